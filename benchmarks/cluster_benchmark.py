@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+"""Compares find_biggest_cluster with the networkx clique search it replaced.
+
+Forts are spread uniformly over a 1.5 km square (about the area of the cells
+around the bot), then over a 300 m square like a lure-dense park. Clusters
+have the default FollowCluster radius of 50 m. The clique search counts
+forts that are pairwise less than 100 m apart, which a 50 m circle does not
+always cover, so it may report a few more points in dense areas.
+networkx is no longer a requirement, the clique search is the same
+Bron-Kerbosch algorithm written out here. It takes a few minutes for 1000
+dense forts.
+Run from the root of the repository:
+
+    python benchmarks/cluster_benchmark.py
+"""
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import numpy as np
+
+from pokemongo_bot.cell_workers.utils import coord2merc, distance, find_biggest_cluster, merc2coord
+
+RADIUS = 50
+SIZES = (50, 200, 1000)
+AREAS = (('spread', 0.0135), ('dense', 0.0027))  # degrees, about 1.5 km and 300 m
+
+
+def find_cliques(graph):
+    # maximal cliques of graph (node -> set of neighbours), Bron-Kerbosch
+    # with the pivot of Tomita et al. like networkx.find_cliques
+    def expand(clique, candidates, excluded):
+        if not candidates and not excluded:
+            yield clique
+            return
+        pivot = max(candidates | excluded, key=lambda node: len(candidates & graph[node]))
+        for node in list(candidates - graph[pivot]):
+            for found in expand(clique + [node], candidates & graph[node], excluded & graph[node]):
+                yield found
+            candidates.remove(node)
+            excluded.add(node)
+
+    if graph:
+        for found in expand([], set(graph), set()):
+            yield found
+
+
+def legacy_find_biggest_cluster(radius, points):
+    # cell_workers.utils.find_biggest_cluster before the disk cover
+    graph = {}
+    for point in points:
+        f = point['latitude'], point['longitude'], 0
+        graph.setdefault(f, set())
+        for node in graph:
+            if node != f and distance(f[0], f[1], node[0], node[1]) <= radius * 2:
+                graph[f].add(node)
+                graph[node].add(f)
+    cliques = list(find_cliques(graph))
+    if len(cliques) > 0:
+        max_clique = max(list(find_cliques(graph)), key=lambda l: (len(l), sum(x[2] for x in l)))
+        merc_clique = [coord2merc(x[0], x[1]) for x in max_clique]
+        clique_x, clique_y = zip(*merc_clique)
+        best_coord = merc2coord((np.mean(clique_x), np.mean(clique_y)))
+        return {'latitude': best_coord[0], 'longitude': best_coord[1], 'num_points': len(max_clique)}
+    return None
+
+
+def forts(count, area, rand):
+    return [{'latitude': 40.7 + rand.uniform(0, area), 'longitude': -74.0 + rand.uniform(0, area)}
+            for _ in range(count)]
+
+
+def timed(func, *args):
+    start = time.time()
+    result = func(*args)
+    return time.time() - start, result
+
+
+def main():
+    rand = random.Random(0)
+    print '{:>7} {:>6} {:>12} {:>15} {:>9} {:>17}'.format(
+        'area', 'forts', 'cliques (s)', 'disk cover (s)', 'speedup', 'points (old/new)')
+    for name, area in AREAS:
+        for size in SIZES:
+            points = forts(size, area, rand)
+            old_time, old = timed(legacy_find_biggest_cluster, RADIUS, points)
+            new_time, new = timed(find_biggest_cluster, RADIUS, points)
+            print '{:>7} {:>6} {:>12.4f} {:>15.4f} {:>8.1f}x {:>13}/{}'.format(
+                name, size, old_time, new_time, old_time / new_time, old['num_points'], new['num_points'])
+
+
+if __name__ == '__main__':
+    main()
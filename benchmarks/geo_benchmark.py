@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+"""Compares pokemongo_bot.geo with the distance / bearing / destination
+functions it replaced.
+
+Run from the root of the repository:
+
+    python benchmarks/geo_benchmark.py
+"""
+
+import math
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import haversine
+from geopy import Point
+from geopy.distance import VincentyDistance
+
+from pokemongo_bot import geo
+
+POINTS = 1000
+
+
+def legacy_distance(lat1, lon1, lat2, lon2):
+    # cell_workers.utils.distance before pokemongo_bot.geo
+    p = 0.017453292519943295
+    a = 0.5 - math.cos((lat2 - lat1) * p) / 2 + math.cos(lat1 * p) * \
+        math.cos(lat2 * p) * (1 - math.cos((lon2 - lon1) * p)) / 2
+    return 12742 * math.asin(math.sqrt(a)) * 1000
+
+
+def legacy_bearing(start_lat, start_lng, dest_lat, dest_lng):
+    # StepWalker._calc_bearing before pokemongo_bot.geo
+    lat1 = math.radians(start_lat)
+    lat2 = math.radians(dest_lat)
+    diffLong = math.radians(dest_lng - start_lng)
+    x = math.sin(diffLong) * math.cos(lat2)
+    y = math.cos(lat1) * math.sin(lat2) - (math.sin(lat1) * math.cos(lat2) * math.cos(diffLong))
+    return (math.degrees(math.atan2(x, y)) + 360) % 360
+
+
+def legacy_destination(lat, lng, bearing, distance):
+    # StepWalker._get_next_pos / Polyline._calc_next_pos before pokemongo_bot.geo
+    lat, lng, _ = VincentyDistance(kilometers=distance * 1e-3).destination(Point(lat, lng), bearing)
+    return lat, lng
+
+
+def bench(label, func, number):
+    best = min(timeit.repeat(func, number=number, repeat=3)) / number
+    print '{:<45} {:>12.2f} us'.format(label, best * 1e6)
+    return best
+
+
+def main():
+    rand = random.Random(0)
+    lat, lng = 40.7, -74.0
+    lats = [lat + rand.uniform(-0.02, 0.02) for _ in range(POINTS)]
+    lngs = [lng + rand.uniform(-0.02, 0.02) for _ in range(POINTS)]
+    bearings = [rand.uniform(0, 360) for _ in range(POINTS)]
+    steps = [rand.uniform(1, 50) for _ in range(POINTS)]
+    pairs = zip(lats, lngs)
+
+    print 'one call'
+    bench('utils.distance (legacy)', lambda: legacy_distance(lat, lng, lats[0], lngs[0]), 20000)
+    bench('haversine.haversine', lambda: haversine.haversine((lat, lng), pairs[0]) * 1000, 20000)
+    bench('geo.distance', lambda: geo.distance(lat, lng, lats[0], lngs[0]), 20000)
+    bench('StepWalker._calc_bearing (legacy)', lambda: legacy_bearing(lat, lng, lats[0], lngs[0]), 20000)
+    bench('geo.bearing', lambda: geo.bearing(lat, lng, lats[0], lngs[0]), 20000)
+    old = bench('VincentyDistance.destination', lambda: legacy_destination(lat, lng, 45.0, 10.0), 5000)
+    new = bench('geo.destination', lambda: geo.destination(lat, lng, 45.0, 10.0), 5000)
+    print '{:<45} {:>12.1f}x'.format('destination speedup', old / new)
+
+    print
+    print '{} points'.format(POINTS)
+    old = bench('utils.distance loop (legacy)',
+                lambda: [legacy_distance(lat, lng, a, b) for a, b in pairs], 50)
+    new = bench('geo.distance arrays', lambda: geo.distance(lat, lng, lats, lngs), 50)
+    print '{:<45} {:>12.1f}x'.format('distance speedup', old / new)
+
+    old = bench('StepWalker._calc_bearing loop (legacy)',
+                lambda: [legacy_bearing(lat, lng, a, b) for a, b in pairs], 50)
+    new = bench('geo.bearing arrays', lambda: geo.bearing(lat, lng, lats, lngs), 50)
+    print '{:<45} {:>12.1f}x'.format('bearing speedup', old / new)
+
+    old = bench('VincentyDistance.destination loop (legacy)',
+                lambda: [legacy_destination(a, b, c, d) for a, b, c, d in zip(lats, lngs, bearings, steps)], 5)
+    new = bench('geo.destination arrays', lambda: geo.destination(lats, lngs, bearings, steps), 5)
+    print '{:<45} {:>12.1f}x'.format('destination speedup', old / new)
+
+
+if __name__ == '__main__':
+    main()
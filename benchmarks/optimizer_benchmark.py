@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+"""Compares the keep rule scoring of PokemonOptimizer with the one it replaced.
+
+A synthetic bag of pokemons is grouped by family and every family goes
+through the default "keep" rules of the optimizer, the way work() does
+in "by_family" mode. The old code called get_score() for each pokemon
+to sort each family and again to select in it, KeepRule scores all the
+families of a rule in one go with numpy. Not measured: work() does not
+score again the families which did not change since its previous run.
+Run from the root of the repository:
+
+    python benchmarks/optimizer_benchmark.py
+"""
+
+import math
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from pokemon_benchmark import synthetic_bag, timed
+from pokemongo_bot.cell_workers.pokemon_optimizer import KeepRule, PokemonOptimizer
+from pokemongo_bot.inventory import ChargedAttacks, FastAttacks, Pokemon, Pokemons
+
+BAG_SIZES = (250, 1000, 3000)
+RULES = [{"mode": "by_family", "top": 1, "sort": [{"iv": 0.9}], "evolve": True, "upgrade": False},
+         {"mode": "by_family", "top": 1, "sort": [{"ncp": 0.9}], "evolve": True, "upgrade": False},
+         {"mode": "by_family", "top": 1, "sort": ["cp"], "evolve": False, "upgrade": False},
+         {"mode": "by_family", "top": 3, "sort": [{"iv": 0.9}, {"ncp": 0.9}], "evolve": True, "upgrade": True}]
+
+
+# PokemonOptimizer before KeepRule
+def legacy_get_score(pokemon, rule):
+    score = []
+    may_try_evolve = (getattr(pokemon, "has_next_evolution", False) and
+                      pokemon.has_next_evolution() and
+                      rule.get("evolve", True))
+    may_try_upgrade = rule.get("upgrade", False)
+
+    for a in rule.get("sort", []):
+        if (type(a) is str) or (type(a) is unicode):
+            value = getattr(pokemon, a, 0)
+            score.append(value)
+        elif type(a) is dict:
+            value = getattr(pokemon, a.keys()[0], 0)
+            score.append(value)
+            may_try_evolve &= (value >= a.values()[0])
+            may_try_upgrade &= (value >= a.values()[0])
+
+    return tuple(score), may_try_evolve, may_try_upgrade
+
+
+def legacy_get_best_pokemon_for_rule(pokemon_list, rule):
+    sorted_pokemon = sorted(pokemon_list, key=lambda p: legacy_get_score(p, rule)[0], reverse=True)
+    index = int(math.ceil(max(rule.get("top", 0), 0))) - 1
+    worst = sorted_pokemon[index] if 0 <= index < len(sorted_pokemon) else sorted_pokemon[-1]
+
+    min_score = legacy_get_score(worst, rule)[0]
+    scored_list = [(p, legacy_get_score(p, rule)) for p in sorted_pokemon]
+    best = [x for x in scored_list if x[1][0] >= min_score]
+    try_evolve = [x[0] for x in best if x[1][1] is True]
+    try_upgrade = [x[0] for x in best if x[1][1] is False and x[1][2] is True]
+    return try_evolve, try_upgrade, [x[0] for x in best]
+
+
+def families(bag):
+    by_family = {}
+    for pokemon in bag:
+        by_family.setdefault(pokemon.first_evolution_id, []).append(pokemon)
+    return by_family.values()
+
+
+def main():
+    FastAttacks(), ChargedAttacks(), Pokemons()
+    keep_rules = [KeepRule(rule) for rule in RULES]
+    # get_best_of_ranking() doesn't use the task configuration
+    optimizer = PokemonOptimizer.__new__(PokemonOptimizer)
+
+    print '{:>10} {:>12} {:>12}'.format('pokemons', 'get_score', 'KeepRule')
+    for size in BAG_SIZES:
+        groups = families([Pokemon(data) for data in synthetic_bag(size, random.Random(size))])
+
+        # the lazy attributes of the pokemons (iv, ncp, ...) are computed
+        # before, a bag stays in memory between two runs of the optimizer
+        [legacy_get_best_pokemon_for_rule(group, rule) for rule in RULES for group in groups]
+        old_time, old = timed(lambda: [legacy_get_best_pokemon_for_rule(group, rule)
+                                       for rule in RULES for group in groups])
+        new_time, new = timed(lambda: [optimizer.get_best_of_ranking(ranking, rule)
+                                       for rule in keep_rules for ranking in rule.rank_groups(groups)])
+        assert [keep for _, _, keep in old] == [keep for _, _, keep in new]
+
+        print '{:>10} {:>12.4f} {:>12.4f}'.format(size, old_time, new_time)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+"""Compares inventory.Pokemon with the dict based class it replaced.
+
+A synthetic bag of 1000 pokemons of random species, levels, IVs and
+movesets is parsed with both classes. Memory is the size of what each
+pokemon keeps for itself (the instance, its fields and the server data it
+holds on to), species and attacks shared by every pokemon are not counted.
+The old class computed IV CP perfection, exact CP and moveset in its
+constructor, the time to read them is given for the new one. Scoring is
+the IV CP perfection and exact CP of the whole bag, one pokemon at a time
+with the old formulas, in one CpTable.score() call with the new class.
+The Pokemons component also keeps a fingerprint of each server item to
+spot unchanged ones on refresh, its size is given for the bag.
+Run from the root of the repository:
+
+    python benchmarks/pokemon_benchmark.py
+"""
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from pokemongo_bot.inventory import (Attack, ChargedAttacks, CpTable, FastAttacks, LevelToCPm, Moveset,
+                                     Pokemon, PokemonInfo, Pokemons, _calc_cp)
+
+BAG_SIZE = 1000
+SHARED = (PokemonInfo, Attack, Moveset)
+
+
+class LegacyPokemon(object):
+    # inventory.Pokemon before __slots__, computations as in its constructor
+    def __init__(self, data):
+        self._data = data
+        self.unique_id = data.get('id', 0)
+        self.pokemon_id = data['pokemon_id']
+        self.static = Pokemons.data_for(self.pokemon_id)
+        self.cp = data['cp']
+        self.cp_bm = data['cp_multiplier']
+        self.cp_am = data.get('additional_cp_multiplier', .0)
+        self.cp_m = self.cp_bm + self.cp_am
+        self.level = LevelToCPm.level_from_cpm(self.cp_m)
+        if 'level' not in self._data:
+            self._data['level'] = self.level
+        self.hp_max = data['stamina_max']
+        self.hp = data.get('stamina', self.hp_max)
+        self.iv_attack = data.get('individual_attack', 0)
+        self.iv_defense = data.get('individual_defense', 0)
+        self.iv_stamina = data.get('individual_stamina', 0)
+        self.name = self.static.name
+        self.nickname_raw = data.get('nickname', '')
+        self.nickname = self.nickname_raw or self.name
+        self.in_fort = 'deployed_fort_id' in data
+        self.is_favorite = data.get('favorite', 0) is 1
+        self.fast_attack = FastAttacks.data_for(data['move_1'])
+        self.charged_attack = ChargedAttacks.data_for(data['move_2'])
+        self.iv = Pokemon._compute_iv_perfection.im_func(self)
+        self.ivcp = self._compute_cp_perfection()
+        self.cp_exact = self._compute_cp_exact()
+        self.cp_percent = self.cp_exact / self.static.max_cp
+        self.moveset = Pokemon._get_moveset.im_func(self)
+
+    def _compute_cp_exact(self):
+        return _calc_cp(
+            self.static.base_attack, self.static.base_defense, self.static.base_stamina,
+            self.iv_attack, self.iv_defense, self.iv_stamina, self.cp_m)
+
+    def _compute_cp_perfection(self):
+        variants = []
+        cp_m = LevelToCPm.MAX_CPM
+        for pokemon_id in self.static.last_evolution_ids:
+            poke_info = Pokemons.data_for(pokemon_id)
+            base_attack = poke_info.base_attack
+            base_defense = poke_info.base_defense
+            base_stamina = poke_info.base_stamina
+            worst_cp = _calc_cp(base_attack, base_defense, base_stamina, 0, 0, 0, cp_m)
+            perfect_cp = _calc_cp(base_attack, base_defense, base_stamina, cp_multiplier=cp_m)
+            current_cp = _calc_cp(base_attack, base_defense, base_stamina,
+                                  self.iv_attack, self.iv_defense, self.iv_stamina, cp_m)
+            variants.append((current_cp - worst_cp) / (perfect_cp - worst_cp))
+        return max(variants)
+
+
+def synthetic_bag(size, rand):
+    bag = []
+    levels = sorted(LevelToCPm.STATIC_DATA.items(), key=lambda level: float(level[0]))
+    for i in xrange(size):
+        info = rand.choice(Pokemons.STATIC_DATA)
+        moveset = rand.choice(info.movesets)
+        cp_multiplier = rand.choice(levels[:60])[1]
+        ivs = [rand.randint(0, 15) for _ in range(3)]
+        cp = _calc_cp(info.base_attack, info.base_defense, info.base_stamina,
+                      ivs[0], ivs[1], ivs[2], cp_multiplier)
+        bag.append({
+            'id': 10 ** 15 + i, 'pokemon_id': info.id, 'cp': max(int(cp), 10),
+            'cp_multiplier': cp_multiplier,
+            'stamina_max': max(int((info.base_stamina + ivs[2]) * cp_multiplier), 10),
+            'individual_attack': ivs[0], 'individual_defense': ivs[1], 'individual_stamina': ivs[2],
+            'move_1': moveset.fast_attack.id, 'move_2': moveset.charged_attack.id,
+            'creation_time_ms': 1470000000000 + i, 'height_m': rand.uniform(0.2, 2),
+            'weight_kg': rand.uniform(1, 100), 'pokeball': 1, 'captured_cell_id': 6108423709528162304,
+            'origin': 0, 'battles_attacked': 0, 'num_upgrades': 0, 'owner_name': '', 'from_fort': 0
+        })
+    return bag
+
+
+def own_size(obj, seen):
+    # size of obj and everything it references, but the shared static data
+    if id(obj) in seen or isinstance(obj, SHARED) or isinstance(obj, type):
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(own_size(k, seen) + own_size(v, seen) for k, v in obj.iteritems())
+    elif isinstance(obj, (list, tuple)):
+        size += sum(own_size(v, seen) for v in obj)
+    elif hasattr(obj, '__dict__'):
+        size += own_size(obj.__dict__, seen)
+    elif hasattr(obj, '__slots__'):
+        size += sum(own_size(getattr(obj, slot, None), seen) for slot in obj.__slots__)
+    return size
+
+
+def timed(func):
+    start = time.time()
+    result = func()
+    return time.time() - start, result
+
+
+def main():
+    FastAttacks(), ChargedAttacks(), Pokemons()
+    bag = synthetic_bag(BAG_SIZE, random.Random(0))
+
+    old_time, old = timed(lambda: [LegacyPokemon(dict(data)) for data in bag])
+    new_time, new = timed(lambda: [Pokemon(dict(data)) for data in bag])
+    old_score_time, _ = timed(lambda: [(p._compute_cp_perfection(), p._compute_cp_exact()) for p in old])
+    new_score_time, _ = timed(lambda: CpTable.score(new))
+    read_time, _ = timed(lambda: [(p.ivcp, p.cp_percent, p.moveset, p.level) for p in new])
+    # the server data is dropped by the new class, what is measured for it
+    # is only what it keeps
+    old_size = own_size(old, set())
+    new_size = own_size(new, set())
+
+    pokemons = Pokemons()
+    pokemons.refresh([{'inventory_item_data': {'pokemon_data': dict(data)}} for data in bag])
+    fingerprints_size = own_size(pokemons._raw, set())
+
+    print '{} pokemons'.format(BAG_SIZE)
+    print '{:>28} {:>10} {:>10}'.format('', 'dict', 'slots')
+    print '{:>28} {:>10.4f} {:>10.4f}'.format('construction (s)', old_time, new_time)
+    print '{:>28} {:>10} {:>10.4f}'.format('first read of ivcp, ... (s)', '-', read_time)
+    print '{:>28} {:>10.4f} {:>10.4f}'.format('scoring the bag (s)', old_score_time, new_score_time)
+    print '{:>28} {:>10} {:>10}'.format('memory (KiB)', old_size / 1024, new_size / 1024)
+    print '{:>28} {:>10} {:>10}'.format('fingerprints (KiB)', '-', fingerprints_size / 1024)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,177 @@
+# -*- coding: utf-8 -*-
+"""Compares Polyline walking with the step by step code it replaced.
+
+A synthetic winding route of a few kilometers, with a point every 15 m
+like the decoded Google Directions polylines and 512 elevation samples
+(the most the Elevation API returns), is walked from end to end at
+2.5 m per call of get_pos() and get_alt(), the way PolylineWalker moves
+the bot. The old class walked the steps one by one from its last position
+and recomputed the total distance at each call, the new one bisects the
+cumulative distances. get_alt() used to compare the position with every
+elevation sample, it now searches a KDTree of them; 1000 lookups are timed
+on their own, as is the removal of the duplicated points of a decoded
+route. Run from the root of the repository:
+
+    python benchmarks/polyline_benchmark.py
+"""
+
+import math
+import os
+import random
+import sys
+import time
+from itertools import chain
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from pokemongo_bot import geo
+from pokemongo_bot.walkers.polyline_generator import Polyline
+
+ROUTE_LENGTHS = (2000, 5000, 10000)
+POINT_SPACING = 15.0
+ELEVATION_SAMPLES = 512
+SPEED = 2.5
+
+
+class LegacyPolyline(Polyline):
+    # Polyline before the cumulative distances
+    def _init_steps(self):
+        self._last_pos = self._points[0]
+        self._step_dict = self._get_steps_dict()
+        self._step_keys = sorted(self._step_dict.keys())
+        self._last_step = 0
+
+    def _get_walk_steps(self):
+        if self._points:
+            steps = zip(chain([self._points[0]], self._points),
+                        chain(self._points, [self._points[-1]]))
+            steps = filter(None, [(o, d) if o != d else None for o, d in steps])
+            return list(steps)
+        else:
+            return []
+
+    def _get_steps_dict(self):
+        walked_distance = 0.0
+        steps_dict = {}
+        for step in self._get_walk_steps():
+            (o_lat, o_lng), (d_lat, d_lng) = step
+            walked_distance += geo.distance(o_lat, o_lng, d_lat, d_lng)
+            steps_dict[walked_distance] = step
+        return steps_dict
+
+    def get_alt(self):
+        closest_sample = None
+        best_distance = float("inf")
+        for point in self._elevation_at_point.keys():
+            local_distance = geo.distance(self._last_pos[0], self._last_pos[1], point[0], point[1])
+            if local_distance < best_distance:
+                closest_sample = point
+                best_distance = local_distance
+        if closest_sample in self._elevation_at_point:
+            return self._elevation_at_point[closest_sample]
+        else:
+            return None
+
+    def get_pos(self):
+        if self.speed > self.get_total_distance():
+            self._last_pos = self.destination
+            self._last_step = len(self._step_keys)-1
+        if self.get_last_pos() == self.destination:
+            return self.get_last_pos()
+        distance = self.speed
+        origin = self._last_pos
+        ((so_lat, so_lng), (sd_lat, sd_lng)) = self._step_dict[self._step_keys[self._last_step]]
+        bearing = geo.bearing(so_lat, so_lng, sd_lat, sd_lng)
+        while geo.distance(self._last_pos[0], self._last_pos[1], sd_lat, sd_lng) < distance:
+            distance -= geo.distance(self._last_pos[0], self._last_pos[1], sd_lat, sd_lng)
+            self._last_pos = (sd_lat, sd_lng)
+            if self._last_step < len(self._step_keys)-1:
+                self._last_step += 1
+                ((so_lat, so_lng), (sd_lat, sd_lng)) = self._step_dict[self._step_keys[self._last_step]]
+                bearing = geo.bearing(so_lat, so_lng, sd_lat, sd_lng)
+                origin = (so_lat, so_lng)
+                lat, lng = geo.destination(origin[0], origin[1], bearing, distance)
+                if geo.distance(self._last_pos[0], self._last_pos[1], lat, lng) < distance:
+                    distance -= geo.distance(self._last_pos[0], self._last_pos[1], lat, lng)
+                    self._last_pos = (lat, lng)
+            else:
+                return self.get_last_pos()
+        else:
+            lat, lng = geo.destination(origin[0], origin[1], self._calc_bearing(so_lat, so_lng, sd_lat, sd_lng), distance)
+            self._last_pos = (lat, lng)
+            return self.get_last_pos()
+
+    def get_total_distance(self):
+        steps = self._get_walk_steps()
+        if not steps:
+            return 0.0
+        (o_lats, o_lngs), (d_lats, d_lngs) = [zip(*points) for points in zip(*steps)]
+        return math.ceil(geo.distance(o_lats, o_lngs, d_lats, d_lngs).sum())
+
+    def _calc_bearing(self, start_lat, start_lng, dest_lat, dest_lng):
+        return geo.bearing(start_lat, start_lng, dest_lat, dest_lng)
+
+
+def legacy_dedupe(points):
+    return [x for n, x in enumerate(points) if x not in points[:n]]
+
+
+def new_dedupe(points):
+    seen = set()
+    return [x for x in points if not (x in seen or seen.add(x))]
+
+
+def winding_route(length, rng):
+    points = [(47.1700, 8.5100)]
+    bearing = 45.0
+    for _ in range(int(length / POINT_SPACING)):
+        bearing += rng.uniform(-30, 30)
+        points.append(tuple(round(v, 5) for v in geo.destination(points[-1][0], points[-1][1], bearing, POINT_SPACING)))
+    step = max(len(points) // ELEVATION_SAMPLES, 1)
+    elevations = dict((p, 400 + rng.random() * 20) for p in points[::step])
+    return points, elevations
+
+
+def lookups(polyline, positions):
+    start = time.time()
+    for polyline._last_pos in positions:
+        polyline.get_alt()
+    return time.time() - start
+
+
+def walk(polyline):
+    start = time.time()
+    walked = 0
+    while polyline.get_last_pos() != polyline.destination and walked < 100000:
+        polyline.get_pos()
+        polyline.get_alt()
+        walked += 1
+    return time.time() - start, walked
+
+
+def main():
+    print '{:>10} {:>8} {:>14} {:>14} {:>14} {:>14} {:>14} {:>14}'.format(
+        'meters', 'moves', 'walk (legacy)', 'walk', 'alt legacy', 'alt', 'dedupe legacy', 'dedupe')
+    for length in ROUTE_LENGTHS:
+        points, elevations = winding_route(length, random.Random(length))
+        old_time, old_moves = walk(LegacyPolyline.from_points(points, SPEED, elevations))
+        new_time, new_moves = walk(Polyline.from_points(points, SPEED, elevations))
+
+        positions = [points[i % len(points)] for i in range(0, 1000 * 7, 7)]
+        old_alt = lookups(LegacyPolyline.from_points(points, SPEED, elevations), positions)
+        new_alt = lookups(Polyline.from_points(points, SPEED, elevations), positions)
+
+        decoded = points + points[::7]
+        start = time.time()
+        assert legacy_dedupe(decoded) == points
+        old_dedupe = time.time() - start
+        start = time.time()
+        assert new_dedupe(decoded) == points
+        new_dedupe_time = time.time() - start
+
+        print '{:>10} {:>8} {:>14.3f} {:>14.3f} {:>14.3f} {:>14.3f} {:>14.4f} {:>14.4f}'.format(
+            length, new_moves, old_time, new_time, old_alt, new_alt, old_dedupe, new_dedupe_time)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+"""Measures the walking routes per second of the local road graph.
+
+PolylineWalker used to get every route from the Google Directions and
+Elevation APIs, two HTTP round trips (a few hundred ms) counted against
+the API quota. This times RoadGraph.route() on a synthetic town: a grid
+of streets 80 m apart with a tenth of the blocks missing, saved to a
+temporary file and memory mapped as the bot does. Routes go between
+random points a few hundred meters to 2 km apart, the walks of the bot.
+Plain Dijkstra (A* without the haversine heuristic) is timed as well to
+show what the heuristic saves. Run from the root of the repository:
+
+    python benchmarks/routing_benchmark.py
+"""
+
+import heapq
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from pokemon_benchmark import timed
+from pokemongo_bot.walkers.road_graph import RoadGraph
+
+GRID_SIZES = (50, 150, 300)
+ROUTES = 200
+# degrees, about 80 m of latitude
+SPACING = 0.0007
+ORIGIN = (47.1700, 8.5100)
+
+
+def town(size, rng):
+    lats = [ORIGIN[0] + SPACING * (n // size) for n in range(size * size)]
+    lngs = [ORIGIN[1] + SPACING * (n % size) for n in range(size * size)]
+    edges = []
+
+    for n in range(size * size):
+        if (n + 1) % size and rng.random() > 0.1:
+            edges.append((n, n + 1))
+        if n + size < size * size and rng.random() > 0.1:
+            edges.append((n, n + size))
+
+    return RoadGraph.from_edges(lats, lngs, edges)
+
+
+def trips(size, rng):
+    span = min(size - 1, 25)
+    points = []
+
+    for _ in range(ROUTES):
+        # grid coordinates of both ends, the destination stays in the town
+        row, column = rng.uniform(0, size - 1), rng.uniform(0, size - 1)
+        to_row = min(max(row + rng.uniform(-span, span), 0), size - 1)
+        to_column = min(max(column + rng.uniform(-span, span), 0), size - 1)
+        points.append(((ORIGIN[0] + row * SPACING, ORIGIN[1] + column * SPACING),
+                       (ORIGIN[0] + to_row * SPACING, ORIGIN[1] + to_column * SPACING)))
+
+    return points
+
+
+def dijkstra(graph, start, goal):
+    distances = {start: 0.0}
+    done = set()
+    heap = [(0.0, start)]
+
+    while heap:
+        walked, node = heapq.heappop(heap)
+        if node == goal:
+            return walked
+        if node in done:
+            continue
+        done.add(node)
+
+        first, last = graph.offsets.item(node), graph.offsets.item(node + 1)
+        for target, length in zip(graph.targets[first:last].tolist(), graph.lengths[first:last].tolist()):
+            if walked + length < distances.get(target, float('inf')):
+                distances[target] = walked + length
+                heapq.heappush(heap, (walked + length, target))
+
+    return None
+
+
+def main():
+    directory = tempfile.mkdtemp()
+
+    try:
+        print '{:>8} {:>12} {:>12} {:>14} {:>10}'.format('nodes', 'open (ms)', 'nearest (us)', 'A* routes/s', 'Dijkstra')
+        for size in GRID_SIZES:
+            rng = random.Random(size)
+            path = os.path.join(directory, 'town.graph')
+            town(size, rng).save(path)
+
+            start = time.time()
+            graph = RoadGraph.load(path)
+            open_time = time.time() - start
+
+            points = trips(size, rng)
+            ends = [(graph.nearest_node(*o)[0], graph.nearest_node(*d)[0]) for o, d in points]
+
+            nearest_time, _ = timed(lambda: [graph.nearest_node(*o) for o, _ in points])
+            astar_time, routes = timed(lambda: [graph.route(o, d) for o, d in points])
+            dijkstra_time, lengths = timed(lambda: [dijkstra(graph, s, g) for s, g in ends])
+            # a few points are on streets cut from the rest of the town
+            assert [route is None for route in routes] == [length is None for length in lengths]
+
+            print '{:>8} {:>12.2f} {:>12.1f} {:>14.0f} {:>10.0f}'.format(
+                len(graph), open_time * 1000, nearest_time / ROUTES * 1e6, ROUTES / astar_time, ROUTES / dijkstra_time)
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    main()
@@ -42,11 +42,12 @@ from getpass import getpass
 from pgoapi.exceptions import NotLoggedInException, ServerSideRequestThrottlingException, ServerBusyOrOfflineException, NoPlayerPositionSetException
 from geopy.exc import GeocoderQuotaExceeded
 
-from pokemongo_bot import PokemonGoBot, TreeConfigBuilder
+from pokemongo_bot import PokemonGoBot, TreeConfigBuilder, clock
 from pokemongo_bot.base_dir import _base_dir
 from pokemongo_bot.health_record import BotEvent
 from pokemongo_bot.plugin_loader import PluginLoader
 from pokemongo_bot.api_wrapper import PermaBannedException
+from pokemongo_bot.traffic_log import ReplayServer
 
 try:
     from demjson import jsonlint
@@ -96,6 +97,13 @@ def main():
     def initialize(config):
         from pokemongo_bot.datastore import Datastore
 
+        if config.api_traffic_replay:
+            # replayed responses expect the time they were recorded at
+            clock.set_clock(clock.VirtualClock(start=ReplayServer.start_time_of(config.api_traffic_replay)))
+        elif config.simulator_enabled:
+            # nothing to wait for against the local server, time only moves when the bot sleeps
+            clock.set_clock(clock.VirtualClock())
+
         ds = Datastore(conn_str='/data/{}.db'.format(config.username))
         for directory in ['pokemongo_bot', 'pokemongo_bot/cell_workers']:
             ds.migrate(directory + '/migrations')
@@ -104,6 +112,12 @@ def main():
 
         return bot
 
+    def stop_recording(bot):
+        # a new bot records to the log with its own file
+        recorder = getattr(getattr(bot, 'api', None), 'recorder', None)
+        if recorder is not None:
+            recorder.close()
+
     def start_bot(bot, config):
         bot.start()
         initialize_task(bot, config)
@@ -145,6 +159,7 @@ def main():
 
         while not finished:
             try:
+                stop_recording(bot)
                 bot = initialize(config)
                 bot = start_bot(bot, config)
                 config_changed = check_mod(config_file)
@@ -165,6 +180,7 @@ def main():
                         if config.live_config_update_tasks_only:
                             initialize_task(bot, config)
                         else:
+                            stop_recording(bot)
                             bot = initialize(config)
                             bot = start_bot(bot, config)
 
@@ -241,6 +257,7 @@ def main():
     finally:
         # Cache here on SIGTERM, or Exception.  Check data is available and worth caching.
         if bot:
+            stop_recording(bot)
             if len(bot.recent_forts) > 0 and bot.recent_forts[-1] is not None and bot.config.forts_cache_recent_forts:
                 cached_forts_path = os.path.join(
                     _base_dir, 'data', 'recent-forts-%s.json' % bot.config.username
@@ -535,6 +552,30 @@ def init_config():
         type=float,
         default=5.0
     )
+    add_config(
+        parser,
+        load,
+        long_flag="--web_update_interval",
+        help="Minimum amount of seconds between two writes of the location files used by the web UI",
+        type=float,
+        default=2.0
+    )
+    add_config(
+        parser,
+        load,
+        long_flag="--api_rate_limit.rate",
+        help="Sustained number of requests per second sent to the server",
+        type=float,
+        default=2.0
+    )
+    add_config(
+        parser,
+        load,
+        long_flag="--api_rate_limit.burst",
+        help="Number of requests that can be sent at once before being limited by api_rate_limit.rate",
+        type=int,
+        default=5
+    )
     add_config(
         parser,
         load,
@@ -664,6 +705,54 @@ def init_config():
          type=bool,
          default=False
     )
+    add_config(
+         parser,
+         load,
+         long_flag="--road_graph",
+         help="Road graph file used by PolylineWalker to compute walking routes locally instead of asking Google",
+         type=str,
+         default=None
+    )
+    add_config(
+         parser,
+         load,
+         long_flag="--route_cache_size",
+         help="Number of PolylineWalker routes kept in data/routes-<username>.json, 0 disables the cache",
+         type=int,
+         default=100
+    )
+    add_config(
+         parser,
+         load,
+         long_flag="--simulator.enabled",
+         help="Play against a local simulation of the game servers instead of the real ones, on a virtual clock",
+         type=bool,
+         default=False
+    )
+    add_config(
+         parser,
+         load,
+         long_flag="--simulator.seed",
+         help="Seed of the simulated world (forts, spawns, catch rolls...), the same seed plays the same way",
+         type=int,
+         default=0
+    )
+    add_config(
+         parser,
+         load,
+         long_flag="--api_traffic.record",
+         help="Log file every request sent and response received is appended to (compressed if it ends with .gz)",
+         type=str,
+         default=None
+    )
+    add_config(
+         parser,
+         load,
+         long_flag="--api_traffic.replay",
+         help="Log file recorded with api_traffic.record to replay instead of talking to the servers, on a virtual clock",
+         type=str,
+         default=None
+    )
 
     # Start to parse other attrs
     config = parser.parse_args()
@@ -685,11 +774,25 @@ def init_config():
     config.live_config_update_enabled = config.live_config_update.get('enabled', False)
     config.live_config_update_tasks_only = config.live_config_update.get('tasks_only', False)
     config.logging = load.get('logging', {})
+    config.api_rate_limit_weights = load.get('api_rate_limit', {}).get('weights', {})
+    config.api_cache = load.get('api_cache', {})
 
     if config.map_object_cache_time < 0.0:
         parser.error("--map_object_cache_time is out of range! (should be >= 0.0)")
         return None
 
+    if config.web_update_interval < 0.0:
+        parser.error("--web_update_interval is out of range! (should be >= 0.0)")
+        return None
+
+    if config.route_cache_size < 0:
+        parser.error("--route_cache_size is out of range! (should be >= 0)")
+        return None
+
+    if config.api_traffic_replay and not os.path.isfile(config.api_traffic_replay):
+        parser.error("--api_traffic.replay file not found! ({})".format(config.api_traffic_replay))
+        return None
+
     if len(config.raw_tasks) == 0:
         logging.error("No tasks are configured. Did you mean to configure some behaviors? Read https://github.com/PokemonGoF/PokemonGo-Bot/wiki/Configuration-files#configuring-tasks for more information")
         return None
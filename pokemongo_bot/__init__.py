@@ -20,7 +20,9 @@ from pgoapi import PGoApi
 from pgoapi.utilities import f2i, get_cell_ids
 
 import cell_workers
+import clock
 from base_task import BaseTask
+from cell_store import CellStore
 from plugin_loader import PluginLoader
 from api_wrapper import ApiWrapper
 from cell_workers.utils import distance
@@ -28,7 +30,12 @@ from event_manager import EventManager
 from human_behaviour import sleep
 from item_list import Item
 from metrics import Metrics
+from simulator import LocalServer
 from sleep_schedule import SleepSchedule
+from spatial_index import SpatialIndex
+from traffic_log import ReplayServer
+import static_data
+from web_location_writer import WebLocationWriter
 from pokemongo_bot.event_handlers import LoggingHandler, SocketIoHandler, ColoredLoggingHandler, SocialHandler
 from pokemongo_bot.socketio_server.runner import SocketIoRunner
 from pokemongo_bot.websocket_remote_control import WebsocketRemoteControl
@@ -83,10 +90,8 @@ class PokemonGoBot(object):
         super(PokemonGoBot, self).__init__()
 
         self.fort_timeouts = dict()
-        self.pokemon_list = json.load(
-            open(os.path.join(_base_dir, 'data', 'pokemon.json'))
-        )
-        self.item_list = json.load(open(os.path.join(_base_dir, 'data', 'items.json')))
+        self.pokemon_list = static_data.load_json(os.path.join(_base_dir, 'data', 'pokemon.json'))
+        self.item_list = static_data.load_json(os.path.join(_base_dir, 'data', 'items.json'))
         # @var Metrics
         self.metrics = Metrics(self)
         self.latest_inventory = None
@@ -97,6 +102,12 @@ class PokemonGoBot(object):
         self.start_position = None
         self.last_map_object = None
         self.last_time_map_object = 0
+        self.cell_store = CellStore()
+        # pokestops of self.cell, gyms have no type
+        self.fort_index = SpatialIndex(accept=lambda fort: 'type' in fort)
+        self._meta_cell_key = None
+        # cells of the last tick, written to the web location files
+        self._close_cells = None
         self.logger = logging.getLogger(type(self).__name__)
         self.alt = self.config.gps_default_altitude
 
@@ -104,6 +115,8 @@ class PokemonGoBot(object):
         self.workers = []
 
         # Theading setup for file writing
+        self.web_location_writer = WebLocationWriter(
+            _base_dir, self.config.username, self.config.web_update_interval)
         self.web_update_queue = Queue.Queue(maxsize=1)
         self.web_update_thread = threading.Thread(target=self.update_web_location_worker)
         self.web_update_thread.start()
@@ -111,7 +124,8 @@ class PokemonGoBot(object):
         # Heartbeat limiting
         self.heartbeat_threshold = self.config.heartbeat_threshold
         self.heartbeat_counter = 0
-        self.last_heartbeat = time.time()
+        self.last_heartbeat = clock.time()
+        self._heartbeat_requests = None
 
         self.capture_locked = False  # lock catching while moving to VIP pokemon
 
@@ -662,12 +676,19 @@ class PokemonGoBot(object):
 
     def tick(self):
         self.health_record.heartbeat()
+        heartbeat_due = self._heartbeat_due()
+        if heartbeat_due:
+            # sent in the same envelope as the map objects
+            self._queue_heartbeat()
         self.cell = self.get_meta_cell()
+        self.fort_index.update(self.cell["forts"])
+        if heartbeat_due:
+            self.heartbeat()
 
         if self.sleep_schedule:
             self.sleep_schedule.work()
 
-        now = time.time() * 1000
+        now = clock.time() * 1000
 
         for fort in self.cell["forts"]:
             timeout = fort.get("cooldown_complete_timestamp_ms", 0)
@@ -688,6 +709,14 @@ class PokemonGoBot(object):
         location = self.position[0:2]
         cells = self.find_close_cells(*location)
 
+        # nothing changed since the last tick, keep the same lists so the
+        # fort index is not rebuilt
+        key = (self.cell_store.version, frozenset(cell.get('s2_cell_id') for cell in cells))
+        self._close_cells = (key, cells)
+        if self.cell and key == self._meta_cell_key:
+            return self.cell
+        self._meta_cell_key = key
+
         # Combine all cells into a single dict of the items we care about.
         forts = []
         wild_pokemons = []
@@ -729,40 +758,21 @@ class PokemonGoBot(object):
         if self.api.teleporting:
             return
 
+        cells_key = None
         if cells == []:
-            location = self.position[0:2]
-            cells = self.find_close_cells(*location)
-
-        user_data_cells = os.path.join(_base_dir, 'data', 'cells-%s.json' % self.config.username)
-        try:
-            with open(user_data_cells, 'w') as outfile:
-                json.dump(cells, outfile)
-        except IOError as e:
-            self.logger.info('[x] Error while opening location file: %s' % e)
+            if self._close_cells is not None:
+                # reuse the cells of the last tick instead of asking again
+                cells_key, cells = self._close_cells
+            else:
+                location = self.position[0:2]
+                cells = self.find_close_cells(*location)
 
-        user_web_location = os.path.join(
-            _base_dir, 'web', 'location-%s.json' % self.config.username
-        )
         # alt is unused atm but makes using *location easier
         try:
-            with open(user_web_location, 'w') as outfile:
-                json.dump({
-                    'lat': lat,
-                    'lng': lng,
-                    'alt': alt,
-                    'cells': cells
-                }, outfile)
-        except IOError as e:
+            self.web_location_writer.write(lat, lng, alt, cells, self.start_position, cells_key=cells_key)
+        except (IOError, OSError) as e:
             self.logger.info('[x] Error while opening location file: %s' % e)
 
-        user_data_lastlocation = os.path.join(
-            _base_dir, 'data', 'last-location-%s.json' % self.config.username
-        )
-        try:
-            with open(user_data_lastlocation, 'w') as outfile:
-                json.dump({'lat': lat, 'lng': lng, 'alt': alt, 'start_position': self.start_position}, outfile)
-        except IOError as e:
-            self.logger.info('[x] Error while opening location file: %s' % e)
     def emit_forts_event(self,response_dict):
         map_objects = response_dict.get(
             'responses', {}
@@ -786,24 +796,18 @@ class PokemonGoBot(object):
 
     def find_close_cells(self, lat, lng):
         cellid = get_cell_ids(lat, lng)
-        timestamp = [0, ] * len(cellid)
-        response_dict = self.get_map_objects(lat, lng, timestamp, cellid)
-        map_objects = response_dict.get(
-            'responses', {}
-        ).get('GET_MAP_OBJECTS', {})
-        status = map_objects.get('status', None)
-
-        map_cells = []
-        if status and status == 1:
-            map_cells = map_objects['map_cells']
-            position = (lat, lng, 0)
-            map_cells.sort(
-                key=lambda x: distance(
-                    lat,
-                    lng,
-                    x['forts'][0]['latitude'],
-                    x['forts'][0]['longitude']) if x.get('forts', []) else 1e6
-            )
+        # only ask for what changed since the last response of each cell
+        timestamp = self.cell_store.timestamps(cellid)
+        self.get_map_objects(lat, lng, timestamp, cellid)
+
+        map_cells = self.cell_store.cells(cellid)
+        map_cells.sort(
+            key=lambda x: distance(
+                lat,
+                lng,
+                x['forts'][0]['latitude'],
+                x['forts'][0]['longitude']) if x.get('forts', []) else 1e6
+        )
         return map_cells
 
     def _setup_logging(self):
@@ -858,10 +862,13 @@ class PokemonGoBot(object):
                     level='info',
                     formatted='Session stale, re-logging in.'
                 )
-                self.api = ApiWrapper(config=self.config)
+                # keep the request budget of the account across sessions
+                self.api = ApiWrapper(config=self.config, rate_limiter=self.api.rate_limiter,
+                                      server=self.api.server, recorder=self.api.recorder)
                 self.api.set_position(*position)
                 self.login()
-                self.api.activate_signature(self.get_encryption_lib())
+                if self.api.server is None:
+                    self.api.activate_signature(self.get_encryption_lib())
 
     @staticmethod
     def is_numeric(s):
@@ -892,7 +899,7 @@ class PokemonGoBot(object):
                 level='info',
                 formatted="Login error, server busy. Waiting 10 seconds to try again."
             )
-            time.sleep(10)
+            clock.sleep(10)
 
         with self.database as conn:
             c = conn.cursor()
@@ -947,7 +954,13 @@ class PokemonGoBot(object):
 
     def _setup_api(self):
         # instantiate pgoapi @var ApiWrapper
-        self.api = ApiWrapper(config=self.config)
+        if self.config.api_traffic_replay:
+            server = ReplayServer.from_file(self.config.api_traffic_replay)
+        elif self.config.simulator_enabled:
+            server = LocalServer.from_config(self.config)
+        else:
+            server = None
+        self.api = ApiWrapper(config=self.config, server=server)
 
         # provide player position on the earth
         self._set_starting_position()
@@ -955,15 +968,17 @@ class PokemonGoBot(object):
         self.login()
         # chain subrequests (methods) into one RPC call
 
-        self.api.activate_signature(self.get_encryption_lib())
+        # local servers need no signature
+        if server is None:
+            self.api.activate_signature(self.get_encryption_lib())
         self.logger.info('')
         # send empty map_cells and then our position
         self.update_web_location()
 
     def _print_character_info(self):
-        # get player profile call
+        # get player profile call, answered from the cache if it is fresh
         # ----------------------
-        response_dict = self.api.get_player()
+        response_dict = self.api.batch.enqueue('get_player').result()
         # print('Response dictionary: \n\r{}'.format(json.dumps(response_dict, indent=2)))
         currency_1 = "0"
         currency_2 = "0"
@@ -1258,18 +1273,17 @@ class PokemonGoBot(object):
 
     def heartbeat(self):
         # Remove forts that we can now spin again.
-        now = time.time()
+        now = clock.time()
         self.fort_timeouts = {id: timeout for id, timeout
                               in self.fort_timeouts.iteritems()
                               if timeout >= now * 1000}
 
-        if now - self.last_heartbeat >= self.heartbeat_threshold:
+        if self._heartbeat_due():
             self.last_heartbeat = now
-            request = self.api.create_request()
-            request.get_player()
-            request.check_awarded_badges()
-            responses = request.call()
+            player_request, badges_request, inventory_request = self._queue_heartbeat()
+            self._heartbeat_requests = None
 
+            responses = player_request.result()
             if responses['responses']['GET_PLAYER']['success'] == True:
                 # we get the player_data anyway, might as well store it
                 self._player = responses['responses']['GET_PLAYER']['player_data']
@@ -1280,6 +1294,7 @@ class PokemonGoBot(object):
                     formatted='player_data: {player_data}',
                     data={'player_data': self._player}
                 )
+            responses = badges_request.result()
             if responses['responses']['CHECK_AWARDED_BADGES']['success'] == True:
                 # store awarded_badges reponse to be used in a task or part of heartbeat
                 self._awarded_badges = responses['responses']['CHECK_AWARDED_BADGES']
@@ -1300,16 +1315,34 @@ class PokemonGoBot(object):
                     )
                     human_behaviour.action_delay(3, 10)
 
-            inventory.refresh_inventory()
+            inventory.refresh_inventory(inventory_request.result())
 
         try:
             self.web_update_queue.put_nowait(True)  # do this outside of thread every tick
         except Queue.Full:
             pass
 
+    def _heartbeat_due(self):
+        return clock.time() - self.last_heartbeat >= self.heartbeat_threshold
+
+    def _queue_heartbeat(self):
+        # nothing is sent until one of the responses is needed, so anything
+        # else queued in the meantime shares the same RPC. Requests of a batch
+        # that failed (in get_meta_cell...) are queued again
+        if self._heartbeat_requests is None or any(r.failed() for r in self._heartbeat_requests):
+            self._heartbeat_requests = (
+                self.api.batch.enqueue('get_player'),
+                self.api.batch.enqueue('check_awarded_badges'),
+                inventory.enqueue_inventory()
+            )
+        return self._heartbeat_requests
+
     def update_web_location_worker(self):
         while True:
             self.web_update_queue.get()
+            # ticks queued while waiting are merged, the last position is
+            # written once the interval is over
+            self.web_location_writer.wait()
             self.update_web_location()
 
     def display_player_info(self):
@@ -1330,34 +1363,57 @@ class PokemonGoBot(object):
                     '{}'.format(player_stats.poke_stop_visits))
 
     def get_forts(self, order_by_distance=False):
-        forts = [fort
-                 for fort in self.cell['forts']
-                 if 'latitude' in fort and 'type' in fort]
+        if self.cell:
+            self.fort_index.update(self.cell['forts'])
 
         if order_by_distance:
-            forts.sort(key=lambda x: distance(
-                self.position[0],
-                self.position[1],
-                x['latitude'],
-                x['longitude']
-            ))
+            return self.fort_index.nearest(self.position[0], self.position[1])
+
+        return self.fort_index.all()
 
-        return forts
+    def get_forts_in_range(self, radius, position=None, exclude=None):
+        """
+        Pokestops at most radius meters away, the closest first.
+        :param position: Center of the search, the bot position by default.
+        :param exclude: Ids of the forts to skip.
+        :rtype: list of dict
+        """
+        if self.cell:
+            self.fort_index.update(self.cell['forts'])
+        lat, lng = (position or self.position)[0:2]
+        return self.fort_index.within(lat, lng, radius, exclude)
+
+    def get_nearest_fort(self, exclude=None):
+        """
+        Closest pokestop whose id is not in exclude.
+        :return: The fort or None if there is none.
+        :rtype: dict
+        """
+        if self.cell:
+            self.fort_index.update(self.cell['forts'])
+        return self.fort_index.nearest_not_in(self.position[0], self.position[1], exclude or ())
 
     def get_map_objects(self, lat, lng, timestamp, cellid):
-        if time.time() - self.last_time_map_object < self.config.map_object_cache_time:
+        if clock.time() - self.last_time_map_object < self.config.map_object_cache_time:
             return self.last_map_object
 
-        self.last_map_object = self.api.get_map_objects(
+        self.last_map_object = self.api.batch.enqueue(
+            'get_map_objects',
             latitude=f2i(lat),
             longitude=f2i(lng),
             since_timestamp_ms=timestamp,
             cell_id=cellid
-        )
+        ).result()
         self.emit_forts_event(self.last_map_object)
+
+        map_objects = self.last_map_object.get(
+            'responses', {}
+        ).get('GET_MAP_OBJECTS', {})
+        if map_objects.get('status', None) == 1:
+            self.cell_store.update(map_objects.get('map_cells', []), dict(zip(cellid, timestamp)))
         #if self.last_map_object:
         #    print self.last_map_object
-        self.last_time_map_object = time.time()
+        self.last_time_map_object = clock.time()
 
         return self.last_map_object
 
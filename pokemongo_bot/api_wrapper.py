@@ -1,4 +1,3 @@
-import time
 import logging
 import random, base64, struct
 import hashlib
@@ -14,6 +13,10 @@ from pgoapi.protos.POGOProtos.Networking.Envelopes.Signature_pb2 import Signatur
 from pgoapi.utilities import get_time
 from human_behaviour import sleep, gps_noise_rng
 from pokemongo_bot.base_dir import _base_dir
+from pokemongo_bot.rate_limiter import RateLimiter
+from pokemongo_bot.request_batcher import RequestBatcher
+from pokemongo_bot.response_cache import ResponseCache
+from pokemongo_bot.traffic_log import TrafficRecorder
 
 class PermaBannedException(Exception):
     pass
@@ -21,7 +24,7 @@ class PermaBannedException(Exception):
 class ApiWrapper(PGoApi, object):
     DEVICE_ID = None
 
-    def __init__(self, config=None):
+    def __init__(self, config=None, rate_limiter=None, server=None, recorder=None):
         PGoApi.__init__(self)
         # Set to default, just for CI...
         self.actual_lat, self.actual_lng, self.actual_alt = PGoApi.get_position(self)
@@ -30,6 +33,15 @@ class ApiWrapper(PGoApi, object):
 
         self.useVanillaRequest = False
         self.config = config
+        # answers the requests instead of the game servers, see simulator.LocalServer
+        self.server = server
+        # writes the traffic to a log, see traffic_log.TrafficRecorder
+        self.recorder = recorder or TrafficRecorder.from_config(config)
+        # shared by all the requests of this account, see RateLimiter
+        self.rate_limiter = rate_limiter or RateLimiter.from_config(config)
+        self.response_cache = ResponseCache.from_config(config)
+        # read-only subrequests queued during a tick, see RequestBatcher
+        self.batch = RequestBatcher(self)
 
         if self.config is None or self.config.username is None:
             ApiWrapper.DEVICE_ID = "3d65919ca1c2fc3a8e2bd7cc3f974c34"
@@ -71,6 +83,11 @@ class ApiWrapper(PGoApi, object):
         )
 
     def login(self, *args):
+        if self.server is not None:
+            # nothing to authenticate against, args are (provider, username, password)
+            self._auth_provider = self.server.auth_provider(args[1])
+            return True
+
         # login needs base class "create_request"
         self.useVanillaRequest = True
         try:
@@ -107,12 +124,14 @@ class ApiWrapper(PGoApi, object):
 
 
 class ApiRequest(PGoApiRequest):
-    def __init__(self, *args):
-        PGoApiRequest.__init__(self, *args)
+    def __init__(self, api, *args):
+        PGoApiRequest.__init__(self, api, *args)
         self.logger = logging.getLogger(__name__)
         self.request_callers = []
-        self.last_api_request_time = None
-        self.requests_per_seconds = 2
+        self.rate_limiter = api.rate_limiter
+        self.response_cache = api.response_cache
+        self.server = api.server
+        self.recorder = api.recorder
 
     def can_call(self):
         if not self._req_method_list:
@@ -128,6 +147,10 @@ class ApiRequest(PGoApiRequest):
         return True
 
     def _call(self):
+        if self.server is not None:
+            return self.server.call(self._subrequests(self._req_method_list),
+                                    (self._position_lat, self._position_lng, self._position_alt))
+
         # Need fill in the location_fix
         location_fix = [Signature.LocationFix(
             provider='fused',
@@ -185,6 +208,18 @@ class ApiRequest(PGoApiRequest):
         )
         return PGoApiRequest.call(self, signature)
 
+    @staticmethod
+    def _subrequests(req_method_list):
+        # _req_method_list holds request types, or {request type: arguments}
+        subrequests = []
+        for req_method in req_method_list:
+            if isinstance(req_method, dict):
+                for request_type, kwargs in req_method.items():
+                    subrequests.append((RequestType.Name(request_type), kwargs))
+            else:
+                subrequests.append((RequestType.Name(req_method), {}))
+        return subrequests
+
     def _pop_request_callers(self):
         r = self.request_callers
         self.request_callers = []
@@ -221,14 +256,13 @@ class ApiRequest(PGoApiRequest):
         if not self.can_call():
             return False  # currently this is never ran, exceptions are raised before
 
-        request_timestamp = None
         api_req_method_list = self._req_method_list
         result = None
         try_cnt = 0
         throttling_retry = 0
         unexpected_response_retry = 0
         while True:
-            request_timestamp = self.throttle_sleep()
+            self.throttle_sleep(request_callers)
             # self._call internally clear this field, so save it
             self._req_method_list = [req_method for req_method in api_req_method_list]
             should_throttle_retry = False
@@ -244,7 +278,9 @@ class ApiRequest(PGoApiRequest):
                 throttling_retry += 1
                 if throttling_retry >= max_retry:
                     raise ServerSideRequestThrottlingException('Server throttled too many times')
-                sleep(1)  # huge sleep ?
+                # slows down every request of the account, the next
+                # throttle_sleep waits until the bucket has refilled
+                self.rate_limiter.throttled()
                 continue  # skip response checking
 
             if should_unexpected_response_retry:
@@ -268,7 +304,12 @@ class ApiRequest(PGoApiRequest):
             else:
                 break
 
-        self.last_api_request_time = request_timestamp
+        self.rate_limiter.succeeded()
+        if self.recorder is not None:
+            self.recorder.record(request_callers, self._subrequests(api_req_method_list),
+                                 (self._position_lat, self._position_lng, self._position_alt), result)
+        # drop what may have changed on the server (inventory after a catch...)
+        self.response_cache.invalidate(request_callers)
         return result
 
     def __getattr__(self, func):
@@ -276,14 +317,5 @@ class ApiRequest(PGoApiRequest):
             self.request_callers.append(func)
         return PGoApiRequest.__getattr__(self, func)
 
-    def throttle_sleep(self):
-        now_milliseconds = time.time() * 1000
-        required_delay_between_requests = 1000 / self.requests_per_seconds
-
-        difference = now_milliseconds - (self.last_api_request_time if self.last_api_request_time else 0)
-
-        if self.last_api_request_time != None and difference < required_delay_between_requests:
-            sleep_time = required_delay_between_requests - difference
-            time.sleep(sleep_time / 1000)
-
-        return now_milliseconds
+    def throttle_sleep(self, request_callers=()):
+        return self.rate_limiter.acquire(request_callers)
@@ -1,6 +1,6 @@
 import logging
 
-import time
+from pokemongo_bot import clock
 
 
 class BaseTask(object):
@@ -19,7 +19,7 @@ class BaseTask(object):
     self._validate_work_exists()
     self.logger = logging.getLogger(type(self).__name__)
     self.enabled = config.get('enabled', True)
-    self.last_log_time = time.time()
+    self.last_log_time = clock.time()
     self.initialize()
 
   def _validate_work_exists(self):
@@ -33,8 +33,8 @@ class BaseTask(object):
 
     # Print log only if X seconds are passed from last log
     try:
-        if (time.time() - self.last_log_time) >= self.config.get('log_interval', 0):
-          self.last_log_time = time.time()
+        if (clock.time() - self.last_log_time) >= self.config.get('log_interval', 0):
+          self.last_log_time = clock.time()
           self.bot.event_manager.emit(
             event,
             sender=sender,
@@ -43,8 +43,8 @@ class BaseTask(object):
             data=data
           )
     except AttributeError:
-        if (time.time() - self.last_log_time) > 0:
-          self.last_log_time = time.time()
+        if (clock.time() - self.last_log_time) > 0:
+          self.last_log_time = clock.time()
           self.bot.event_manager.emit(
             event,
             sender=sender,
@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+
+import logging
+from collections import OrderedDict, deque
+
+from pokemongo_bot import inventory
+from pokemongo_bot.human_behaviour import action_delay
+
+# RELEASE_POKEMON results
+SUCCESS = 1
+
+
+class BulkReleaser(object):
+    """Releases pokemons with as few requests as possible
+
+    A RELEASE_POKEMON subrequest takes a list of pokemon_ids. The response
+    only tells how many candies the whole request awarded, so the pokemons
+    are grouped by candy family and each request releases up to
+    `batch_size` pokemons of a single family. The candies are credited and
+    the pokemons removed from the cached inventory as the responses come in.
+
+    Requests are paced by one action_delay(wait_min, wait_max) between two
+    requests instead of a delay after every pokemon. The transfer_log rows
+    of the released pokemons are written in one transaction at the end.
+
+    If a request releasing several pokemons fails (a pokemon deployed in a
+    gym, a server which does not accept lists...) or can not even be built
+    (protos without the repeated pokemon_ids field), its pokemons are sent
+    again one at a time and so are the following ones.
+    With `simulate` no request is sent and every pokemon awards one candy.
+    """
+
+    DEFAULT_BATCH_SIZE = 20
+
+    def __init__(self, bot, batch_size=DEFAULT_BATCH_SIZE, wait_min=1, wait_max=4, simulate=False):
+        if batch_size < 1:
+            raise ValueError('batch_size must be at least 1')
+
+        self.bot = bot
+        self.batch_size = batch_size
+        self.wait_min = wait_min
+        self.wait_max = wait_max
+        self.simulate = simulate
+        self.logger = logging.getLogger(type(self).__name__)
+
+    def release(self, pokemons):
+        """
+        :param pokemons: Pokemons to release.
+        :return: The released pokemons, grouped by family.
+        :rtype: list
+        """
+        queue = deque(self._requests(pokemons))
+        released = []
+        sent = False
+
+        while queue:
+            chunk = queue.popleft()
+
+            if sent:
+                action_delay(self.wait_min, self.wait_max)
+
+            candy_awarded = self._send(chunk)
+            sent = not self.simulate
+
+            if candy_awarded is None:
+                if len(chunk) > 1:
+                    self.batch_size = 1
+                    queue = deque([p] for c in [chunk] + list(queue) for p in c)
+                continue
+
+            inventory.candies().get(chunk[0].pokemon_id).add(candy_awarded)
+
+            for pokemon in chunk:
+                inventory.pokemons().remove(pokemon.unique_id)
+
+            released += chunk
+
+        if released:
+            self.bot.metrics.released_pokemon(len(released))
+            self.log(released)
+
+        return released
+
+    def log(self, pokemons):
+        with self.bot.database as db:
+            cursor = db.cursor()
+            cursor.execute("SELECT COUNT(name) FROM sqlite_master WHERE type='table' AND name='transfer_log'")
+
+            if cursor.fetchone()[0] == 1:
+                db.executemany("INSERT INTO transfer_log (pokemon, iv, cp) VALUES (?, ?, ?)",
+                               [(p.name, p.iv, p.cp) for p in pokemons])
+
+    def _requests(self, pokemons):
+        by_family = OrderedDict()
+
+        for pokemon in pokemons:
+            by_family.setdefault(pokemon.first_evolution_id, []).append(pokemon)
+
+        for family in by_family.values():
+            for i in range(0, len(family), self.batch_size):
+                yield family[i:i + self.batch_size]
+
+    def _send(self, chunk):
+        # candies awarded for the chunk, None if it was not released
+        if self.simulate:
+            return len(chunk)
+
+        if len(chunk) == 1:
+            response_dict = self.bot.api.release_pokemon(pokemon_id=chunk[0].unique_id)
+        else:
+            try:
+                response_dict = self.bot.api.release_pokemon(pokemon_ids=[p.unique_id for p in chunk])
+            except Exception as e:
+                # pgoapi raises for fields its ReleasePokemonMessage does not have
+                self.logger.debug('Releasing several pokemons in one request failed: %s', e)
+                return None
+
+        if not response_dict:
+            return None
+
+        result = response_dict.get("responses", {}).get("RELEASE_POKEMON", {})
+
+        if result.get("result", 0) != SUCCESS:
+            return None
+
+        return result.get("candy_awarded", 0)
@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+
+import threading
+from collections import OrderedDict
+
+from pokemongo_bot import clock
+
+
+class _Cell(object):
+    def __init__(self, cell_id):
+        self.cell_id = cell_id
+        # current_timestamp_ms of the last response, sent back as since_timestamp_ms
+        self.timestamp = 0
+        self.full_at = 0
+        self.objects = dict((field, OrderedDict()) for field in CellStore.DELTA_FIELDS)
+        self.snapshot = {}
+        self._map_cell = None
+
+    def map_cell(self):
+        # rebuilt only after an update
+        if self._map_cell is None:
+            map_cell = dict(self.snapshot)
+            map_cell['s2_cell_id'] = self.cell_id
+            map_cell['current_timestamp_ms'] = self.timestamp
+            for field, objects in self.objects.iteritems():
+                if objects:
+                    map_cell[field] = list(objects.itervalues())
+            self._map_cell = map_cell
+        return self._map_cell
+
+
+class CellStore(object):
+    """Map cells received from GET_MAP_OBJECTS, kept between calls
+
+    Every cell remembers the current_timestamp_ms of the last response, it is
+    sent back as since_timestamp_ms so the server only answers with what
+    changed since then.
+    Forts and spawn points are merged by id into the stored cell (and removed
+    when listed in deleted_objects), everything else (wild, catchable and
+    nearby pokemons...) is replaced by the content of each response.
+
+    A cell is fully requested again (since_timestamp_ms=0) every
+    FULL_REFRESH_INTERVAL seconds, and only the MAX_CELLS most recently
+    requested cells are kept.
+    """
+
+    DELTA_FIELDS = ('forts', 'spawn_points', 'decimated_spawn_points')
+    FULL_REFRESH_INTERVAL = 600
+    MAX_CELLS = 256
+
+    def __init__(self):
+        self._cells = OrderedDict()
+        self._lock = threading.Lock()
+        # bumped on every change, lets callers know their view is outdated
+        self.version = 0
+
+    def timestamps(self, cell_ids):
+        """
+        Timestamps to send as since_timestamp_ms for the given cells.
+        :return: One timestamp per cell, 0 to get the whole cell.
+        :rtype: list of int
+        """
+        now = clock.time()
+        timestamps = []
+        with self._lock:
+            for cell_id in cell_ids:
+                cell = self._cells.get(cell_id)
+                if cell is None or now - cell.full_at >= self.FULL_REFRESH_INTERVAL:
+                    timestamps.append(0)
+                else:
+                    timestamps.append(cell.timestamp)
+        return timestamps
+
+    def update(self, map_cells, since_timestamps):
+        """
+        Merges the map_cells of a GET_MAP_OBJECTS response.
+        :param map_cells: The map_cells of the response.
+        :param since_timestamps: since_timestamp_ms sent for each cell id.
+        :type since_timestamps: dict
+        :return: Nothing.
+        :rtype: None
+        """
+        now = clock.time()
+        with self._lock:
+            received = set()
+            for map_cell in map_cells:
+                cell_id = map_cell.get('s2_cell_id')
+                if cell_id is None:
+                    continue
+                received.add(cell_id)
+
+                cell = self._cells.pop(cell_id, None)
+                if cell is None or not since_timestamps.get(cell_id, 0):
+                    cell = _Cell(cell_id)
+                    cell.full_at = now
+                self._cells[cell_id] = cell
+                self._merge(cell, map_cell)
+
+            # cells missing from the response have no pokemon left
+            for cell_id in since_timestamps:
+                cell = self._cells.get(cell_id)
+                if cell is not None and cell_id not in received and cell.snapshot:
+                    cell.snapshot = {}
+                    cell._map_cell = None
+
+            while len(self._cells) > self.MAX_CELLS:
+                self._cells.popitem(last=False)
+
+            self.version += 1
+
+    def cells(self, cell_ids):
+        """
+        Stored cells in the same shape as the map_cells of a response.
+        :return: The known cells amongst cell_ids.
+        :rtype: list of dict
+        """
+        with self._lock:
+            return [self._cells[cell_id].map_cell() for cell_id in cell_ids if cell_id in self._cells]
+
+    def clear(self):
+        with self._lock:
+            self._cells = OrderedDict()
+            self.version += 1
+
+    def _merge(self, cell, map_cell):
+        for field in self.DELTA_FIELDS:
+            objects = cell.objects[field]
+            for obj in map_cell.get(field, []):
+                objects[self._object_key(obj)] = obj
+
+        forts = cell.objects['forts']
+        for object_id in map_cell.get('deleted_objects', []):
+            forts.pop(object_id, None)
+
+        cell.snapshot = dict((k, v) for k, v in map_cell.iteritems()
+                             if k not in self.DELTA_FIELDS and k != 'deleted_objects')
+        cell.timestamp = map_cell.get('current_timestamp_ms', cell.timestamp)
+        cell._map_cell = None
+
+    @staticmethod
+    def _object_key(obj):
+        if 'id' in obj:
+            return obj['id']
+        return obj.get('latitude'), obj.get('longitude')
@@ -1,9 +1,8 @@
-import math
-import time
-
+from pokemongo_bot import clock
 from pokemongo_bot.base_task import BaseTask
-from pokemongo_bot.cell_workers.utils import distance, coord2merc, merc2coord
+from pokemongo_bot.cell_workers.utils import distance
 from pokemongo_bot.constants import Constants
+from pokemongo_bot.fort_cluster_index import FortClusterIndex
 from pokemongo_bot.human_behaviour import random_lat_long_delta, random_alt_delta
 from pokemongo_bot.walkers.polyline_walker import PolylineWalker
 from pokemongo_bot.worker_result import WorkerResult
@@ -21,6 +20,7 @@ class CampFort(BaseTask):
         self.move_until = 0
         self.last_position_update = 0
         self.walker = None
+        self.cluster_index = None
 
         self.config_max_distance = self.config.get("max_distance", 2000)
         self.config_min_forts_count = self.config.get("min_forts_count", 2)
@@ -32,7 +32,7 @@ class CampFort(BaseTask):
         if not self.enabled:
             return WorkerResult.SUCCESS
 
-        now = time.time()
+        now = clock.time()
 
         if now < self.move_until:
             return WorkerResult.SUCCESS
@@ -46,11 +46,10 @@ class CampFort(BaseTask):
                 return WorkerResult.SUCCESS
 
         if self.destination is None:
-            forts = self.get_forts()
-            forts_clusters = self.get_forts_clusters(forts)
+            cluster = self.get_best_cluster()
 
-            if len(forts_clusters) > 0:
-                self.destination = forts_clusters[0]
+            if cluster is not None:
+                self.destination = cluster
                 self.logger.info("New destination at %s meters: %s forts, %s lured.", int(self.destination[4]), self.destination[3], self.destination[2])
             else:
                 # forts = [f for f in forts if f.get("cooldown_complete_timestamp_ms", 0) < now * 1000]
@@ -66,7 +65,10 @@ class CampFort(BaseTask):
         if self.stay_until >= now:
             lat = self.destination[0] + random_lat_long_delta() / 5
             lon = self.destination[1] + random_lat_long_delta() / 5
-            alt = self.walker.pol_alt + random_alt_delta() / 2
+            alt = self.walker.polyline.get_alt_at(lat, lon, interpolate=True)
+            if alt is None:
+                alt = self.walker.pol_alt
+            alt += random_alt_delta() / 2
             self.bot.api.set_position(lat, lon, alt)
         else:
             self.walker = PolylineWalker(self.bot, self.destination[0], self.destination[1])
@@ -87,95 +89,17 @@ class CampFort(BaseTask):
     def get_forts(self):
         radius = self.config_max_distance + Constants.MAX_DISTANCE_FORT_IS_REACHABLE
 
-        forts = [f for f in self.bot.cell["forts"] if ("latitude" in f) and ("type" in f)]
-        forts = [f for f in forts if self.dist(self.bot.start_position, f) <= radius]
-
-        return forts
-
-    def get_forts_clusters(self, forts):
-        clusters = []
-        points = self.get_all_snap_points(forts)
-
-        for c1, c2, fort1, fort2 in points:
-            cluster_1 = self.get_cluster(forts, c1)
-            cluster_2 = self.get_cluster(forts, c2)
-            cluster_key_1 = self.get_cluster_key(cluster_1)
-            cluster_key_2 = self.get_cluster_key(cluster_2)
-            radius = Constants.MAX_DISTANCE_FORT_IS_REACHABLE
-
-            if cluster_key_1 >= cluster_key_2:
-                cluster = cluster_1
-
-                while True:
-                    new_circle, _ = self.get_enclosing_circles(fort1, fort2, radius - 1)
-
-                    if not new_circle:
-                        break
-
-                    new_cluster = self.get_cluster(forts, new_circle)
-
-                    if new_cluster[3] < cluster[3]:
-                        break
-
-                    cluster = new_cluster
-                    radius -= 1
-            else:
-                cluster = cluster_2
-
-                while True:
-                    _, new_circle = self.get_enclosing_circles(fort1, fort2, radius - 1)
-
-                    if not new_circle:
-                        break
+        return self.bot.get_forts_in_range(radius, position=self.bot.start_position)
 
-                    new_cluster = self.get_cluster(forts, new_circle)
+    def get_best_cluster(self):
+        if self.cluster_index is None:
+            self.cluster_index = FortClusterIndex(self.bot.start_position, Constants.MAX_DISTANCE_FORT_IS_REACHABLE)
 
-                    if new_cluster[3] < cluster[3]:
-                        break
+        # only the forts entering or leaving the area, or whose lure changed,
+        # are updated in the index
+        self.cluster_index.sync(self.get_forts())
 
-                    cluster = new_cluster
-                    radius -= 1
-
-            clusters.append(cluster)
-
-        clusters = [c for c in clusters if c[2] >= self.config_min_lured_forts_count]
-        clusters = [c for c in clusters if c[3] >= self.config_min_forts_count]
-        clusters.sort(key=lambda c: self.get_cluster_key(c), reverse=True)
-
-        return clusters
-
-    def get_all_snap_points(self, forts):
-        points = []
-        radius = Constants.MAX_DISTANCE_FORT_IS_REACHABLE
-
-        for i in range(0, len(forts)):
-            for j in range(i + 1, len(forts)):
-                c1, c2 = self.get_enclosing_circles(forts[i], forts[j], radius)
-
-                if c1 and c2:
-                    points.append((c1, c2, forts[i], forts[j]))
-
-        return points
-
-    def get_enclosing_circles(self, fort1, fort2, radius):
-        # This is an approximation which is good enough for us
-        # since we are dealing with small distances
-        x1, y1 = coord2merc(fort1["latitude"], fort1["longitude"])
-        x2, y2 = coord2merc(fort2["latitude"], fort2["longitude"])
-        dx = x2 - x1
-        dy = y2 - y1
-        d = math.sqrt(dx ** 2 + dy ** 2)
-
-        if (d == 0) or (d > 2 * radius):
-            return None, None
-
-        cx, cy = (x1 + x2) / 2, (y1 + y2) / 2
-        cd = math.sqrt(radius ** 2 - (d / 2) ** 2)
-
-        c1 = merc2coord((cx - cd * dy / d, cy + cd * dx / d)) + (radius,)
-        c2 = merc2coord((cx + cd * dy / d, cy - cd * dx / d)) + (radius,)
-
-        return c1, c2
+        return self.cluster_index.best(self.bot.position, self.config_min_lured_forts_count, self.config_min_forts_count)
 
     def get_cluster(self, forts, circle):
         forts_in_circle = [f for f in forts if self.dist(circle, f) <= circle[2]]
@@ -185,8 +109,5 @@ class CampFort(BaseTask):
 
         return (circle[0], circle[1], lured, count, dst)
 
-    def get_cluster_key(self, cluster):
-        return (cluster[2], cluster[3], -cluster[4])
-
     def dist(self, location, fort):
         return distance(location[0], location[1], fort["latitude"], fort["longitude"])
@@ -10,7 +10,7 @@ from pokemongo_bot.cell_workers.pokemon_catch_worker import PokemonCatchWorker
 from pokemongo_bot.worker_result import WorkerResult
 from pokemongo_bot.item_list import Item
 from pokemongo_bot import inventory
-from utils import fort_details, distance
+from utils import fort_details
 from pokemongo_bot.base_dir import _base_dir
 from pokemongo_bot.constants import Constants
 from pokemongo_bot.inventory import Pokemons, Pokemon, Attack
@@ -86,22 +86,15 @@ class CatchPokemon(BaseTask):
 
     def get_lured_pokemon(self):
         forts_in_range = []
-        forts = self.bot.get_forts(order_by_distance=False)
+        forts = self.bot.get_forts_in_range(Constants.MAX_DISTANCE_FORT_IS_REACHABLE)
 
         if len(forts) == 0:
             return []
 
         for fort in forts:
-            distance_to_fort = distance(
-                self.bot.position[0],
-                self.bot.position[1],
-                fort['latitude'],
-                fort['longitude']
-            )
-
             # See if we have an encounter at this fort
             encounter_id = fort.get('lure_info', {}).get('encounter_id', None)
-            if distance_to_fort < Constants.MAX_DISTANCE_FORT_IS_REACHABLE and encounter_id:
+            if encounter_id:
                 forts_in_range.append(fort)
 
 
@@ -102,14 +102,14 @@ class EvolvePokemon(BaseTask):
             'and': lambda pokemon: pokemon.cp >= self.evolve_above_cp and pokemon.iv >= self.evolve_above_iv
         }
 
-        for pokemon in inventory.pokemons().all():
-            if pokemon.unique_id > 0 and pokemon.has_next_evolution() and (logic_to_function[self.cp_iv_logic](pokemon)):
-                pokemons.append(pokemon)
-
         if self.first_evolve_by == "cp":
-            pokemons.sort(key=lambda x: (x.pokemon_id, x.cp, x.iv), reverse=True)
+            ranked = inventory.pokemons().ranked('pokemon_id', 'cp', 'iv')
         else:
-            pokemons.sort(key=lambda x: (x.pokemon_id, x.iv, x.cp), reverse=True)
+            ranked = inventory.pokemons().ranked('pokemon_id', 'iv', 'cp')
+
+        for pokemon in ranked:
+            if pokemon.unique_id > 0 and pokemon.has_next_evolution() and (logic_to_function[self.cp_iv_logic](pokemon)):
+                pokemons.append(pokemon)
 
         return pokemons
 
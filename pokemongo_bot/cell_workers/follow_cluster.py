@@ -16,9 +16,10 @@ class FollowCluster(BaseTask):
     def _process_config(self):
         self.lured = self.config.get("lured", True)
         self.radius = self.config.get("radius", 50)
+        self.max_distance = self.config.get("max_distance", 2000)
 
     def work(self):
-        forts = self.bot.get_forts()
+        forts = self.bot.get_forts_in_range(self.max_distance)
         log_lure_avail_str = ''
         log_lured_str = ''
         if self.lured:
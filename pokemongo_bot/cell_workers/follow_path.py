@@ -3,7 +3,7 @@
 import gpxpy
 import gpxpy.gpx
 import json
-import time
+from pokemongo_bot import clock
 from pokemongo_bot.base_task import BaseTask
 from pokemongo_bot.cell_workers.utils import distance, i2f, format_dist
 from pokemongo_bot.human_behaviour import sleep
@@ -12,7 +12,7 @@ from pokemongo_bot.worker_result import WorkerResult
 from pgoapi.utilities import f2i
 from random import uniform
 from utils import getSeconds, format_dist
-from datetime import datetime as dt, timedelta
+from datetime import timedelta
 
 STATUS_MOVING = 0
 STATUS_LOITERING = 1
@@ -120,7 +120,7 @@ class FollowPath(BaseTask):
 
     def endLaps(self):
         duration = int(uniform(self.timer_restart_min, self.timer_restart_max))
-        resume = dt.now() + timedelta(seconds=duration)
+        resume = clock.now() + timedelta(seconds=duration)
         
         self.emit_event(
             'path_lap_end',
@@ -140,7 +140,7 @@ class FollowPath(BaseTask):
         if self.status == STATUS_FINISHED:
             return WorkerResult.SUCCESS
 
-        if self.status == STATUS_LOITERING and time.time() < self.loiter_end_time:
+        if self.status == STATUS_LOITERING and clock.time() < self.loiter_end_time:
             return WorkerResult.SUCCESS
 
         last_lat, last_lng, last_alt = self.bot.position
@@ -187,11 +187,11 @@ class FollowPath(BaseTask):
             }
         )
         
-        if dist <= 1 or (self.bot.config.walk_min > 0 and is_at_destination) or (self.status == STATUS_LOITERING and time.time() >= self.loiter_end_time):
+        if dist <= 1 or (self.bot.config.walk_min > 0 and is_at_destination) or (self.status == STATUS_LOITERING and clock.time() >= self.loiter_end_time):
             if "loiter" in point and self.status != STATUS_LOITERING:
                 self.logger.info("Loitering for {} seconds...".format(point["loiter"]))
                 self.status = STATUS_LOITERING
-                self.loiter_end_time = time.time() + point["loiter"]
+                self.loiter_end_time = clock.time() + point["loiter"]
                 return WorkerResult.SUCCESS
             if (self.ptr + 1) == len(self.points):
                 if self.path_mode == 'single':
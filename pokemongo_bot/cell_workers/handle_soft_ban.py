@@ -16,23 +16,23 @@ class HandleSoftBan(BaseTask):
         if not self.should_run():
             return
 
-        forts = self.bot.get_forts(order_by_distance=True)
+        fort = self.bot.get_nearest_fort()
 
-        if len(forts) == 0:
+        if fort is None:
             return
 
         fort_distance = distance(
             self.bot.position[0],
             self.bot.position[1],
-            forts[0]['latitude'],
-            forts[0]['longitude'],
+            fort['latitude'],
+            fort['longitude'],
         )
 
         if fort_distance > Constants.MAX_DISTANCE_FORT_IS_REACHABLE:
             MoveToFort(self.bot, config={}).work()
             self.bot.recent_forts = self.bot.recent_forts[0:-1]
-            if forts[0]['id'] in self.bot.fort_timeouts:
-                del self.bot.fort_timeouts[forts[0]['id']]
+            if fort['id'] in self.bot.fort_timeouts:
+                del self.bot.fort_timeouts[fort['id']]
             return WorkerResult.RUNNING
         else:
             spins = randint(50,60)
@@ -41,7 +41,7 @@ class HandleSoftBan(BaseTask):
                 formatted='Fixing softban.'
             )
             for i in xrange(spins):
-                self.spin_fort(forts[0])
+                self.spin_fort(fort)
             self.bot.softban = False
             self.emit_event(
                 'softban_fix_done',
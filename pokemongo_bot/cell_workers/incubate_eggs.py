@@ -1,6 +1,6 @@
-from datetime import datetime, timedelta
+from datetime import timedelta
 
-from pokemongo_bot import inventory
+from pokemongo_bot import clock, inventory
 from pokemongo_bot.human_behaviour import sleep
 from pokemongo_bot.base_task import BaseTask
 from pokemongo_bot.worker_result import WorkerResult
@@ -122,54 +122,49 @@ class IncubateEggs(BaseTask):
                         )
                         egg["used"] = True
 
-    def _check_inventory(self, lookup_ids=[]):
+    def _check_inventory(self, lookup_ids=[], inventory_response=None):
         if lookup_ids:
-            inventory.refresh_inventory()
+            inventory.refresh_inventory(inventory_response)
         matched_pokemon = []
         temp_eggs = []
         temp_used_incubators = []
         temp_ready_breakable_incubators = []
         temp_ready_infinite_incubators = []
-        inv = inventory.jsonify_inventory()
-        for inv_data in inv:
-            inv_data = inv_data.get("inventory_item_data", {})
-            if "egg_incubators" in inv_data:
-                incubators = inv_data.get("egg_incubators", {}).get("egg_incubator",[])
-                if isinstance(incubators, basestring):  # checking for old response
-                    incubators = [incubators]
-                for incubator in incubators:
-                    if 'pokemon_id' in incubator:
-                        start_km = incubator.get('start_km_walked', 0)
-                        km_walked = incubator.get('target_km_walked', 0)
-                        temp_used_incubators.append({
-                            "id": incubator.get('id', -1),
-                            "km": km_walked,
-                            "km_needed": (km_walked - start_km)
+        for inv_data in inventory.egg_incubators():
+            incubators = inv_data.get("egg_incubators", {}).get("egg_incubator",[])
+            if isinstance(incubators, basestring):  # checking for old response
+                incubators = [incubators]
+            for incubator in incubators:
+                if 'pokemon_id' in incubator:
+                    start_km = incubator.get('start_km_walked', 0)
+                    km_walked = incubator.get('target_km_walked', 0)
+                    temp_used_incubators.append({
+                        "id": incubator.get('id', -1),
+                        "km": km_walked,
+                        "km_needed": (km_walked - start_km)
+                    })
+                else:
+                    if incubator.get('uses_remaining') is not None:
+                        temp_ready_breakable_incubators.append({
+                            "id": incubator.get('id', -1)
                         })
                     else:
-                        if incubator.get('uses_remaining') is not None:
-                            temp_ready_breakable_incubators.append({
-                                "id": incubator.get('id', -1)
-                            })
-                        else:
-                            temp_ready_infinite_incubators.append({
-                                "id": incubator.get('id', -1)
-                            })
-                continue
-            if "pokemon_data" in inv_data:
-                pokemon = inv_data.get("pokemon_data", {})
-                if pokemon.get("is_egg", False) and "egg_incubator_id" not in pokemon:
+                        temp_ready_infinite_incubators.append({
+                            "id": incubator.get('id', -1)
+                        })
+        for pokemon in inventory.pokemons().all_with_eggs():
+            if isinstance(pokemon, inventory.Egg):
+                egg = pokemon._data
+                if "egg_incubator_id" not in egg:
                     temp_eggs.append({
-                        "id": pokemon.get("id", -1),
-                        "km": pokemon.get("egg_km_walked_target", -1),
+                        "id": egg.get("id", -1),
+                        "km": egg.get("egg_km_walked_target", -1),
                         "used": False
                     })
-                elif 'is_egg' not in pokemon and pokemon['id'] in lookup_ids:
-                    matched_pokemon.append(pokemon)
-                continue
-            if "player_stats" in inv_data:
-                self.km_walked = inv_data.get("player_stats", {}).get("km_walked", 0)
-        
+            elif pokemon.unique_id in lookup_ids:
+                matched_pokemon.append(pokemon)
+        self.km_walked = inventory.player().player_stats.get("km_walked", 0)
+
         self.used_incubators = temp_used_incubators
         if self.used_incubators:
             self.used_incubators.sort(key=lambda x: x.get("km"))
@@ -179,11 +174,13 @@ class IncubateEggs(BaseTask):
         return matched_pokemon
 
     def _hatch_eggs(self):
-        response_dict = self.bot.api.get_hatched_eggs()
+        response_dict = self.bot.api.batch.enqueue('get_hatched_eggs').result()
         try:
             result = reduce(dict.__getitem__, ["responses", "GET_HATCHED_EGGS"], response_dict)
         except KeyError:
             return WorkerResult.ERROR
+        # queued only now so an error above leaves nothing pending
+        inventory_request = inventory.enqueue_inventory()
         pokemon_ids = []
         if 'pokemon_id' in result:
             pokemon_ids = [id for id in result['pokemon_id']]
@@ -192,14 +189,11 @@ class IncubateEggs(BaseTask):
         xp = result.get('experience_awarded', [])
         sleep(self.hatching_animation_delay)
         try:
-            pokemon_data = self._check_inventory(pokemon_ids)
-            pokemon_list = [inventory.Pokemon(p) for p in pokemon_data]
-            for pokemon in pokemon_list:
-                inventory.pokemons().remove(pokemon.unique_id)
-                inventory.pokemons().add(pokemon)
+            # the refreshed inventory already holds the hatched pokemon
+            pokemon_list = self._check_inventory(pokemon_ids, inventory_request.result())
         except:
-            pokemon_data = []
-        if not pokemon_ids or not pokemon_data:
+            pokemon_list = []
+        if not pokemon_ids or not pokemon_list:
             self.emit_event(
                 'egg_hatched_fail',
                 formatted= "Error trying to hatch egg."
@@ -269,7 +263,7 @@ class IncubateEggs(BaseTask):
         :return: True if the stats should be displayed; otherwise, False.
         :rtype: bool
         """
-        return self.next_update is None or datetime.now() >= self.next_update
+        return self.next_update is None or clock.now() >= self.next_update
 
     def _compute_next_update(self):
         """
@@ -277,4 +271,4 @@ class IncubateEggs(BaseTask):
         :return: Nothing.
         :rtype: None
         """
-        self.next_update = datetime.now() + timedelta(seconds=self.min_interval)
+        self.next_update = clock.now() + timedelta(seconds=self.min_interval)
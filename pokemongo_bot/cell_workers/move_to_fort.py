@@ -149,27 +149,25 @@ class MoveToFort(BaseTask):
             return None, 0
 
     def get_nearest_fort(self):
-        forts = self.bot.get_forts(order_by_distance=True)
-        # Remove stops that are still on timeout
-        forts = filter(
-            lambda x: x["id"] not in self.bot.fort_timeouts or (
-                x.get('active_fort_modifier', False) and self.wait_at_fort
-            ),
-            forts
-        )
+        # lures only attract from lure_max_distance, closer forts are enough
+        nearby = self.bot.get_forts_in_range(self.lure_max_distance)
 
-        next_attracted_pts, lure_distance = self._get_nearest_fort_on_lure_way(forts)
+        # Remove stops that are still on timeout, lured ones stay when waiting at lures
+        timeouts = set(self.bot.fort_timeouts)
+        if self.wait_at_fort and timeouts:
+            timeouts.difference_update(x['id'] for x in self.bot.get_forts() if x.get('active_fort_modifier', False))
 
-        # Remove all forts which were spun in the last ticks to avoid circles if set
-        if self.bot.config.forts_avoid_circles or not self.wait_at_fort:
-            forts = filter(lambda x: x["id"] not in self.bot.recent_forts, forts)
+        next_attracted_pts, lure_distance = self._get_nearest_fort_on_lure_way(
+            [x for x in nearby if x['id'] not in timeouts])
 
         self.lure_distance = lure_distance
 
         if (lure_distance > 0):
             return next_attracted_pts
 
-        if len(forts):
-            return forts[0]
-        else:
-            return None
+        # Remove all forts which were spun in the last ticks to avoid circles if set
+        exclude = timeouts
+        if self.bot.config.forts_avoid_circles or not self.wait_at_fort:
+            exclude = timeouts.union(self.bot.recent_forts)
+
+        return self.bot.get_nearest_fort(exclude=exclude)
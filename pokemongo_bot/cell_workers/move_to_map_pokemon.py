@@ -60,7 +60,7 @@ import json
 import base64
 import requests
 
-from pokemongo_bot import inventory
+from pokemongo_bot import clock, inventory
 from pokemongo_bot.base_dir import _base_dir
 from pokemongo_bot.cell_workers.utils import distance, format_dist, format_time, fort_details
 from pokemongo_bot.walkers.walker_factory import walker_factory
@@ -280,10 +280,10 @@ class MoveToMapPokemon(BaseTask):
         self._teleport_to(pokemon)
         catch_worker = PokemonCatchWorker(pokemon, self.bot, self.config)
         api_encounter_response = catch_worker.create_encounter_api_call()
-        time.sleep(self.config.get('snipe_sleep_sec', 2))
+        clock.sleep(self.config.get('snipe_sleep_sec', 2))
         self._teleport_back(last_position)
         self.bot.api.set_position(last_position[0], last_position[1], self.alt, False)
-        time.sleep(self.config.get('snipe_sleep_sec', 2))
+        clock.sleep(self.config.get('snipe_sleep_sec', 2))
         self.bot.heartbeat()
         catch_worker.work(api_encounter_response)
         self.add_caught(pokemon)
@@ -343,7 +343,7 @@ class MoveToMapPokemon(BaseTask):
                         if count >= self.config.get('snipe_max_in_chain', 2):
                             return WorkerResult.SUCCESS
                         if count is not 1:
-                            time.sleep(self.config.get('snipe_sleep_sec', 2)*5)
+                            clock.sleep(self.config.get('snipe_sleep_sec', 2)*5)
                     else:
                         if self.config.get('debug', False):
                             self._emit_log('this pokemon is not good enough to snipe {}'.format(pokemon))
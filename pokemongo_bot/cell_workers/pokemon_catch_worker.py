@@ -1,14 +1,12 @@
 # -*- coding: utf-8 -*-
 
 import os
-import time
 import json
 import logging
-import time
 import sys
 
 from random import random, randrange, uniform
-from pokemongo_bot import inventory
+from pokemongo_bot import clock, inventory
 from pokemongo_bot.base_task import BaseTask
 from pokemongo_bot.human_behaviour import sleep, action_delay
 from pokemongo_bot.inventory import Pokemon
@@ -169,7 +167,7 @@ class PokemonCatchWorker(BaseTask):
         )
 
         # simulate app
-        time.sleep(3)
+        clock.sleep(3)
 
         # check for VIP pokemon
         if is_vip:
@@ -196,7 +194,7 @@ class PokemonCatchWorker(BaseTask):
                 break
 
         # simulate app
-        time.sleep(5)
+        clock.sleep(5)
 
     def create_encounter_api_call(self):
         encounter_id = self.pokemon['encounter_id']
@@ -715,7 +713,7 @@ class PokemonCatchWorker(BaseTask):
 
     def start_rest(self):
         duration = int(uniform(self.rest_duration_min, self.rest_duration_max))
-        resume = datetime.now() + timedelta(seconds=duration)
+        resume = clock.now() + timedelta(seconds=duration)
         
         self.emit_event(
             'vanish_limit_reached',
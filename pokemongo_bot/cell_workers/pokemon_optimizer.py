@@ -1,12 +1,14 @@
 import difflib
-import itertools
-import json
 import math
 import os
 
-from pokemongo_bot import inventory
+import numpy as np
+
+from pokemongo_bot import inventory, static_data
 from pokemongo_bot.base_dir import _base_dir
 from pokemongo_bot.base_task import BaseTask
+from pokemongo_bot.bulk_release import BulkReleaser
+from pokemongo_bot.evolution_planner import LUCKY_EGG_DURATION, EvolutionPlanner
 from pokemongo_bot.human_behaviour import sleep, action_delay
 from pokemongo_bot.item_list import Item
 from pokemongo_bot.worker_result import WorkerResult
@@ -17,6 +19,148 @@ ERROR_XP_BOOST_ALREADY_ACTIVE = 3
 ERROR_NO_ITEMS_REMAINING = 4
 ERROR_LOCATION_UNSET = 5
 
+# sort keys CpTable.score() computes for a whole list at once
+CP_TABLE_KEYS = ("cp_exact", "iv", "ivcp", "ncp")
+
+
+class KeepRule(object):
+    """
+    A rule of the "keep" config, compiled once. Scores a whole list of
+    pokemons at a time: one column per sort key and the evolve and upgrade
+    eligibility as boolean masks.
+    """
+
+    def __init__(self, rule, whitelist_names=(), blacklist_names=()):
+        self.mode = rule.get("mode", "by_family")
+        self.top = max(rule.get("top", 0), 0)
+        self.evolve = rule.get("evolve", True)
+        self.upgrade = rule.get("upgrade", False)
+        self.whitelist_names = whitelist_names
+        self.blacklist_names = blacklist_names
+        self.keys = []
+        # (column, minimum value) the pokemons must reach to be evolved or upgraded
+        self.minimums = []
+
+        for a in rule.get("sort", []):
+            if (type(a) is str) or (type(a) is unicode):
+                self.keys.append(a)
+            elif type(a) is dict:
+                self.minimums.append((len(self.keys), a.values()[0]))
+                self.keys.append(a.keys()[0])
+            elif type(a) is list:
+                self.minimums.append((len(self.keys), a[1]))
+                self.keys.append(a[0])
+
+    def score(self, pokemon_list):
+        """
+        :return: The scores, one row per pokemon and one column per sort key,
+                 and the may_try_evolve and may_try_upgrade masks.
+        :rtype: tuple
+        """
+        count = len(pokemon_list)
+        columns = []
+        table = None
+
+        for key in self.keys:
+            if key in CP_TABLE_KEYS:
+                if table is None:
+                    table = inventory.CpTable.score(pokemon_list)
+                columns.append(table[key])
+            else:
+                columns.append(np.array([getattr(p, key, 0) for p in pokemon_list], dtype=float))
+
+        scores = np.column_stack(columns) if columns else np.empty((count, 0))
+        eligible = np.ones(count, dtype=bool)
+
+        for column, minimum in self.minimums:
+            eligible &= scores[:, column] >= minimum
+
+        has_next_evolution = np.array([getattr(p, "has_next_evolution", False) and p.has_next_evolution()
+                                       for p in pokemon_list], dtype=bool)
+        may_try_evolve = eligible & has_next_evolution & bool(self.evolve)
+        may_try_upgrade = eligible & bool(self.upgrade)
+
+        return scores, may_try_evolve, may_try_upgrade
+
+    def rank(self, pokemon_list):
+        """
+        Sorts the pokemons best first, pokemons with the same score keep
+        their order.
+        :rtype: Ranking
+        """
+        return self.rank_groups([pokemon_list])[0]
+
+    def rank_groups(self, groups):
+        """
+        Sorts several lists of pokemons, all scored in one go.
+        :param groups: Lists of pokemons.
+        :return: One Ranking per list.
+        :rtype: list
+        """
+        sizes = [len(group) for group in groups]
+        pokemon_list = [p for group in groups for p in group]
+        scores, may_try_evolve, may_try_upgrade = self.score(pokemon_list)
+
+        # lexsort sorts ascending on the last key first: by group, then by
+        # score from the first sort key to the last one, best first
+        group_indexes = np.repeat(np.arange(len(groups)), sizes)
+        order = np.lexsort(np.vstack((-scores.T[::-1], group_indexes)))
+        pokemon_list = [pokemon_list[i] for i in order]
+        scores, may_try_evolve, may_try_upgrade = scores[order], may_try_evolve[order], may_try_upgrade[order]
+
+        bounds = np.cumsum([0] + sizes)
+        return [Ranking(pokemon_list[start:end], scores[start:end], may_try_evolve[start:end], may_try_upgrade[start:end])
+                for start, end in zip(bounds[:-1], bounds[1:])]
+
+
+class Ranking(object):
+    """
+    Pokemons sorted by a KeepRule, with their scores and masks in the same
+    order.
+    """
+
+    def __init__(self, pokemon_list, scores, may_try_evolve, may_try_upgrade):
+        self.pokemon_list = pokemon_list
+        self.scores = scores
+        self.may_try_evolve = may_try_evolve
+        self.may_try_upgrade = may_try_upgrade
+
+    def __len__(self):
+        return len(self.pokemon_list)
+
+    def subset(self, mask):
+        indexes = np.flatnonzero(mask)
+        return Ranking([self.pokemon_list[i] for i in indexes], self.scores[indexes],
+                       self.may_try_evolve[indexes], self.may_try_upgrade[indexes])
+
+    def at_least(self, worst):
+        """
+        :param worst: Scores, one per sort key.
+        :return: Mask of the pokemons scoring at least as much as worst,
+                 the scores being compared key after key like tuples.
+        """
+        above = np.zeros(len(self), dtype=bool)
+        below = np.zeros(len(self), dtype=bool)
+
+        for column, value in enumerate(worst):
+            undecided = ~(above | below)
+            above |= undecided & (self.scores[:, column] > value)
+            below |= undecided & (self.scores[:, column] < value)
+
+        return ~below
+
+    def select(self, worst, limit=1000):
+        """
+        :return: The pokemons scoring at least worst, at most limit of them,
+                 as (try_evolve, try_upgrade, keep) lists.
+        """
+        best = np.flatnonzero(self.at_least(worst))[:limit]
+        try_evolve = [self.pokemon_list[i] for i in best if self.may_try_evolve[i]]
+        try_upgrade = [self.pokemon_list[i] for i in best if not self.may_try_evolve[i] and self.may_try_upgrade[i]]
+        keep = [self.pokemon_list[i] for i in best]
+
+        return try_evolve, try_upgrade, keep
+
 
 class PokemonOptimizer(BaseTask):
     SUPPORTED_TASK_API_VERSION = 1
@@ -29,17 +173,15 @@ class PokemonOptimizer(BaseTask):
         self.last_pokemon_count = 0
         self.pokemon_names = [p.name for p in inventory.pokemons().STATIC_DATA]
         self.stardust_count = 0
-        self.ongoing_stardust_count = 0
 
         pokemon_upgrade_cost_file = os.path.join(_base_dir, "data", "pokemon_upgrade_cost.json")
-
-        with open(pokemon_upgrade_cost_file, "r") as fd:
-            self.pokemon_upgrade_cost = json.load(fd)
+        self.pokemon_upgrade_cost = static_data.load_json(pokemon_upgrade_cost_file)
 
         self.config_min_slots_left = self.config.get("min_slots_left", 5)
         self.config_transfer = self.config.get("transfer", False)
         self.config_transfer_wait_min = self.config.get("transfer_wait_min", 3)
         self.config_transfer_wait_max = self.config.get("transfer_wait_max", 5)
+        self.config_transfer_batch_size = self.config.get("transfer_batch_size", BulkReleaser.DEFAULT_BATCH_SIZE)
         self.config_evolve = self.config.get("evolve", False)
         self.config_evolve_time = self.config.get("evolve_time", 25)
         self.config_evolve_for_xp = self.config.get("evolve_for_xp", True)
@@ -57,6 +199,11 @@ class PokemonOptimizer(BaseTask):
         if (not self.config_may_use_lucky_egg) and self.config_evolve_only_with_lucky_egg:
             self.config_evolve = False
 
+        self.keep_rules = [KeepRule(rule, *self.get_colorlist_names(rule.get("names", [])))
+                           for rule in self.config_keep]
+        # (rule index, group) -> (pokemons of the group, best of the group)
+        self.best_by_group = {}
+
     def get_pokemon_slot_left(self):
         pokemon_count = inventory.Pokemons.get_space_used()
 
@@ -77,98 +224,80 @@ class PokemonOptimizer(BaseTask):
         try_upgrade_all = []
         keep_all = []
 
-        for rule in self.config_keep:
-            mode = rule.get("mode", "by_family")
-            names = rule.get("names", [])
-            whitelist_names, blacklist_names = self.get_colorlist_names(names)
+        for index, rule in enumerate(self.keep_rules):
+            groups = []
 
-            if mode == "by_pokemon":
-                for pokemon_id, pokemon_list in self.group_by_pokemon_id(inventory.pokemons().all()):
+            if rule.mode == "by_pokemon":
+                for pokemon_id, pokemon_list in inventory.pokemons().group_by_pokemon_id():
                     name = inventory.pokemons().name_for(pokemon_id)
 
-                    if name in blacklist_names:
+                    if name in rule.blacklist_names:
                         continue
 
-                    if whitelist_names and (name not in whitelist_names):
+                    if rule.whitelist_names and (name not in rule.whitelist_names):
                         continue
 
-                    try_evolve, try_upgrade, keep = self.get_best_pokemon_for_rule(pokemon_list, rule)
-                    try_evolve_all += try_evolve
-                    try_upgrade_all += try_upgrade
-                    keep_all += keep
-            elif mode == "by_family":
-                for family_id, pokemon_list in self.group_by_family_id(inventory.pokemons().all()):
+                    groups.append((pokemon_id, pokemon_list))
+            elif rule.mode == "by_family":
+                for family_id, pokemon_list in inventory.pokemons().group_by_family():
                     matching_names = self.get_family_names(family_id)
 
-                    if any(n in blacklist_names for n in matching_names):
+                    if any(n in rule.blacklist_names for n in matching_names):
                         continue
 
-                    if whitelist_names and not any(n in whitelist_names for n in matching_names):
+                    if rule.whitelist_names and not any(n in rule.whitelist_names for n in matching_names):
                         continue
 
-                    if family_id == 133:  # "Eevee"
-                        try_evolve, try_upgrade, keep = self.get_multi_best_pokemon_for_rule(pokemon_list, rule, 3)
-                    else:
-                        try_evolve, try_upgrade, keep = self.get_best_pokemon_for_rule(pokemon_list, rule)
-
-                    try_evolve_all += try_evolve
-                    try_upgrade_all += try_upgrade
-                    keep_all += keep
-            elif mode == "overall":
+                    groups.append((family_id, pokemon_list))
+            elif rule.mode == "overall":
                 pokemon_list = []
 
                 for pokemon in inventory.pokemons().all():
                     name = pokemon.name
 
-                    if name in blacklist_names:
+                    if name in rule.blacklist_names:
                         continue
 
-                    if whitelist_names and (name not in whitelist_names):
+                    if rule.whitelist_names and (name not in rule.whitelist_names):
                         continue
 
                     pokemon_list.append(pokemon)
 
-                try_evolve, try_upgrade, keep = self.get_best_pokemon_for_rule(pokemon_list, rule)
+                groups.append((None, pokemon_list))
+
+            for try_evolve, try_upgrade, keep in self.get_best_for_groups(index, rule, groups):
                 try_evolve_all += try_evolve
                 try_upgrade_all += try_upgrade
                 keep_all += keep
 
-        try_evolve_all = self.unique_pokemon_list(try_evolve_all)
-        try_upgrade_all = self.unique_pokemon_list(try_upgrade_all)
-        keep_all = self.unique_pokemon_list(keep_all)
-
-        transfer_all = []
-        evolve_all = []
-        upgrade_all = []
-        xp_all = []
-
-        for family_id, pokemon_list in self.group_by_family_id(inventory.pokemons().all()):
-            try_evolve = [p for p in try_evolve_all if self.get_family_id(p) == family_id]
-            try_upgrade = [p for p in try_upgrade_all if self.get_family_id(p) == family_id]
-            keep = [p for p in keep_all if self.get_family_id(p) == family_id]
-
-            transfer, evolve, upgrade, xp = self.get_evolution_plan(family_id, pokemon_list, try_evolve, try_upgrade, keep)
-
-            transfer_all += transfer
-            evolve_all += evolve
-            upgrade_all += upgrade
-            xp_all += xp
-
-        self.apply_optimization(transfer_all, evolve_all, upgrade_all, xp_all)
+        try_evolve_by_family = self.index_by_family(self.unique_pokemon_list(try_evolve_all))
+        try_upgrade_by_family = self.index_by_family(self.unique_pokemon_list(try_upgrade_all))
+        keep_by_family = self.index_by_family(self.unique_pokemon_list(keep_all))
+
+        planner = EvolutionPlanner(self.pokemon_upgrade_cost,
+                                   min(self.config_upgrade_level, inventory.player().level * 2),
+                                   self.stardust_count,
+                                   evolve_for_xp=self.config_evolve_for_xp,
+                                   min_xp_evolutions=math.ceil(self.max_pokemon_storage * 0.02),
+                                   bag_size=inventory.Pokemons.get_space_used(),
+                                   bag_limit=self.max_pokemon_storage - self.config_min_slots_left - 1)
+
+        for family_id, pokemon_list in inventory.pokemons().group_by_family():
+            planner.add_family(family_id,
+                               inventory.candies().get(family_id).quantity,
+                               pokemon_list,
+                               try_evolve_by_family.get(family_id, []),
+                               try_upgrade_by_family.get(family_id, []),
+                               keep_by_family.get(family_id, []),
+                               inventory.pokemons().evolution_cost_for(family_id))
+
+        self.apply_optimization(planner.plan())
 
         return WorkerResult.SUCCESS
 
     def open_inventory(self):
-        for pokemon in inventory.pokemons().all():
-            setattr(pokemon, "ncp", pokemon.cp_percent)
-            setattr(pokemon, "dps", pokemon.moveset.dps)
-            setattr(pokemon, "dps1", pokemon.fast_attack.dps)
-            setattr(pokemon, "dps2", pokemon.charged_attack.dps)
-            setattr(pokemon, "dps_attack", pokemon.moveset.dps_attack)
-            setattr(pokemon, "dps_defense", pokemon.moveset.dps_defense)
-
+        # ncp, dps, ... are properties of inventory.Pokemon
         self.stardust_count = self.get_stardust_count()
-        self.ongoing_stardust_count = self.stardust_count
 
     def get_colorlist_names(self, names):
         whitelist_names = []
@@ -223,49 +352,71 @@ class PokemonOptimizer(BaseTask):
             self.logger.error("Unknown Pokemon name [%s]", name)
             return ""
 
-    def group_by_pokemon_id(self, pokemon_list):
-        sorted_list = sorted(pokemon_list, key=self.get_pokemon_id)
-        return itertools.groupby(sorted_list, self.get_pokemon_id)
+    def index_by_family(self, pokemon_list):
+        by_family = {}
 
-    def group_by_family_id(self, pokemon_list):
-        sorted_list = sorted(pokemon_list, key=self.get_family_id)
-        return itertools.groupby(sorted_list, self.get_family_id)
+        for pokemon in pokemon_list:
+            by_family.setdefault(self.get_family_id(pokemon), []).append(pokemon)
 
-    def get_pokemon_id(self, pokemon):
-        return pokemon.pokemon_id
+        return by_family
 
     def get_family_id(self, pokemon):
         return pokemon.first_evolution_id
 
+    def get_best_for_groups(self, rule_index, rule, groups):
+        """
+        Applies a keep rule to groups of pokemons.
+        :param groups: (family or pokemon id, pokemons) pairs.
+        :return: (try_evolve, try_upgrade, keep) of each group.
+        :rtype: list
+        """
+        # A group is only scored again when its pokemons changed. Pokemon
+        # objects are replaced rather than modified (refresh, evolve,
+        # upgrade), so comparing the objects is enough.
+        members = [frozenset(id(p) for p in pokemon_list) for _, pokemon_list in groups]
+        changed = [i for i, (key, _) in enumerate(groups)
+                   if self.best_by_group.get((rule_index, key), (None,))[0] != members[i]]
+        rankings = rule.rank_groups([groups[i][1] for i in changed]) if changed else []
+
+        for i, ranking in zip(changed, rankings):
+            key, pokemon_list = groups[i]
+
+            if rule.mode == "by_family" and key == 133:  # "Eevee"
+                best = self.get_multi_best_of_ranking(ranking, rule, 3)
+            else:
+                best = self.get_best_of_ranking(ranking, rule)
+
+            # the pokemons are held so that their ids are not reused
+            self.best_by_group[(rule_index, key)] = (members[i], pokemon_list, best)
+
+        return [self.best_by_group[(rule_index, key)][2] for key, _ in groups]
+
     def get_best_pokemon_for_rule(self, pokemon_list, rule):
-        sorted_pokemon = self.sort_pokemon_list(pokemon_list, rule)
+        return self.get_best_of_ranking(rule.rank(pokemon_list), rule)
 
-        if len(sorted_pokemon) == 0:
+    def get_best_of_ranking(self, ranking, rule):
+        if len(ranking) == 0:
             return ([], [], [])
 
-        top = max(rule.get("top", 0), 0)
-        index = int(math.ceil(top)) - 1
+        index = int(math.ceil(rule.top)) - 1
 
-        if 0 < top < 1:
-            worst = object()
-
-            for a in rule.get("sort", []):
-                best_attribute = getattr(sorted_pokemon[0], a)
-                setattr(worst, a, best_attribute * (1 - top))
-        elif 0 <= index < len(sorted_pokemon):
-            worst = sorted_pokemon[index]
+        if 0 < rule.top < 1:
+            # keep the pokemons within top of the best one
+            worst = ranking.scores[0] * (1 - rule.top)
+        elif 0 <= index < len(ranking):
+            worst = ranking.scores[index]
         else:
-            worst = sorted_pokemon[-1]
+            worst = ranking.scores[-1]
 
-        return self.get_better_pokemon_for_rule(sorted_pokemon, rule, worst)
+        return ranking.select(worst)
 
-    def get_multi_best_pokemon_for_rule(self, family_list, rule, nb_branch):
-        sorted_family = self.sort_pokemon_list(family_list, rule)
+    def get_multi_best_of_ranking(self, ranking, rule, nb_branch):
+        pokemon_ids = np.array([p.pokemon_id for p in ranking.pokemon_list], dtype=int)
+        has_next_evolution = np.array([p.has_next_evolution() for p in ranking.pokemon_list], dtype=bool)
 
         # Handle each group of senior independently
-        senior_pokemon_list = [p for p in sorted_family if not p.has_next_evolution()]
-        other_family_list = [p for p in sorted_family if p.has_next_evolution()]
-        senior_pids = set(p.pokemon_id for p in senior_pokemon_list)
+        senior_pids = set(pokemon_ids[~has_next_evolution])
+        other_family = ranking.subset(has_next_evolution)
 
         try_evolve_all = []
         try_upgrade_all = []
@@ -273,231 +424,100 @@ class PokemonOptimizer(BaseTask):
 
         if not self.config_evolve:
             # Player handle evolution manually = Fall-back to per Pokemon behavior
-            for _, pokemon_list in self.group_by_pokemon_id(sorted_family):
-                try_evolve, try_upgrade, keep = self.get_best_pokemon_for_rule(pokemon_list, rule)
-                try_evolve_all += try_evolve
-                try_upgrade_all += try_upgrade
-                keep_all += keep
+            pids = set(pokemon_ids)
         else:
-            for _, pokemon_list in self.group_by_pokemon_id(senior_pokemon_list):
-                try_evolve, try_upgrade, keep = self.get_best_pokemon_for_rule(pokemon_list, rule)
-                try_evolve_all += try_evolve
-                try_upgrade_all += try_upgrade
-                keep_all += keep
+            pids = senior_pids
+
+        for pid in sorted(pids):
+            try_evolve, try_upgrade, keep = self.get_best_of_ranking(ranking.subset(pokemon_ids == pid), rule)
+            try_evolve_all += try_evolve
+            try_upgrade_all += try_upgrade
+            keep_all += keep
+
+        if self.config_evolve and len(other_family) > 0:
+            if len(senior_pids) < nb_branch:
+                # We did not get every combination yet = All other Pokemon are potentially good to keep
+                worst = other_family.scores[-1]
+            else:
+                best = try_evolve_all + try_upgrade_all + keep_all
+                worst = rule.rank(best).scores[-1]
 
-            if len(other_family_list) > 0:
-                if len(senior_pids) < nb_branch:
-                    # We did not get every combination yet = All other Pokemon are potentially good to keep
-                    worst = other_family_list[-1]
-                else:
-                    best = try_evolve_all + try_upgrade_all + keep_all
-                    worst = self.sort_pokemon_list(best, rule)[-1]
-
-                try_evolve, try_upgrade, keep = self.get_better_pokemon_for_rule(other_family_list, rule, worst, 12)
-                try_evolve_all += try_evolve
-                try_upgrade_all += try_upgrade
-                keep_all += keep
+            try_evolve, try_upgrade, keep = other_family.select(worst, 12)
+            try_evolve_all += try_evolve
+            try_upgrade_all += try_upgrade
+            keep_all += keep
 
         return try_evolve_all, try_upgrade_all, keep_all
 
-    def get_better_pokemon_for_rule(self, pokemon_list, rule, worst, limit=1000):
-        min_score = self.get_score(worst, rule)[0]
-        scored_list = [(p, self.get_score(p, rule)) for p in pokemon_list]
-        best = [x for x in scored_list if x[1][0] >= min_score][:limit]
-        try_evolve = [x[0] for x in best if x[1][1] is True]
-        try_upgrade = [x[0] for x in best if x[1][1] is False and x[1][2] is True]
-        keep = [x[0] for x in best]
-
-        return try_evolve, try_upgrade, keep
-
-    def sort_pokemon_list(self, pokemon_list, rule):
-        return sorted(pokemon_list, key=lambda p: self.get_score(p, rule)[0], reverse=True)
-
-    def get_score(self, pokemon, rule):
-        score = []
-        may_try_evolve = (getattr(pokemon, "has_next_evolution", False) and
-                          pokemon.has_next_evolution() and
-                          rule.get("evolve", True))
-        may_try_upgrade = rule.get("upgrade", False)
-
-        for a in rule.get("sort", []):
-            if (type(a) is str) or (type(a) is unicode):
-                value = getattr(pokemon, a, 0)
-                score.append(value)
-            elif type(a) is dict:
-                value = getattr(pokemon, a.keys()[0], 0)
-                score.append(value)
-                may_try_evolve &= (value >= a.values()[0])
-                may_try_upgrade &= (value >= a.values()[0])
-            elif type(a) is list:
-                value = getattr(pokemon, a[0], 0)
-                score.append(value)
-                may_try_evolve &= (value >= a[1])
-                may_try_upgrade &= (value >= a[1])
-
-        return tuple(score), may_try_evolve, may_try_upgrade
-
     def unique_pokemon_list(self, pokemon_list):
         seen = set()
         return [p for p in pokemon_list if not (p.unique_id in seen or seen.add(p.unique_id))]
 
-    def get_evolution_plan(self, family_id, family_list, try_evolve, try_upgrade, keep):
-        candies = inventory.candies().get(family_id).quantity
-
-        # All the rest is crap, for now
-        crap = list(family_list)
-        crap = [p for p in crap if p not in keep]
-        crap = [p for p in crap if not p.in_fort and not p.is_favorite]
-        crap.sort(key=lambda p: (p.iv, p.cp), reverse=True)
-
-        # We will gain a candy whether we choose to transfer or evolve these Pokemon
-        candies += len(crap)
-
-        evolve = []
-
-        for pokemon in try_evolve:
-            candies -= pokemon.evolution_cost
+    def apply_optimization(self, plan):
+        self.logger.info("Transferring %s Pokemon", len(plan.transfer))
 
-            if candies < 0:
-                continue
-
-            candies += 1
-            evolve.append(pokemon)
-
-        upgrade = []
-        upgrade_level = min(self.config_upgrade_level, inventory.player().level * 2)
-
-        for pokemon in try_upgrade:
-            level = int(pokemon.level * 2) - 1
-
-            if level >= upgrade_level:
-                continue
+        self.transfer_pokemon(plan.transfer)
 
-            full_upgrade_candy_cost = 0
-            full_upgrade_stardust_cost = 0
+        self.logger.info("Evolving %s Pokemon (%s the best, %s for xp)", len(plan.evolutions), len(plan.evolve), len(plan.xp))
 
-            for i in range(level, upgrade_level):
-                upgrade_cost = self.pokemon_upgrade_cost[i - 1]
-                full_upgrade_candy_cost += upgrade_cost[0]
-                full_upgrade_stardust_cost += upgrade_cost[1]
+        # one lucky egg per batch, a batch evolves while the egg lasts
+        batch_size = max(int(LUCKY_EGG_DURATION / max(self.config_evolve_time, 1)), 1)
+        lucky_egg_count = min(self.config_evolve_count_for_lucky_egg, batch_size)
 
-            candies -= full_upgrade_candy_cost
-            self.ongoing_stardust_count -= full_upgrade_stardust_cost
-
-            if (candies < 0) or (self.ongoing_stardust_count < 0):
-                continue
-
-            upgrade.append(pokemon)
-
-        if self.config_evolve_for_xp:
-            # Compute how many crap we should keep if we want to batch evolve them for xp
-            lowest_evolution_cost = inventory.pokemons().evolution_cost_for(family_id)
-
-            # transfer + keep_for_xp = len(crap)
-            # leftover_candies = candies - len(crap) + transfer * 1
-            # keep_for_xp = (leftover_candies - 1) / (lowest_evolution_cost - 1)
-            # keep_for_xp = (candies - len(crap) + transfer - 1) / (lowest_evolution_cost - 1)
-            # keep_for_xp = (candies - keep_for_xp - 1) / (lowest_evolution_cost - 1)
-
-            if (candies > 0) and lowest_evolution_cost:
-                keep_for_xp = int((candies - 1) / lowest_evolution_cost)
-            else:
-                keep_for_xp = 0
+        for batch in plan.evolution_batches(batch_size):
+            if self.skip_evolve(batch, lucky_egg_count):
+                break
 
-            xp = [p for p in crap if p.has_next_evolution() and p.evolution_cost == lowest_evolution_cost][:keep_for_xp]
-
-            # If not much to evolve, better keep the candies
-            if len(xp) < math.ceil(self.max_pokemon_storage * 0.02):
-                xp = []
-
-            transfer = [p for p in crap if p not in xp]
-        else:
-            xp = []
-            transfer = crap
-
-        return (transfer, evolve, upgrade, xp)
-
-    def apply_optimization(self, transfer, evolve, upgrade, xp):
-        self.logger.info("Transferring %s Pokemon", len(transfer))
+            for pokemon in batch:
+                self.evolve_pokemon(pokemon)
 
-        for pokemon in transfer:
-            self.transfer_pokemon(pokemon)
+        self.logger.info("Upgrading %s Pokemon [%s stardust]", len(plan.upgrade), self.stardust_count)
 
-        skip_evolve = False
+        for pokemon in plan.upgrade:
+            self.upgrade_pokemon(pokemon)
 
+    def skip_evolve(self, batch, lucky_egg_count):
         if self.config_evolve and self.config_may_use_lucky_egg and (not self.bot.config.test):
             lucky_egg = inventory.items().get(Item.ITEM_LUCKY_EGG.value)  # @UndefinedVariable
 
             if lucky_egg.count == 0:
                 if self.config_evolve_only_with_lucky_egg:
-                    skip_evolve = True
                     self.emit_event("skip_evolve",
                                     formatted="Skipping evolution step. No lucky egg available")
-            elif (len(evolve) + len(xp)) < self.config_evolve_count_for_lucky_egg:
+                    return True
+            elif len(batch) < lucky_egg_count:
                 if self.config_evolve_only_with_lucky_egg:
-                    skip_evolve = True
                     self.emit_event("skip_evolve",
-                                    formatted="Skipping evolution step. Not enough Pokemon to evolve with lucky egg: %s/%s" % (len(evolve) + len(xp), self.config_evolve_count_for_lucky_egg))
+                                    formatted="Skipping evolution step. Not enough Pokemon to evolve with lucky egg: %s/%s" % (len(batch), lucky_egg_count))
+                    return True
                 elif self.get_pokemon_slot_left() > self.config_min_slots_left:
-                    skip_evolve = True
                     self.emit_event("skip_evolve",
-                                    formatted="Waiting for more Pokemon to evolve with lucky egg: %s/%s" % (len(evolve) + len(xp), self.config_evolve_count_for_lucky_egg))
+                                    formatted="Waiting for more Pokemon to evolve with lucky egg: %s/%s" % (len(batch), lucky_egg_count))
+                    return True
             else:
                 self.use_lucky_egg()
 
-        if not skip_evolve:
-            self.logger.info("Evolving %s Pokemon (the best)", len(evolve))
-
-            for pokemon in evolve:
-                self.evolve_pokemon(pokemon)
-
-            self.logger.info("Evolving %s Pokemon (for xp)", len(xp))
-
-            for pokemon in xp:
-                self.evolve_pokemon(pokemon)
-
-        self.logger.info("Upgrading %s Pokemon [%s stardust]", len(upgrade), self.stardust_count)
-
-        for pokemon in upgrade:
-            self.upgrade_pokemon(pokemon)
-
-    def transfer_pokemon(self, pokemon):
-        if self.config_transfer and (not self.bot.config.test):
-            response_dict = self.bot.api.release_pokemon(pokemon_id=pokemon.unique_id)
-        else:
-            response_dict = {"responses": {"RELEASE_POKEMON": {"candy_awarded": 0}}}
-
-        if not response_dict:
-            return False
-
-        candy_awarded = response_dict.get("responses", {}).get("RELEASE_POKEMON", {}).get("candy_awarded", 0)
-        candy = inventory.candies().get(pokemon.pokemon_id)
+        return False
 
+    def transfer_pokemon(self, pokemon_list):
         if self.config_transfer and (not self.bot.config.test):
-            candy.add(candy_awarded)
+            releaser = BulkReleaser(self.bot,
+                                    batch_size=self.config_transfer_batch_size,
+                                    wait_min=self.config_transfer_wait_min,
+                                    wait_max=self.config_transfer_wait_max)
+            pokemon_list = releaser.release(pokemon_list)
 
-        self.emit_event("pokemon_release",
-                        formatted="Exchanged {pokemon} [IV {iv}] [CP {cp}] [{candy} candies]",
-                        data={"pokemon": pokemon.name,
-                              "iv": pokemon.iv,
-                              "cp": pokemon.cp,
-                              "candy": candy.quantity})
+        for pokemon in pokemon_list:
+            candy = inventory.candies().get(pokemon.pokemon_id)
 
-        if self.config_transfer and (not self.bot.config.test):
-            inventory.pokemons().remove(pokemon.unique_id)
-
-            with self.bot.database as db:
-                cursor = db.cursor()
-                cursor.execute("SELECT COUNT(name) FROM sqlite_master WHERE type='table' AND name='transfer_log'")
-
-                db_result = cursor.fetchone()
-
-                if db_result[0] == 1:
-                    db.execute("INSERT INTO transfer_log (pokemon, iv, cp) VALUES (?, ?, ?)", (pokemon.name, pokemon.iv, pokemon.cp))
-
-            action_delay(self.config_transfer_wait_min, self.config_transfer_wait_max)
+            self.emit_event("pokemon_release",
+                            formatted="Exchanged {pokemon} [IV {iv}] [CP {cp}] [{candy} candies]",
+                            data={"pokemon": pokemon.name,
+                                  "iv": pokemon.iv,
+                                  "cp": pokemon.cp,
+                                  "candy": candy.quantity})
 
-        return True
+        return pokemon_list
 
     def use_lucky_egg(self):
         lucky_egg = inventory.items().get(Item.ITEM_LUCKY_EGG.value)  # @UndefinedVariable
@@ -631,5 +651,5 @@ class PokemonOptimizer(BaseTask):
         return True
 
     def get_stardust_count(self):
-        response_dict = self.bot.api.get_player()
+        response_dict = self.bot.api.batch.enqueue('get_player').result()
         return response_dict.get("responses", {}).get("GET_PLAYER", {}).get("player_data", {}).get("currencies", [{}, {}])[1].get("amount", 0)
@@ -1,6 +1,6 @@
 from datetime import datetime as dt, timedelta
-from time import sleep
 from random import uniform
+from pokemongo_bot import clock
 from pokemongo_bot.base_task import BaseTask
 from pokemongo_bot.worker_result import WorkerResult
 
@@ -33,7 +33,7 @@ class RandomAlivePause(BaseTask):
     def work(self):
         if self._should_pause_now():
             if not self._sleep():
-              sleep(1)
+              clock.sleep(1)
               return WorkerResult.RUNNING
             self._schedule_next_pause()
 
@@ -83,7 +83,7 @@ class RandomAlivePause(BaseTask):
     def _should_pause_now(self):
         if self._sleep_to_go > 0: return True
 
-        now = dt.now()
+        now = clock.now()
         end = self._next_pause + timedelta(seconds=self._next_duration)
         if now >= self._next_pause and now < end:
             diff = (now - self._next_pause).total_seconds()
@@ -97,7 +97,7 @@ class RandomAlivePause(BaseTask):
         return False
 
     def _get_next_pause_schedule(self):
-        now = dt.now()
+        now = clock.now()
         next_time = now + timedelta(seconds=int(uniform(self.minInterval, self.maxInterval)))
 
         # If pause time is passed add one day
@@ -113,7 +113,7 @@ class RandomAlivePause(BaseTask):
     def _sleep(self):
         if self._next_duration <= 0: return True
 
-        now = dt.now()
+        now = clock.now()
 
         if self._sleep_to_go <= 0:
             self._sleep_to_go = self._next_duration
@@ -1,6 +1,6 @@
 from datetime import datetime as dt, timedelta
-from time import sleep
 from random import uniform
+from pokemongo_bot import clock
 from pokemongo_bot.base_task import BaseTask
 
 
@@ -84,16 +84,16 @@ class RandomPause(BaseTask):
         )
 
     def _should_pause_now(self):
-        if dt.now() >= (self._next_pause + timedelta(seconds=self._next_duration) + timedelta(seconds=1)):
+        if clock.now() >= (self._next_pause + timedelta(seconds=self._next_duration) + timedelta(seconds=1)):
             self._schedule_next_pause()
             return False
-        if dt.now() >= self._next_pause:
+        if clock.now() >= self._next_pause:
             return True
 
         return False
 
     def _get_next_pause_schedule(self):
-        now = dt.now() + self.SCHEDULING_MARGIN
+        now = clock.now() + self.SCHEDULING_MARGIN
         next_time = now + timedelta(seconds=int(uniform(self.minInterval, self.maxInterval)))
 
         # If pause time is passed add one day
@@ -113,7 +113,7 @@ class RandomPause(BaseTask):
         sleep_h, sleep_m = divmod(sleep_m, 60)
         sleep_hms = '%02d:%02d:%02d' % (sleep_h, sleep_m, sleep_s)
 
-        now = dt.now()
+        now = clock.now()
         resume = now + timedelta(seconds=sleep_to_go)
 
         self.emit_event(
@@ -126,8 +126,8 @@ class RandomPause(BaseTask):
         )
         while sleep_to_go > 0:
             if sleep_to_go < self.LOG_INTERVAL_SECONDS:
-                sleep(sleep_to_go)
+                clock.sleep(sleep_to_go)
                 sleep_to_go = 0
             else:
-                sleep(self.LOG_INTERVAL_SECONDS)
+                clock.sleep(self.LOG_INTERVAL_SECONDS)
                 sleep_to_go -= self.LOG_INTERVAL_SECONDS
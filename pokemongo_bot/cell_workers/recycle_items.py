@@ -1,7 +1,6 @@
-import json
 import os
 
-from pokemongo_bot import inventory
+from pokemongo_bot import clock, inventory, static_data
 from pokemongo_bot.base_dir import _base_dir
 from pokemongo_bot.base_task import BaseTask
 from pokemongo_bot.human_behaviour import action_delay
@@ -106,13 +105,13 @@ class RecycleItems(BaseTask):
         )
 
     def _should_force_now(self):
-        if dt.now() >= self._next_force:
+        if clock.now() >= self._next_force:
             return True
 
         return False
 
     def _get_next_force_schedule(self):
-        now = dt.now()
+        now = clock.now()
         next_time = now + timedelta(seconds=int(uniform(self.minInterval, self.maxInterval)))
 
         return next_time
@@ -124,7 +123,7 @@ class RecycleItems(BaseTask):
         :rtype: None
         :raise: ConfigException: When an item doesn't exist in ../../data/items.json
         """
-        item_list = json.load(open(os.path.join(_base_dir, 'data', 'items.json')))
+        item_list = static_data.load_json(os.path.join(_base_dir, 'data', 'items.json'))
         for config_item_name, bag_count in self.items_filter.iteritems():
             if config_item_name not in item_list.viewvalues():
                 if config_item_name not in item_list:
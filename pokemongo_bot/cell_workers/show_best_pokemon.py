@@ -1,7 +1,7 @@
 import ctypes
-from datetime import datetime, timedelta
+from datetime import timedelta
 
-from pokemongo_bot import inventory
+from pokemongo_bot import clock, inventory
 from pokemongo_bot.base_task import BaseTask
 from pokemongo_bot.worker_result import WorkerResult
 from pokemongo_bot.tree_config_builder import ConfigException
@@ -61,8 +61,6 @@ class ShowBestPokemon(BaseTask):
         if not self.info_to_show or not self.amount or not self._should_print():
             return WorkerResult.SUCCESS
 
-        self.pokemons = inventory.pokemons().all()
-
         line = self._get_pokemons_line()
         if not line:
             return WorkerResult.SUCCESS
@@ -76,7 +74,7 @@ class ShowBestPokemon(BaseTask):
         :return: True if the stats should be displayed; otherwise, False.
         :rtype: bool
         """
-        return self.next_update is None or datetime.now() >= self.next_update
+        return self.next_update is None or clock.now() >= self.next_update
 
     def _compute_next_update(self):
         """
@@ -84,7 +82,7 @@ class ShowBestPokemon(BaseTask):
         :return: Nothing.
         :rtype: None
         """
-        self.next_update = datetime.now() + timedelta(seconds=self.min_interval)
+        self.next_update = clock.now() + timedelta(seconds=self.min_interval)
 
     def print_pokemons(self, pokemons):
         """
@@ -110,19 +108,17 @@ class ShowBestPokemon(BaseTask):
         :return: A string containing pokemons and their info, ready to be displayed.
         :rtype: string
         """
-        def get_poke_info(info, pokemon):
-            poke_info = {
-                'cp': pokemon.cp,
-                'iv': pokemon.iv,
-                'ivcp': pokemon.ivcp,
-                'ncp': pokemon.cp_percent,
-                'level': pokemon.level,
-                'hp': pokemon.hp,
-                'dps': pokemon.moveset.dps
-            }
-            if info not in poke_info:
-                raise ConfigException("order by {}' isn't available".format(self.order_by))
-            return poke_info[info]
+        order_by_attribute = {
+            'cp': 'cp',
+            'iv': 'iv',
+            'ivcp': 'ivcp',
+            'ncp': 'cp_percent',
+            'level': 'level',
+            'hp': 'hp',
+            'dps': 'moveset.dps'
+        }
+        if self.order_by not in order_by_attribute:
+            raise ConfigException("order by {}' isn't available".format(self.order_by))
 
         def get_poke_info_formatted(info, pokemon):
             poke_info = {
@@ -143,7 +139,7 @@ class ShowBestPokemon(BaseTask):
 
         info_to_show = ['name'] + self.info_to_show
 
-        pokemons_ordered = sorted(self.pokemons, key=lambda x: get_poke_info(self.order_by, x), reverse=True)
+        pokemons_ordered = inventory.pokemons().ranked(order_by_attribute[self.order_by])
         pokemons_ordered = pokemons_ordered[:self.amount]
 
         poke_info = ['[{}]'.format(', '.join([get_poke_info_formatted(x, p) for x in info_to_show])) for p in pokemons_ordered]
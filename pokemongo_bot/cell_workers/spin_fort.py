@@ -2,16 +2,15 @@
 from __future__ import unicode_literals
 
 import sys
-import time
 
 from pgoapi.utilities import f2i
-from pokemongo_bot import inventory
+from pokemongo_bot import clock, inventory
 
 from pokemongo_bot.constants import Constants
 from pokemongo_bot.human_behaviour import action_delay
 from pokemongo_bot.worker_result import WorkerResult
 from pokemongo_bot.base_task import BaseTask
-from utils import distance, format_time, fort_details
+from utils import format_time, fort_details
 
 SPIN_REQUEST_RESULT_SUCCESS = 1
 SPIN_REQUEST_RESULT_OUT_OF_RANGE = 2
@@ -126,7 +125,7 @@ class SpinFort(BaseTask):
                     'cooldown_complete_timestamp_ms')
                 if pokestop_cooldown:
                     self.bot.fort_timeouts.update({fort["id"]: pokestop_cooldown})
-                    seconds_since_epoch = time.time()
+                    seconds_since_epoch = clock.time()
                     minutes_left = format_time(
                         (pokestop_cooldown / 1000) - seconds_since_epoch
                     )
@@ -172,7 +171,7 @@ class SpinFort(BaseTask):
                                         level='info',
                                         formatted="softban_log table not found, skipping log")
 
-                self.bot.fort_timeouts[fort["id"]] = (time.time() + 300) * 1000  # Don't spin for 5m
+                self.bot.fort_timeouts[fort["id"]] = (clock.time() + 300) * 1000  # Don't spin for 5m
 
                 return WorkerResult.ERROR
         action_delay(self.spin_wait_min, self.spin_wait_max)
@@ -183,25 +182,16 @@ class SpinFort(BaseTask):
         return WorkerResult.SUCCESS
 
     def get_forts_in_range(self):
-        forts = self.bot.get_forts(order_by_distance=True)
-        forts = filter(lambda fort: fort["id"] not in self.bot.fort_timeouts, forts)
-
         if self.bot.config.replicate_gps_xy_noise:
-            forts = filter(lambda fort: distance(
-                self.bot.noised_position[0],
-                self.bot.noised_position[1],
-                fort['latitude'],
-                fort['longitude']
-            ) <= Constants.MAX_DISTANCE_FORT_IS_REACHABLE, forts)
+            position = self.bot.noised_position
         else:
-            forts = filter(lambda fort: distance(
-                self.bot.position[0],
-                self.bot.position[1],
-                fort['latitude'],
-                fort['longitude']
-            ) <= Constants.MAX_DISTANCE_FORT_IS_REACHABLE, forts)
-
-        return forts
+            position = self.bot.position
+
+        return self.bot.get_forts_in_range(
+            Constants.MAX_DISTANCE_FORT_IS_REACHABLE,
+            position=position,
+            exclude=self.bot.fort_timeouts
+        )
 
     def get_items_awarded_from_fort_spinned(self, response_dict):
         experience_awarded = response_dict['responses']['FORT_SEARCH'].get('experience_awarded', 0)
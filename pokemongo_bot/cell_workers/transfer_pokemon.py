@@ -2,8 +2,8 @@ import json
 import os
 
 from pokemongo_bot import inventory
-from pokemongo_bot.human_behaviour import action_delay
 from pokemongo_bot.base_task import BaseTask
+from pokemongo_bot.bulk_release import BulkReleaser
 from pokemongo_bot.inventory import Pokemons, Pokemon, Attack
 from operator import attrgetter
 from random import randrange
@@ -19,20 +19,25 @@ class TransferPokemon(BaseTask):
         self.min_free_slot = self.config.get('min_free_slot', 5)
         self.transfer_wait_min = self.config.get('transfer_wait_min', 1)
         self.transfer_wait_max = self.config.get('transfer_wait_max', 4)
+        self.transfer_batch_size = self.config.get('transfer_batch_size', BulkReleaser.DEFAULT_BATCH_SIZE)
 
     def work(self):
         if not self._should_work():
             return
 
+        transfer_pokemons = []
         pokemon_groups = self._release_pokemon_get_groups()
         for pokemon_id, group in pokemon_groups.iteritems():
             pokemon_name = Pokemons.name_for(pokemon_id)
-            self._release_pokemon_worst_in_group(group, pokemon_name)
+            transfer_pokemons += self._release_pokemon_worst_in_group(group, pokemon_name)
 
         if self.bot.config.release.get('all'):
+            transfer_ids = set(p.unique_id for p in transfer_pokemons)
             group = [p for p in inventory.pokemons().all()
-                     if p.in_fort is False and p.is_favorite is False]
-            self._release_pokemon_worst_in_group(group, 'all')
+                     if p.in_fort is False and p.is_favorite is False and p.unique_id not in transfer_ids]
+            transfer_pokemons += self._release_pokemon_worst_in_group(group, 'all')
+
+        self.release_pokemons(transfer_pokemons)
 
     def _should_work(self):
         random_number = randrange (0,20,1) 
@@ -40,16 +45,11 @@ class TransferPokemon(BaseTask):
 
     def _release_pokemon_get_groups(self):
         pokemon_groups = {}
-        for pokemon in inventory.pokemons().all():
-            if pokemon.in_fort or pokemon.is_favorite:
-                continue
-
-            group_id = pokemon.pokemon_id
-
-            if group_id not in pokemon_groups:
-                pokemon_groups[group_id] = []
+        for pokemon_id, group in inventory.pokemons().group_by_pokemon_id():
+            group = [p for p in group if not p.in_fort and not p.is_favorite]
 
-            pokemon_groups[group_id].append(pokemon)
+            if group:
+                pokemon_groups[pokemon_id] = group
 
         return pokemon_groups
 
@@ -118,13 +118,10 @@ class TransferPokemon(BaseTask):
                             'criteria': order_criteria
                         }
                     )
-                for pokemon in transfer_pokemons:
-                    self.release_pokemon(pokemon)
+            return transfer_pokemons
         else:
             group = sorted(group, key=lambda x: x.cp, reverse=True)
-            for pokemon in group:
-                if self.should_release_pokemon(pokemon):
-                    self.release_pokemon(pokemon)
+            return [pokemon for pokemon in group if self.should_release_pokemon(pokemon)]
 
     def should_release_pokemon(self, pokemon, keep_best_mode=False):
         release_config = self._get_release_config_for(pokemon.name)
@@ -181,58 +178,29 @@ class TransferPokemon(BaseTask):
 
         return logic_to_function[cp_iv_logic](*release_results.values())
 
-    def release_pokemon(self, pokemon):
+    def release_pokemons(self, pokemons):
         """
 
-        :type pokemon: Pokemon
+        :type pokemons: list of Pokemon
         """
-        try:
-            if self.bot.config.test:
-                candy_awarded = 1
-            else:
-                response_dict = self.bot.api.release_pokemon(
-                    pokemon_id=pokemon.unique_id)
-                candy_awarded = response_dict['responses'][
-                    'RELEASE_POKEMON']['candy_awarded']
-        except KeyError:
-            return
-
-        # We could refresh here too, but adding 1 saves a inventory request
-        candy = inventory.candies().get(pokemon.pokemon_id)
-        candy.add(candy_awarded)
-        inventory.pokemons().remove(pokemon.unique_id)
-        self.bot.metrics.released_pokemon()
-        self.emit_event(
-            'pokemon_release',
-            formatted='Exchanged {pokemon} [IV {iv}] [CP {cp}] [{candy} candies]',
-            data={
-                'pokemon': pokemon.name,
-                'iv': pokemon.iv,
-                'cp': pokemon.cp,
-                'candy': candy.quantity
-            }
-        )
-        with self.bot.database as conn:
-            c = conn.cursor()
-            c.execute(
-                "SELECT COUNT(name) FROM sqlite_master WHERE type='table' AND name='transfer_log'")
-
-        result = c.fetchone()
-
-        while True:
-            if result[0] == 1:
-                conn.execute('''INSERT INTO transfer_log (pokemon, iv, cp) VALUES (?, ?, ?)''',
-                             (pokemon.name, pokemon.iv, pokemon.cp))
-                break
-            else:
-                self.emit_event(
-                    'transfer_log',
-                    sender=self,
-                    level='info',
-                    formatted="transfer_log table not found, skipping log"
-                )
-                break
-        action_delay(self.transfer_wait_min, self.transfer_wait_max)
+        releaser = BulkReleaser(self.bot,
+                                batch_size=self.transfer_batch_size,
+                                wait_min=self.transfer_wait_min,
+                                wait_max=self.transfer_wait_max,
+                                simulate=self.bot.config.test)
+
+        for pokemon in releaser.release(pokemons):
+            candy = inventory.candies().get(pokemon.pokemon_id)
+            self.emit_event(
+                'pokemon_release',
+                formatted='Exchanged {pokemon} [IV {iv}] [CP {cp}] [{candy} candies]',
+                data={
+                    'pokemon': pokemon.name,
+                    'iv': pokemon.iv,
+                    'cp': pokemon.cp,
+                    'candy': candy.quantity
+                }
+            )
 
     def _get_release_config_for(self, pokemon):
         release_config = self.bot.config.release.get(pokemon)
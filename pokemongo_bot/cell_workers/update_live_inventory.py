@@ -1,8 +1,8 @@
 import ctypes
 import logging
-from datetime import datetime, timedelta
+from datetime import timedelta
 
-from pokemongo_bot import inventory
+from pokemongo_bot import clock, inventory
 from pokemongo_bot.base_task import BaseTask
 from pokemongo_bot.worker_result import WorkerResult
 from pokemongo_bot.tree_config_builder import ConfigException
@@ -98,7 +98,7 @@ class UpdateLiveInventory(BaseTask):
         :return: True if the stats should be displayed; otherwise, False.
         :rtype: bool
         """
-        return self.next_update is None or datetime.now() >= self.next_update
+        return self.next_update is None or clock.now() >= self.next_update
 
     def compute_next_update(self):
         """
@@ -106,7 +106,7 @@ class UpdateLiveInventory(BaseTask):
         :return: Nothing.
         :rtype: None
         """
-        self.next_update = datetime.now() + timedelta(seconds=self.min_interval)
+        self.next_update = clock.now() + timedelta(seconds=self.min_interval)
 
     def print_inv(self, items, is_debug=False):
         """
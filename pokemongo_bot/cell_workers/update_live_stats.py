@@ -4,13 +4,13 @@ import os
 import logging
 
 from sys import stdout, platform as _platform
-from datetime import datetime, timedelta
+from datetime import timedelta
 
 from pokemongo_bot.base_task import BaseTask
 from pokemongo_bot.worker_result import WorkerResult
 from pokemongo_bot.tree_config_builder import ConfigException
 from pokemongo_bot.base_dir import _base_dir
-from pokemongo_bot import inventory
+from pokemongo_bot import clock, inventory
 
 # XP file
 import json
@@ -185,7 +185,7 @@ class UpdateLiveStats(BaseTask):
         """
         if not self.terminal_title and not self.terminal_log:
             return False
-        return self.next_update is None or datetime.now() >= self.next_update
+        return self.next_update is None or clock.now() >= self.next_update
 
     def _compute_next_update(self):
         """
@@ -193,7 +193,7 @@ class UpdateLiveStats(BaseTask):
         :return: Nothing.
         :rtype: None
         """
-        self.next_update = datetime.now() + timedelta(seconds=self.min_interval)
+        self.next_update = clock.now() + timedelta(seconds=self.min_interval)
 
     def _log_on_terminal(self, stats):
         """
@@ -1,4 +1,4 @@
-import time
+from pokemongo_bot import clock
 from pokemongo_bot.base_task import BaseTask
 from pokemongo_bot.worker_result import WorkerResult
 from pokemongo_bot.item_list import Item
@@ -49,7 +49,7 @@ class UseIncense(BaseTask):
       if self._has_count() > 0 and self.start_time == 0:
         return True      
       
-      using_incense = time.time() - self.start_time < 1800
+      using_incense = clock.time() - self.start_time < 1800
       if not using_incense: 
         self._update_inventory()
         if self._has_count() and self.use_incense:
@@ -57,7 +57,7 @@ class UseIncense(BaseTask):
 
     def work(self):
       if self._should_run():
-        self.start_time = time.time()
+        self.start_time = clock.time()
         type = self._get_type()        
         response_dict = self.bot.api.use_incense(incense_type=type)
         result = response_dict.get('responses', {}).get('USE_INCENSE', {}).get('result', 0)
@@ -1,18 +1,21 @@
 # -*- coding: utf-8 -*-
 
 import struct
-from math import asin, atan, cos, exp, log, pi, sin, sqrt, tan
+from math import atan, exp, log, pi, sin, sqrt, tan
 
 from colorama import init
-from networkx.algorithms.clique import find_cliques
 
-import networkx as nx
 import numpy as np
 
 from datetime import datetime as dt, timedelta
+from pokemongo_bot import clock, geo
+from pokemongo_bot.disk_cover import TOLERANCE, best_disk, covering_radius
+from pokemongo_bot.geo import distance
 
 init()
 
+LURE_DURATION_MS = 30 * 60 * 1000
+
 TIME_PERIODS = (
     (60, 'minute'),
     (3600, 'hour'),
@@ -20,26 +23,18 @@ TIME_PERIODS = (
     (86400*7, 'week')
 )
 
-FORT_CACHE = {}
 def fort_details(bot, fort_id, latitude, longitude):
     """
     Lookup fort metadata and (if possible) serve from cache.
+    The response is kept by the api ResponseCache (see api_cache.FORT_DETAILS).
     """
-
-    if fort_id not in FORT_CACHE:
-        """
-        Lookup the fort details and cache the response for future use.
-        """
-        request = bot.api.create_request()
-        request.fort_details(fort_id=fort_id, latitude=latitude, longitude=longitude)
-        try:
-            response_dict = request.call()
-            FORT_CACHE[fort_id] = response_dict['responses']['FORT_DETAILS']
-        except Exception:
-            pass
-
-    # Just to avoid KeyErrors
-    return FORT_CACHE.get(fort_id, {})
+    try:
+        response_dict = bot.api.batch.enqueue(
+            'fort_details', fort_id=fort_id, latitude=latitude, longitude=longitude).result()
+        return response_dict['responses']['FORT_DETAILS']
+    except Exception:
+        # Just to avoid KeyErrors
+        return {}
 
 def encode(cellid):
     output = []
@@ -47,13 +42,6 @@ def encode(cellid):
     return ''.join(output)
 
 
-def distance(lat1, lon1, lat2, lon2):
-    p = 0.017453292519943295
-    a = 0.5 - cos((lat2 - lat1) * p) / 2 + cos(lat1 * p) * \
-        cos(lat2 * p) * (1 - cos((lon2 - lon1) * p)) / 2
-    return 12742 * asin(sqrt(a)) * 1000
-
-
 def convert(distance, from_unit, to_unit):  # Converts units
     # Example of converting distance from meters to feet:
     # convert(100.0,"m","ft")
@@ -235,26 +223,46 @@ def rad2deg(rad):
 
 
 def find_biggest_cluster(radius, points, order=None):
-    graph = nx.Graph()
-    for point in points:
-            if order is '9QM=':
-                #is a lure module - 9QM=
-                now = int(time.time())
-                remaining = now - point['last_modified_timestamp_ms']
-                f = point['latitude'], point['longitude'], remaining
-            else:
-                f = point['latitude'], point['longitude'], 0
-            graph.add_node(f)
-            for node in graph.nodes():
-                if node != f and distance(f[0], f[1], node[0], node[1]) <= radius*2:
-                    graph.add_edge(f, node)
-    cliques = list(find_cliques(graph))
-    if len(cliques) > 0:
-        max_clique = max(list(find_cliques(graph)), key=lambda l: (len(l), sum(x[2] for x in l)))
-        merc_clique = [coord2merc(x[0], x[1]) for x in max_clique]
-        clique_x, clique_y = zip(*merc_clique)
-        best_point = np.mean(clique_x), np.mean(clique_y)
-        best_coord = merc2coord(best_point)
-        return {'latitude': best_coord[0], 'longitude': best_coord[1], 'num_points': len(max_clique)}
-    else:
+    """
+    Finds the circle of the given radius that covers the most points.
+    :param points: Forts, or anything with a latitude and a longitude.
+    :param order: '9QM=' (lure module) to prefer the lures lasting the longest
+        amongst the biggest clusters.
+    :return: The center of the cluster and the number of points it covers, or
+        None if there are no points.
+    :rtype: dict
+    """
+    if not points:
         return None
+
+    lats = np.array([point['latitude'] for point in points])
+    lngs = np.array([point['longitude'] for point in points])
+    weights = None
+    if order == '9QM=':
+        #is a lure module - 9QM=
+        now = clock.time() * 1000
+        weights = [lure_expiration(point) - now for point in points]
+
+    origin = (lats[0], lngs[0])
+    x, y = geo.project(lats, lngs, origin)
+    cx, cy, covered = best_disk(x, y, radius, weights)
+
+    # center on the covered points when it does not leave any of them out
+    merc_clique = [coord2merc(lats[i], lngs[i]) for i in covered]
+    clique_x, clique_y = zip(*merc_clique)
+    best_coord = merc2coord((np.mean(clique_x), np.mean(clique_y)))
+    mean_x, mean_y = geo.project(best_coord[0], best_coord[1], origin)
+    if covering_radius(x[covered], y[covered], mean_x, mean_y) > radius + TOLERANCE:
+        best_coord = geo.unproject(cx, cy, origin)
+
+    return {'latitude': float(best_coord[0]), 'longitude': float(best_coord[1]), 'num_points': len(covered)}
+
+
+def lure_expiration(fort):
+    """
+    Timestamp in ms at which the lure of a fort ends.
+    """
+    expiration = fort.get('lure_info', {}).get('lure_expires_timestamp_ms')
+    if expiration is None:
+        expiration = fort.get('last_modified_timestamp_ms', 0) + LURE_DURATION_MS
+    return expiration
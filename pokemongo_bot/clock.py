@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+
+import threading
+import time as _time
+from datetime import datetime
+
+
+class RealClock(object):
+    """The wall clock, what the bot runs on against the real servers"""
+
+    def time(self):
+        return _time.time()
+
+    def sleep(self, seconds):
+        if seconds > 0:
+            _time.sleep(seconds)
+
+    def now(self):
+        return datetime.now()
+
+
+class VirtualClock(object):
+    """A clock that only moves when someone sleeps
+
+    sleep() returns immediately after moving the clock forward, so a bot
+    running on it against a local server waits as long as it would on the
+    real clock without spending that time: a day of walking, catching and
+    sleep schedules plays in the time the code takes to run.
+
+    `slept` counts the seconds spent sleeping since the clock was created.
+    """
+
+    def __init__(self, start=None):
+        self._time = float(_time.time() if start is None else start)
+        self.slept = 0.0
+        self._lock = threading.Lock()
+
+    def time(self):
+        return self._time
+
+    def sleep(self, seconds):
+        if seconds > 0:
+            with self._lock:
+                self._time += seconds
+                self.slept += seconds
+
+    def now(self):
+        return datetime.fromtimestamp(self._time)
+
+
+_clock = RealClock()
+
+
+def get_clock():
+    return _clock
+
+
+def set_clock(clock):
+    """
+    Makes every delay of the bot go through clock.
+    :return: The clock used before.
+    """
+    global _clock
+    previous, _clock = _clock, clock
+    return previous
+
+
+def time():
+    return _clock.time()
+
+
+def sleep(seconds):
+    _clock.sleep(seconds)
+
+
+def now():
+    return _clock.now()
@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+
+import math
+from collections import defaultdict
+
+import numpy as np
+
+# points exactly on the circle are covered, whatever the rounding
+TOLERANCE = 1e-6  # meters
+# candidate centers checked at once, bounds the memory used by dense areas
+CHUNK_SIZE = 2048
+
+
+def best_disk(x, y, radius, weights=None):
+    """
+    Finds a circle of the given radius covering as many points as possible.
+
+    If some circle covers a set of points, it can be moved until two of them
+    are on its border (or it is centered on a point, if it covers only one),
+    so the only centers to try are the points themselves and the two centers
+    of the circles going through each pair of points at most 2 * radius
+    apart. Points are bucketed in a grid of 2 * radius cells, so pairs and
+    covered points are only looked for in the 3x3 cells around each point.
+
+    :param x: Planar coordinates of the points, in meters (see geo.project).
+    :param y: Planar coordinates of the points, in meters.
+    :param radius: Radius of the circle in meters.
+    :param weights: Tie-breaker, amongst the circles covering the most points
+        the one with the highest sum of weights wins.
+    :return: x and y of the center and indices of the covered points, or
+        None if there are no points.
+    :rtype: tuple
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    if len(x) == 0:
+        return None
+    if weights is None:
+        weights = np.zeros(len(x))
+    else:
+        weights = np.asarray(weights, dtype=float)
+
+    cell_size = 2.0 * radius if radius > 0 else 1.0
+    grid = defaultdict(list)
+    for index, key in enumerate(zip(np.floor(x / cell_size).astype(int), np.floor(y / cell_size).astype(int))):
+        grid[key].append(index)
+
+    limit = (radius + TOLERANCE) ** 2
+    best = None
+
+    for (gx, gy), members in grid.iteritems():
+        neighbours = np.array([i
+                               for dx in (-1, 0, 1)
+                               for dy in (-1, 0, 1)
+                               for i in grid.get((gx + dx, gy + dy), ())])
+        members = np.array(members)
+        nx, ny, nw = x[neighbours], y[neighbours], weights[neighbours]
+        mx, my = x[members], y[members]
+
+        # pairs (member, neighbour) close enough to be on the same circle,
+        # each pair is seen from the cell of its lowest index only
+        dx = nx[np.newaxis, :] - mx[:, np.newaxis]
+        dy = ny[np.newaxis, :] - my[:, np.newaxis]
+        d2 = dx ** 2 + dy ** 2
+        pairs = (members[:, np.newaxis] < neighbours[np.newaxis, :]) & (d2 > 0) & (d2 <= 4 * radius ** 2)
+        i, j = np.nonzero(pairs)
+
+        d = np.sqrt(d2[i, j])
+        half = np.sqrt(np.maximum(radius ** 2 - (d / 2) ** 2, 0))
+        mid_x = mx[i] + dx[i, j] / 2
+        mid_y = my[i] + dy[i, j] / 2
+        offset_x = -dy[i, j] / d * half
+        offset_y = dx[i, j] / d * half
+
+        cx = np.concatenate((mx, mid_x + offset_x, mid_x - offset_x))
+        cy = np.concatenate((my, mid_y + offset_y, mid_y - offset_y))
+
+        for start in xrange(0, len(cx), CHUNK_SIZE):
+            chunk_x = cx[start:start + CHUNK_SIZE]
+            chunk_y = cy[start:start + CHUNK_SIZE]
+            inside = ((chunk_x[:, np.newaxis] - nx[np.newaxis, :]) ** 2 +
+                      (chunk_y[:, np.newaxis] - ny[np.newaxis, :]) ** 2) <= limit
+            counts = inside.sum(axis=1)
+            scores = inside.dot(nw)
+
+            top = counts.max()
+            if best is not None and top < best[0]:
+                continue
+            candidates = np.nonzero(counts == top)[0]
+            k = candidates[np.argmax(scores[candidates])]
+            if best is None or (top, scores[k]) > best[0:2]:
+                best = (top, scores[k], chunk_x[k], chunk_y[k], neighbours[inside[k]])
+
+    return best[2], best[3], np.sort(best[4])
+
+
+def covering_radius(x, y, cx, cy):
+    """
+    Distance from (cx, cy) to the farthest of the points.
+    """
+    if len(x) == 0:
+        return 0.0
+    return math.sqrt(np.max((np.asarray(x) - cx) ** 2 + (np.asarray(y) - cy) ** 2))
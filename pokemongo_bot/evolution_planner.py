@@ -0,0 +1,293 @@
+# -*- coding: utf-8 -*-
+
+import itertools
+import math
+from fractions import gcd
+
+import numpy as np
+
+# seconds
+LUCKY_EGG_DURATION = 30 * 60
+# above that many upgrade candidates in a family, only prefixes of the list
+# are considered instead of all the subsets
+MAX_UPGRADE_SUBSET = 8
+# size of the stardust dimension of the knapsack, bounds the solving time
+MAX_STARDUST_STEPS = 4000
+
+
+class EvolutionPlan(object):
+    """
+    What the optimizer does with the pokemons, in execution order: transfer,
+    evolve (the best ones, then the ones kept for xp) and upgrade.
+    """
+
+    def __init__(self):
+        self.transfer = []
+        self.evolve = []
+        self.upgrade = []
+        self.xp = []
+        self.stardust_cost = 0
+
+    @property
+    def evolutions(self):
+        return self.evolve + self.xp
+
+    def evolution_batches(self, size):
+        """
+        Splits the evolutions in batches, e.g. one per lucky egg.
+        :rtype: list
+        """
+        evolutions = self.evolutions
+        return [evolutions[i:i + size] for i in range(0, len(evolutions), max(size, 1))]
+
+
+class _FamilyOption(object):
+    # one way of spending the candies of a family
+    def __init__(self, upgrade, candy_cost, stardust_cost, xp_count):
+        self.upgrade = upgrade
+        self.candy_cost = candy_cost
+        self.stardust_cost = stardust_cost
+        self.xp_count = xp_count
+
+
+class _Family(object):
+    def __init__(self, family_id, evolve, crap, xp_candidates, options, evolution_cost):
+        self.family_id = family_id
+        self.evolve = evolve
+        self.crap = crap
+        self.xp_candidates = xp_candidates
+        self.options = options
+        # candies spent by each evolution for xp
+        self.evolution_cost = evolution_cost
+
+
+class EvolutionPlanner(object):
+    """
+    Plans the evolutions, upgrades and transfers of all the families at once.
+
+    The plan makes as much xp as possible: every evolution gives the same
+    xp, upgrades give none and only break ties. The pokemons the keep rules
+    want evolved are evolved first, in order, as long as the candies of
+    their family allow, as docs/pokemon_optimizer.md promises that no
+    evolution for xp takes the candies of a better pokemon. What is left is
+    shared by the upgrades, which need candies and the stardust of all
+    families, and the evolutions for xp of the pokemons which would be
+    transferred.
+
+    The options of a family are its affordable subsets of upgrades, or the
+    prefixes of the list above MAX_UPGRADE_SUBSET candidates. Picking one
+    option per family is a multiple-choice knapsack on stardust, solved by
+    dynamic programming with the stardust counted in at most
+    MAX_STARDUST_STEPS steps (rounded up, the plan never overspends). These
+    two caps bound the solving time, there is no clock involved. Before
+    solving, the evolutions for xp are limited so the bag ends below
+    bag_limit, cheapest families first, and dropped if there are fewer than
+    min_xp_evolutions. Nothing depends on the order the families were added
+    in: ties between families with the same evolution cost are broken by
+    family id.
+    """
+
+    def __init__(self, upgrade_costs, upgrade_level, stardust, evolve_for_xp=True,
+                 min_xp_evolutions=0, bag_size=0, bag_limit=None):
+        """
+        :param upgrade_costs: (candy, stardust) of each upgrade from a half level to the next.
+        :param upgrade_level: Half level the pokemons are upgraded to.
+        :param stardust: Stardust of the player.
+        :param evolve_for_xp: Whether pokemons which would be transferred are evolved for xp.
+        :param min_xp_evolutions: Fewer evolutions for xp are not worth it.
+        :param bag_size: Pokemons and eggs in the bag.
+        :param bag_limit: Pokemons the bag may hold once the plan is done, None if unlimited.
+        """
+        self.upgrade_costs = upgrade_costs
+        self.upgrade_level = upgrade_level
+        self.stardust = stardust
+        self.evolve_for_xp = evolve_for_xp
+        self.min_xp_evolutions = min_xp_evolutions
+        self.bag_size = bag_size
+        self.bag_limit = bag_limit
+        self.families = []
+
+    def upgrade_cost(self, pokemon):
+        """
+        :return: Candies and stardust needed to upgrade the pokemon, None if
+                 it is already at the upgrade level.
+        :rtype: tuple
+        """
+        level = int(pokemon.level * 2) - 1
+
+        if level >= self.upgrade_level:
+            return None
+
+        costs = [self.upgrade_costs[i - 1] for i in range(level, self.upgrade_level)]
+        return sum(c[0] for c in costs), sum(c[1] for c in costs)
+
+    def add_family(self, family_id, candies, family_list, try_evolve, try_upgrade, keep, lowest_evolution_cost):
+        """
+        :param candies: Candies of the family.
+        :param family_list: All the pokemons of the family.
+        :param try_evolve: Pokemons to evolve, the most wanted first.
+        :param try_upgrade: Pokemons to upgrade, the most wanted first.
+        :param keep: Pokemons not to transfer.
+        :param lowest_evolution_cost: Candies needed by the cheapest evolution of the family.
+        """
+        keep = set(id(p) for p in keep)
+        crap = [p for p in family_list if id(p) not in keep and not p.in_fort and not p.is_favorite]
+        crap.sort(key=lambda p: (p.iv, p.cp), reverse=True)
+
+        # We will gain a candy whether we choose to transfer or evolve these Pokemon
+        candies += len(crap)
+
+        evolve = []
+
+        for pokemon in try_evolve:
+            if candies < pokemon.evolution_cost:
+                continue
+
+            # evolving gives a candy back
+            candies -= pokemon.evolution_cost - 1
+            evolve.append(pokemon)
+
+        upgrades = [(p, self.upgrade_cost(p)) for p in try_upgrade]
+        upgrades = [(p, cost) for p, cost in upgrades if cost is not None]
+
+        if len(upgrades) <= MAX_UPGRADE_SUBSET:
+            choices = itertools.chain.from_iterable(
+                itertools.combinations(upgrades, n) for n in range(len(upgrades) + 1))
+        else:
+            choices = (upgrades[:n] for n in range(len(upgrades) + 1))
+
+        if self.evolve_for_xp and lowest_evolution_cost:
+            xp_candidates = [p for p in crap if p.has_next_evolution() and p.evolution_cost == lowest_evolution_cost]
+        else:
+            xp_candidates = []
+
+        options = []
+
+        for choice in choices:
+            candy_cost = sum(cost[0] for _, cost in choice)
+            stardust_cost = sum(cost[1] for _, cost in choice)
+
+            if candy_cost > candies or stardust_cost > self.stardust:
+                continue
+
+            # Keeping n pokemons for xp loses their n transfer candies and
+            # the last evolution still needs a full evolution cost:
+            # candies_left - n >= (n - 1) * (cost - 1) + cost
+            xp_count = 0
+
+            if xp_candidates:
+                xp_count = min(len(xp_candidates), max((candies - candy_cost - 1) // lowest_evolution_cost, 0))
+
+            options.append(_FamilyOption([p for p, _ in choice], candy_cost, stardust_cost, xp_count))
+
+        self.families.append(_Family(family_id, evolve, crap, xp_candidates, options, lowest_evolution_cost))
+
+    def plan(self):
+        """
+        :rtype: EvolutionPlan
+        """
+        # Every family can make its most evolutions for xp without stardust,
+        # so the limits are applied to them before solving: the candies of
+        # the evolutions dropped are then free for upgrades.
+        xp_counts = [max(o.xp_count for o in family.options) for family in self.families]
+
+        if self.bag_limit is not None:
+            # the pokemons kept for xp are not transferred, the bag must
+            # still end below its limit
+            transfers = sum(len(family.crap) for family in self.families)
+            xp_budget = max(self.bag_limit - (self.bag_size - transfers), 0)
+            xp_counts = self._limit(xp_counts, xp_budget)
+
+        if sum(xp_counts) < self.min_xp_evolutions:
+            # If not much to evolve, better keep the candies
+            xp_counts = [0] * len(xp_counts)
+
+        for family, xp_count in zip(self.families, xp_counts):
+            for option in family.options:
+                option.xp_count = min(option.xp_count, xp_count)
+
+        choices = self._solve()
+        plan = EvolutionPlan()
+
+        for family, choice in zip(self.families, choices):
+            option = family.options[choice]
+            xp = family.xp_candidates[:option.xp_count]
+            xp_ids = set(id(p) for p in xp)
+
+            plan.evolve += family.evolve
+            plan.upgrade += option.upgrade
+            plan.xp += xp
+            plan.transfer += [p for p in family.crap if id(p) not in xp_ids]
+            plan.stardust_cost += option.stardust_cost
+
+        return plan
+
+    def _solve(self):
+        # Index of the option chosen in each family. The value of an option
+        # is its evolutions for xp, then its number of upgrades.
+        xp_value = sum(max(len(o.upgrade) for o in family.options) for family in self.families) + 1
+        values = [[o.xp_count * xp_value + len(o.upgrade) for o in family.options] for family in self.families]
+        choices = [int(np.argmax(v)) for v in values]
+        # families with options needing stardust compete for it
+        contested = [i for i, family in enumerate(self.families)
+                     if any(o.stardust_cost for o in family.options)]
+
+        if not contested:
+            return choices
+
+        # Costs in steps of the knapsack. The step is the gcd of the costs
+        # when that fits in MAX_STARDUST_STEPS, costs are rounded up
+        # otherwise so the plan never needs more stardust than available.
+        costs = [o.stardust_cost for i in contested for o in self.families[i].options if o.stardust_cost]
+        step = reduce(gcd, costs)
+
+        if self.stardust / step > MAX_STARDUST_STEPS:
+            step = int(math.ceil(float(self.stardust) / MAX_STARDUST_STEPS))
+
+        capacity = int(self.stardust / step)
+        # best[w]: best value of the families seen so far using at most w steps
+        best = np.zeros(capacity + 1, dtype=np.int64)
+        picks = []
+
+        for i in contested:
+            options = self.families[i].options
+            new_best = np.full(capacity + 1, -1, dtype=np.int64)
+            pick = np.zeros(capacity + 1, dtype=int)
+
+            for k, option in enumerate(options):
+                weight = int(math.ceil(float(option.stardust_cost) / step))
+
+                if weight > capacity:
+                    continue
+
+                candidate = np.full(capacity + 1, -1, dtype=np.int64)
+                candidate[weight:] = best[:capacity + 1 - weight] + values[i][k]
+                better = candidate > new_best
+                new_best[better] = candidate[better]
+                pick[better] = k
+
+            best = new_best
+            picks.append(pick)
+
+        # walk back from the full capacity
+        w = capacity
+
+        for i, pick in reversed(zip(contested, picks)):
+            k = pick[w]
+            choices[i] = int(k)
+            w -= int(math.ceil(float(self.families[i].options[k].stardust_cost) / step))
+
+        return choices
+
+    def _limit(self, counts, budget):
+        # keeps the evolutions up to the budget, those of the families with
+        # the cheapest evolutions first: they use the fewest candies for xp
+        limited = [0] * len(counts)
+        order = sorted(range(len(counts)),
+                       key=lambda i: (self.families[i].evolution_cost, self.families[i].family_id))
+
+        for i in order:
+            limited[i] = min(counts[i], budget)
+            budget -= limited[i]
+
+        return limited
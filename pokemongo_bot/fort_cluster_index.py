@@ -0,0 +1,257 @@
+# -*- coding: utf-8 -*-
+
+import bisect
+import math
+from collections import defaultdict
+
+from pokemongo_bot import geo
+
+# forts exactly on a circle are inside, whatever the rounding
+TOLERANCE = 1e-6  # meters
+
+
+class _Circle(object):
+    __slots__ = ('x', 'y', 'pair', 'side', 'covered', 'lured', 'key')
+
+    def __init__(self, x, y, pair, side):
+        self.x = x
+        self.y = y
+        # the two forts on the border and on which side of them the center is
+        self.pair = pair
+        self.side = side
+        self.covered = set()
+        self.lured = 0
+        self.key = None
+
+
+class FortClusterIndex(object):
+    """Circles going through two forts, ranked by the forts they cover
+
+    Every pair of forts at most 2 * radius apart gives the two circles of
+    `radius` meters going through both of them; a spot where the most forts
+    (and lured forts) are in reach is always one of them. The circles are
+    built once and then kept up to date with sync(): only the circles around
+    a fort entering or leaving the set, or whose lure changed, are touched.
+
+    Circles are bucketed by (lured, count) and the keys kept sorted, so the
+    best cluster is found without looking at every circle, only the circles
+    of the best bucket are compared on their distance to the bot.
+
+    Positions are projected on a plane around origin, which should stay
+    within a few kilometers of the forts (e.g. the start position).
+    """
+
+    def __init__(self, origin, radius):
+        self.origin = tuple(origin[0:2])
+        self.radius = float(radius)
+        self._forts = {}
+        self._fort_grid = defaultdict(set)
+        self._circles = {}
+        self._circle_grid = defaultdict(set)
+        self._circles_of_fort = defaultdict(set)
+        self._buckets = defaultdict(set)
+        self._keys = []
+        self._next_id = 0
+
+    def __len__(self):
+        return len(self._forts)
+
+    def sync(self, forts):
+        """
+        Updates the index to the given forts.
+        :param forts: Every fort to consider, forts missing are removed.
+        :return: True if anything changed.
+        :rtype: bool
+        """
+        current = dict((fort['id'], fort) for fort in forts)
+        changed = False
+
+        for fort_id in [f for f in self._forts if f not in current]:
+            self.remove(fort_id)
+            changed = True
+
+        for fort_id, fort in current.iteritems():
+            known = self._forts.get(fort_id)
+            if known is None:
+                self.add(fort)
+                changed = True
+            elif known[2] != self._is_lured(fort):
+                self.set_lured(fort_id, self._is_lured(fort))
+                changed = True
+
+        return changed
+
+    def add(self, fort):
+        x, y = self._project(fort['latitude'], fort['longitude'])
+        fort_id = fort['id']
+        lured = self._is_lured(fort)
+
+        # circles already there which now also cover the new fort
+        for circle_id in self._near(self._circle_grid, x, y):
+            circle = self._circles[circle_id]
+            if self._inside(circle, x, y):
+                circle.covered.add(fort_id)
+                circle.lured += lured
+                self._rebucket(circle_id)
+
+        self._forts[fort_id] = (x, y, lured)
+        self._fort_grid[self._cell(x, y)].add(fort_id)
+
+        for other_id in self._near(self._fort_grid, x, y, reach=2):
+            if other_id == fort_id:
+                continue
+            ox, oy, _ = self._forts[other_id]
+            d = math.hypot(ox - x, oy - y)
+            if 0 < d <= 2 * self.radius:
+                for side in (1, -1):
+                    self._add_circle((fort_id, other_id), side)
+
+    def remove(self, fort_id):
+        x, y, lured = self._forts.pop(fort_id)
+        self._fort_grid[self._cell(x, y)].discard(fort_id)
+
+        for circle_id in list(self._circles_of_fort.pop(fort_id, ())):
+            self._remove_circle(circle_id)
+
+        for circle_id in self._near(self._circle_grid, x, y):
+            circle = self._circles[circle_id]
+            if fort_id in circle.covered:
+                circle.covered.discard(fort_id)
+                circle.lured -= lured
+                self._rebucket(circle_id)
+
+    def set_lured(self, fort_id, lured):
+        x, y, was_lured = self._forts[fort_id]
+        if was_lured == lured:
+            return
+        self._forts[fort_id] = (x, y, lured)
+
+        for circle_id in self._near(self._circle_grid, x, y):
+            circle = self._circles[circle_id]
+            if fort_id in circle.covered:
+                circle.lured += 1 if lured else -1
+                self._rebucket(circle_id)
+
+    def best(self, position, min_lured=0, min_count=0):
+        """
+        The cluster with the most lured forts, then the most forts, then the
+        closest to position. Its circle is shrunk as long as it keeps all its
+        forts, so the bot stands closer to them.
+        :return: (latitude, longitude, lured, count, distance) or None.
+        :rtype: tuple
+        """
+        px, py = self._project(position[0], position[1])
+
+        for key in reversed(self._keys):
+            lured, count = key
+            if lured < min_lured or count < min_count:
+                # keys are sorted on lured first, the next ones only have less
+                if lured < min_lured:
+                    break
+                continue
+
+            circle = min((self._circles[c] for c in self._buckets[key]),
+                         key=lambda c: ((c.x - px) ** 2 + (c.y - py) ** 2, c.x, c.y))
+            x, y, radius = self._shrink(circle)
+            lat, lng = geo.unproject(x, y, self.origin)
+            lat, lng = float(lat), float(lng)
+            return lat, lng, lured, count, geo.distance(position[0], position[1], lat, lng)
+
+        return None
+
+    def _shrink(self, circle):
+        x, y, radius = circle.x, circle.y, self.radius
+        while radius > 1:
+            center = self._center(circle.pair, circle.side, radius - 1)
+            if center is None or len(self._covered(center[0], center[1], radius - 1)) < len(circle.covered):
+                break
+            x, y = center
+            radius -= 1
+        return x, y, radius
+
+    def _add_circle(self, pair, side):
+        center = self._center(pair, side, self.radius)
+        if center is None:
+            return
+
+        circle = _Circle(center[0], center[1], pair, side)
+        circle.covered = self._covered(center[0], center[1], self.radius)
+        circle.lured = sum(self._forts[f][2] for f in circle.covered)
+
+        circle_id = self._next_id
+        self._next_id += 1
+        self._circles[circle_id] = circle
+        self._circle_grid[self._cell(circle.x, circle.y)].add(circle_id)
+        for fort_id in pair:
+            self._circles_of_fort[fort_id].add(circle_id)
+        self._rebucket(circle_id)
+
+    def _remove_circle(self, circle_id):
+        circle = self._circles.pop(circle_id)
+        self._circle_grid[self._cell(circle.x, circle.y)].discard(circle_id)
+        for fort_id in circle.pair:
+            if fort_id in self._circles_of_fort:
+                self._circles_of_fort[fort_id].discard(circle_id)
+        self._set_key(circle_id, circle, None)
+
+    def _rebucket(self, circle_id):
+        circle = self._circles[circle_id]
+        self._set_key(circle_id, circle, (circle.lured, len(circle.covered)))
+
+    def _set_key(self, circle_id, circle, key):
+        if circle.key == key:
+            return
+        if circle.key is not None:
+            bucket = self._buckets[circle.key]
+            bucket.discard(circle_id)
+            if not bucket:
+                del self._buckets[circle.key]
+                del self._keys[bisect.bisect_left(self._keys, circle.key)]
+        if key is not None:
+            if key not in self._buckets:
+                bisect.insort(self._keys, key)
+            self._buckets[key].add(circle_id)
+        circle.key = key
+
+    def _center(self, pair, side, radius):
+        x1, y1, _ = self._forts[pair[0]]
+        x2, y2, _ = self._forts[pair[1]]
+        dx, dy = x2 - x1, y2 - y1
+        d = math.hypot(dx, dy)
+        if d == 0 or d > 2 * radius:
+            return None
+        h = math.sqrt(radius ** 2 - (d / 2) ** 2)
+        return (x1 + x2) / 2 - side * h * dy / d, (y1 + y2) / 2 + side * h * dx / d
+
+    def _covered(self, x, y, radius):
+        limit = (radius + TOLERANCE) ** 2
+        covered = set()
+        for fort_id in self._near(self._fort_grid, x, y):
+            fx, fy, _ = self._forts[fort_id]
+            if (fx - x) ** 2 + (fy - y) ** 2 <= limit:
+                covered.add(fort_id)
+        return covered
+
+    def _inside(self, circle, x, y):
+        return (circle.x - x) ** 2 + (circle.y - y) ** 2 <= (self.radius + TOLERANCE) ** 2
+
+    def _near(self, grid, x, y, reach=1):
+        # cells are radius wide, anything within reach * radius is in the
+        # (2 * reach + 1) squared cells around
+        cx, cy = self._cell(x, y)
+        near = []
+        for dx in xrange(-reach, reach + 1):
+            for dy in xrange(-reach, reach + 1):
+                near.extend(grid.get((cx + dx, cy + dy), ()))
+        return near
+
+    def _cell(self, x, y):
+        return int(math.floor(x / self.radius)), int(math.floor(y / self.radius))
+
+    def _project(self, lat, lng):
+        x, y = geo.project(lat, lng, self.origin)
+        return float(x), float(y)
+
+    @staticmethod
+    def _is_lured(fort):
+        return 1 if 'active_fort_modifier' in fort else 0
@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+"""Distances, bearings and destination points
+
+Every function takes either plain numbers, in which case the `math` module
+is used and a float (or a tuple of floats) is returned, or sequences /
+numpy arrays of coordinates, which are broadcast against each other and
+computed at once with numpy (arrays of one element count as numbers):
+
+    distance(lat, lng, fort_lats, fort_lngs)  # array of meters
+
+Latitudes, longitudes and bearings are in degrees, distances in meters.
+distance() and bearing() are great circle formulas on a spherical earth,
+destination() works on the WGS-84 ellipsoid.
+"""
+
+import math
+from math import asin, atan2, cos, degrees, radians, sin, sqrt
+
+import numpy as np
+
+EARTH_RADIUS = 6371000.0  # meters, mean radius as used by haversine
+# semi-major axis, semi-minor axis (meters) and flattening
+WGS84 = (6378137.0, 6356752.3142, 1 / 298.257223563)
+VINCENTY_TOLERANCE = 10e-12
+VINCENTY_MAX_ITERATIONS = 200
+
+
+def distance(lat1, lng1, lat2, lng2):
+    """
+    Haversine distance between two points or arrays of points.
+    :return: Distance in meters.
+    :rtype: float or numpy.ndarray
+    """
+    # math raises TypeError on sequences, numpy handles them below
+    try:
+        p = 0.017453292519943295  # pi / 180
+        a = sin((lat2 - lat1) * p / 2) ** 2 + cos(lat1 * p) * cos(lat2 * p) * sin((lng2 - lng1) * p / 2) ** 2
+        return 2 * EARTH_RADIUS * asin(sqrt(a))
+    except TypeError:
+        pass
+
+    lat1, lng1, lat2, lng2 = [np.radians(np.asarray(v, dtype=float)) for v in (lat1, lng1, lat2, lng2)]
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2) ** 2
+    return 2 * EARTH_RADIUS * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def bearing(lat1, lng1, lat2, lng2):
+    """
+    Initial compass bearing to follow to go from the first point to the second.
+    :return: Bearing in degrees, from 0 (north) to 360, clockwise.
+    :rtype: float or numpy.ndarray
+    """
+    try:
+        r_lat1 = radians(lat1)
+        r_lat2 = radians(lat2)
+        d_lng = radians(lng2 - lng1)
+        x = sin(d_lng) * cos(r_lat2)
+        y = cos(r_lat1) * sin(r_lat2) - sin(r_lat1) * cos(r_lat2) * cos(d_lng)
+        return (degrees(atan2(x, y)) + 360) % 360
+    except TypeError:
+        pass
+
+    lat1, lng1, lat2, lng2 = [np.radians(np.asarray(v, dtype=float)) for v in (lat1, lng1, lat2, lng2)]
+    d_lng = lng2 - lng1
+    x = np.sin(d_lng) * np.cos(lat2)
+    y = np.cos(lat1) * np.sin(lat2) - np.sin(lat1) * np.cos(lat2) * np.cos(d_lng)
+    return (np.degrees(np.arctan2(x, y)) + 360) % 360
+
+
+def destination(lat, lng, bearing, distance):
+    """
+    Point reached after walking distance meters from lat, lng along bearing.
+    Solved with the Vincenty direct formula on the WGS-84 ellipsoid, the same
+    as geopy VincentyDistance.destination() without building geopy objects.
+    :return: Latitude and longitude of the destination.
+    :rtype: tuple
+    """
+    try:
+        return _destination(math, atan2, lat, lng, bearing, distance)
+    except TypeError:
+        pass
+
+    lat, lng, bearing, distance = np.broadcast_arrays(
+        *[np.asarray(v, dtype=float) for v in (lat, lng, bearing, distance)])
+    return _destination(np, np.arctan2, lat, lng, bearing, distance)
+
+
+def _destination(m, atan2, lat, lng, bearing, distance):
+    # m is either math or numpy, they share sin, cos, sqrt, tan and radians
+    a, b, f = WGS84
+    lat1 = m.radians(lat)
+    lng1 = m.radians(lng)
+    azimuth = m.radians(bearing)
+    sin_alpha1 = m.sin(azimuth)
+    cos_alpha1 = m.cos(azimuth)
+
+    tan_reduced1 = (1 - f) * m.tan(lat1)
+    cos_reduced1 = 1 / m.sqrt(1 + tan_reduced1 ** 2)
+    sin_reduced1 = tan_reduced1 * cos_reduced1
+    sigma1 = atan2(tan_reduced1, cos_alpha1)
+    sin_alpha = cos_reduced1 * sin_alpha1
+    cos_sq_alpha = 1 - sin_alpha ** 2
+    u_sq = cos_sq_alpha * (a ** 2 - b ** 2) / b ** 2
+
+    A = 1 + u_sq / 16384. * (4096 + u_sq * (-768 + u_sq * (320 - 175 * u_sq)))
+    B = u_sq / 1024. * (256 + u_sq * (-128 + u_sq * (74 - 47 * u_sq)))
+
+    sigma = distance / (b * A)
+    sigma_prime = 2 * math.pi + sigma * 0
+    for _ in xrange(VINCENTY_MAX_ITERATIONS):
+        change = abs(sigma - sigma_prime)
+        if (change.max() if m is np else change) <= VINCENTY_TOLERANCE:
+            break
+        cos2_sigma_m = m.cos(2 * sigma1 + sigma)
+        sin_sigma = m.sin(sigma)
+        cos_sigma = m.cos(sigma)
+        delta_sigma = B * sin_sigma * (
+            cos2_sigma_m + B / 4. * (
+                cos_sigma * (-1 + 2 * cos2_sigma_m ** 2) -
+                B / 6. * cos2_sigma_m * (-3 + 4 * sin_sigma ** 2) * (-3 + 4 * cos2_sigma_m ** 2)
+            )
+        )
+        sigma_prime = sigma
+        sigma = distance / (b * A) + delta_sigma
+
+    sin_sigma = m.sin(sigma)
+    cos_sigma = m.cos(sigma)
+    lat2 = atan2(
+        sin_reduced1 * cos_sigma + cos_reduced1 * sin_sigma * cos_alpha1,
+        (1 - f) * m.sqrt(sin_alpha ** 2 + (sin_reduced1 * sin_sigma - cos_reduced1 * cos_sigma * cos_alpha1) ** 2)
+    )
+    lambda_lng = atan2(sin_sigma * sin_alpha1, cos_reduced1 * cos_sigma - sin_reduced1 * sin_sigma * cos_alpha1)
+    C = f / 16. * cos_sq_alpha * (4 + f * (4 - 3 * cos_sq_alpha))
+    delta_lng = lambda_lng - (1 - C) * f * sin_alpha * (
+        sigma + C * sin_sigma * (cos2_sigma_m + C * cos_sigma * (-1 + 2 * cos2_sigma_m ** 2))
+    )
+
+    return m.degrees(lat2), (m.degrees(lng1 + delta_lng) + 180) % 360 - 180
+
+
+def distances_from(lat, lng, points):
+    """
+    Distances from one position to a list of objects or (lat, lng) pairs.
+    :param points: dicts with latitude and longitude keys, or pairs.
+    :return: One distance in meters per point.
+    :rtype: numpy.ndarray
+    """
+    if len(points) == 0:
+        return np.empty(0)
+    if isinstance(points[0], dict):
+        lats = [p['latitude'] for p in points]
+        lngs = [p['longitude'] for p in points]
+    else:
+        lats, lngs = zip(*points)[0:2]
+    return distance(lat, lng, lats, lngs)
+
+
+def project(lats, lngs, origin):
+    """
+    Equirectangular projection around origin, accurate enough for the few
+    kilometers around the bot.
+    :param origin: (lat, lng) of the projection origin.
+    :return: x (east) and y (north) offsets from origin in meters.
+    :rtype: tuple of numpy.ndarray
+    """
+    lats = np.asarray(lats, dtype=float)
+    lngs = np.asarray(lngs, dtype=float)
+    meters_per_degree = EARTH_RADIUS * math.pi / 180
+    x = (lngs - origin[1]) * meters_per_degree * math.cos(math.radians(origin[0]))
+    y = (lats - origin[0]) * meters_per_degree
+    return x, y
+
+
+def unproject(x, y, origin):
+    """
+    Inverse of project().
+    :return: Latitudes and longitudes.
+    :rtype: tuple
+    """
+    meters_per_degree = EARTH_RADIUS * math.pi / 180
+    lats = origin[0] + np.asarray(y, dtype=float) / meters_per_degree
+    lngs = origin[1] + np.asarray(x, dtype=float) / (meters_per_degree * math.cos(math.radians(origin[0])))
+    return lats, lngs
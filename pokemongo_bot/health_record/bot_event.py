@@ -1,5 +1,4 @@
 # -*- coding: utf-8 -*-
-from time import sleep
 
 import logging
 from raven import Client
@@ -7,9 +6,9 @@ import raven
 import os
 import uuid
 import requests
-import time
 import shelve
 import os
+from pokemongo_bot import clock
 from pokemongo_bot.base_dir import _base_dir
 
 class BotEvent(object):
@@ -47,7 +46,7 @@ class BotEvent(object):
             )
 
         self.heartbeat_wait = 15*60 # seconds
-        self.last_heartbeat = time.time()
+        self.last_heartbeat = clock.time()
 
     def capture_error(self):
         if self.config.health_record:
@@ -55,7 +54,7 @@ class BotEvent(object):
 
     def login_success(self):
         if self.config.health_record:
-            self.last_heartbeat = time.time()
+            self.last_heartbeat = clock.time()
             self.track_url('/loggedin')
 
     def login_failed(self):
@@ -72,7 +71,7 @@ class BotEvent(object):
 
     def heartbeat(self):
         if self.config.health_record:
-            current_time = time.time()
+            current_time = clock.time()
             if current_time - self.heartbeat_wait > self.last_heartbeat:
                 self.last_heartbeat = current_time
                 self.track_url('/heartbeat')
@@ -1,11 +1,12 @@
 # -*- coding: utf-8 -*-
 
-import time
 from random import random, uniform, gauss
 
+from pokemongo_bot import clock
+
 
 def sleep(seconds, delta=0.3):
-    time.sleep(jitter(seconds,delta))
+    clock.sleep(jitter(seconds,delta))
 
 
 def jitter(value, delta=0.3):
@@ -17,7 +18,7 @@ def action_delay(low, high):
     # Waits for random number of seconds between low & high numbers
     longNum = uniform(low, high)
     shortNum = float("{0:.2f}".format(longNum))
-    time.sleep(shortNum)
+    clock.sleep(shortNum)
 
 
 def random_lat_long_delta():
@@ -1,11 +1,17 @@
+import hashlib
 import json
 import logging
 import os
 import time
 from collections import OrderedDict
+from operator import attrgetter
 
+import numpy as np
+
+from pokemongo_bot import clock, static_data
 from pokemongo_bot.base_dir import _base_dir
 from pokemongo_bot.services.item_recycle_worker import ItemRecycler
+from pokemongo_bot.web_location_writer import write_atomically
 
 '''
 Helper class for updating/retrieving Inventory data
@@ -37,7 +43,7 @@ class _StaticInventoryComponent(object):
     def init_static_data(cls):
         if not hasattr(cls, 'STATIC_DATA') or cls.STATIC_DATA is None:
             cls.STATIC_DATA = cls.process_static_data(
-                json.load(open(cls.STATIC_DATA_FILE)))
+                static_data.load_json(cls.STATIC_DATA_FILE))
 
     @classmethod
     def process_static_data(cls, data):
@@ -52,8 +58,19 @@ class _BaseInventoryComponent(_StaticInventoryComponent):
 
     def __init__(self):
         self._data = {}
+        # fingerprint of each item as sent by the server
+        self._raw = {}
+        # incremented whenever the content changes, exports compare it with
+        # the version they last wrote instead of comparing the content
+        self.version = 0
+        # changed locally (catch, recycle, ...) since the last refresh
+        self.dirty = False
         super(_BaseInventoryComponent, self).__init__()
 
+    def touch(self):
+        self.version += 1
+        self.dirty = True
+
     def parse(self, item):
         # optional hook for parsing the dict for this item
         # default is to use the dict directly
@@ -72,7 +89,67 @@ class _BaseInventoryComponent(_StaticInventoryComponent):
         return ret
 
     def refresh(self, inventory):
-        self._data = self.retrieve_data(inventory)
+        """
+        Replaces the content with the one of a full inventory. The objects of
+        the items which did not change since the last refresh are kept.
+        """
+        items = self._items_by_id(inventory)
+        raw = dict((key, self._fingerprint(item)) for key, item in items.iteritems())
+        if raw == self._raw and not self.dirty:
+            return
+
+        # objects changed locally can't be trusted anymore
+        previous = {} if self.dirty else self._raw
+        data = {}
+        for key, item in items.iteritems():
+            if key in self._data and previous.get(key) == raw[key]:
+                data[key] = self._data[key]
+            else:
+                data[key] = self.parse(item)
+
+        self._data = data
+        self._raw = raw
+        self.version += 1
+        self.dirty = False
+
+    def apply_delta(self, inventory):
+        """
+        Updates the items of an inventory delta, the other ones are kept.
+        """
+        items = self._items_by_id(inventory)
+        if not items:
+            return
+        for key, item in items.iteritems():
+            self._raw[key] = self._fingerprint(item)
+            self._data[key] = self.parse(item)
+        self.version += 1
+
+    def delete(self, object_ids):
+        """
+        Removes the items deleted in an inventory delta.
+        """
+        deleted = [object_id for object_id in object_ids if object_id in self._data]
+        if not deleted:
+            return
+        for object_id in deleted:
+            del self._data[object_id]
+            self._raw.pop(object_id, None)
+        self.version += 1
+
+    def _items_by_id(self, inventory):
+        items = {}
+        for item in inventory:
+            data = item.get('inventory_item_data', {})
+            if self.TYPE in data:
+                item = data[self.TYPE]
+                items[item[self.ID_FIELD]] = item
+        return items
+
+    @staticmethod
+    def _fingerprint(item):
+        # stands for the item in comparisons without keeping a copy of it,
+        # the same for the same content whatever the order of nested dicts
+        return hashlib.sha1(json.dumps(item, sort_keys=True)).digest()
 
     def get(self, object_id):
         return self._data.get(object_id)
@@ -94,6 +171,7 @@ class Player(_BaseInventoryComponent):
         self.pokemons_captured = None
         self.poke_stop_visits = None
         self.player_stats = None
+        self.version = 0
         super(_BaseInventoryComponent, self).__init__()
 
     @property
@@ -120,7 +198,17 @@ class Player(_BaseInventoryComponent):
         self._exp = value
 
     def refresh(self,inventory):
-        self.player_stats = self.retrieve_data(inventory)
+        player_stats = self.retrieve_data(inventory)
+        if player_stats != self.player_stats:
+            self.player_stats = player_stats
+            self.version += 1
+
+    def apply_delta(self, inventory):
+        # only there when they changed
+        player_stats = self.retrieve_data(inventory)
+        if player_stats and player_stats != self.player_stats:
+            self.player_stats = player_stats
+            self.version += 1
 
     def parse(self, item):
         if not item:
@@ -135,7 +223,7 @@ class Player(_BaseInventoryComponent):
     def retrieve_data(self, inventory):
         ret = {}
         for item in inventory:
-            data = item['inventory_item_data']
+            data = item.get('inventory_item_data', {})
             if self.TYPE in data:
                 item = data[self.TYPE]
                 ret = item
@@ -154,11 +242,14 @@ class Candies(_BaseInventoryComponent):
 
     def get(self, pokemon_id):
         family_id = self.family_id_for(pokemon_id)
-        return self._data.setdefault(family_id, Candy(family_id, 0))
+        if family_id not in self._data:
+            # a placeholder is not content, it gets a version when changed
+            self._data[family_id] = Candy(family_id, 0, owner=self)
+        return self._data[family_id]
 
     def parse(self, item):
         candy = item['candy'] if 'candy' in item else 0
-        return Candy(item['family_id'], candy)
+        return Candy(item['family_id'], candy, owner=self)
 
 
 class Pokedex(_BaseInventoryComponent):
@@ -178,19 +269,22 @@ class Item(object):
     """
     Representation of an item.
     """
-    def __init__(self, item_id, item_count):
+    def __init__(self, item_id, item_count, owner=None):
         """
         Representation of an item
         :param item_id: ID of the item
         :type item_id: int
         :param item_count: Quantity of the item
         :type item_count: int
+        :param owner: Inventory component told when the count changes
+        :type owner: Items
         :return: An item
         :rtype: Item
         """
         self.id = item_id
         self.name = Items.name_for(self.id)
         self.count = item_count
+        self.owner = owner
 
     def remove(self, amount):
         """
@@ -204,6 +298,8 @@ class Item(object):
         if self.count < amount:
             raise Exception('Tried to remove more {} than you have'.format(self.name))
         self.count -= amount
+        if self.owner is not None:
+            self.owner.touch()
 
 
     def recycle(self, amount_to_recycle):
@@ -237,6 +333,8 @@ class Item(object):
         if amount < 0:
             raise Exception('Must add positive amount of {}'.format(self.name))
         self.count += amount
+        if self.owner is not None:
+            self.owner.touch()
 
     def __str__(self):
         return self.name + " : " + str(self.count)
@@ -256,7 +354,7 @@ class Items(_BaseInventoryComponent):
         """
         item_id = item_data.get(Items.ID_FIELD, None)
         item_count = item_data['count'] if 'count' in item_data else 0
-        return Item(item_id, item_count)
+        return Item(item_id, item_count, owner=self)
 
     def all(self):
         """
@@ -273,7 +371,10 @@ class Items(_BaseInventoryComponent):
         :return: Instance of the item from the cached inventory
         :rtype: Item
         """
-        return self._data.setdefault(item_id, Item(item_id, 0))
+        if item_id not in self._data:
+            # a placeholder is not content, it gets a version when changed
+            self._data[item_id] = Item(item_id, 0, owner=self)
+        return self._data[item_id]
 
     @classmethod
     def name_for(cls, item_id):
@@ -400,15 +501,97 @@ class Pokemons(_BaseInventoryComponent):
     def evolution_cost_for(cls, pokemon_id):
         return cls.data_for(pokemon_id).evolution_cost
 
+    def __init__(self):
+        super(Pokemons, self).__init__()
+        # indexes of the pokemons (not the eggs), valid for _index_version
+        self._index_version = None
+        self._pokemons = []
+        self._by_pokemon_id = {}
+        self._by_family = {}
+        self._ranked = {}
+
     def parse(self, item):
         if 'is_egg' in item:
             return Egg(item)
-        return Pokemon(item)
+        pokemon = Pokemon(item)
+        pokemon.owner = self
+        return pokemon
+
+    def _indexes(self):
+        """
+        Rebuilds the indexes if the content changed since they were built.
+        add() and remove() keep them up to date, refreshes rebuild them on
+        the next query.
+        """
+        if self._index_version == self.version:
+            return
+        self._pokemons = []
+        self._by_pokemon_id = {}
+        self._by_family = {}
+        self._ranked = {}
+        for pokemon in self._data.itervalues():
+            if not isinstance(pokemon, Egg):
+                self._index(pokemon)
+        self._index_version = self.version
+
+    def _index(self, pokemon):
+        self._pokemons.append(pokemon)
+        self._by_pokemon_id.setdefault(pokemon.pokemon_id, []).append(pokemon)
+        self._by_family.setdefault(pokemon.family_id, []).append(pokemon)
+
+    def _unindex(self, pokemon):
+        self._pokemons.remove(pokemon)
+        for index, key in ((self._by_pokemon_id, pokemon.pokemon_id), (self._by_family, pokemon.family_id)):
+            index[key].remove(pokemon)
+            if not index[key]:
+                del index[key]
 
     def all(self):
         # by default don't include eggs in all pokemon (usually just
         # makes caller's lives more difficult)
-        return [p for p in super(Pokemons, self).all() if not isinstance(p, Egg)]
+        self._indexes()
+        return list(self._pokemons)
+
+    def of_pokemon_id(self, pokemon_id):
+        self._indexes()
+        return list(self._by_pokemon_id.get(pokemon_id, []))
+
+    def of_family(self, family_id):
+        self._indexes()
+        return list(self._by_family.get(family_id, []))
+
+    def group_by_pokemon_id(self):
+        """
+        Groups the pokemons by species.
+        :return: (pokemon_id, pokemons) pairs sorted by pokemon_id.
+        :rtype: list
+        """
+        self._indexes()
+        return [(key, list(group)) for key, group in sorted(self._by_pokemon_id.iteritems())]
+
+    def group_by_family(self):
+        """
+        Groups the pokemons by family, a family is the id of its first
+        evolution.
+        :return: (family_id, pokemons) pairs sorted by family_id.
+        :rtype: list
+        """
+        self._indexes()
+        return [(key, list(group)) for key, group in sorted(self._by_family.iteritems())]
+
+    def ranked(self, *keys):
+        """
+        Sorts the pokemons by the given attributes, best first. The order is
+        kept until the content changes, so asking again is free.
+        :param keys: Attribute names, dotted names are allowed, e.g. 'iv', 'cp'
+                     or 'moveset.dps'.
+        :return: The pokemons, best first.
+        :rtype: list
+        """
+        self._indexes()
+        if keys not in self._ranked:
+            self._ranked[keys] = sorted(self._pokemons, key=attrgetter(*keys), reverse=True)
+        return list(self._ranked[keys])
 
     def all_with_eggs(self):
         # count pokemon AND eggs, since eggs are counted as bag space
@@ -420,11 +603,22 @@ class Pokemons(_BaseInventoryComponent):
         if pokemon.unique_id in self._data:
             raise ValueError("Pokemon already present in the inventory")
         self._data[pokemon.unique_id] = pokemon
+        pokemon.owner = self
+        self._update_indexes(pokemon, self._index)
 
     def remove(self, pokemon_unique_id):
         if pokemon_unique_id not in self._data:
             raise ValueError("Pokemon not present in the inventory")
-        self._data.pop(pokemon_unique_id)
+        pokemon = self._data.pop(pokemon_unique_id)
+        self._update_indexes(pokemon, self._unindex)
+
+    def _update_indexes(self, pokemon, update):
+        current = self._index_version == self.version
+        self.touch()
+        if current and not isinstance(pokemon, Egg):
+            update(pokemon)
+            self._ranked = {}
+            self._index_version = self.version
 
 
 #
@@ -531,6 +725,148 @@ class LevelToCPm(_StaticInventoryComponent):
         raise ValueError("Unknown cp_multiplier: {}".format(cp_multiplier))
 
 
+class CpTable(object):
+    """
+    CP of every species, level and IVs, as arrays
+
+    CP = (BaseAtk + AtkIV) * (BaseDef + DefIV)^0.5 * (BaseSta + StaIV)^0.5 * CPM^2 / 10
+    is a product of one factor per stat and one per level, so the full
+    (species, level, atk, def, sta) table, 50 million values, is never
+    built: ATTACK, DEFENSE and STAMINA hold the factor of each species
+    (row, by pokemon id) and IV (column), CPM2 the one of each level (by
+    level * 2 - 2). Any CP is the product of four lookups, and numpy
+    broadcasting turns arrays of pokemons into arrays of CPs.
+
+    WORST_CP and PERFECT_CP are the CP of each species at max level with
+    0 and 15 IVs, LAST_EVOLUTIONS the final evolutions of each species,
+    repeated to fill the columns.
+    """
+
+    CPM2 = None
+    ATTACK = None
+    DEFENSE = None
+    STAMINA = None
+    WORST_CP = None
+    PERFECT_CP = None
+    LAST_EVOLUTIONS = None
+
+    @classmethod
+    def init_static_data(cls):
+        if cls.ATTACK is not None:
+            return
+
+        levels = sorted(LevelToCPm.STATIC_DATA.iteritems(), key=lambda level: float(level[0]))
+        cls.CPM2 = np.array([cpm for _, cpm in levels]) ** 2
+
+        species = Pokemons.STATIC_DATA
+        base = np.zeros((len(species) + 1, 3))
+        for info in species:
+            base[info.id] = info.base_attack, info.base_defense, info.base_stamina
+        ivs = np.arange(16)
+        cls.ATTACK = base[:, 0:1] + ivs
+        cls.DEFENSE = np.sqrt(base[:, 1:2] + ivs)
+        cls.STAMINA = np.sqrt(base[:, 2:3] + ivs)
+
+        max_cpm2 = LevelToCPm.MAX_CPM ** 2
+        cls.WORST_CP = cls.ATTACK[:, 0] * cls.DEFENSE[:, 0] * cls.STAMINA[:, 0] * max_cpm2 / 10
+        cls.PERFECT_CP = cls.ATTACK[:, 15] * cls.DEFENSE[:, 15] * cls.STAMINA[:, 15] * max_cpm2 / 10
+
+        width = max(len(info.last_evolution_ids) for info in species)
+        cls.LAST_EVOLUTIONS = np.zeros((len(species) + 1, width), dtype=np.intp)
+        for info in species:
+            ids = info.last_evolution_ids
+            cls.LAST_EVOLUTIONS[info.id] = [ids[min(i, len(ids) - 1)] for i in range(width)]
+        # row 0 is no pokemon, keep it away from divisions by zero
+        cls.LAST_EVOLUTIONS[0] = species[0].id
+
+    @classmethod
+    def cp_for(cls, pokemon_id, iv_attack, iv_defense, iv_stamina, cp_multiplier):
+        """
+        Exact CP of one pokemon, without the overhead of numpy scalars.
+        :rtype: float
+        """
+        return (cls.ATTACK.item(pokemon_id, iv_attack) * cls.DEFENSE.item(pokemon_id, iv_defense)
+                * cls.STAMINA.item(pokemon_id, iv_stamina) * cp_multiplier ** 2 / 10)
+
+    @classmethod
+    def cp_perfection_for(cls, pokemon_id, iv_attack, iv_defense, iv_stamina):
+        """
+        IV CP perfection of one pokemon.
+
+        CP perfect percent is more accurate than IV perfect: attack plays
+        an important role in CP and base values differ between pokemons, so
+        15/14/15 is better than 14/15/15 for lot of them, and if the base
+        def is more than base sta, 15/15/14 is better than 15/14/15.
+        See https://github.com/jabbink/PokemonGoBot/issues/469
+
+        So calculate CP perfection at final level for the best of the final
+        evolutions of the pokemon.
+        :rtype: float
+        """
+        best = None
+        for evolution_id in Pokemons.data_for(pokemon_id).last_evolution_ids:
+            current = cls.cp_for(evolution_id, iv_attack, iv_defense, iv_stamina, LevelToCPm.MAX_CPM)
+            worst = cls.WORST_CP.item(evolution_id)
+            perfection = (current - worst) / (cls.PERFECT_CP.item(evolution_id) - worst)
+            if best is None or perfection > best:
+                best = perfection
+        return best
+
+    @classmethod
+    def cp(cls, pokemon_id, iv_attack, iv_defense, iv_stamina, cp_multiplier):
+        """
+        Exact CP of arrays of pokemons.
+        :rtype: numpy.ndarray
+        """
+        return (cls.ATTACK[pokemon_id, iv_attack] * cls.DEFENSE[pokemon_id, iv_defense]
+                * cls.STAMINA[pokemon_id, iv_stamina] * np.square(cp_multiplier) / 10)
+
+    @classmethod
+    def cp_at_level(cls, pokemon_id, iv_attack, iv_defense, iv_stamina, level):
+        level_index = (np.asarray(level) * 2).astype(np.intp) - 2
+        return (cls.ATTACK[pokemon_id, iv_attack] * cls.DEFENSE[pokemon_id, iv_defense]
+                * cls.STAMINA[pokemon_id, iv_stamina] * cls.CPM2[level_index] / 10)
+
+    @classmethod
+    def cp_perfection(cls, pokemon_id, iv_attack, iv_defense, iv_stamina):
+        """
+        IV CP perfection (see Pokemon.ivcp) of arrays of pokemons: where the
+        CP at max level of the best final evolution stands between the worst
+        and the perfect IVs.
+        :rtype: numpy.ndarray
+        """
+        evolutions = cls.LAST_EVOLUTIONS[pokemon_id]
+        iv_attack = np.asarray(iv_attack)[..., np.newaxis]
+        iv_defense = np.asarray(iv_defense)[..., np.newaxis]
+        iv_stamina = np.asarray(iv_stamina)[..., np.newaxis]
+        current = cls.cp(evolutions, iv_attack, iv_defense, iv_stamina, LevelToCPm.MAX_CPM)
+        worst = cls.WORST_CP[evolutions]
+        return ((current - worst) / (cls.PERFECT_CP[evolutions] - worst)).max(axis=-1)
+
+    @classmethod
+    def score(cls, pokemons):
+        """
+        CP and perfections of a whole bag in one go.
+        :param pokemons: List of Pokemon.
+        :return: Arrays named like the Pokemon attributes: cp_exact, iv, ivcp and ncp.
+        :rtype: dict
+        """
+        count = len(pokemons)
+        fields = np.empty((6, count))
+        for i, pokemon in enumerate(pokemons):
+            fields[:, i] = (pokemon.pokemon_id, pokemon.iv_attack, pokemon.iv_defense,
+                            pokemon.iv_stamina, pokemon.cp_m, pokemon.iv)
+        pokemon_id, iv_attack, iv_defense, iv_stamina = fields[:4].astype(np.intp)
+
+        cp_exact = cls.cp(pokemon_id, iv_attack, iv_defense, iv_stamina, fields[4])
+        return {
+            'cp_exact': cp_exact,
+            'iv': fields[5],
+            'ivcp': cls.cp_perfection(pokemon_id, iv_attack, iv_defense, iv_stamina),
+            'ncp': cp_exact / cls.PERFECT_CP[pokemon_id]
+        }
+
+
 class _Attacks(_StaticInventoryComponent):
     BY_NAME = {}  # type: Dict[string, Attack]
     BY_TYPE = {}  # type: Dict[List[Attack]]
@@ -662,25 +998,33 @@ class Type(object):
 
 
 class Candy(object):
-    def __init__(self, family_id, quantity):
+    def __init__(self, family_id, quantity, owner=None):
         self.type = Pokemons.name_for(family_id)
         self.quantity = quantity
+        self.owner = owner
 
     def consume(self, amount):
         if self.quantity < amount:
             raise Exception('Tried to consume more {} candy than you have'.format(self.type))
         self.quantity -= amount
+        if self.owner is not None:
+            self.owner.touch()
 
     def add(self, amount):
         if amount < 0:
             raise Exception('Must add positive amount of candy')
         self.quantity += amount
+        if self.owner is not None:
+            self.owner.touch()
 
 
 class Egg(object):
     def __init__(self, data):
         self._data = data
 
+    def to_dict(self):
+        return self._data
+
     def has_next_evolution(self):
         return False
 
@@ -846,8 +1190,26 @@ class PokemonInfo(object):
 
 
 class Pokemon(object):
+    # thousands of them are kept per account, no __dict__ and no copy of the
+    # server data, what is derived from the fields is computed on first use
+    __slots__ = (
+        'unique_id', 'pokemon_id', 'static', 'cp', 'cp_bm', 'cp_am',
+        'hp_max', 'hp', 'iv_attack', 'iv_defense', 'iv_stamina', 'iv',
+        'name', 'nickname_raw', 'nickname', 'in_fort', 'is_favorite',
+        'fast_attack', 'charged_attack', 'owner', '_extra',
+        '_level', '_ivcp', '_cp_exact', '_moveset'
+    )
+
+    # fields of the server data not used by the bot, kept for to_dict()
+    EXTRA_FIELDS = (
+        'creation_time_ms', 'height_m', 'weight_kg', 'num_upgrades',
+        'pokeball', 'captured_cell_id', 'deployed_fort_id', 'origin',
+        'battles_attacked', 'battles_defended', 'from_fort', 'pokemon_display'
+    )
+
     def __init__(self, data):
-        self._data = data
+        # Pokemons component holding this pokemon, told when it changes
+        self.owner = None
         # Unique ID for this particular Pokemon
         self.unique_id = data.get('id', 0)
         # Id of the such pokemons in pokedex
@@ -861,14 +1223,6 @@ class Pokemon(object):
         self.cp_bm = data['cp_multiplier']
         # Changeable part of the CP multiplier, increasing at power up
         self.cp_am = data.get('additional_cp_multiplier', .0)
-        # Resulting CP multiplier
-        self.cp_m = self.cp_bm + self.cp_am
-
-        # Current pokemon level (half of level is a normal value)
-        self.level = LevelToCPm.level_from_cpm(self.cp_m)
-
-        if 'level' not in self._data:
-            self._data['level'] = self.level
 
         # Maximum health points
         self.hp_max = data['stamina_max']
@@ -881,11 +1235,6 @@ class Pokemon(object):
         self.iv_defense = data.get('individual_defense', 0)
         self.iv_stamina = data.get('individual_stamina', 0)
 
-        # Basic Values of the pokemon (identical for all pokemons of one kind)
-        base_attack = self.static.base_attack
-        base_defense = self.static.base_defense
-        base_stamina = self.static.base_stamina
-
         self.name = self.static.name
         self.nickname_raw = data.get('nickname', '')
         self.nickname = self.nickname_raw or self.name
@@ -899,23 +1248,112 @@ class Pokemon(object):
         # Individial values (IV) perfection percent
         self.iv = self._compute_iv_perfection()
 
+        extra = tuple(data.get(field) for field in self.EXTRA_FIELDS)
+        self._extra = extra if any(v is not None for v in extra) else None
+
+        self._level = None
+        self._ivcp = None
+        self._cp_exact = None
+        self._moveset = None
+
+    @property
+    def cp_m(self):
+        # Resulting CP multiplier
+        return self.cp_bm + self.cp_am
+
+    @property
+    def level(self):
+        # Current pokemon level (half of level is a normal value)
+        if self._level is None:
+            self._level = LevelToCPm.level_from_cpm(self.cp_m)
+        return self._level
+
+    @property
+    def ivcp(self):
         # IV CP perfection - kind of IV perfection percent but calculated
         #  using weight of each IV in its contribution to CP of the best
         #  evolution of current pokemon
         # So it tends to be more accurate than simple IV perfection
-        self.ivcp = self._compute_cp_perfection()
+        if self._ivcp is None:
+            self._ivcp = CpTable.cp_perfection_for(
+                self.pokemon_id, self.iv_attack, self.iv_defense, self.iv_stamina)
+        return self._ivcp
 
+    @property
+    def cp_exact(self):
         # Exact value of current CP (not rounded)
-        self.cp_exact = _calc_cp(
-            base_attack, base_defense, base_stamina,
-            self.iv_attack, self.iv_defense, self.iv_stamina, self.cp_m)
-        assert max(int(self.cp_exact), 10) == self.cp
+        if self._cp_exact is None:
+            cp_exact = CpTable.cp_for(
+                self.pokemon_id, self.iv_attack, self.iv_defense, self.iv_stamina, self.cp_m)
+            assert max(int(cp_exact), 10) == self.cp
+            self._cp_exact = cp_exact
+        return self._cp_exact
 
+    @property
+    def cp_percent(self):
         # Percent of maximum possible CP
-        self.cp_percent = self.cp_exact / self.static.max_cp
+        return self.cp_exact / CpTable.PERFECT_CP.item(self.pokemon_id)
 
+    @property
+    def ncp(self):
+        return self.cp_percent
+
+    @property
+    def moveset(self):
         # Get moveset instance with calculated DPS and perfection percents
-        self.moveset = self._get_moveset()
+        if self._moveset is None:
+            self._moveset = self._get_moveset()
+        return self._moveset
+
+    @property
+    def dps(self):
+        return self.moveset.dps
+
+    @property
+    def dps1(self):
+        return self.fast_attack.dps
+
+    @property
+    def dps2(self):
+        return self.charged_attack.dps
+
+    @property
+    def dps_attack(self):
+        return self.moveset.dps_attack
+
+    @property
+    def dps_defense(self):
+        return self.moveset.dps_defense
+
+    def to_dict(self):
+        """
+        The pokemon in the shape of the server data (pokemon_data).
+        :rtype: dict
+        """
+        data = {
+            'id': self.unique_id,
+            'pokemon_id': self.pokemon_id,
+            'cp': self.cp,
+            'cp_multiplier': self.cp_bm,
+            'additional_cp_multiplier': self.cp_am,
+            'stamina': self.hp,
+            'stamina_max': self.hp_max,
+            'individual_attack': self.iv_attack,
+            'individual_defense': self.iv_defense,
+            'individual_stamina': self.iv_stamina,
+            'move_1': self.fast_attack.id,
+            'move_2': self.charged_attack.id,
+            'level': self.level
+        }
+        if self.nickname_raw:
+            data['nickname'] = self.nickname_raw
+        if self.is_favorite:
+            data['favorite'] = 1
+        if self._extra is not None:
+            for field, value in zip(self.EXTRA_FIELDS, self._extra):
+                if value is not None:
+                    data[field] = value
+        return data
 
     def __str__(self):
         return self.name
@@ -926,6 +1364,8 @@ class Pokemon(object):
     def update_nickname(self, new_nickname):
         self.nickname_raw = new_nickname
         self.nickname = self.nickname_raw or self.name
+        if self.owner is not None:
+            self.owner.touch()
 
     def can_evolve_now(self):
         return self.has_next_evolution() and \
@@ -977,46 +1417,6 @@ class Pokemon(object):
         iv_perfection = round((total_iv / 45.0), 2)
         return iv_perfection
 
-    def _compute_cp_perfection(self):
-        """
-        CP perfect percent is more accurate than IV perfect
-
-        We know attack plays an important role in CP, and different
-        pokemons have different base value, that's means 15/14/15 is
-        better than 14/15/15 for lot of pokemons, and if one pokemon's
-        base def is more than base sta, 15/15/14 is better than 15/14/15.
-
-        See https://github.com/jabbink/PokemonGoBot/issues/469
-
-        So calculate CP perfection at final level for the best of the final
-        evolutions of the pokemon.
-        """
-        variants = []
-        iv_attack = self.iv_attack
-        iv_defense = self.iv_defense
-        iv_stamina = self.iv_stamina
-        cp_m = LevelToCPm.MAX_CPM
-        last_evolution_ids = self.last_evolution_ids
-        for pokemon_id in last_evolution_ids:
-            poke_info = Pokemons.data_for(pokemon_id)
-            base_attack = poke_info.base_attack
-            base_defense = poke_info.base_defense
-            base_stamina = poke_info.base_stamina
-
-            # calculate CP variants at maximum level
-            worst_cp = _calc_cp(base_attack, base_defense, base_stamina,
-                                0, 0, 0, cp_m)
-            perfect_cp = _calc_cp(base_attack, base_defense, base_stamina,
-                                  cp_multiplier=cp_m)
-            current_cp = _calc_cp(base_attack, base_defense, base_stamina,
-                                  iv_attack, iv_defense, iv_stamina, cp_m)
-            cp_perfection = (current_cp - worst_cp) / (perfect_cp - worst_cp)
-            variants.append(cp_perfection)
-
-        # get best value (probably for the best evolution)
-        cp_perfection = max(variants)
-        return cp_perfection
-
     def _get_moveset(self):
         move1 = self.fast_attack
         move2 = self.charged_attack
@@ -1169,6 +1569,10 @@ class Moveset(object):
 
 
 class Inventory(object):
+    # the whole inventory is asked again every FULL_REFRESH_INTERVAL seconds,
+    # deltas never correct local estimates of items the server doesn't resend
+    FULL_REFRESH_INTERVAL = 600
+
     def __init__(self, bot):
         self.bot = bot
         self.pokedex = Pokedex()
@@ -1177,51 +1581,105 @@ class Inventory(object):
         self.pokemons = Pokemons()
         self.player = Player(self.bot)  # include inventory inside Player?
         self.egg_incubators = None
+        self.egg_incubators_version = 0
+        # new_timestamp_ms of the last inventory applied, the server only
+        # sends what changed since then
+        self.last_timestamp_ms = 0
+        # clock time of the last full inventory applied
+        self.full_at = 0
+        # version of the content of the web inventory file and of the
+        # last jsonify_inventory() result
+        self._exported_version = None
+        self._json_inventory = (None, None)
         self.refresh()
         self.item_inventory_size = None
         self.pokemon_inventory_size = None
 
+    def enqueue(self):
+        """
+        Queues a GET_INVENTORY asking for what changed since the last refresh.
+        :rtype: pokemongo_bot.request_batcher.BatchedResponse
+        """
+        last_timestamp_ms = self.last_timestamp_ms
+        if clock.time() - self.full_at >= self.FULL_REFRESH_INTERVAL:
+            last_timestamp_ms = 0
+        return self.bot.api.batch.enqueue('get_inventory', last_timestamp_ms=last_timestamp_ms)
+
     def refresh(self, inventory=None):
         if inventory is None:
-            inventory = self.bot.api.get_inventory()
-
-        inventory = inventory['responses']['GET_INVENTORY']['inventory_delta']['inventory_items']
-        for i in (self.pokedex, self.candy, self.items, self.pokemons, self.player):
-            i.refresh(inventory)
-
-        self.egg_incubators = [x["inventory_item_data"] for x in inventory if "egg_incubators" in x["inventory_item_data"]]
-
+            inventory = self.enqueue().result()
+
+        delta = inventory['responses']['GET_INVENTORY']['inventory_delta']
+        new_timestamp_ms = delta.get('new_timestamp_ms', 0)
+        if new_timestamp_ms and new_timestamp_ms < self.last_timestamp_ms:
+            # older than what we already have (a response kept since)
+            return
+
+        components = (self.pokedex, self.candy, self.items, self.pokemons, self.player)
+        if delta.get('original_timestamp_ms'):
+            # only the items changed since original_timestamp_ms
+            inventory = delta.get('inventory_items', [])
+            for i in components:
+                i.apply_delta(inventory)
+            deleted = [self._deleted_id(x) for x in inventory if 'inventory_item_data' not in x]
+            if deleted:
+                # the player stats are never deleted
+                for i in (self.pokedex, self.candy, self.items, self.pokemons):
+                    i.delete(deleted)
+        else:
+            inventory = delta['inventory_items']
+            # also drops the local estimates (dirty components) for what the server sent
+            for i in components:
+                i.refresh(inventory)
+            self.full_at = clock.time()
+
+        egg_incubators = [x["inventory_item_data"] for x in inventory if "egg_incubators" in x.get("inventory_item_data", {})]
+        if (egg_incubators or not delta.get('original_timestamp_ms')) and egg_incubators != self.egg_incubators:
+            self.egg_incubators = egg_incubators
+            self.egg_incubators_version += 1
+
+        self.last_timestamp_ms = max(self.last_timestamp_ms, new_timestamp_ms)
         self.update_web_inventory()
 
-    def init_inventory_outfile(self):
-        web_inventory = os.path.join(_base_dir, "web", "inventory-%s.json" % self.bot.config.username)
-
-        if not os.path.exists(web_inventory):
-            self.bot.logger.info('No inventory file %s found. Creating a new one' % web_inventory)
-
-            json_inventory = []
+    @staticmethod
+    def _deleted_id(item):
+        # deleted_item_key in older versions of the protos
+        if 'deleted_item' in item:
+            return item['deleted_item'].get('pokemon_id')
+        return item.get('deleted_item_key')
 
-            with open(web_inventory, "w") as outfile:
-                json.dump(json_inventory, outfile)
+    def version(self):
+        """
+        Changes whenever anything in the inventory changes.
+        :rtype: tuple
+        """
+        return (self.pokedex.version, self.candy.version, self.items.version,
+                self.pokemons.version, self.player.version, self.egg_incubators_version)
 
     def update_web_inventory(self):
-        web_inventory = os.path.join(_base_dir, "web", "inventory-%s.json" % self.bot.config.username)
-
-        if not os.path.exists(web_inventory):
-            self.init_inventory_outfile()
+        # nothing changed since the file was written
+        version = self.version()
+        if version == self._exported_version:
+            return
 
-        json_inventory = self.jsonify_inventory()
+        web_inventory = os.path.join(_base_dir, "web", "inventory-%s.json" % self.bot.config.username)
 
         try:
-            with open(web_inventory, "w") as outfile:
-                json.dump(json_inventory, outfile)
-        except (IOError, ValueError) as e:
+            write_atomically(web_inventory, json.dumps(self.jsonify_inventory()))
+        except (IOError, OSError, ValueError) as e:
             self.bot.logger.info('[x] Error while opening inventory file for write: %s' % e, 'red')
-            pass
+            return
         except:
-            raise FileIOException("Unexpected error writing to {}".web_inventory)
+            raise FileIOException("Unexpected error writing to {}".format(web_inventory))
+
+        self._exported_version = version
 
     def jsonify_inventory(self):
+        version = self.version()
+        if self._json_inventory[0] == version:
+            # callers may append to or edit the list they get
+            return list(self._json_inventory[1])
+
         json_inventory = []
 
         json_inventory.append({"inventory_item_data": {"player_stats": self.player.player_stats}})
@@ -1236,12 +1694,13 @@ class Inventory(object):
             json_inventory.append({"inventory_item_data": {"item": {"item_id": item_id, "count": item.count}}})
 
         for pokemon in self.pokemons.all_with_eggs():
-            json_inventory.append({"inventory_item_data": {"pokemon_data": pokemon._data}})
+            json_inventory.append({"inventory_item_data": {"pokemon_data": pokemon.to_dict()}})
 
         for inc in self.egg_incubators:
             json_inventory.append({"inventory_item_data": inc})
 
-        return json_inventory
+        self._json_inventory = (version, json_inventory)
+        return list(json_inventory)
 
     def retrieve_inventories_size(self):
         """
@@ -1251,7 +1710,7 @@ class Inventory(object):
         """
         # TODO: Force to update it if the player upgrades its size
         if self.item_inventory_size is None or self.pokemon_inventory_size is None:
-           player_data = self.bot.api.get_player()['responses']['GET_PLAYER']['player_data']
+           player_data = self.bot.api.batch.enqueue('get_player').result()['responses']['GET_PLAYER']['player_data']
            self.item_inventory_size = player_data['max_item_storage']
            self.pokemon_inventory_size = player_data['max_pokemon_storage']
 
@@ -1314,6 +1773,7 @@ LevelToCPm()  # init LevelToCPm
 FastAttacks()  # init FastAttacks
 ChargedAttacks()  # init ChargedAttacks
 Pokemons()  # init Pokemons
+CpTable.init_static_data()  # init CpTable, needs Pokemons and LevelToCPm
 
 
 #
@@ -1344,6 +1804,15 @@ def refresh_inventory(data=None):
     except AttributeError:
         print '_inventory was not initialized'
 
+def enqueue_inventory():
+    """
+    Queues a GET_INVENTORY for refresh_inventory(), only asking for what
+    changed since the last refresh.
+    :return: The future response.
+    :rtype: pokemongo_bot.request_batcher.BatchedResponse
+    """
+    return _inventory.enqueue()
+
 def jsonify_inventory():
     try:
         return _inventory.jsonify_inventory()
@@ -1355,6 +1824,15 @@ def update_web_inventory():
     _inventory.update_web_inventory()
 
 
+def egg_incubators():
+    """
+    Egg incubators of the last refresh.
+    :return: The inventory_item_data of each egg_incubators item.
+    :rtype: list of dict
+    """
+    return _inventory.egg_incubators
+
+
 def get_item_inventory_size():
     """
     Access to the Item inventory size.
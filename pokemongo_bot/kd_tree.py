@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+
+import heapq
+import math
+
+import numpy as np
+
+from pokemongo_bot.spatial_index import METERS_PER_DEGREE
+
+
+class KDTree(object):
+    """Nearest neighbours of a position among a fixed set of points
+
+    Meant for the points of a small area (a walk, a camping spot): they are
+    projected on a plane around their mean position, in meters, and stored
+    as a balanced 2-d tree laid out in flat arrays. The median of each range
+    of the arrays splits it, alternately on x and y, so a query visits about
+    log2(n) points instead of all of them.
+
+    nearest() gives the index of the points in the order they were given,
+    with their distance in meters on the projection.
+    """
+
+    def __init__(self, lats, lngs):
+        lats = np.asarray(lats, dtype=float)
+        lngs = np.asarray(lngs, dtype=float)
+
+        if len(lats):
+            self._lat = float(lats.mean())
+            self._lng = float(lngs.mean())
+        else:
+            self._lat = self._lng = 0.0
+
+        self._scale = math.cos(math.radians(self._lat)) * METERS_PER_DEGREE
+        coords = ((lngs - self._lng) * self._scale, (lats - self._lat) * METERS_PER_DEGREE)
+        order = np.arange(len(lats))
+        self._build(order, coords, 0, len(order), 0)
+
+        self._x = coords[0][order].tolist()
+        self._y = coords[1][order].tolist()
+        self._index = order.tolist()
+
+    def __len__(self):
+        return len(self._index)
+
+    def nearest(self, lat, lng, k=1):
+        """
+        :return: Up to k (index, distance) pairs, the closest first.
+        :rtype: list
+        """
+        x = (lng - self._lng) * self._scale
+        y = (lat - self._lat) * METERS_PER_DEGREE
+        # max heap of the k best squared distances so far
+        best = []
+        self._search(0, len(self._index), 0, x, y, k, best)
+        return [(self._index[i], math.sqrt(-d)) for d, i in sorted(best, reverse=True)]
+
+    def _build(self, order, coords, lo, hi, axis):
+        if hi - lo <= 1:
+            return
+
+        mid = (lo + hi) // 2
+        segment = order[lo:hi]
+        order[lo:hi] = segment[np.argpartition(coords[axis][segment], mid - lo)]
+        self._build(order, coords, lo, mid, 1 - axis)
+        self._build(order, coords, mid + 1, hi, 1 - axis)
+
+    def _search(self, lo, hi, axis, x, y, k, best):
+        if lo >= hi:
+            return
+
+        mid = (lo + hi) // 2
+        dx = x - self._x[mid]
+        dy = y - self._y[mid]
+        d = dx * dx + dy * dy
+
+        if len(best) < k:
+            heapq.heappush(best, (-d, mid))
+        elif d < -best[0][0]:
+            heapq.heapreplace(best, (-d, mid))
+
+        split = dx if axis == 0 else dy
+
+        if split < 0:
+            near, far = (lo, mid), (mid + 1, hi)
+        else:
+            near, far = (mid + 1, hi), (lo, mid)
+
+        self._search(near[0], near[1], 1 - axis, x, y, k, best)
+
+        # the other side can only hold closer points if the split line is closer
+        if len(best) < k or split * split < -best[0][0]:
+            self._search(far[0], far[1], 1 - axis, x, y, k, best)
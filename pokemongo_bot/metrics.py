@@ -1,13 +1,12 @@
-import time
 from datetime import timedelta
 from pokemongo_bot.inventory import Pokemons, refresh_inventory
-from pokemongo_bot import inventory
+from pokemongo_bot import clock, inventory
 
 class Metrics(object):
 
     def __init__(self, bot):
         self.bot = bot
-        self.start_time = time.time()
+        self.start_time = clock.time()
         self.dust = {'start': -1, 'latest': -1}
         self.xp = {'start': -1, 'latest': -1}
         self.distance = {'start': -1, 'latest': -1}
@@ -29,13 +28,13 @@ class Metrics(object):
         self.player_stats = []
 
     def runtime(self):
-        return timedelta(seconds=round(time.time() - self.start_time))
+        return timedelta(seconds=round(clock.time() - self.start_time))
 
     def xp_earned(self):
         return self.xp['latest'] - self.xp['start']
 
     def xp_per_hour(self):
-        return self.xp_earned()/(time.time() - self.start_time)*3600
+        return self.xp_earned()/(clock.time() - self.start_time)*3600
 
     def distance_travelled(self):
         return self.distance['latest'] - self.distance['start']
@@ -59,7 +58,7 @@ class Metrics(object):
         :return: An estimated number of pokemon caught per hour.
         :rtype: float
         """
-        return self.num_captures() / (time.time() - self.start_time) * 3600
+        return self.num_captures() / (clock.time() - self.start_time) * 3600
 
     def num_visits(self):
         return self.visits['latest'] - self.visits['start']
@@ -107,42 +106,39 @@ class Metrics(object):
                 self.dust['start'] = self.dust['latest']
 
             inventory.refresh_inventory()
-            json_inventory = inventory.jsonify_inventory()
-            for item in json_inventory:
-                if 'inventory_item_data' in item:
-                    if 'player_stats' in item['inventory_item_data']:
-                        playerdata = item['inventory_item_data']['player_stats']
-                        self.player_stats = playerdata
+            playerdata = inventory.player().player_stats
+            if playerdata is None:
+                # Nothing we can do if there's no player info.
+                return
+            self.player_stats = playerdata
 
-                        self.xp['latest'] = playerdata.get('experience', 0)
-                        if self.xp['start'] < 0: self.xp['start'] = self.xp['latest']
+            self.xp['latest'] = playerdata.get('experience', 0)
+            if self.xp['start'] < 0: self.xp['start'] = self.xp['latest']
 
-                        self.visits['latest'] = playerdata.get('poke_stop_visits', 0)
-                        if self.visits['start'] < 0: self.visits['start'] = self.visits['latest']
+            self.visits['latest'] = playerdata.get('poke_stop_visits', 0)
+            if self.visits['start'] < 0: self.visits['start'] = self.visits['latest']
 
-                        self.captures['latest'] = playerdata.get('pokemons_captured', 0)
-                        if self.captures['start'] < 0: self.captures['start'] = self.captures['latest']
+            self.captures['latest'] = playerdata.get('pokemons_captured', 0)
+            if self.captures['start'] < 0: self.captures['start'] = self.captures['latest']
 
-                        self.distance['latest'] = playerdata.get('km_walked', 0)
-                        if self.distance['start'] < 0: self.distance['start'] = self.distance['latest']
+            self.distance['latest'] = playerdata.get('km_walked', 0)
+            if self.distance['start'] < 0: self.distance['start'] = self.distance['latest']
 
-                        self.encounters['latest'] = playerdata.get('pokemons_encountered', 0)
-                        if self.encounters['start'] < 0: self.encounters['start'] = self.encounters['latest']
+            self.encounters['latest'] = playerdata.get('pokemons_encountered', 0)
+            if self.encounters['start'] < 0: self.encounters['start'] = self.encounters['latest']
 
-                        self.throws['latest'] = playerdata.get('pokeballs_thrown', 0)
-                        if self.throws['start'] < 0: self.throws['start'] = self.throws['latest']
+            self.throws['latest'] = playerdata.get('pokeballs_thrown', 0)
+            if self.throws['start'] < 0: self.throws['start'] = self.throws['latest']
 
-                        self.unique_mons['latest'] = playerdata.get('unique_pokedex_entries', 0)
-                        if self.unique_mons['start'] < 0: self.unique_mons['start'] = self.unique_mons['latest']
+            self.unique_mons['latest'] = playerdata.get('unique_pokedex_entries', 0)
+            if self.unique_mons['start'] < 0: self.unique_mons['start'] = self.unique_mons['latest']
 
-                        self.visits['latest'] = playerdata.get('poke_stop_visits', 0)
-                        if self.visits['start'] < 0: self.visits['start'] = self.visits['latest']
+            self.evolutions['latest'] = playerdata.get('evolutions', 0)
+            if self.evolutions['start'] < 0: self.evolutions['start'] = self.evolutions['latest']
 
-                        self.evolutions['latest'] = playerdata.get('evolutions', 0)
-                        if self.evolutions['start'] < 0: self.evolutions['start'] = self.evolutions['latest']
-                    elif 'pokedex_entry' in item['inventory_item_data']:
-                        entry = item['inventory_item_data']['pokedex_entry'].get('pokemon_id')
-                        if entry: uniq_pokemon_list.add(entry)
+            for entry in inventory.pokedex().all():
+                if entry.get('pokemon_id'):
+                    uniq_pokemon_list.add(entry['pokemon_id'])
 
             if not self.uniq_pokemons_list:  # make set from pokedex entries on first run
                 self.uniq_pokemons_list = uniq_pokemon_list
@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+
+import threading
+
+from pokemongo_bot import clock
+
+
+class RateLimiter(object):
+    """Token bucket shared by every request sent by one account
+
+    Every RPC envelope takes tokens from the bucket before being sent, the
+    bucket is refilled at `rate` tokens per second and can hold up to `burst`
+    tokens, so short bursts go out immediately while the sustained rate stays
+    below `rate`.
+
+    An envelope costs as much as its most expensive subrequest, the cost of
+    each RequestType is read from `weights` (1 if missing).
+
+    When the server throttles us the sustained rate is halved (never below
+    `min_rate`) and then recovers a bit after each successful call, this way
+    the bot settles on the highest rate the server accepts.
+    Example Config:
+    "api_rate_limit": {
+      "rate": 2,
+      "burst": 5,
+      "weights": {
+        "GET_MAP_OBJECTS": 2
+      }
+    }
+    """
+
+    DEFAULT_RATE = 2.0
+    DEFAULT_BURST = 5
+    MIN_RATE = 0.2
+    # fraction of the configured rate given back after each successful call
+    RECOVERY_STEP = 0.05
+
+    def __init__(self, rate=DEFAULT_RATE, burst=DEFAULT_BURST, weights=None, min_rate=MIN_RATE):
+        if rate <= 0:
+            raise ValueError('rate must be greater than 0')
+        if burst < 1:
+            raise ValueError('burst must be at least 1')
+
+        self.max_rate = float(rate)
+        self.rate = float(rate)
+        self.min_rate = min(float(min_rate), self.max_rate)
+        self.burst = float(burst)
+        self.weights = dict((k.upper(), float(v)) for k, v in (weights or {}).items())
+
+        self.tokens = self.burst
+        self.last_refill = clock.time()
+        self.throttled_count = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(
+            rate=getattr(config, 'api_rate_limit_rate', cls.DEFAULT_RATE),
+            burst=getattr(config, 'api_rate_limit_burst', cls.DEFAULT_BURST),
+            weights=getattr(config, 'api_rate_limit_weights', None)
+        )
+
+    def cost(self, request_types):
+        if not request_types:
+            return 1.0
+        return max(self.weights.get(t.upper(), 1.0) for t in request_types)
+
+    def acquire(self, request_types=()):
+        """
+        Takes the tokens needed by an envelope, waiting until they are available.
+        :param request_types: Names of the subrequests in the envelope.
+        :return: The number of seconds spent waiting.
+        :rtype: float
+        """
+        cost = min(self.cost(request_types), self.burst)
+
+        with self._lock:
+            self._refill()
+            # tokens may go negative: the deficit is the wait of this caller,
+            # later callers queue up behind it
+            self.tokens -= cost
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+
+        if wait > 0:
+            clock.sleep(wait)
+        return wait
+
+    def throttled(self):
+        """
+        To be called when the server answered with a throttling error.
+        """
+        with self._lock:
+            self._refill()
+            self.throttled_count += 1
+            self.rate = max(self.min_rate, self.rate / 2)
+            self.tokens = min(self.tokens, 0.0)
+
+    def succeeded(self):
+        with self._lock:
+            if self.rate < self.max_rate:
+                self._refill()
+                self.rate = min(self.max_rate, self.rate + self.max_rate * self.RECOVERY_STEP)
+
+    def _refill(self):
+        now = clock.time()
+        self.tokens = min(self.burst, self.tokens + (now - self.last_refill) * self.rate)
+        self.last_refill = now
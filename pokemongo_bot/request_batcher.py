@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+
+import threading
+
+
+class BatchedResponse(object):
+    """
+    Response of a subrequest queued in a RequestBatcher.
+    """
+
+    def __init__(self, batcher, name, kwargs):
+        self.batcher = batcher
+        self.name = name
+        self.kwargs = kwargs
+        self._done = False
+        self._result = None
+        self._error = None
+
+    def done(self):
+        return self._done
+
+    def failed(self):
+        return self._error is not None
+
+    def result(self):
+        """
+        Returns the response, sending the pending batch if it was not sent yet.
+        The response has the same shape as the one of a single call:
+        {'responses': {'GET_PLAYER': {...}}, 'status_code': 1, ...}
+        :return: The response of this subrequest only.
+        :rtype: dict
+        """
+        if not self._done:
+            self.batcher.flush()
+        if self._error is not None:
+            raise self._error
+        return self._result
+
+    def _resolve(self, result=None, error=None):
+        self._result = result
+        self._error = error
+        self._done = True
+
+
+class RequestBatcher(object):
+    """Sends the read-only subrequests queued during a tick as one RPC
+
+    Callers queue subrequests with enqueue() and get a BatchedResponse back.
+    Nothing is sent until one of the responses is needed, at that time every
+    pending subrequest goes out in a single envelope and the response is split
+    back to each caller, so reads queued early in the tick (heartbeat, map
+    objects, inventory...) only cost one round trip.
+
+    Only subrequests without side effects can be batched, actions (catch,
+    release, evolve, ...) must keep using api.create_request().
+    Fresh responses found in the api ResponseCache are served without
+    being sent at all.
+    """
+
+    READ_ONLY_REQUESTS = frozenset([
+        'GET_PLAYER',
+        'GET_INVENTORY',
+        'GET_MAP_OBJECTS',
+        'GET_HATCHED_EGGS',
+        'CHECK_AWARDED_BADGES',
+        'DOWNLOAD_SETTINGS',
+        'FORT_DETAILS'
+    ])
+
+    def __init__(self, api):
+        self.api = api
+        self._pending = []
+        self._lock = threading.RLock()
+
+    def enqueue(self, name, **kwargs):
+        """
+        Queues a read-only subrequest.
+        :param name: Name of the subrequest, as called on the api (e.g. get_player).
+        :return: The future response of the subrequest.
+        :rtype: BatchedResponse
+        """
+        request_type = name.upper()
+        if request_type not in self.READ_ONLY_REQUESTS:
+            raise ValueError('{} can not be batched'.format(request_type))
+
+        cached = self.api.response_cache.get(request_type, kwargs)
+        if cached is not None:
+            response = BatchedResponse(self, request_type, kwargs)
+            response._resolve(result=cached)
+            return response
+
+        with self._lock:
+            for pending in self._pending:
+                if pending.name == request_type:
+                    if pending.kwargs == kwargs:
+                        # same read already queued, share its response
+                        return pending
+                    # an envelope can only hold one subrequest of each type
+                    self.flush()
+                    break
+
+            pending = BatchedResponse(self, request_type, kwargs)
+            self._pending.append(pending)
+            return pending
+
+    def pending(self):
+        with self._lock:
+            return [p.name for p in self._pending]
+
+    def flush(self):
+        """
+        Sends every pending subrequest in one envelope.
+        :return: Nothing.
+        :rtype: None
+        """
+        with self._lock:
+            pending, self._pending = self._pending, []
+            if not pending:
+                return
+
+            request = self.api.create_request()
+            for subrequest in pending:
+                getattr(request, subrequest.name.lower())(**subrequest.kwargs)
+
+            try:
+                response_dict = request.call()
+            except Exception as e:
+                for subrequest in pending:
+                    subrequest._resolve(error=e)
+                raise
+
+            for subrequest in pending:
+                result = self._split(response_dict, subrequest.name)
+                if result:
+                    self.api.response_cache.set(subrequest.name, subrequest.kwargs, result)
+                subrequest._resolve(result=result)
+
+    @staticmethod
+    def _split(response_dict, request_type):
+        if not isinstance(response_dict, dict) or 'responses' not in response_dict:
+            return response_dict
+
+        result = dict(response_dict)
+        result['responses'] = {request_type: response_dict['responses'].get(request_type, {})}
+        return result
@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+
+import copy
+import threading
+
+from pokemongo_bot import clock
+
+
+class ResponseCache(object):
+    """Keeps the responses of idempotent requests for a few seconds
+
+    Responses are keyed by request type and arguments, each request type has
+    its own time to live in seconds (0 disables caching for the type).
+    Any other request sent to the server, like RELEASE_POKEMON or
+    CATCH_POKEMON, drops the cached responses it may have changed.
+    Workers edit the responses they get, so every get returns a copy and
+    the cache keeps its own copy of what it is given.
+    Example Config:
+    "api_cache": {
+      "GET_PLAYER": 10,
+      "GET_INVENTORY": 5,
+      "FORT_DETAILS": 3600
+    }
+    """
+
+    DEFAULT_TTL = {
+        'GET_PLAYER': 10,
+        'GET_INVENTORY': 5,
+        'FORT_DETAILS': 3600
+    }
+
+    # requests that don't change what the cached requests return
+    NO_SIDE_EFFECTS = frozenset([
+        'GET_PLAYER',
+        'GET_INVENTORY',
+        'FORT_DETAILS',
+        'GET_MAP_OBJECTS',
+        'CHECK_AWARDED_BADGES',
+        'DOWNLOAD_SETTINGS',
+        'ENCOUNTER',
+        'DISK_ENCOUNTER',
+        'INCENSE_ENCOUNTER',
+        'GET_INCENSE_POKEMON'
+    ])
+
+    # what is dropped after a request with side effects, default is everything
+    # related to the player, fort details only change with a new modifier
+    INVALIDATES = {
+        'ADD_FORT_MODIFIER': ('GET_PLAYER', 'GET_INVENTORY', 'FORT_DETAILS')
+    }
+    DEFAULT_INVALIDATES = ('GET_PLAYER', 'GET_INVENTORY')
+
+    def __init__(self, ttl=None):
+        self.ttl = dict(self.DEFAULT_TTL)
+        self.ttl.update(dict((k.upper(), v) for k, v in (ttl or {}).items()))
+        self.hits = 0
+        self.misses = 0
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(getattr(config, 'api_cache', None))
+
+    def is_cacheable(self, request_type):
+        return self.ttl.get(request_type.upper(), 0) > 0
+
+    def get(self, request_type, kwargs):
+        """
+        Looks for a fresh response.
+        :return: A copy of the cached response or None if missing or expired.
+        :rtype: dict
+        """
+        request_type = request_type.upper()
+        if not self.is_cacheable(request_type):
+            return None
+
+        key = self._key(request_type, kwargs)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > clock.time():
+                self.hits += 1
+                return copy.deepcopy(entry[1])
+            self._entries.pop(key, None)
+            self.misses += 1
+            return None
+
+    def set(self, request_type, kwargs, response):
+        request_type = request_type.upper()
+        if not self.is_cacheable(request_type):
+            return
+
+        response = copy.deepcopy(response)
+        now = clock.time()
+        with self._lock:
+            self._entries[self._key(request_type, kwargs)] = (now + self.ttl[request_type], response)
+            if len(self._entries) > 1000:
+                self._entries = dict((k, v) for k, v in self._entries.items() if v[0] > now)
+
+    def invalidate(self, request_types):
+        """
+        Drops the responses that may have been changed by the given requests.
+        :param request_types: Types of the requests just sent.
+        :return: Nothing.
+        :rtype: None
+        """
+        stale = set()
+        for request_type in request_types:
+            request_type = request_type.upper()
+            if request_type not in self.NO_SIDE_EFFECTS:
+                stale.update(self.INVALIDATES.get(request_type, self.DEFAULT_INVALIDATES))
+
+        if not stale:
+            return
+
+        with self._lock:
+            for key in [k for k in self._entries if k[0] in stale]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries = {}
+
+    @staticmethod
+    def _key(request_type, kwargs):
+        return request_type, repr(sorted(kwargs.items()))
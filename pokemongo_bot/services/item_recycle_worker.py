@@ -1,5 +1,4 @@
-import time
-
+from pokemongo_bot import clock
 from pokemongo_bot.worker_result import WorkerResult
 from pokemongo_bot.base_task import BaseTask
 from pokemongo_bot.tree_config_builder import ConfigException
@@ -26,7 +25,7 @@ class ItemRecycler(BaseTask):
         self.item_to_recycle = item_to_recycle
         self.amount_to_recycle = amount_to_recycle
         self.recycle_item_request_result = None
-        self.last_log_time = time.time()
+        self.last_log_time = clock.time()
 
     def work(self):
         """
@@ -0,0 +1,744 @@
+# -*- coding: utf-8 -*-
+
+import logging
+import math
+import os
+import random
+import threading
+
+import numpy as np
+from s2sphere import CellId, LatLng
+
+from pokemongo_bot import clock, geo, static_data
+from pokemongo_bot.base_dir import _base_dir
+from pokemongo_bot.inventory import CpTable, LevelToCPm, Pokemons
+from pokemongo_bot.spatial_index import METERS_PER_DEGREE
+
+# level of the s2 cells asked for by GET_MAP_OBJECTS
+CELL_LEVEL = 15
+
+# meters
+WILD_DISTANCE = 200
+CATCHABLE_DISTANCE = 70
+ENCOUNTER_DISTANCE = 100
+FORT_SEARCH_DISTANCE = 40
+
+# seconds
+SPAWN_PERIOD = 3600
+SPAWN_DURATION = 900
+LURE_DURATION = 1800
+FORT_COOLDOWN = 300
+LUCKY_EGG_DURATION = 1800
+INCENSE_DURATION = 1800
+
+ITEM_POKEBALL = 1
+ITEM_MASTERBALL = 4
+ITEM_LUCKY_EGG = 301
+ITEM_INCENSE = 401
+ITEM_RAZZBERRY = 701
+ITEM_INCUBATOR_UNLIMITED = 901
+
+STARTING_ITEMS = {1: 50, 2: 10, 101: 10, 201: 5, 301: 1, 401: 1, 701: 10}
+# item id: weight, what a pokestop gives
+FORT_ITEMS = {1: 60, 2: 10, 101: 15, 201: 5, 701: 10}
+EGG_DISTANCES = (2.0, 5.0, 10.0)
+
+CAPTURE_XP = 100
+NEW_SPECIES_XP = 500
+CAPTURE_CANDY = 3
+CAPTURE_STARDUST = 100
+FORT_SEARCH_XP = 50
+EVOLVE_XP = 500
+HATCH_XP = 200
+HATCH_STARDUST = 800
+
+MAX_POKEMON_STORAGE = 250
+MAX_ITEM_STORAGE = 350
+MAX_EGGS = 9
+
+
+def cell_id(lat, lng):
+    return CellId.from_lat_lng(LatLng.from_degrees(lat, lng)).parent(CELL_LEVEL).id()
+
+
+class LocalAuth(object):
+    """Stands for the auth provider of pgoapi, always logged in"""
+
+    _ticket_expire = None
+
+    def __init__(self, username):
+        self.username = username
+
+    def is_login(self):
+        return True
+
+
+class World(object):
+    """Forts, spawn points and lures of an area, the same for the same seed
+
+    Pokestops, gyms and spawn points are scattered in a disk of `radius`
+    meters around `center`. Each spawn point shows a pokemon for
+    SPAWN_DURATION seconds once per hour and a share of the pokestops are
+    always lured, a new pokemon coming with each lure. What spawns is drawn
+    from the seed, the spawn point and the hour only, so the same world
+    answers the same way whatever the order of the requests.
+    """
+
+    def __init__(self, center, seed=0, radius=1000, pokestops=80, gyms=10, spawn_points=150, lured=0.1):
+        self.seed = seed
+        rng = random.Random(seed)
+
+        self.forts = []
+        for n in range(pokestops + gyms):
+            lat, lng = self._scatter(rng, center, radius)
+            fort = {'id': 'sim-fort-%d' % n, 'latitude': lat, 'longitude': lng, 'enabled': True}
+            if n < pokestops:
+                fort['type'] = 1
+            fort['lured'] = n < pokestops and rng.random() < lured
+            fort['cell_id'] = cell_id(lat, lng)
+            self.forts.append(fort)
+        self.forts_by_id = dict((fort['id'], fort) for fort in self.forts)
+
+        self.spawn_points = []
+        for n in range(spawn_points):
+            lat, lng = self._scatter(rng, center, radius)
+            self.spawn_points.append({
+                'id': 'sim-spawn-%d' % n,
+                'latitude': lat,
+                'longitude': lng,
+                'offset': rng.randrange(SPAWN_PERIOD),
+                'cell_id': cell_id(lat, lng)
+            })
+        self.spawn_points_by_id = dict((spawn['id'], spawn) for spawn in self.spawn_points)
+        self._spawn_lats = np.array([s['latitude'] for s in self.spawn_points])
+        self._spawn_lngs = np.array([s['longitude'] for s in self.spawn_points])
+
+        # first evolutions, the common ones more often
+        species = [p for p in Pokemons.STATIC_DATA if p.id == p.first_evolution_id and p.capture_rate > 0]
+        self._species = [p.id for p in species]
+        self._species_weights = np.cumsum([p.capture_rate for p in species])
+
+    @staticmethod
+    def _scatter(rng, center, radius):
+        distance = radius * math.sqrt(rng.random())
+        bearing = rng.uniform(0, 2 * math.pi)
+        lat = center[0] + distance * math.cos(bearing) / METERS_PER_DEGREE
+        lng = center[1] + distance * math.sin(bearing) / (METERS_PER_DEGREE * math.cos(math.radians(center[0])))
+        return lat, lng
+
+    def random_species(self, rng):
+        return self._species[int(np.searchsorted(self._species_weights, rng.random() * self._species_weights[-1], 'right'))]
+
+    def spawn(self, spawn_point, now):
+        """
+        :return: The pokemon shown by the spawn point at that time, None if
+                 there is none.
+        :rtype: dict
+        """
+        elapsed = now - spawn_point['offset']
+        period, into = divmod(elapsed, SPAWN_PERIOD)
+        if into >= SPAWN_DURATION:
+            return None
+
+        index = int(spawn_point['id'].rsplit('-', 1)[1])
+        encounter_id = self._encounter_id(0, index, int(period))
+        return {
+            'encounter_id': encounter_id,
+            'spawn_point_id': spawn_point['id'],
+            'pokemon_id': self.random_species(random.Random(encounter_id)),
+            'latitude': spawn_point['latitude'],
+            'longitude': spawn_point['longitude'],
+            'expiration_timestamp_ms': int((now - into + SPAWN_DURATION) * 1000)
+        }
+
+    def lure(self, fort, now):
+        """
+        :return: The lure_info of a lured pokestop at that time, None if it
+                 is not lured.
+        :rtype: dict
+        """
+        if not fort['lured']:
+            return None
+
+        period = int(now // LURE_DURATION)
+        index = int(fort['id'].rsplit('-', 1)[1])
+        encounter_id = self._encounter_id(1, index, period)
+        return {
+            'fort_id': fort['id'],
+            'encounter_id': encounter_id,
+            'active_pokemon_id': self.random_species(random.Random(encounter_id)),
+            'lure_expires_timestamp_ms': (period + 1) * LURE_DURATION * 1000
+        }
+
+    def spawns_near(self, lat, lng, distance, now):
+        distances = geo.distance(lat, lng, self._spawn_lats, self._spawn_lngs)
+        spawns = [self.spawn(self.spawn_points[i], now) for i in np.flatnonzero(distances <= distance)]
+        return [spawn for spawn in spawns if spawn is not None]
+
+    def find_encounter(self, encounter_id, now):
+        # spawns and lures of the current period only
+        kind, index = (encounter_id // 4) % 2, (encounter_id // 8) % 100000
+
+        if kind == 0 and index < len(self.spawn_points):
+            spawn = self.spawn(self.spawn_points[index], now)
+            if spawn is not None and spawn['encounter_id'] == encounter_id:
+                return spawn
+        elif kind == 1 and index < len(self.forts):
+            fort = self.forts[index]
+            lure = self.lure(fort, now)
+            if lure is not None and lure['encounter_id'] == encounter_id:
+                return {'encounter_id': encounter_id, 'pokemon_id': lure['active_pokemon_id'],
+                        'latitude': fort['latitude'], 'longitude': fort['longitude'], 'fort_id': fort['id']}
+        return None
+
+    def _encounter_id(self, kind, index, period):
+        # period, index and kind can be read back from the id
+        return ((period * 100000 + index) * 2 + kind) * 4 + self.seed % 4
+
+
+class LocalServer(object):
+    """In-process stand-in for the game servers, behind ApiWrapper
+
+    Answers the requests the bot sends with responses shaped like the ones
+    of pgoapi, from a seeded World built around the first position it is
+    called from and the inventory of a single player kept here. Pokemons
+    are drawn from the encounter ids and catch rolls from the seed, so a
+    session replays the same way for the same requests, and timestamps come
+    from pokemongo_bot.clock to run on a VirtualClock.
+
+    Handled: GET_MAP_OBJECTS, FORT_SEARCH, FORT_DETAILS, ENCOUNTER,
+    DISK_ENCOUNTER, CATCH_POKEMON, GET_INVENTORY, GET_PLAYER,
+    RELEASE_POKEMON, EVOLVE_POKEMON, UPGRADE_POKEMON, RECYCLE_INVENTORY_ITEM,
+    USE_ITEM_CAPTURE, USE_ITEM_XP_BOOST, USE_ITEM_EGG_INCUBATOR, USE_INCENSE,
+    GET_HATCHED_EGGS and CHECK_AWARDED_BADGES. Anything else gets an empty
+    response.
+    """
+
+    def __init__(self, seed=0, **world_options):
+        self.seed = seed
+        self.world_options = world_options
+        self.world = None
+        self.calls = 0
+        self.logger = logging.getLogger(type(self).__name__)
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._unknown = set()
+
+        self._xp_per_level = [xp for _, _, xp in static_data.load_json(os.path.join(_base_dir, 'data', 'xp_per_level.json'))]
+        self._upgrade_cost = static_data.load_json(os.path.join(_base_dir, 'data', 'pokemon_upgrade_cost.json'))
+
+        self.username = None
+        self.position = None
+        self.created_ms = int(clock.time() * 1000)
+        self.stats = {'level': 1, 'experience': 0, 'km_walked': 0.0, 'pokemons_encountered': 0,
+                      'pokemons_captured': 0, 'poke_stop_visits': 0, 'pokeballs_thrown': 0,
+                      'eggs_hatched': 0, 'evolutions': 0}
+        self.stardust = 0
+        self.pokecoins = 0
+        self.items = dict(STARTING_ITEMS)
+        self.candies = {}
+        self.pokedex = {}
+        self.pokemons = {}  # id -> pokemon_data, eggs included
+        self.incubators = [{'id': 'sim-incubator-0', 'item_id': ITEM_INCUBATOR_UNLIMITED, 'incubator_type': 1}]
+        self.fort_cooldowns = {}  # fort id -> timestamp ms
+        self.finished_encounters = set()
+        self.encounters = {}  # encounter id -> pokemon_data of the current encounters
+        self.capture_multipliers = {}
+        self.lucky_egg_expires = 0
+        self.incense_expires = 0
+        self._next_id = 1
+        self._chain_hack_sequence = 0
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(seed=getattr(config, 'simulator_seed', 0))
+
+    def auth_provider(self, username):
+        self.username = username
+        return LocalAuth(username)
+
+    def call(self, subrequests, position):
+        """
+        :param subrequests: (request type name, arguments) pairs of an envelope.
+        :param position: Position of the envelope, (lat, lng, alt).
+        :return: The response of the envelope.
+        :rtype: dict
+        """
+        with self._lock:
+            now = clock.time()
+            self._move(position)
+            self.calls += 1
+
+            responses = {}
+            for name, kwargs in subrequests:
+                handler = getattr(self, '_' + name.lower(), None)
+                if handler is None:
+                    if name not in self._unknown:
+                        self._unknown.add(name)
+                        self.logger.debug('No simulation of %s, answering with an empty response', name)
+                    responses[name] = {}
+                else:
+                    responses[name] = handler(now, **kwargs)
+
+            return {'status_code': 1, 'request_id': self.calls, 'responses': responses}
+
+    def _move(self, position):
+        if self.world is None:
+            self.world = World(position[:2], self.seed, **self.world_options)
+        elif self.position is not None:
+            walked = geo.distance(self.position[0], self.position[1], position[0], position[1])
+            # teleports do not hatch eggs
+            if walked < 1000:
+                self.stats['km_walked'] += walked / 1000.0
+        self.position = position
+
+    def _new_id(self):
+        self._next_id += 1
+        return self._next_id
+
+    def _award_xp(self, xp, now):
+        if now < self.lucky_egg_expires:
+            xp *= 2
+        self.stats['experience'] += xp
+        levels = self._xp_per_level
+        while self.stats['level'] < len(levels) and self.stats['experience'] >= levels[self.stats['level']]:
+            self.stats['level'] += 1
+        return xp
+
+    def _add_candy(self, pokemon_id, quantity):
+        family_id = Pokemons.first_evolution_id_for(pokemon_id)
+        self.candies[family_id] = self.candies.get(family_id, 0) + quantity
+
+    def _pokedex(self, pokemon_id, field):
+        entry = self.pokedex.setdefault(pokemon_id, {'pokemon_id': pokemon_id, 'times_encountered': 0, 'times_captured': 0})
+        entry[field] += 1
+
+    def _distance_to(self, lat, lng):
+        return geo.distance(self.position[0], self.position[1], lat, lng)
+
+    def _space_left(self):
+        return MAX_POKEMON_STORAGE - len(self.pokemons)
+
+    def _new_pokemon(self, pokemon_id, rng, max_level):
+        info = Pokemons.data_for(pokemon_id)
+        level = rng.randrange(2, int(max_level * 2) + 1) / 2.0
+        cp_multiplier = LevelToCPm.cp_multiplier_for(level)
+        ivs = [rng.randrange(16) for _ in range(3)]
+        return {
+            'pokemon_id': pokemon_id,
+            'cp': max(int(CpTable.cp_for(pokemon_id, ivs[0], ivs[1], ivs[2], cp_multiplier)), 10),
+            'cp_multiplier': cp_multiplier,
+            'stamina_max': max(int((info.base_stamina + ivs[2]) * cp_multiplier), 10),
+            'individual_attack': ivs[0],
+            'individual_defense': ivs[1],
+            'individual_stamina': ivs[2],
+            'move_1': rng.choice(info.fast_attacks).id,
+            'move_2': rng.choice(info.charged_attack).id
+        }
+
+    def _with_stats(self, pokemon, pokemon_id=None, cp_multiplier=None):
+        # same pokemon at another level or as another species
+        pokemon = dict(pokemon)
+        pokemon_id = pokemon_id or pokemon['pokemon_id']
+        cp_m = cp_multiplier or pokemon['cp_multiplier'] + pokemon.get('additional_cp_multiplier', 0)
+        if cp_multiplier is not None:
+            pokemon['additional_cp_multiplier'] = cp_multiplier - pokemon['cp_multiplier']
+        pokemon['pokemon_id'] = pokemon_id
+        pokemon['cp'] = max(int(CpTable.cp_for(pokemon_id, pokemon['individual_attack'], pokemon['individual_defense'],
+                                               pokemon['individual_stamina'], cp_m)), 10)
+        pokemon['stamina_max'] = max(int((Pokemons.data_for(pokemon_id).base_stamina + pokemon['individual_stamina']) * cp_m), 10)
+        pokemon['stamina'] = pokemon['stamina_max']
+        return pokemon
+
+    def _encounter_pokemon(self, encounter):
+        encounter_id = encounter['encounter_id']
+        if encounter_id not in self.encounters:
+            rng = random.Random(encounter_id)
+            self.encounters[encounter_id] = self._new_pokemon(
+                encounter['pokemon_id'], rng, min(self.stats['level'], 30))
+            self._pokedex(encounter['pokemon_id'], 'times_encountered')
+            self.stats['pokemons_encountered'] += 1
+        return self.encounters[encounter_id]
+
+    def _capture_probability(self, pokemon):
+        info = Pokemons.data_for(pokemon['pokemon_id'])
+        base = min(info.capture_rate / (2 * pokemon['cp_multiplier']), 1.0)
+        # poke ball, great ball, ultra ball
+        return [1 - (1 - base) ** multiplier for multiplier in (1, 1.5, 2)]
+
+    #
+    # Handlers, one per request type, called with the time and the
+    # arguments of the subrequest
+
+    def _get_player(self, now, **kwargs):
+        return {
+            'success': True,
+            'player_data': {
+                'username': self.username or 'simulated',
+                'creation_timestamp_ms': self.created_ms,
+                'team': 0,
+                'tutorial_state': [0, 1, 3, 4, 7],
+                'max_pokemon_storage': MAX_POKEMON_STORAGE,
+                'max_item_storage': MAX_ITEM_STORAGE,
+                'currencies': [{'name': 'POKECOIN', 'amount': self.pokecoins},
+                               {'name': 'STARDUST', 'amount': self.stardust}]
+            }
+        }
+
+    def _check_awarded_badges(self, now, **kwargs):
+        return {'success': True}
+
+    def _get_inventory(self, now, **kwargs):
+        level = self.stats['level']
+        levels = self._xp_per_level
+        player_stats = dict(self.stats)
+        player_stats['prev_level_xp'] = levels[level - 1]
+        player_stats['next_level_xp'] = levels[level] if level < len(levels) else levels[-1]
+        player_stats['unique_pokedex_entries'] = len(self.pokedex)
+
+        data = [{'player_stats': player_stats},
+                {'egg_incubators': {'egg_incubator': [dict(i) for i in self.incubators]}}]
+        data += [{'item': {'item_id': item_id, 'count': count}} for item_id, count in sorted(self.items.items())]
+        data += [{'candy': {'family_id': family_id, 'candy': candy}} for family_id, candy in sorted(self.candies.items())]
+        data += [{'pokedex_entry': dict(entry)} for _, entry in sorted(self.pokedex.items())]
+        data += [{'pokemon_data': dict(pokemon)} for _, pokemon in sorted(self.pokemons.items())]
+
+        # always the whole inventory, never a delta
+        return {
+            'success': True,
+            'inventory_delta': {
+                'new_timestamp_ms': int(now * 1000),
+                'inventory_items': [{'inventory_item_data': d} for d in data]
+            }
+        }
+
+    def _get_map_objects(self, now, cell_id=(), **kwargs):
+        lat, lng = self.position[:2]
+        cells = dict((c, {'s2_cell_id': c, 'current_timestamp_ms': int(now * 1000)}) for c in cell_id)
+
+        for fort in self.world.forts:
+            cell = cells.get(fort['cell_id'])
+            if cell is None:
+                continue
+            data = dict((k, v) for k, v in fort.items() if k not in ('cell_id', 'lured'))
+            data['last_modified_timestamp_ms'] = self.created_ms
+            cooldown = self.fort_cooldowns.get(fort['id'], 0)
+            if cooldown > now * 1000:
+                data['cooldown_complete_timestamp_ms'] = cooldown
+            lure = self.world.lure(fort, now)
+            if lure is not None:
+                if lure['encounter_id'] in self.finished_encounters:
+                    del lure['active_pokemon_id']
+                data['lure_info'] = lure
+            cell.setdefault('forts', []).append(data)
+
+        for spawn in self.world.spawns_near(lat, lng, WILD_DISTANCE, now):
+            cell = cells.get(self.world.spawn_points_by_id[spawn['spawn_point_id']]['cell_id'])
+            if cell is None or spawn['encounter_id'] in self.finished_encounters:
+                continue
+            cell.setdefault('wild_pokemons', []).append({
+                'encounter_id': spawn['encounter_id'],
+                'spawn_point_id': spawn['spawn_point_id'],
+                'latitude': spawn['latitude'],
+                'longitude': spawn['longitude'],
+                'time_till_hidden_ms': int(spawn['expiration_timestamp_ms'] - now * 1000),
+                'pokemon_data': {'pokemon_id': spawn['pokemon_id']}
+            })
+            if self._distance_to(spawn['latitude'], spawn['longitude']) <= CATCHABLE_DISTANCE:
+                cell.setdefault('catchable_pokemons', []).append(spawn)
+
+        return {'status': 1, 'map_cells': [cells[c] for c in cell_id]}
+
+    def _fort_details(self, now, fort_id=None, **kwargs):
+        fort = self.world.forts_by_id.get(fort_id)
+        if fort is None:
+            return {}
+        return {
+            'fort_id': fort_id,
+            'name': '%s %s' % ('Pokestop' if 'type' in fort else 'Gym', fort_id.rsplit('-', 1)[1]),
+            'description': '',
+            'image_urls': [],
+            'latitude': fort['latitude'],
+            'longitude': fort['longitude'],
+            'type': fort.get('type', 0)
+        }
+
+    def _fort_search(self, now, fort_id=None, **kwargs):
+        fort = self.world.forts_by_id.get(fort_id)
+        if fort is None or 'type' not in fort:
+            return {'result': 0}
+        if self._distance_to(fort['latitude'], fort['longitude']) > FORT_SEARCH_DISTANCE:
+            return {'result': 2}
+        if self.fort_cooldowns.get(fort_id, 0) > now * 1000:
+            return {'result': 3, 'cooldown_complete_timestamp_ms': self.fort_cooldowns[fort_id]}
+
+        cooldown = int((now + FORT_COOLDOWN) * 1000)
+        self.fort_cooldowns[fort_id] = cooldown
+        self.stats['poke_stop_visits'] += 1
+        self._chain_hack_sequence += 1
+        response = {
+            'experience_awarded': self._award_xp(FORT_SEARCH_XP, now),
+            'cooldown_complete_timestamp_ms': cooldown,
+            'chain_hack_sequence_number': self._chain_hack_sequence
+        }
+
+        if sum(self.items.values()) >= MAX_ITEM_STORAGE:
+            response['result'] = 4
+            return response
+
+        awarded = {}
+        item_ids, weights = zip(*sorted(FORT_ITEMS.items()))
+        weights = np.cumsum(weights)
+        for _ in range(self._rng.randint(3, 5)):
+            item_id = item_ids[int(np.searchsorted(weights, self._rng.random() * weights[-1], 'right'))]
+            awarded[item_id] = awarded.get(item_id, 0) + 1
+            self.items[item_id] = self.items.get(item_id, 0) + 1
+        response['items_awarded'] = [{'item_id': i, 'item_count': c} for i, c in sorted(awarded.items())]
+
+        eggs = sum(1 for p in self.pokemons.values() if p.get('is_egg'))
+        if eggs < MAX_EGGS and self._space_left() > 0 and self._rng.random() < 0.2:
+            egg = {'id': self._new_id(), 'is_egg': True, 'creation_time_ms': int(now * 1000),
+                   'egg_km_walked_target': self._rng.choice(EGG_DISTANCES)}
+            self.pokemons[egg['id']] = egg
+            response['pokemon_data_egg'] = dict(egg)
+
+        response['result'] = 1
+        return response
+
+    def _encounter(self, now, encounter_id=None, spawn_point_id=None, **kwargs):
+        encounter = self.world.find_encounter(encounter_id, now) if encounter_id is not None else None
+        if encounter is None or encounter.get('spawn_point_id') != spawn_point_id:
+            return {'status': 2}
+        if encounter_id in self.finished_encounters:
+            return {'status': 6}
+        if self._distance_to(encounter['latitude'], encounter['longitude']) > ENCOUNTER_DISTANCE:
+            return {'status': 5}
+        if self._space_left() <= 0:
+            return {'status': 7}
+
+        pokemon = self._encounter_pokemon(encounter)
+        return {
+            'status': 1,
+            'wild_pokemon': {
+                'encounter_id': encounter_id,
+                'spawn_point_id': spawn_point_id,
+                'latitude': encounter['latitude'],
+                'longitude': encounter['longitude'],
+                'pokemon_data': dict(pokemon)
+            },
+            'capture_probability': {'pokeball_type': [1, 2, 3],
+                                    'capture_probability': self._capture_probability(pokemon)}
+        }
+
+    def _disk_encounter(self, now, encounter_id=None, fort_id=None, **kwargs):
+        encounter = self.world.find_encounter(encounter_id, now) if encounter_id is not None else None
+        if encounter is None or encounter.get('fort_id') != fort_id:
+            return {'result': 2}
+        if self._distance_to(encounter['latitude'], encounter['longitude']) > ENCOUNTER_DISTANCE:
+            return {'result': 3}
+        if encounter_id in self.finished_encounters:
+            return {'result': 4}
+        if self._space_left() <= 0:
+            return {'result': 5}
+
+        pokemon = self._encounter_pokemon(encounter)
+        return {
+            'result': 1,
+            'pokemon_data': dict(pokemon),
+            'capture_probability': {'pokeball_type': [1, 2, 3],
+                                    'capture_probability': self._capture_probability(pokemon)}
+        }
+
+    def _use_item_capture(self, now, item_id=None, encounter_id=None, **kwargs):
+        if encounter_id not in self.encounters or self.items.get(item_id, 0) <= 0 or item_id != ITEM_RAZZBERRY:
+            return {'success': False}
+        self.items[item_id] -= 1
+        self.capture_multipliers[encounter_id] = 1.5
+        return {'success': True, 'item_capture_mult': 1.5}
+
+    def _catch_pokemon(self, now, encounter_id=None, pokeball=ITEM_POKEBALL, hit_pokemon=1,
+                       normalized_reticle_size=1.0, spin_modifier=0.0, **kwargs):
+        pokemon = self.encounters.get(encounter_id)
+        if pokemon is None or encounter_id in self.finished_encounters:
+            return {'status': 0}
+        if self.items.get(pokeball, 0) <= 0:
+            return {'status': 0}
+
+        self.items[pokeball] -= 1
+        self.stats['pokeballs_thrown'] += 1
+        if not hit_pokemon:
+            return {'status': 4}
+
+        if pokeball >= ITEM_MASTERBALL:
+            probability = 1.0
+        else:
+            probability = self._capture_probability(pokemon)[pokeball - 1]
+        probability *= self.capture_multipliers.pop(encounter_id, 1.0)
+        probability *= 1 + 0.3 * max(normalized_reticle_size - 1, 0)
+        if spin_modifier > 0.5:
+            probability *= 1.7
+
+        if self._rng.random() >= probability:
+            if self._rng.random() < Pokemons.data_for(pokemon['pokemon_id']).flee_rate:
+                self.finished_encounters.add(encounter_id)
+                del self.encounters[encounter_id]
+                return {'status': 3}
+            return {'status': 2}
+
+        self.finished_encounters.add(encounter_id)
+        del self.encounters[encounter_id]
+
+        new_species = self.pokedex.get(pokemon['pokemon_id'], {}).get('times_captured', 0) == 0
+        pokemon = dict(pokemon, id=self._new_id(), pokeball=pokeball, stamina=pokemon['stamina_max'],
+                       creation_time_ms=int(now * 1000))
+        self.pokemons[pokemon['id']] = pokemon
+        self._pokedex(pokemon['pokemon_id'], 'times_captured')
+        self.stats['pokemons_captured'] += 1
+        self._add_candy(pokemon['pokemon_id'], CAPTURE_CANDY)
+        self.stardust += CAPTURE_STARDUST
+        xp = self._award_xp(CAPTURE_XP + (NEW_SPECIES_XP if new_species else 0), now)
+
+        return {
+            'status': 1,
+            'captured_pokemon_id': pokemon['id'],
+            'capture_award': {'activity_type': [1], 'xp': [xp], 'candy': [CAPTURE_CANDY], 'stardust': [CAPTURE_STARDUST]}
+        }
+
+    def _release_pokemon(self, now, pokemon_id=None, pokemon_ids=None, **kwargs):
+        ids = pokemon_ids if pokemon_ids is not None else [pokemon_id]
+        pokemons = [self.pokemons.get(i) for i in ids]
+        if not ids or any(p is None for p in pokemons):
+            return {'result': 3}
+        if any(p.get('is_egg') for p in pokemons):
+            return {'result': 4}
+        if any('deployed_fort_id' in p or p.get('favorite') for p in pokemons):
+            return {'result': 2}
+
+        for pokemon in pokemons:
+            del self.pokemons[pokemon['id']]
+            self._add_candy(pokemon['pokemon_id'], 1)
+        return {'result': 1, 'candy_awarded': len(pokemons)}
+
+    def _evolve_pokemon(self, now, pokemon_id=None, **kwargs):
+        pokemon = self.pokemons.get(pokemon_id)
+        if pokemon is None or pokemon.get('is_egg'):
+            return {'result': 2}
+        info = Pokemons.data_for(pokemon['pokemon_id'])
+        if not info.next_evolution_ids:
+            return {'result': 4}
+        if self.candies.get(info.family_id, 0) < info.evolution_cost:
+            return {'result': 3}
+
+        self.candies[info.family_id] -= info.evolution_cost
+        self._add_candy(pokemon['pokemon_id'], 1)
+        evolved = self._with_stats(pokemon, pokemon_id=self._rng.choice(info.next_evolution_ids))
+        self.pokemons[pokemon_id] = evolved
+        self._pokedex(evolved['pokemon_id'], 'times_captured')
+        self.stats['evolutions'] += 1
+
+        return {'result': 1, 'evolved_pokemon_data': dict(evolved),
+                'experience_awarded': self._award_xp(EVOLVE_XP, now), 'candy_awarded': 1}
+
+    def _upgrade_pokemon(self, now, pokemon_id=None, **kwargs):
+        pokemon = self.pokemons.get(pokemon_id)
+        if pokemon is None or pokemon.get('is_egg'):
+            return {'result': 2}
+
+        cp_m = pokemon['cp_multiplier'] + pokemon.get('additional_cp_multiplier', 0)
+        level = LevelToCPm.level_from_cpm(cp_m)
+        if level >= min(self.stats['level'] + 1.5, LevelToCPm.MAX_LEVEL):
+            return {'result': 4}
+
+        candy_cost, stardust_cost = self._upgrade_cost[int(level * 2) - 2]
+        family_id = Pokemons.first_evolution_id_for(pokemon['pokemon_id'])
+        if self.candies.get(family_id, 0) < candy_cost or self.stardust < stardust_cost:
+            return {'result': 3}
+
+        self.candies[family_id] -= candy_cost
+        self.stardust -= stardust_cost
+        upgraded = self._with_stats(pokemon, cp_multiplier=LevelToCPm.cp_multiplier_for(level + 0.5))
+        upgraded['num_upgrades'] = pokemon.get('num_upgrades', 0) + 1
+        self.pokemons[pokemon_id] = upgraded
+
+        return {'result': 1, 'upgraded_pokemon': dict(upgraded)}
+
+    def _recycle_inventory_item(self, now, item_id=None, count=0, **kwargs):
+        if count <= 0 or self.items.get(item_id, 0) < count:
+            return {'result': 2}
+        self.items[item_id] -= count
+        return {'result': 1, 'new_count': self.items[item_id]}
+
+    def _use_item_xp_boost(self, now, item_id=None, **kwargs):
+        if item_id != ITEM_LUCKY_EGG:
+            return {'result': 2}
+        if now < self.lucky_egg_expires:
+            return {'result': 3}
+        if self.items.get(item_id, 0) <= 0:
+            return {'result': 4}
+
+        self.items[item_id] -= 1
+        self.lucky_egg_expires = now + LUCKY_EGG_DURATION
+        return {'result': 1, 'applied_items': {'item': [{'item_id': item_id, 'item_type': 12,
+                                                         'expire_ms': int(self.lucky_egg_expires * 1000),
+                                                         'applied_ms': int(now * 1000)}]}}
+
+    def _use_incense(self, now, incense_type=ITEM_INCENSE, **kwargs):
+        if now < self.incense_expires:
+            return {'result': 2}
+        if self.items.get(incense_type, 0) <= 0:
+            return {'result': 3}
+
+        # no incense pokemons, only the item is used
+        self.items[incense_type] -= 1
+        self.incense_expires = now + INCENSE_DURATION
+        return {'result': 1, 'applied_incense': {'item_id': incense_type,
+                                                 'expire_ms': int(self.incense_expires * 1000)}}
+
+    def _use_item_egg_incubator(self, now, item_id=None, pokemon_id=None, **kwargs):
+        incubator = next((i for i in self.incubators if i['id'] == item_id), None)
+        egg = self.pokemons.get(pokemon_id)
+        if incubator is None:
+            return {'result': 2}
+        if egg is None:
+            return {'result': 3}
+        if not egg.get('is_egg'):
+            return {'result': 4}
+        if 'pokemon_id' in incubator:
+            return {'result': 5}
+        if 'egg_incubator_id' in egg:
+            return {'result': 6}
+
+        km_walked = self.stats['km_walked']
+        incubator.update(pokemon_id=pokemon_id, start_km_walked=km_walked,
+                         target_km_walked=km_walked + egg['egg_km_walked_target'])
+        egg['egg_incubator_id'] = item_id
+        return {'result': 1, 'egg_incubator': dict(incubator)}
+
+    def _get_hatched_eggs(self, now, **kwargs):
+        response = {'success': True}
+
+        for incubator in self.incubators:
+            if 'pokemon_id' not in incubator or incubator['target_km_walked'] > self.stats['km_walked']:
+                continue
+
+            egg = self.pokemons.pop(incubator.pop('pokemon_id'))
+            del incubator['start_km_walked'], incubator['target_km_walked']
+
+            rng = random.Random(egg['id'] * 31 + self.seed)
+            pokemon = self._new_pokemon(self.world.random_species(rng), rng, min(self.stats['level'], 20))
+            pokemon.update(id=egg['id'], stamina=pokemon['stamina_max'], creation_time_ms=int(now * 1000))
+            self.pokemons[pokemon['id']] = pokemon
+            self._pokedex(pokemon['pokemon_id'], 'times_captured')
+            self.stats['eggs_hatched'] += 1
+
+            candy = int(egg['egg_km_walked_target'] * 2) + 3
+            self._add_candy(pokemon['pokemon_id'], candy)
+            self.stardust += HATCH_STARDUST
+            xp = self._award_xp(HATCH_XP, now)
+
+            response.setdefault('pokemon_id', []).append(pokemon['id'])
+            response.setdefault('experience_awarded', []).append(xp)
+            response.setdefault('candy_awarded', []).append(candy)
+            response.setdefault('stardust_awarded', []).append(HATCH_STARDUST)
+
+        return response
@@ -1,7 +1,8 @@
 from datetime import datetime, timedelta
-from time import sleep
 from random import uniform
 
+from pokemongo_bot import clock
+
 
 class SleepSchedule(object):
     """Pauses the execution of the bot every day for some time
@@ -112,7 +113,7 @@ class SleepSchedule(object):
             )
 
     def _should_sleep_now(self):
-        now = datetime.now()
+        now = clock.now()
 
         if now >= self._next_sleep and now < self._next_end:
             self._next_duration = (self._next_end - now).total_seconds()
@@ -121,7 +122,7 @@ class SleepSchedule(object):
         return False
 
     def _get_next_sleep_schedule(self):
-        now = datetime.now() #+ self.SCHEDULING_MARGIN
+        now = clock.now() #+ self.SCHEDULING_MARGIN
 
         times = []
         for index in range(len(self.entries)):
@@ -159,7 +160,7 @@ class SleepSchedule(object):
         sleep_h, sleep_m = divmod(sleep_m, 60)
         sleep_hms = '%02d:%02d:%02d' % (sleep_h, sleep_m, sleep_s)
 
-        now = datetime.now()
+        now = clock.now()
         wake = str(now + timedelta(seconds=sleep_to_go))
 
         self.bot.event_manager.emit(
@@ -173,10 +174,10 @@ class SleepSchedule(object):
         )
         while sleep_to_go > 0:
             if sleep_to_go < self.LOG_INTERVAL_SECONDS:
-                sleep(sleep_to_go)
+                clock.sleep(sleep_to_go)
                 sleep_to_go = 0
             else:
-                sleep(self.LOG_INTERVAL_SECONDS)
+                clock.sleep(self.LOG_INTERVAL_SECONDS)
                 sleep_to_go -= self.LOG_INTERVAL_SECONDS
 
         self._last_index = self._next_index
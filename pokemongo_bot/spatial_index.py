@@ -0,0 +1,176 @@
+# -*- coding: utf-8 -*-
+
+import heapq
+import math
+
+from pokemongo_bot.geo import distance, distances_from
+
+# meters per degree of latitude, good enough for the local projection
+METERS_PER_DEGREE = 111319.49
+
+
+class SpatialIndex(object):
+    """Uniform grid of map objects (forts, spawn points...) for nearby queries
+
+    Objects are projected on a local plane around the first indexed object
+    and bucketed in square cells of CELL_SIZE meters. Queries only visit the
+    cells around the searched position, ring after ring, and stop as soon as
+    no unvisited cell can hold anything closer, so asking for the nearest
+    forts or the forts in range no longer sorts every fort of the map.
+
+    accept filters the indexed objects, e.g. pokestops only. Distances used
+    for ordering are the haversine geo.distance(), the grid is only used to
+    skip far away cells.
+    """
+
+    CELL_SIZE = 100.0  # meters
+    # the local projection is slightly off from the haversine distance
+    # far from its origin, keep a margin before trusting a ring is complete
+    PROJECTION_MARGIN = 0.98
+
+    def __init__(self, items=(), accept=None):
+        self.accept = accept
+        self._source = None
+        self.rebuild(items)
+
+    def __len__(self):
+        return len(self._items)
+
+    def update(self, items):
+        """
+        Rebuilds the index if items is not the list already indexed.
+        :return: True if the index was rebuilt.
+        :rtype: bool
+        """
+        if items is self._source:
+            return False
+        self.rebuild(items)
+        return True
+
+    def rebuild(self, items):
+        self._source = items
+        self._items = [i for i in items
+                       if 'latitude' in i and 'longitude' in i and (self.accept is None or self.accept(i))]
+        self._grid = {}
+        self._sorted = None
+
+        if not self._items:
+            self._bounds = None
+            return
+
+        self._origin = (self._items[0]['latitude'], self._items[0]['longitude'])
+        self._lng_scale = math.cos(math.radians(self._origin[0]))
+
+        for item in self._items:
+            key = self._cell(item['latitude'], item['longitude'])
+            self._grid.setdefault(key, []).append(item)
+
+        rows = [k[0] for k in self._grid]
+        cols = [k[1] for k in self._grid]
+        self._bounds = (min(rows), max(rows), min(cols), max(cols))
+
+    def all(self):
+        return list(self._items)
+
+    def nearest(self, lat, lng, k=None, exclude=None):
+        """
+        Objects ordered by distance to the given position.
+        :param k: Maximum number of objects returned, all of them if None.
+        :param exclude: Ids of the objects to skip.
+        :return: The closest objects first.
+        :rtype: list of dict
+        """
+        if k is None and not exclude:
+            return list(self._sorted_from(lat, lng))
+
+        result = []
+        for _, item in self._by_distance(lat, lng, exclude=exclude):
+            if k is not None and len(result) >= k:
+                break
+            result.append(item)
+        return result
+
+    def nearest_not_in(self, lat, lng, exclude):
+        """
+        The closest object whose id is not in exclude.
+        :return: The object or None if every object is excluded.
+        :rtype: dict
+        """
+        for _, item in self._by_distance(lat, lng, exclude=exclude):
+            return item
+        return None
+
+    def within(self, lat, lng, radius, exclude=None):
+        """
+        Objects at most radius meters away from the given position.
+        :return: The objects in range, the closest first.
+        :rtype: list of dict
+        """
+        return [item for _, item in self._by_distance(lat, lng, radius, exclude)]
+
+    def _sorted_from(self, lat, lng):
+        # workers of the same tick ask from the same position
+        if self._sorted is None or self._sorted[0] != (lat, lng):
+            order = distances_from(lat, lng, self._items).argsort(kind='mergesort')
+            self._sorted = ((lat, lng), [self._items[i] for i in order])
+        return self._sorted[1]
+
+    def _by_distance(self, lat, lng, max_distance=None, exclude=None):
+        if self._bounds is None:
+            return
+
+        row, col = self._cell(lat, lng)
+        min_row, max_row, min_col, max_col = self._bounds
+        last_ring = max(abs(row - min_row), abs(row - max_row), abs(col - min_col), abs(col - max_col))
+        if max_distance is not None:
+            # an object of ring r is at least (r - 1) * CELL_SIZE away
+            last_ring = min(last_ring, int(max_distance / (self.CELL_SIZE * self.PROJECTION_MARGIN)) + 1)
+
+        candidates = []
+        first_ring = max(min_row - row, row - max_row, min_col - col, col - max_col, 0)
+        if first_ring <= last_ring and first_ring ** 2 > len(self._grid):
+            # far away from the indexed objects, every ring up to them would
+            # be empty
+            for item in self._items:
+                if exclude and item.get('id') in exclude:
+                    continue
+                dist = distance(lat, lng, item['latitude'], item['longitude'])
+                if max_distance is None or dist <= max_distance:
+                    candidates.append((dist, id(item), item))
+            heapq.heapify(candidates)
+            last_ring = -1
+
+        for ring in xrange(last_ring + 1):
+            for key in self._ring(row, col, ring):
+                for item in self._grid.get(key, ()):
+                    if exclude and item.get('id') in exclude:
+                        continue
+                    dist = distance(lat, lng, item['latitude'], item['longitude'])
+                    if max_distance is None or dist <= max_distance:
+                        heapq.heappush(candidates, (dist, id(item), item))
+
+            # anything in the next rings is at least ring * CELL_SIZE away
+            safe = ring * self.CELL_SIZE * self.PROJECTION_MARGIN
+            while candidates and candidates[0][0] <= safe:
+                dist, _, item = heapq.heappop(candidates)
+                yield dist, item
+
+        while candidates:
+            dist, _, item = heapq.heappop(candidates)
+            yield dist, item
+
+    def _ring(self, row, col, ring):
+        if ring == 0:
+            yield row, col
+            return
+        for c in xrange(col - ring, col + ring + 1):
+            yield row - ring, c
+            yield row + ring, c
+        for r in xrange(row - ring + 1, row + ring):
+            yield r, col - ring
+            yield r, col + ring
+
+    def _cell(self, lat, lng):
+        y = (lat - self._origin[0]) * METERS_PER_DEGREE
+        x = (lng - self._origin[1]) * METERS_PER_DEGREE * self._lng_scale
+        return int(math.floor(y / self.CELL_SIZE)), int(math.floor(x / self.CELL_SIZE))
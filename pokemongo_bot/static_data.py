@@ -0,0 +1,25 @@
+# -*- coding: utf-8 -*-
+"""Registry of the static game data in data/
+
+Each json file is parsed once per process and every module gets the same
+objects: the inventory components building their static data, the bot
+(pokemon_list, item_list) and the tasks. The bot being re-created after
+every API error in pokecli, the files are not parsed again on reconnects.
+"""
+
+import json
+
+_files = {}  # path -> parsed json
+
+
+def load_json(path):
+    """
+    Parses a data file, or returns what was parsed before.
+    The same objects are shared by every caller, they must not be modified.
+    :param path: Path of the json file.
+    :return: The parsed content.
+    """
+    if path not in _files:
+        with open(path) as infile:
+            _files[path] = json.load(infile)
+    return _files[path]
@@ -14,7 +14,7 @@ class FollowClusterTestCase(unittest.TestCase):
         mock_pokemongo_bot.position = (37.396787, -5.994587)
         mock_pokemongo_bot.config.walk_max = 4.16
         mock_pokemongo_bot.config.walk_min = 2.16
-        mock_pokemongo_bot.get_forts.return_value = ex_forts
+        mock_pokemongo_bot.get_forts_in_range.return_value = ex_forts
         follow_cluster = FollowCluster(mock_pokemongo_bot, config)
 
         expected = (37.397183750142624, -5.9932912500000013)
@@ -33,7 +33,7 @@ class FollowClusterTestCase(unittest.TestCase):
         mock_pokemongo_bot.position = (37.39718375014263, -5.9932912500000013)
         mock_pokemongo_bot.config.walk_max = 4.16
         mock_pokemongo_bot.config.walk_min = 2.16
-        mock_pokemongo_bot.get_forts.return_value = ex_forts
+        mock_pokemongo_bot.get_forts_in_range.return_value = ex_forts
         follow_cluster = FollowCluster(mock_pokemongo_bot, config)
 
         expected = (37.397183750142624, -5.9932912500000013)
@@ -70,3 +70,38 @@ class PolylineTestCase(unittest.TestCase):
     def test_get_last_pos(self):
         self.assertEquals(self.polyline.get_last_pos(), self.polyline._last_pos)
 
+
+class PolylineFromPointsTestCase(unittest.TestCase):
+    def setUp(self):
+        # three segments of about 111 m, 76 m and 111 m
+        self.points = [(47.170, 8.510), (47.171, 8.510), (47.171, 8.511), (47.170, 8.511)]
+        self.polyline = Polyline.from_points(self.points, 50, {(47.170, 8.510): 430.0, (47.170, 8.511): 440.0})
+
+    def test_walk_crosses_the_points(self):
+        positions = [self.polyline.get_pos() for _ in range(7)]
+
+        self.assertAlmostEqual(positions[0][0], 47.17045, places=5)
+        self.assertEqual(positions[0][1], 8.510)
+        self.assertAlmostEqual(positions[2][1], 8.51051, places=5)
+        self.assertEqual(positions[-1], self.points[-1])
+        self.assertEqual(self.polyline.get_total_distance(), 298)
+
+    def test_pos_at_a_point(self):
+        walked = self.polyline._cumulative[2]
+        lat, lng = self.polyline.get_pos_at(walked)
+        self.assertAlmostEqual(lat, 47.171, places=9)
+        self.assertAlmostEqual(lng, 8.511, places=9)
+        self.assertEqual(self.polyline.get_pos_at(-1), self.points[0])
+
+    def test_alt_of_the_closest_sample(self):
+        self.assertEqual(self.polyline.get_alt(), 430.0)
+        self.polyline.set_speed(250)
+        self.polyline.get_pos()
+        self.assertEqual(self.polyline.get_alt(), 440.0)
+
+    def test_interpolated_alt(self):
+        # 1/4 of the way from the first sample to the second one
+        self.assertAlmostEqual(self.polyline.get_alt_at(47.170, 8.51025, interpolate=True), 432.5, places=3)
+        self.assertEqual(self.polyline.get_alt_at(47.170, 8.51025), 430.0)
+        self.assertEqual(Polyline.from_points(self.points, 50, {}).get_alt(interpolate=True), None)
+
@@ -0,0 +1,125 @@
+import os
+import random
+import shutil
+import tempfile
+import unittest
+
+import requests_mock
+
+from pokemongo_bot import geo
+from pokemongo_bot.walkers.polyline_generator import Polyline
+from pokemongo_bot.walkers.road_graph import RoadGraph
+
+ORIGIN = (47.1700, 8.5100)
+STEP = 0.001
+
+OSM = '''<?xml version="1.0" encoding="UTF-8"?>
+<osm version="0.6">
+  <node id="1" lat="47.1700" lon="8.5100"><tag k="ele" v="430"/></node>
+  <node id="2" lat="47.1710" lon="8.5100"/>
+  <node id="3" lat="47.1710" lon="8.5110"/>
+  <node id="4" lat="47.1720" lon="8.5110"/>
+  <way id="10"><nd ref="1"/><nd ref="2"/><nd ref="3"/><tag k="highway" v="footway"/></way>
+  <way id="11"><nd ref="3"/><nd ref="4"/><tag k="highway" v="motorway"/></way>
+</osm>
+'''
+
+
+def grid(size, missing=()):
+    # size x size nodes, linked to their neighbours unless one of them is missing
+    lats = [ORIGIN[0] + STEP * (n // size) for n in range(size * size)]
+    lngs = [ORIGIN[1] + STEP * (n % size) for n in range(size * size)]
+    alts = [400 + n for n in range(size * size)]
+    edges = []
+
+    for n in range(size * size):
+        for neighbour in (n + 1 if (n + 1) % size else None, n + size if n + size < size * size else None):
+            if neighbour is not None and n not in missing and neighbour not in missing:
+                edges.append((n, neighbour))
+
+    return RoadGraph.from_edges(lats, lngs, edges, alts)
+
+
+class RoadGraphTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        # the center of a 3x3 grid can not be walked through
+        self.graph = grid(3, missing=(4,))
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_route_goes_around(self):
+        self.assertIn(self.graph.shortest_path(0, 8), ([0, 1, 2, 5, 8], [0, 3, 6, 7, 8]))
+        self.assertEqual(self.graph.shortest_path(0, 4), None)
+
+        route = self.graph.route((ORIGIN[0] + 0.00001, ORIGIN[1]), (ORIGIN[0] + 2 * STEP, ORIGIN[1] + 2 * STEP))
+        self.assertEqual(len(route), 5)
+        self.assertEqual(route[0], (ORIGIN[0], ORIGIN[1], 400))
+        self.assertEqual(route[-1][2], 408)
+
+    def test_nearest_node(self):
+        graph = grid(10)
+        for n in (0, 9, 45, 99):
+            node, distance = graph.nearest_node(graph.lats[n] + STEP * 0.3, graph.lngs[n] - STEP * 0.2)
+            self.assertEqual(node, n)
+            self.assertAlmostEqual(distance, 36.6, places=1)
+
+        # the same as comparing with every node, from the grid cells around
+        path = os.path.join(self.directory, 'grid.graph')
+        graph.save(path)
+        graph = RoadGraph.load(path)
+        rng = random.Random(1)
+        for _ in range(50):
+            lat, lng = ORIGIN[0] + rng.uniform(-0.003, 0.012), ORIGIN[1] + rng.uniform(-0.003, 0.012)
+            distances = [geo.distance(lat, lng, graph.lats[n], graph.lngs[n]) for n in range(len(graph))]
+            self.assertEqual(graph.nearest_node(lat, lng, max_distance=1000)[0],
+                             distances.index(min(distances)))
+
+        self.assertEqual(graph.nearest_node(ORIGIN[0] - 0.01, ORIGIN[1]), None)
+        self.assertEqual(graph.nearest_node(ORIGIN[0] - 0.01, ORIGIN[1], max_distance=2000)[0], 0)
+
+    def test_route_outside_of_the_graph(self):
+        self.assertEqual(self.graph.route(ORIGIN, (ORIGIN[0] + 0.1, ORIGIN[1])), None)
+        self.assertEqual(RoadGraph.from_edges([], [], []).route(ORIGIN, ORIGIN), None)
+
+    def test_saved_graph_is_memory_mapped(self):
+        path = os.path.join(self.directory, 'grid.graph')
+        self.graph.save(path)
+        graph = RoadGraph.load(path)
+
+        self.assertEqual(len(graph), 9)
+        self.assertEqual(graph.lats.tolist(), self.graph.lats.tolist())
+        self.assertEqual(graph.shortest_path(0, 8), self.graph.shortest_path(0, 8))
+
+        with open(path, 'wb') as outfile:
+            outfile.write('not a graph')
+        self.assertRaises(ValueError, RoadGraph.load, path)
+
+    def test_from_osm(self):
+        path = os.path.join(self.directory, 'map.osm')
+        with open(path, 'w') as outfile:
+            outfile.write(OSM)
+        graph = RoadGraph.from_osm(path)
+
+        # the motorway can not be walked
+        self.assertEqual(len(graph), 3)
+        self.assertEqual(graph.shortest_path(0, 2), [0, 1, 2])
+        self.assertEqual(graph.alts.tolist()[0], 430)
+
+    def test_polyline_without_google(self):
+        graph = grid(10)
+        destination = (ORIGIN[0] + 9 * STEP, ORIGIN[1] + 9 * STEP)
+
+        with requests_mock.Mocker():
+            polyline = Polyline(ORIGIN, destination, 2.5, road_graph=graph)
+
+        self.assertEqual(polyline._points[0], ORIGIN)
+        self.assertEqual(polyline._points[-1], destination)
+        self.assertEqual(len(polyline._points), 19)
+        self.assertAlmostEqual(polyline.get_total_distance(), 1681, delta=5)
+        self.assertEqual(polyline.get_alt(), 400)
+
+        polyline.set_speed(200)
+        lat, lng = polyline.get_pos()
+        self.assertGreater(lat + lng, sum(ORIGIN))
@@ -0,0 +1,86 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import requests_mock
+from mock import MagicMock
+
+from pokemongo_bot.test.road_graph_test import ORIGIN, STEP, grid
+from pokemongo_bot.walkers.polyline_generator import PolylineObjectHandler
+from pokemongo_bot.walkers.route_cache import RouteCache
+
+DESTINATION = (ORIGIN[0] + 2 * STEP, ORIGIN[1] + 2 * STEP)
+POINTS = [ORIGIN, (ORIGIN[0] + STEP, ORIGIN[1]), (ORIGIN[0] + STEP, ORIGIN[1] + 2 * STEP), DESTINATION]
+ELEVATIONS = [(ORIGIN, 400.0), (DESTINATION, 410.0)]
+
+
+class RouteCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'routes.json')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_closest_route_to_the_same_place(self):
+        cache = RouteCache()
+        cache.put(ORIGIN, DESTINATION, POINTS, ELEVATIONS)
+
+        # 10 m away from the second point of the route, 5 m from the destination
+        origin = (ORIGIN[0] + STEP, ORIGIN[1] + 0.0001)
+        destination = (DESTINATION[0] + 0.00005, DESTINATION[1])
+        points, elevations = cache.get(origin, destination)
+
+        self.assertEqual(points, [origin, POINTS[1], POINTS[2], destination])
+        self.assertEqual(elevations, ELEVATIONS)
+        self.assertEqual(cache.get((ORIGIN[0], ORIGIN[1] + STEP), DESTINATION), None)
+        self.assertEqual(cache.get(ORIGIN, POINTS[2]), None)
+        self.assertEqual((cache.hits, cache.misses), (1, 2))
+
+    def test_lookups_are_logged_with_new_routes(self):
+        cache = RouteCache()
+        cache.logger = MagicMock()
+        cache.get(ORIGIN, DESTINATION)
+        cache.put(ORIGIN, DESTINATION, POINTS, ELEVATIONS)
+        cache.get(ORIGIN, DESTINATION)
+        cache.put(ORIGIN, POINTS[2], POINTS[:3], [])
+
+        cache.logger.debug.assert_called_with('%d routes cached, %d hits and %d misses so far', 2, 1, 1)
+
+    def test_least_recently_used_routes_are_dropped(self):
+        cache = RouteCache(max_size=2)
+        destinations = [(DESTINATION[0] + n * STEP, DESTINATION[1]) for n in range(3)]
+
+        cache.put(ORIGIN, destinations[0], [ORIGIN, destinations[0]], [])
+        cache.put(ORIGIN, destinations[1], [ORIGIN, destinations[1]], [])
+        cache.get(ORIGIN, destinations[0])
+        cache.put(ORIGIN, destinations[2], [ORIGIN, destinations[2]], [])
+
+        self.assertEqual(len(cache), 2)
+        self.assertIsNotNone(cache.get(ORIGIN, destinations[0]))
+        self.assertIsNone(cache.get(ORIGIN, destinations[1]))
+
+    def test_routes_are_kept_between_runs(self):
+        RouteCache(self.path).put(ORIGIN, DESTINATION, POINTS, ELEVATIONS)
+
+        cache = RouteCache(self.path)
+        self.assertEqual(cache.get(ORIGIN, DESTINATION), (POINTS, ELEVATIONS))
+
+        with open(self.path, 'w') as outfile:
+            outfile.write('{"version": 1, "rou')
+        self.assertEqual(len(RouteCache(self.path)), 0)
+
+    def test_polyline_of_a_cached_route(self):
+        cache = RouteCache()
+        first = PolylineObjectHandler.new_polyline(ORIGIN, DESTINATION, 2.5, road_graph=grid(3), route_cache=cache)
+
+        # no request can be sent from here
+        with requests_mock.Mocker():
+            second = PolylineObjectHandler.new_polyline(ORIGIN, DESTINATION, 2.5, route_cache=cache)
+
+        self.assertEqual(second._points, first._points)
+        self.assertEqual(second.get_total_distance(), first.get_total_distance())
+        self.assertEqual(second.get_alt(), first.get_alt())
+        self.assertEqual(second.destination, DESTINATION)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
@@ -21,9 +21,9 @@ class SleepScheculeTestCase(unittest.TestCase):
         self.assertEqual(self.worker.entries[0]['time_random_offset'], timedelta(minutes=5).total_seconds())
         self.assertEqual(self.worker.entries[0]['duration_random_offset'], timedelta(minutes=5).total_seconds())
 
-    @patch('pokemongo_bot.sleep_schedule.datetime')
-    def test_get_next_time(self, mock_datetime):
-        mock_datetime.now.return_value = datetime(year=2016, month=8, day=01, hour=8, minute=0)
+    @patch('pokemongo_bot.clock.now')
+    def test_get_next_time(self, mock_now):
+        mock_now.return_value = datetime(year=2016, month=8, day=01, hour=8, minute=0)
 
         next_time = self.worker._get_next_sleep_schedule()[0]
         from_date = datetime(year=2016, month=8, day=1, hour=12, minute=15)
@@ -33,13 +33,13 @@ class SleepScheculeTestCase(unittest.TestCase):
         self.assertLessEqual(next_time, to_date)
 
     @unittest.skip("Will rewrite test later")
-    @patch('pokemongo_bot.sleep_schedule.datetime')
-    def test_get_next_time_called_near_activation_time(self, mock_datetime):
+    @patch('pokemongo_bot.clock.now')
+    def test_get_next_time_called_near_activation_time(self, mock_now):
         pass
 
-    @patch('pokemongo_bot.sleep_schedule.datetime')
-    def test_get_next_time_called_before_activation_time(self, mock_datetime):
-        mock_datetime.now.return_value = datetime(year=2016, month=8, day=1, hour=11, minute=25)
+    @patch('pokemongo_bot.clock.now')
+    def test_get_next_time_called_before_activation_time(self, mock_now):
+        mock_now.return_value = datetime(year=2016, month=8, day=1, hour=11, minute=25)
 
         next = self.worker._get_next_sleep_schedule()[0]
         from_date = datetime(year=2016, month=8, day=01, hour=12, minute=15)
@@ -48,19 +48,19 @@ class SleepScheculeTestCase(unittest.TestCase):
         self.assertGreaterEqual(next, from_date)
         self.assertLessEqual(next, to_date)
 
-    @patch('pokemongo_bot.sleep_schedule.datetime')
-    def test_get_next_time_called_within_sleep_range(self, mock_datetime):
+    @patch('pokemongo_bot.clock.now')
+    def test_get_next_time_called_within_sleep_range(self, mock_now):
         now = datetime(year=2016, month=8, day=1, hour=12, minute=25)
-        mock_datetime.now.return_value = now
+        mock_now.return_value = now
 
         next = self.worker._get_next_sleep_schedule()[0]
 
         self.assertEqual(next, now)
 
-    @patch('pokemongo_bot.sleep_schedule.datetime')
-    def test_get_next_time_called_within_sleep_range_2(self, mock_datetime):
+    @patch('pokemongo_bot.clock.now')
+    def test_get_next_time_called_within_sleep_range_2(self, mock_now):
         now = datetime(year=2016, month=8, day=1, hour=17, minute=00)
-        mock_datetime.now.return_value = now
+        mock_now.return_value = now
 
         next, duration, end_time, _, _ = self.worker._get_next_sleep_schedule()
         expected_duration = 3600
@@ -70,9 +70,9 @@ class SleepScheculeTestCase(unittest.TestCase):
         self.assertEqual(duration, expected_duration)
         self.assertEqual(end_time, expected_endtime)
 
-    @patch('pokemongo_bot.sleep_schedule.datetime')
-    def test_get_next_time_called_when_this_days_time_passed(self, mock_datetime):
-        mock_datetime.now.return_value = datetime(year=2016, month=8, day=1, hour=19, minute=0)
+    @patch('pokemongo_bot.clock.now')
+    def test_get_next_time_called_when_this_days_time_passed(self, mock_now):
+        mock_now.return_value = datetime(year=2016, month=8, day=1, hour=19, minute=0)
 
         next = self.worker._get_next_sleep_schedule()[0]
         from_date = datetime(year=2016, month=8, day=02, hour=12, minute=15)
@@ -90,7 +90,7 @@ class SleepScheculeTestCase(unittest.TestCase):
         self.assertGreaterEqual(duration, from_seconds)
         self.assertLessEqual(duration, to_seconds)
 
-    @patch('pokemongo_bot.sleep_schedule.sleep')
+    @patch('pokemongo_bot.clock.sleep')
     def test_sleep(self, mock_sleep):
         self.worker._next_duration = SleepSchedule.LOG_INTERVAL_SECONDS * 10
         self.worker._sleep()
@@ -100,7 +100,7 @@ class SleepScheculeTestCase(unittest.TestCase):
         for arg in calls:
             self.assertEqual(arg, SleepSchedule.LOG_INTERVAL_SECONDS)
 
-    @patch('pokemongo_bot.sleep_schedule.sleep')
+    @patch('pokemongo_bot.clock.sleep')
     def test_sleep_not_divedable_by_interval(self, mock_sleep):
         self.worker._next_duration = SleepSchedule.LOG_INTERVAL_SECONDS * 10 + 5
         self.worker._sleep()
@@ -112,23 +112,23 @@ class SleepScheculeTestCase(unittest.TestCase):
         #Last call must be 5
         self.assertEqual(calls[-1], 5)
 
-    @patch('pokemongo_bot.sleep_schedule.sleep')
-    @patch('pokemongo_bot.sleep_schedule.datetime')
-    def test_call_work_before_schedule(self, mock_datetime, mock_sleep):
+    @patch('pokemongo_bot.clock.sleep')
+    @patch('pokemongo_bot.clock.now')
+    def test_call_work_before_schedule(self, mock_now, mock_sleep):
         self.worker._next_sleep = datetime(year=2016, month=8, day=1, hour=12, minute=0)
-        mock_datetime.now.return_value = self.worker._next_sleep - timedelta(minutes=5)
+        mock_now.return_value = self.worker._next_sleep - timedelta(minutes=5)
 
         self.worker.work()
 
         self.assertEqual(mock_sleep.call_count, 0)
 
-    @patch('pokemongo_bot.sleep_schedule.sleep')
-    @patch('pokemongo_bot.sleep_schedule.datetime')
-    def test_call_work_after_schedule(self, mock_datetime, mock_sleep):
+    @patch('pokemongo_bot.clock.sleep')
+    @patch('pokemongo_bot.clock.now')
+    def test_call_work_after_schedule(self, mock_now, mock_sleep):
         self.bot.login = MagicMock()
         self.worker._next_sleep = datetime(year=2016, month=8, day=1, hour=12, minute=0)
         # Change time to be after schedule
-        mock_datetime.now.return_value = self.worker._next_sleep + timedelta(minutes=5)
+        mock_now.return_value = self.worker._next_sleep + timedelta(minutes=5)
 
         self.worker.work()
 
@@ -0,0 +1,229 @@
+# -*- coding: utf-8 -*-
+
+import base64
+import copy
+import gzip
+import json
+import logging
+import threading
+from collections import defaultdict, deque
+
+from pokemongo_bot import clock
+from pokemongo_bot.simulator import LocalAuth
+
+
+def _open(path, mode):
+    if path.endswith('.gz'):
+        return gzip.open(path, mode)
+    return open(path, mode)
+
+
+def _encode(value):
+    # protobuf bytes fields are str that is not always valid utf-8, those
+    # are written as {"__bytes__": base64} and come back as str
+    if isinstance(value, dict):
+        return {key: _encode(item) for key, item in value.iteritems()}
+    if isinstance(value, (list, tuple)):
+        return [_encode(item) for item in value]
+    if isinstance(value, str):
+        try:
+            value.decode('utf-8')
+        except UnicodeDecodeError:
+            return {'__bytes__': base64.b64encode(value)}
+    return value
+
+
+def _decode(value):
+    if isinstance(value, dict):
+        if len(value) == 1 and '__bytes__' in value:
+            return base64.b64decode(value['__bytes__'])
+        return {key: _decode(item) for key, item in value.iteritems()}
+    if isinstance(value, list):
+        return [_decode(item) for item in value]
+    return value
+
+
+def read_records(path):
+    """
+    Records of a traffic log, in the order they were written.
+    A line cut by a crash while recording ends the log.
+    :rtype: list of dict
+    """
+    records = []
+    with _open(path, 'rb') as infile:
+        for line in infile:
+            try:
+                records.append(_decode(json.loads(line)))
+            except ValueError:
+                break
+    return records
+
+
+class TrafficRecorder(object):
+    """Appends every call of ApiRequest to a log file
+
+    One JSON line per call with its time, the request_callers, the position
+    and the subrequests of the envelope, and the decoded response. Lines are
+    flushed as they are written so a crashed session keeps its traffic, a
+    path ending with .gz is compressed. The log is read back by
+    ReplayServer.
+    Example Config:
+    "api_traffic": {
+      "record": "data/traffic.jsonl.gz"
+    }
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.sequence = 0
+        self._file = _open(path, 'ab')
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config):
+        path = getattr(config, 'api_traffic_record', None)
+        return cls(path) if path else None
+
+    def record(self, request_callers, subrequests, position, response):
+        with self._lock:
+            self.sequence += 1
+            line = json.dumps(_encode({
+                'seq': self.sequence,
+                'time': clock.time(),
+                'callers': request_callers,
+                'position': position,
+                'requests': subrequests,
+                'response': response
+            }), separators=(',', ':'))
+            self._file.write(line + '\n')
+            self._file.flush()
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+class ReplayServer(object):
+    """Serves the responses of a traffic log back, behind ApiWrapper
+
+    Envelopes are answered in the order they were recorded: while the bot
+    sends the same subrequests as the next recorded call, that call is
+    served as a whole. When an envelope differs, e.g. the subrequests are
+    batched differently, each request type gets the first of its recorded
+    responses not served yet, and the fallback is logged. Once the responses
+    of a type are used up the last one is repeated, types never recorded get
+    an empty response.
+
+    On a VirtualClock the clock is moved forward to the time each response
+    was recorded at, timers and cooldowns of the bot then expire as they did
+    in the recorded session.
+    """
+
+    def __init__(self, records):
+        self.logger = logging.getLogger(type(self).__name__)
+        self.calls = 0
+        self.repeated = 0
+        self.fallbacks = 0
+        self._envelopes = deque()  # (session, seq), request types
+        self._by_type = defaultdict(deque)  # request type -> (session, seq)
+        self._responses = {}  # ((session, seq), request type) -> (time, status_code, response)
+        self._last = {}
+        self._lock = threading.Lock()
+
+        # seq starts over with each session appended to the log
+        session = 0
+        previous = None
+        for record in records:
+            if previous is not None and record['seq'] <= previous:
+                session += 1
+            previous = record['seq']
+            key = (session, record['seq'])
+
+            responses = record['response'].get('responses', {})
+            names = [name for name, _ in record['requests']]
+            self._envelopes.append((key, names))
+            for name in names:
+                if name in responses:
+                    self._by_type[name].append(key)
+                    self._responses[(key, name)] = (record['time'], record['response'].get('status_code', 1),
+                                                    responses[name])
+
+    @classmethod
+    def from_file(cls, path):
+        return cls(read_records(path))
+
+    @staticmethod
+    def start_time_of(path):
+        """
+        :return: Time of the first record of the log, None if it is empty.
+        :rtype: float
+        """
+        records = read_records(path)
+        return records[0]['time'] if records else None
+
+    @property
+    def finished(self):
+        """Whether every recorded response was served"""
+        return not self._responses
+
+    def auth_provider(self, username):
+        return LocalAuth(username)
+
+    def _next_envelope(self):
+        # envelopes already served by type in a fallback are skipped
+        while self._envelopes:
+            key, names = self._envelopes[0]
+            if any((key, name) in self._responses for name in names):
+                return key, names
+            self._envelopes.popleft()
+        return None, None
+
+    def _next_of_type(self, name):
+        queue = self._by_type.get(name)
+        while queue:
+            key = queue.popleft()
+            if (key, name) in self._responses:
+                return key
+        return None
+
+    def call(self, subrequests, position):
+        with self._lock:
+            self.calls += 1
+            status_code = None
+            recorded_at = None
+            responses = {}
+            names = [name for name, _ in subrequests]
+
+            key, recorded = self._next_envelope()
+            if recorded == names:
+                self._envelopes.popleft()
+            else:
+                if key is not None:
+                    self.fallbacks += 1
+                    self.logger.info('Call %d sends %s, recorded call %d sent %s, replaying by request type',
+                                     self.calls, names, key[1], recorded)
+                key = None
+
+            for name in names:
+                if key is None:
+                    served = self._next_of_type(name)
+                else:
+                    served = key if (key, name) in self._responses else None
+                if served is not None:
+                    recorded_at, status, self._last[name] = self._responses.pop((served, name))
+                    if status_code is None:
+                        status_code = status
+                    responses[name] = self._last[name]
+                elif name in self._last:
+                    # the bot may change what it gets, each repeat is a copy
+                    self.repeated += 1
+                    responses[name] = copy.deepcopy(self._last[name])
+                else:
+                    self.logger.debug('No recorded response to %s', name)
+                    responses[name] = {}
+
+            if recorded_at is not None and isinstance(clock.get_clock(), clock.VirtualClock):
+                clock.sleep(recorded_at - clock.time())
+
+            return {'status_code': 1 if status_code is None else status_code, 'request_id': self.calls,
+                    'responses': responses}
@@ -1,13 +1,14 @@
 # -*- coding: utf-8 -*-
-from geopy.distance import VincentyDistance
-from geopy import Point
-from itertools import chain
+from bisect import bisect_right
 
-import haversine
 import math
+import numpy as np
 import polyline
 import requests
 
+from pokemongo_bot import geo
+from pokemongo_bot.kd_tree import KDTree
+
 
 class PolylineObjectHandler:
     '''
@@ -19,14 +20,15 @@ class PolylineObjectHandler:
     _run = False
 
     @staticmethod
-    def cached_polyline(origin, destination, speed, google_map_api_key=None):
+    def cached_polyline(origin, destination, speed, google_map_api_key=None, road_graph=None, route_cache=None):
         '''
         Google API has limits, so we can't generate new Polyline at every tick...
         '''
 
         # Absolute offset between bot origin and PolyLine get_last_pos() (in meters)
         if PolylineObjectHandler._cache and PolylineObjectHandler._cache.get_last_pos() != (None, None):
-            abs_offset = haversine.haversine(tuple(origin), PolylineObjectHandler._cache.get_last_pos())*1000
+            last_pos = PolylineObjectHandler._cache.get_last_pos()
+            abs_offset = geo.distance(origin[0], origin[1], last_pos[0], last_pos[1])
         else:
             abs_offset = float("inf")
         is_old_cache = lambda : abs_offset > 8 # Consider cache old if we identified an offset more then 8 m
@@ -46,7 +48,8 @@ class PolylineObjectHandler:
                 PolylineObjectHandler._run = True
                 PolylineObjectHandler._instability = 20 # next N moves use same cache
 
-            PolylineObjectHandler._cache = Polyline(origin, destination, speed, google_map_api_key)
+            PolylineObjectHandler._cache = PolylineObjectHandler.new_polyline(origin, destination, speed,
+                                                                              google_map_api_key, road_graph, route_cache)
         else:
             # valid cache found
             PolylineObjectHandler._instability -= 1
@@ -54,12 +57,63 @@ class PolylineObjectHandler:
             pass # use current cache
         return PolylineObjectHandler._cache
 
+    @staticmethod
+    def new_polyline(origin, destination, speed, google_map_api_key=None, road_graph=None, route_cache=None):
+        '''
+        Reuses a route of the route cache going to the same place when there
+        is one starting near origin, asks for a new route otherwise.
+        '''
+        route = route_cache.get(origin, destination) if route_cache is not None else None
+
+        if route is not None:
+            points, elevations = route
+            return Polyline.from_points(points, speed, dict(elevations))
+
+        new_polyline = Polyline(origin, destination, speed, google_map_api_key, road_graph)
+
+        # a straight line is what we get when Google has no route for us
+        if route_cache is not None and len(new_polyline._points) > 2:
+            route_cache.put(origin, destination, new_polyline._points, new_polyline._elevation_at_point.items())
+
+        return new_polyline
+
 
 class Polyline(object):
-    def __init__(self, origin, destination, speed, google_map_api_key=None):
+    def __init__(self, origin, destination, speed, google_map_api_key=None, road_graph=None):
         self.speed = float(speed)
         self.origin = origin
         self.destination = tuple(destination)
+        # walked locally when the road graph covers both ends
+        route = road_graph.route(self.origin, self.destination) if road_graph is not None else None
+
+        if route is not None:
+            self._init_from_route(route)
+        else:
+            self._init_from_google(google_map_api_key)
+
+    @classmethod
+    def from_points(cls, points, speed, elevation_at_point):
+        '''
+        Polyline along known points, e.g. a route of the RouteCache.
+        '''
+        polyline = cls.__new__(cls)
+        polyline.speed = float(speed)
+        polyline.origin = tuple(points[0])
+        polyline.destination = tuple(points[-1])
+        polyline._init_from_points(points, elevation_at_point)
+        return polyline
+
+    def _init_from_route(self, route):
+        points = [self.origin] + [(lat, lng) for lat, lng, _ in route] + [self.destination]
+        self._init_from_points(points, dict(((lat, lng), alt) for lat, lng, alt in route if alt is not None))
+
+    def _init_from_points(self, points, elevation_at_point):
+        self._points = [p for n, p in enumerate(points) if n == 0 or p != points[n - 1]]
+        self._polyline = self._get_encoded_points()
+        self._init_steps()
+        self._set_elevations(elevation_at_point)
+
+    def _init_from_google(self, google_map_api_key):
         self.DIRECTIONS_API_URL='https://maps.googleapis.com/maps/api/directions/json?mode=walking'
         self.DIRECTIONS_URL = '{}&origin={}&destination={}'.format(self.DIRECTIONS_API_URL,
                 '{},{}'.format(*self.origin),
@@ -86,10 +140,7 @@ class Polyline(object):
             self._directions_encoded_points = self._directions_response['routes']
         self._points = [self.origin] + self._get_directions_points() + [self.destination]
         self._polyline = self._get_encoded_points()
-        self._last_pos = self._points[0]
-        self._step_dict =  self._get_steps_dict()
-        self._step_keys = sorted(self._step_dict.keys())
-        self._last_step = 0
+        self._init_steps()
 
         self._nr_samples = int(min(self.get_total_distance() / self.speed + 1, 512))
         self.ELEVATION_API_URL='https://maps.googleapis.com/maps/api/elevation/json?path=enc:'
@@ -98,135 +149,80 @@ class Polyline(object):
         if google_map_api_key:
             self.ELEVATION_URL = '{}&key={}'.format(self.ELEVATION_URL, google_map_api_key)
         self._elevation_response = requests.get(self.ELEVATION_URL).json()
-        self._elevation_at_point = dict((tuple(x['location'].values()),
-                                         x['elevation']) for x in
-                                        self._elevation_response['results'])
+        self._set_elevations(dict((tuple(x['location'].values()),
+                                   x['elevation']) for x in
+                                  self._elevation_response['results']))
+
+    def _init_steps(self):
+        # distance walked from the origin when reaching each point
+        lats, lngs = zip(*self._points)
+        self._cumulative = [0.0] + np.cumsum(geo.distance(lats[:-1], lngs[:-1], lats[1:], lngs[1:])).tolist()
+        self._total_distance = math.ceil(self._cumulative[-1])
+        self._walked = 0.0
+        self._last_pos = self._points[0]
+
+    def _set_elevations(self, elevation_at_point):
+        self._elevation_at_point = elevation_at_point
+        samples = elevation_at_point.items()
+        self._elevations = [e for _, e in samples]
+        self._elevation_tree = KDTree([p[0] for p, _ in samples], [p[1] for p, _ in samples])
 
     def _get_directions_points(self):
         points = []
         for point in self._directions_encoded_points:
             points += polyline.decode(point)
-        return [x for n,x in enumerate(points) if x not in points[:n]]
+        seen = set()
+        return [x for x in points if not (x in seen or seen.add(x))]
 
     def _get_encoded_points(self):
         return polyline.encode(self._points)
 
-    def _get_walk_steps(self):
-        if self._points:
-            steps = zip(chain([self._points[0]], self._points),
-                        chain(self._points, [self._points[-1]]))
-            steps = filter(None, [(o, d) if o != d else None for o, d in steps])
-            # consume the filter as list
-            return list(steps)
-        else:
-            return []
-
-    def _get_steps_dict(self):
-        walked_distance = 0.0
-        steps_dict = {}
-        for step in self._get_walk_steps():
-            walked_distance += haversine.haversine(*step) * 1000
-            steps_dict[walked_distance] = step
-        return steps_dict
-
-    def get_alt(self):
-        closest_sample = None
-        best_distance = float("inf")
-        for point in self._elevation_at_point.keys():
-            local_distance = haversine.haversine(self._last_pos, point)*1000
-            if local_distance < best_distance:
-                closest_sample = point
-                best_distance = local_distance
-        if closest_sample in self._elevation_at_point:
-            return self._elevation_at_point[closest_sample]
-        else:
-            return None
-
-    def get_pos(self):
-        if self.speed > self.get_total_distance():
-            self._last_pos = self.destination
-            self._last_step = len(self._step_keys)-1
-        if self.get_last_pos() == self.destination:
-            return self.get_last_pos()
-        distance = self.speed
-        origin = Point(*self._last_pos)
-        ((so_lat, so_lng), (sd_lat, sd_lng)) = self._step_dict[self._step_keys[self._last_step]]
-        bearing = self._calc_bearing(so_lat, so_lng, sd_lat, sd_lng)
-        while haversine.haversine(self._last_pos, (sd_lat, sd_lng))*1000 < distance:
-            distance -= haversine.haversine(self._last_pos, (sd_lat, sd_lng))*1000
-            self._last_pos = (sd_lat, sd_lng)
-            if self._last_step < len(self._step_keys)-1:
-                self._last_step += 1
-                ((so_lat, so_lng), (sd_lat, sd_lng)) = self._step_dict[self._step_keys[self._last_step]]
-                bearing = self._calc_bearing(so_lat, so_lng, sd_lat, sd_lng)
-                origin = Point(so_lat, so_lng)
-                lat, lng = self._calc_next_pos(origin, distance, bearing)
-                if haversine.haversine(self._last_pos, (lat, lng))*1000 < distance:
-                    distance -= haversine.haversine(self._last_pos, (lat, lng))*1000
-                    self._last_pos = (lat, lng)
-            else:
-                return self.get_last_pos()
-        else:
-            lat, lng = self._calc_next_pos(origin, distance, bearing)
-            self._last_pos = (lat, lng)
-            return self.get_last_pos()
-
+    def get_alt(self, interpolate=False):
+        return self.get_alt_at(self._last_pos[0], self._last_pos[1], interpolate)
 
-    def get_total_distance(self):
-        return math.ceil(sum([haversine.haversine(*x) * 1000 for x in self._get_walk_steps()]))
+    def get_alt_at(self, lat, lng, interpolate=False):
+        """
+        Elevation of the sample closest to a position, None without samples.
+        With interpolate, the elevations of the two closest samples are
+        interpolated linearly according to their distances.
+        """
+        nearest = self._elevation_tree.nearest(lat, lng, 2 if interpolate else 1)
 
+        if not nearest:
+            return None
 
-    def get_last_pos(self):
-        return self._last_pos
+        if len(nearest) == 1 or nearest[0][1] == 0:
+            return self._elevations[nearest[0][0]]
 
-    def set_speed(self, speed):
-        self.speed = speed
+        (a, a_distance), (b, b_distance) = nearest
+        return (self._elevations[a] * b_distance + self._elevations[b] * a_distance) / (a_distance + b_distance)
 
-    def _calc_next_pos(self, origin, distance, bearing):
-        lat, lng, _ = origin
-        if distance == 0.0:
-            return lat, lng
-        if distance == float("inf"):
-            return self.destination
-        lat, lng, _ = VincentyDistance(kilometers=distance * 1e-3).destination(origin, bearing)
-        return (lat, lng)
+    def get_pos(self):
+        self._walked = min(self._walked + self.speed, self._cumulative[-1])
+        self._last_pos = self.get_pos_at(self._walked)
+        return self.get_last_pos()
 
-    def _calc_bearing(self, start_lat, start_lng, dest_lat, dest_lng):
+    def get_pos_at(self, walked):
         """
-        Calculates the bearing between two points.
-
-        The formulae used is the following:
-            θ = atan2(sin(Δlong).cos(lat2),
-                      cos(lat1).sin(lat2) − sin(lat1).cos(lat2).cos(Δlong))
-
-        :Parameters:
-          - `start_lat in decimal degrees
-          - `start_lng in decimal degrees
-          - `dest_lat in decimal degrees
-          - `dest_lng in decimal degrees
-
-        :Returns:
-          The bearing in degrees
-
-        :Returns Type:
-          float
+        Position after walking that many meters from the origin along the
+        polyline, interpolated between the two points around it.
         """
+        if walked >= self._cumulative[-1]:
+            return self.destination
+        if walked <= 0:
+            return self._points[0]
 
-        lat1 = math.radians(start_lat)
-        lat2 = math.radians(dest_lat)
-
-        diffLong = math.radians(dest_lng - start_lng)
-
-        x = math.sin(diffLong) * math.cos(lat2)
-        y = math.cos(lat1) * math.sin(lat2) - (math.sin(lat1)
-                                               * math.cos(lat2) * math.cos(diffLong))
+        # cumulative[i] <= walked < cumulative[i + 1]
+        i = bisect_right(self._cumulative, walked) - 1
+        (o_lat, o_lng), (d_lat, d_lng) = self._points[i], self._points[i + 1]
+        ratio = (walked - self._cumulative[i]) / (self._cumulative[i + 1] - self._cumulative[i])
+        return o_lat + (d_lat - o_lat) * ratio, o_lng + (d_lng - o_lng) * ratio
 
-        initial_bearing = math.atan2(x, y)
+    def get_total_distance(self):
+        return self._total_distance
 
-        # Now we have the initial bearing but math.atan2 return values
-        # from -180° to + 180° which is not what we want for a compass bearing
-        # The solution is to normalize the initial bearing as shown below
-        initial_bearing = math.degrees(initial_bearing)
-        compass_bearing = (initial_bearing + 360) % 360
+    def get_last_pos(self):
+        return self._last_pos
 
-        return compass_bearing
+    def set_speed(self, speed):
+        self.speed = speed
@@ -1,8 +1,12 @@
+import os
 from random import uniform
 
+from pokemongo_bot.base_dir import _base_dir
 from pokemongo_bot.cell_workers.utils import distance
 from pokemongo_bot.walkers.step_walker import StepWalker
 from polyline_generator import PolylineObjectHandler
+from road_graph import load as load_road_graph
+from route_cache import load as load_route_cache
 
 
 class PolylineWalker(StepWalker):
@@ -13,9 +17,15 @@ class PolylineWalker(StepWalker):
         self.dest_lat, self.dest_lng = dest_lat, dest_lng
         self.actual_pos = tuple(self.bot.position[:2])
         self.actual_alt = self.bot.position[-1]
+        road_graph = load_road_graph(self.bot.config.road_graph) if self.bot.config.road_graph else None
+        route_cache = None
+        if self.bot.config.route_cache_size > 0:
+            route_cache = load_route_cache(os.path.join(_base_dir, 'data', 'routes-%s.json' % self.bot.config.username),
+                                           self.bot.config.route_cache_size)
         self.polyline = PolylineObjectHandler.cached_polyline(self.actual_pos,
                                                               (self.dest_lat, self.dest_lng),
-                                                              self.speed, google_map_api_key=self.bot.config.gmapkey)
+                                                              self.speed, google_map_api_key=self.bot.config.gmapkey,
+                                                              road_graph=road_graph, route_cache=route_cache)
         self.pol_lat, self.pol_lon = self.polyline.get_pos()
         self.pol_alt = self.polyline.get_alt() or self.actual_alt
         super(PolylineWalker, self).__init__(self.bot, self.pol_lat, self.pol_lon,
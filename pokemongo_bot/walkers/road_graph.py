@@ -0,0 +1,339 @@
+# -*- coding: utf-8 -*-
+"""Walking routes computed locally on a road graph
+
+A RoadGraph is a walking network (an OpenStreetMap extract converted
+once with this module) stored in one binary file which is memory mapped,
+so opening it is instant and only the pages visited by the routes are
+read. route() runs A* with the haversine distance as heuristic and gives
+the points to walk, PolylineWalker uses it instead of the Google
+Directions and Elevation APIs when `road_graph` is set in the config.
+The ends of a route are snapped to the graph through a grid of cells of
+CELL_DEGREES stored in the file, only the cells around them are read.
+
+Converting an extract (.osm XML, e.g. exported from openstreetmap.org or
+cut with osmconvert) from the root of the repository:
+
+    python -m pokemongo_bot.walkers.road_graph map.osm data/map.graph
+
+File layout, little endian: a 20 bytes header (magic, version, number of
+nodes, of edges and of grid cells), then the arrays of node latitudes
+(float64), longitudes (float64), altitudes (float32, NaN if unknown), the
+edge offsets of each node (uint32, nodes + 1), the edge targets (uint32)
+and lengths in meters (float32), then the keys of the cells holding nodes
+in increasing order (int64, row * GRID_COLUMNS + column), the offsets of
+their nodes (uint32, cells + 1) and the nodes sorted by cell (uint32).
+Edges are stored in both directions.
+"""
+
+import heapq
+import math
+import sys
+import xml.etree.cElementTree as ElementTree
+
+import numpy as np
+
+from pokemongo_bot import geo
+
+MAGIC = 'PGRG'
+VERSION = 2
+HEADER = np.dtype([('magic', 'S4'), ('version', '<u4'), ('nodes', '<u4'), ('edges', '<u4'), ('cells', '<u4')])
+# side of the cells of the node grid, about 110 m of latitude
+CELL_DEGREES = 0.001
+GRID_COLUMNS = int(round(360 / CELL_DEGREES))
+# meters, farther from the graph than that the route is left to Google
+MAX_SNAP_DISTANCE = 500.0
+# routes longer than that many times the straight line plus a kilometer are
+# not searched, it bounds the search when the destination is cut from the origin
+MAX_DETOUR = 3.0
+# highway values of OpenStreetMap ways which can not be walked
+NOT_WALKABLE = frozenset(['motorway', 'motorway_link', 'trunk', 'trunk_link', 'construction',
+                          'proposed', 'raceway', 'bus_guideway', 'abandoned'])
+
+_graphs = {}  # path -> RoadGraph
+
+
+def load(path):
+    """
+    Opens a road graph file, or returns the graph opened before.
+    :rtype: RoadGraph
+    """
+    if path not in _graphs:
+        _graphs[path] = RoadGraph.load(path)
+    return _graphs[path]
+
+
+class RoadGraph(object):
+    def __init__(self, lats, lngs, alts, offsets, targets, lengths, cell_keys, cell_offsets, cell_nodes):
+        self.lats = lats
+        self.lngs = lngs
+        self.alts = alts
+        self.offsets = offsets
+        self.targets = targets
+        self.lengths = lengths
+        self.cell_keys = cell_keys
+        self.cell_offsets = cell_offsets
+        self.cell_nodes = cell_nodes
+
+    def __len__(self):
+        return len(self.lats)
+
+    @classmethod
+    def from_edges(cls, lats, lngs, edges, alts=None):
+        """
+        :param lats: Latitude of each node.
+        :param lngs: Longitude of each node.
+        :param edges: Pairs of node indexes which are linked, in both directions.
+        :param alts: Altitude of each node, NaN or None if unknown.
+        :rtype: RoadGraph
+        """
+        lats = np.asarray(lats, dtype='<f8')
+        lngs = np.asarray(lngs, dtype='<f8')
+
+        if alts is None:
+            alts = np.full(len(lats), np.nan, dtype='<f4')
+        else:
+            alts = np.array([np.nan if a is None else a for a in alts], dtype='<f4')
+
+        edges = np.asarray(edges, dtype=np.int64).reshape(-1, 2)
+        sources = np.concatenate([edges[:, 0], edges[:, 1]])
+        targets = np.concatenate([edges[:, 1], edges[:, 0]])
+        order = np.argsort(sources, kind='mergesort')
+        sources, targets = sources[order], targets[order]
+
+        offsets = np.zeros(len(lats) + 1, dtype='<u4')
+        offsets[1:] = np.cumsum(np.bincount(sources, minlength=max(len(lats), 1))[:len(lats)])
+        lengths = geo.distance(lats[sources], lngs[sources], lats[targets], lngs[targets])
+
+        rows, columns = _cell(lats, lngs)
+        keys = rows * GRID_COLUMNS + columns
+        cell_nodes = np.argsort(keys, kind='mergesort')
+        cell_keys, starts = np.unique(keys[cell_nodes], return_index=True)
+        cell_offsets = np.append(starts, len(lats))
+
+        return cls(lats, lngs, alts, offsets, targets.astype('<u4'), np.asarray(lengths, dtype='<f4'),
+                   cell_keys.astype('<i8'), cell_offsets.astype('<u4'), cell_nodes.astype('<u4'))
+
+    @classmethod
+    def from_osm(cls, path):
+        """
+        Builds the graph of the walkable ways of an OpenStreetMap XML extract.
+        The ele tags of the nodes, when there are some, give their altitude.
+        :rtype: RoadGraph
+        """
+        positions = {}
+        ways = []
+
+        for _, element in ElementTree.iterparse(path):
+            if element.tag == 'node':
+                tags = dict((t.get('k'), t.get('v')) for t in element.findall('tag'))
+                positions[element.get('id')] = (float(element.get('lat')), float(element.get('lon')),
+                                                _parse_float(tags.get('ele')))
+                element.clear()
+            elif element.tag == 'way':
+                tags = dict((t.get('k'), t.get('v')) for t in element.findall('tag'))
+                highway = tags.get('highway')
+
+                if highway and highway not in NOT_WALKABLE and tags.get('foot') != 'no' and tags.get('access') != 'private':
+                    ways.append([nd.get('ref') for nd in element.findall('nd')])
+                element.clear()
+
+        index = {}
+        edges = []
+
+        for way in ways:
+            refs = [ref for ref in way if ref in positions]
+
+            for ref in refs:
+                index.setdefault(ref, len(index))
+
+            edges += [(index[a], index[b]) for a, b in zip(refs, refs[1:]) if a != b]
+
+        nodes = sorted(index, key=index.get)
+        lats, lngs, alts = zip(*[positions[ref] for ref in nodes]) if nodes else ((), (), ())
+        return cls.from_edges(lats, lngs, edges, alts)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Memory maps a graph file written by save().
+        :rtype: RoadGraph
+        """
+        header = np.fromfile(path, dtype=HEADER, count=1)
+
+        if len(header) != 1 or header['magic'][0] != MAGIC:
+            raise ValueError('{} is not a road graph file'.format(path))
+        if header['version'][0] != VERSION:
+            raise ValueError('{} was written by another version, convert the extract again'.format(path))
+
+        nodes, edges, cells = int(header['nodes'][0]), int(header['edges'][0]), int(header['cells'][0])
+        arrays = []
+        offset = HEADER.itemsize
+
+        for dtype, count in (('<f8', nodes), ('<f8', nodes), ('<f4', nodes),
+                             ('<u4', nodes + 1), ('<u4', edges), ('<f4', edges),
+                             ('<i8', cells), ('<u4', cells + 1), ('<u4', nodes)):
+            if count:
+                arrays.append(np.memmap(path, dtype=dtype, mode='r', offset=offset, shape=(count,)))
+            else:
+                arrays.append(np.zeros(0, dtype=dtype))
+            offset += np.dtype(dtype).itemsize * count
+
+        return cls(*arrays)
+
+    def save(self, path):
+        header = np.array([(MAGIC, VERSION, len(self.lats), len(self.targets), len(self.cell_keys))], dtype=HEADER)
+
+        with open(path, 'wb') as outfile:
+            header.tofile(outfile)
+            for array, dtype in ((self.lats, '<f8'), (self.lngs, '<f8'), (self.alts, '<f4'),
+                                 (self.offsets, '<u4'), (self.targets, '<u4'), (self.lengths, '<f4'),
+                                 (self.cell_keys, '<i8'), (self.cell_offsets, '<u4'), (self.cell_nodes, '<u4')):
+                np.asarray(array, dtype=dtype).tofile(outfile)
+
+    def nearest_node(self, lat, lng, max_distance=MAX_SNAP_DISTANCE):
+        """
+        Looks in squares of cells around the point, twice as wide each time,
+        until the closest node found is closer than any node outside.
+        :param max_distance: Farther nodes are not looked for, in meters.
+        :return: Index of the node closest to the point and its distance in
+                 meters, None if there is none within max_distance.
+        :rtype: tuple
+        """
+        row, column = [int(v) for v in _cell(lat, lng)]
+        best = None
+        size = 1
+
+        while True:
+            nodes = self._nodes_around(row, column, size)
+
+            if len(nodes):
+                distances = geo.distance(lat, lng, self.lats[nodes], self.lngs[nodes])
+                i = int(np.argmin(distances))
+                best = int(nodes[i]), float(distances[i])
+
+            # the nodes outside are at least `size` cells away
+            reach = _cells_to_meters(lat, size)
+
+            if best is not None and best[1] <= reach:
+                return best
+            if reach >= max_distance or size * CELL_DEGREES >= 180:
+                return best if best is not None and best[1] <= max_distance else None
+            size *= 2
+
+    def _nodes_around(self, row, column, size):
+        # nodes of the cells at most `size` rows and columns away, the cells
+        # of a row follow each other in the index and so do their nodes
+        rows = np.arange(row - size, row + size + 1) * GRID_COLUMNS
+        starts = np.searchsorted(self.cell_keys, rows + column - size).tolist()
+        ends = np.searchsorted(self.cell_keys, rows + column + size, side='right').tolist()
+        slices = [self.cell_nodes[self.cell_offsets.item(s):self.cell_offsets.item(e)]
+                  for s, e in zip(starts, ends) if e > s]
+        return np.concatenate(slices) if slices else np.zeros(0, dtype='<u4')
+
+    def route(self, origin, destination):
+        """
+        Shortest walk between the nodes closest to origin and destination.
+        :return: (lat, lng, alt) of the nodes to walk through, alt is None
+                 if unknown. None when a point is more than MAX_SNAP_DISTANCE
+                 away from the graph or when no path short enough links
+                 them (see MAX_DETOUR), Google is asked then.
+        :rtype: list
+        """
+        start = self.nearest_node(*origin[:2])
+        goal = self.nearest_node(*destination[:2])
+
+        if start is None or goal is None:
+            return None
+
+        straight = geo.distance(self.lats.item(start[0]), self.lngs.item(start[0]),
+                                self.lats.item(goal[0]), self.lngs.item(goal[0]))
+        path = self.shortest_path(start[0], goal[0], max_distance=MAX_DETOUR * straight + 1000.0)
+
+        if path is None:
+            return None
+
+        return [(self.lats.item(n), self.lngs.item(n), _altitude(self.alts.item(n))) for n in path]
+
+    def shortest_path(self, start, goal, max_distance=float('inf')):
+        """
+        A* from node start to node goal.
+        :param max_distance: Longer paths are not searched, in meters.
+        :return: Indexes of the nodes of the path, None if there is none.
+        :rtype: list
+        """
+        lats, lngs, offsets, targets, lengths = self.lats, self.lngs, self.offsets, self.targets, self.lengths
+        goal_lat, goal_lng = lats.item(goal), lngs.item(goal)
+        distances = {start: 0.0}
+        previous = {start: None}
+        done = set()
+        heap = [(geo.distance(lats.item(start), lngs.item(start), goal_lat, goal_lng), 0.0, start)]
+
+        while heap:
+            _, walked, node = heapq.heappop(heap)
+
+            if node == goal:
+                path = []
+                while node is not None:
+                    path.append(node)
+                    node = previous[node]
+                return path[::-1]
+
+            if node in done:
+                continue
+            done.add(node)
+
+            first, last = offsets.item(node), offsets.item(node + 1)
+
+            for target, length in zip(targets[first:last].tolist(), lengths[first:last].tolist()):
+                distance = walked + length
+
+                if distance < distances.get(target, float('inf')):
+                    distances[target] = distance
+                    previous[target] = node
+                    estimate = distance + geo.distance(lats.item(target), lngs.item(target), goal_lat, goal_lng)
+
+                    if estimate <= max_distance:
+                        heapq.heappush(heap, (estimate, distance, target))
+
+        return None
+
+
+def _cell(lat, lng):
+    # row and column of the grid cell of a point, or of arrays of points
+    return (np.floor((np.asarray(lat) + 90.0) / CELL_DEGREES).astype(np.int64),
+            np.floor((np.asarray(lng) + 180.0) / CELL_DEGREES).astype(np.int64))
+
+
+def _cells_to_meters(lat, cells):
+    # shortest distance spanned by that many cells from a point at lat, a
+    # column is the narrowest at the latitude of the square farthest from
+    # the equator
+    angle = math.radians(cells * CELL_DEGREES)
+    farthest = math.radians(min(abs(lat) + (cells + 1) * CELL_DEGREES, 90.0))
+    return geo.EARTH_RADIUS * min(angle, math.asin(min(math.cos(farthest) * math.sin(angle), 1.0)))
+
+
+def _parse_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _altitude(alt):
+    return None if math.isnan(alt) else alt
+
+
+def main(args):
+    if len(args) != 2:
+        print 'usage: python -m pokemongo_bot.walkers.road_graph <extract.osm> <output.graph>'
+        return 1
+
+    graph = RoadGraph.from_osm(args[0])
+    graph.save(args[1])
+    print '{} nodes, {} edges written to {}'.format(len(graph), len(graph.targets) / 2, args[1])
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+
+from pokemongo_bot import geo
+from pokemongo_bot.web_location_writer import write_atomically
+
+# degrees, routes whose destinations are in the same cell of that grid (about
+# 20 m) are the same routes
+GRID = 0.0002
+# meters, how far from a cached route a new origin may be to reuse it
+MATCH_DISTANCE = 30.0
+DEFAULT_SIZE = 100
+VERSION = 1
+
+_caches = {}  # path -> RouteCache
+
+
+def load(path, max_size=DEFAULT_SIZE):
+    """
+    Opens the route cache stored at path, or returns the one opened before.
+    :rtype: RouteCache
+    """
+    if path not in _caches:
+        _caches[path] = RouteCache(path, max_size)
+    return _caches[path]
+
+
+def cell(lat, lng):
+    return int(round(lat / GRID)), int(round(lng / GRID))
+
+
+class RouteCache(object):
+    """Least recently used routes of PolylineWalker, kept between runs
+
+    Each route is the geometry and the elevation samples of a Polyline,
+    keyed by its origin and destination snapped to a grid of GRID degrees.
+    A route is reused for a new origin when its destination is in the same
+    cell and the origin is less than MATCH_DISTANCE meters from one of its
+    points, the walk then starts at the closest point. So a bot going back
+    and forth between the same pokestops asks Google once per route.
+
+    The `max_size` routes used last are kept and written to `path` after
+    each new route, `hits` and `misses` count the lookups and are logged
+    along (at debug level).
+    """
+
+    def __init__(self, path=None, max_size=DEFAULT_SIZE):
+        self.logger = logging.getLogger(type(self).__name__)
+        self.path = path
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        # (origin cell, destination cell) -> (points, elevations)
+        self._routes = OrderedDict()
+        self._lock = threading.Lock()
+
+        if path and os.path.exists(path):
+            self._read()
+
+    def __len__(self):
+        return len(self._routes)
+
+    def get(self, origin, destination):
+        """
+        :return: Points to walk from origin to destination and the
+                 elevation samples along them, None if no route is cached.
+        :rtype: tuple
+        """
+        destination_cell = cell(*destination[:2])
+        best = None
+
+        with self._lock:
+            for key, (points, elevations) in self._routes.items():
+                if key[1] != destination_cell:
+                    continue
+
+                lats, lngs = zip(*points)
+                distances = geo.distance(origin[0], origin[1], lats, lngs)
+                closest = int(distances.argmin())
+
+                if distances[closest] <= MATCH_DISTANCE and (best is None or distances[closest] < best[0]):
+                    best = (distances[closest], closest, key)
+
+            if best is None:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            _, closest, key = best
+            points, elevations = self._routes.pop(key)
+            self._routes[key] = points, elevations
+
+        points = [tuple(origin[:2])] + points[closest:-1] + [tuple(destination[:2])]
+        return [p for n, p in enumerate(points) if n == 0 or p != points[n - 1]], elevations
+
+    def put(self, origin, destination, points, elevations):
+        """
+        :param points: Points of the route, origin and destination included.
+        :param elevations: Elevation samples, ((lat, lng), elevation) pairs.
+        """
+        key = cell(*origin[:2]), cell(*destination[:2])
+
+        with self._lock:
+            self._routes.pop(key, None)
+            self._routes[key] = [tuple(p[:2]) for p in points], [(tuple(p), e) for p, e in elevations]
+
+            while len(self._routes) > self.max_size:
+                self._routes.popitem(last=False)
+
+            if self.path:
+                self._write()
+
+            self.logger.debug('%d routes cached, %d hits and %d misses so far', len(self._routes), self.hits,
+                              self.misses)
+
+    def _read(self):
+        try:
+            with open(self.path) as infile:
+                data = json.load(infile)
+        except ValueError:
+            # not a json file, it is replaced by the next write
+            return
+
+        if data.get('version') != VERSION:
+            return
+
+        for route in data.get('routes', [])[-self.max_size:]:
+            key = tuple(route['origin']), tuple(route['destination'])
+            self._routes[key] = ([tuple(p) for p in route['points']],
+                                 [((lat, lng), alt) for lat, lng, alt in route['elevations']])
+
+    def _write(self):
+        routes = [{'origin': origin,
+                   'destination': destination,
+                   'points': points,
+                   'elevations': [(lat, lng, alt) for (lat, lng), alt in elevations]}
+                  for (origin, destination), (points, elevations) in self._routes.items()]
+        write_atomically(self.path, json.dumps({'version': VERSION, 'routes': routes}))
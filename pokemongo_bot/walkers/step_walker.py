@@ -1,12 +1,9 @@
 # -*- coding: utf-8 -*-
 
-import math
-
 from random import uniform
+from pokemongo_bot import geo
 from pokemongo_bot.cell_workers.utils import distance
 from pokemongo_bot.human_behaviour import sleep, random_alt_delta
-from geopy.distance import VincentyDistance
-from geopy import Point
 
 class StepWalker(object):
 
@@ -104,51 +101,15 @@ class StepWalker(object):
 
     def _calc_bearing(self, start_lat, start_lng, dest_lat, dest_lng):
         """
-        Calculates the bearing between two points.
-    
-        The formulae used is the following:
-            θ = atan2(sin(Δlong).cos(lat2),
-                      cos(lat1).sin(lat2) − sin(lat1).cos(lat2).cos(Δlong))
-    
-        :Parameters:
-          - `start_lat in decimal degrees
-          - `start_lng in decimal degrees
-          - `dest_lat in decimal degrees
-          - `dest_lng in decimal degrees
-    
-        :Returns:
-          The bearing in degrees
-    
-        :Returns Type:
-          float
+        Calculates the compass bearing in degrees between two points.
         """
-    
-        lat1 = math.radians(start_lat)
-        lat2 = math.radians(dest_lat)
-    
-        diffLong = math.radians(dest_lng - start_lng)
-    
-        x = math.sin(diffLong) * math.cos(lat2)
-        y = math.cos(lat1) * math.sin(lat2) - (math.sin(lat1)
-                * math.cos(lat2) * math.cos(diffLong))
-    
-        initial_bearing = math.atan2(x, y)
-    
-        # Now we have the initial bearing but math.atan2 return values
-        # from -180° to + 180° which is not what we want for a compass bearing
-        # The solution is to normalize the initial bearing as shown below
-        initial_bearing = math.degrees(initial_bearing)
-        compass_bearing = (initial_bearing + 360) % 360
-    
-        return compass_bearing
-        
+        return geo.bearing(start_lat, start_lng, dest_lat, dest_lng)
+
     def _get_next_pos(self, lat, lon, bearing, speed, precision):
-        origin = Point(lat, lon)
         if speed == 0.0:
             return lat, lon
         if speed == float("inf"):
             return self.destLat, self.destLng
         else:
             offset_angle = (1/self.speed)*(precision/1.74)
-            lat, lon, _ = VincentyDistance(kilometers=speed*1e-3).destination(origin, bearing + uniform(-offset_angle, offset_angle))
-            return lat, lon
+            return geo.destination(lat, lon, bearing + uniform(-offset_angle, offset_angle), speed)
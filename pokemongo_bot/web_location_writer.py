@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+
+import hashlib
+import json
+import os
+import stat
+import tempfile
+import threading
+
+from pokemongo_bot import clock
+
+
+def _file_mode(path):
+    # mode of the file replaced, or of a file created by open() if there is none
+    try:
+        return stat.S_IMODE(os.stat(path).st_mode)
+    except OSError:
+        umask = os.umask(0)
+        os.umask(umask)
+        return 0o666 & ~umask
+
+
+def write_atomically(path, data):
+    """
+    Writes data to a temporary file next to path and renames it over path,
+    readers (web UI, next start of the bot) never see a half written file.
+    The file keeps the mode of the one it replaces, mkstemp creating it
+    readable by its owner only.
+    """
+    directory = os.path.dirname(path) or '.'
+    fd, temp_path = tempfile.mkstemp(prefix='.{}.'.format(os.path.basename(path)), suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as outfile:
+            outfile.write(data)
+        os.chmod(temp_path, _file_mode(path))
+        if os.name == 'nt' and os.path.exists(path):
+            # rename does not replace an existing file on windows
+            os.remove(path)
+        os.rename(temp_path, path)
+    except Exception:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+class WebLocationWriter(object):
+    """Writes the position of the bot and the cells around it
+
+    Files written for the web UI and the next start of the bot:
+    data/cells-<username>.json, web/location-<username>.json and
+    data/last-location-<username>.json.
+
+    The cells are serialized once and the same bytes go in both files that
+    hold them, a file is only rewritten when its content changed and every
+    write goes through a temporary file renamed over the previous one.
+    wait() lets callers write at most once every `interval` seconds.
+    """
+
+    def __init__(self, base_dir, username, interval=2.0):
+        self.cells_path = os.path.join(base_dir, 'data', 'cells-%s.json' % username)
+        self.location_path = os.path.join(base_dir, 'web', 'location-%s.json' % username)
+        self.last_location_path = os.path.join(base_dir, 'data', 'last-location-%s.json' % username)
+        self.interval = interval
+        self.writes = 0
+        self.skipped = 0
+        self._digests = {}
+        self._last_key = None
+        self._last_write = 0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        """
+        Sleeps until `interval` seconds passed since the last write.
+        """
+        delay = self._last_write + self.interval - clock.time()
+        if delay > 0:
+            clock.sleep(delay)
+
+    def write(self, lat, lng, alt, cells, start_position, cells_key=None):
+        """
+        Writes the files whose content changed.
+        :param cells_key: Anything that changes with the cells, if given and
+            equal to the previous one with the same position, the cells are
+            not even serialized.
+        :return: Number of files written.
+        :rtype: int
+        """
+        with self._lock:
+            key = (lat, lng, alt, start_position and tuple(start_position), cells_key)
+            if cells_key is not None and key == self._last_key:
+                self.skipped += 3
+                return 0
+
+            cells_json = json.dumps(cells)
+            files = (
+                (self.cells_path, cells_json),
+                (self.location_path, '{"lat": %s, "lng": %s, "alt": %s, "cells": %s}' % (
+                    json.dumps(lat), json.dumps(lng), json.dumps(alt), cells_json)),
+                (self.last_location_path, json.dumps(
+                    {'lat': lat, 'lng': lng, 'alt': alt, 'start_position': start_position}))
+            )
+
+            written = 0
+            self._last_key = None
+            for path, data in files:
+                digest = hashlib.sha1(data).digest()
+                if self._digests.get(path) == digest:
+                    self.skipped += 1
+                    continue
+                write_atomically(path, data)
+                self._digests[path] = digest
+                written += 1
+
+            self._last_key = key
+            self.writes += written
+            if written:
+                self._last_write = clock.time()
+            return written
@@ -7,6 +7,7 @@ from tests import FakeApi, get_fake_conf
 from pgoapi import PGoApi
 from pgoapi.exceptions import NotLoggedInException, ServerBusyOrOfflineException, NoPlayerPositionSetException, EmptySubrequestChainException
 from pokemongo_bot.api_wrapper import ApiWrapper
+from pokemongo_bot.rate_limiter import RateLimiter
 
 class TestApiWrapper(unittest.TestCase):
     def test_raises_not_logged_in_exception(self):
@@ -98,23 +99,52 @@ class TestApiWrapper(unittest.TestCase):
 
     @timeout(1)
     def test_api_call_throttle_should_pass(self):
-        request = FakeApi().create_request()
-        request.is_response_valid = MagicMock(return_value=True)
-        request.requests_per_seconds = 5
+        api = FakeApi()
+        api.rate_limiter = RateLimiter(rate=5, burst=1)
 
-        for i in range(request.requests_per_seconds):
+        for i in range(5):
+            request = api.create_request()
+            request.is_response_valid = MagicMock(return_value=True)
+            request.get_inventory()
             request.call()
 
     @timeout(1) # expects a timeout
     def test_api_call_throttle_should_fail(self):
-        request = FakeApi().create_request()
-        request.is_response_valid = MagicMock(return_value=True)
-        request.requests_per_seconds = 5
+        api = FakeApi()
+        api.rate_limiter = RateLimiter(rate=5, burst=1)
 
         with self.assertRaises(TimeoutError):
-            for i in range(request.requests_per_seconds * 2):
+            for i in range(10):
+                request = api.create_request()
+                request.is_response_valid = MagicMock(return_value=True)
+                request.get_inventory()
                 request.call()
 
+    def test_rate_limiter_is_shared_by_requests(self):
+        api = FakeApi()
+        first = api.create_request()
+        second = api.create_request()
+        self.assertIs(first.rate_limiter, api.rate_limiter)
+        self.assertIs(second.rate_limiter, api.rate_limiter)
+
+    def test_rate_limiter_request_weights(self):
+        limiter = RateLimiter(rate=1, burst=3, weights={'get_map_objects': 2})
+        self.assertEqual(limiter.cost(['GET_INVENTORY']), 1)
+        self.assertEqual(limiter.cost(['GET_PLAYER', 'GET_MAP_OBJECTS']), 2)
+
+    @patch('pokemongo_bot.clock.sleep')
+    def test_rate_limiter_backs_off_when_throttled(self, mock_sleep):
+        limiter = RateLimiter(rate=4, burst=1)
+        limiter.throttled()
+        self.assertEqual(limiter.rate, 2)
+
+        limiter.acquire(['GET_INVENTORY'])
+        self.assertTrue(mock_sleep.called)
+
+        for i in range(100):
+            limiter.succeeded()
+        self.assertEqual(limiter.rate, 4)
+
     @patch('pokemongo_bot.api_wrapper.ApiRequest.is_response_valid')
     def test_api_direct_call(self, mock_method):
         mock_method.return_value = True
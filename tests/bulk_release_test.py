@@ -0,0 +1,86 @@
+import sqlite3
+import unittest
+
+from mock import MagicMock, patch
+
+from pokemongo_bot.bulk_release import BulkReleaser
+from pokemongo_bot.inventory import Candies, Pokemons
+from tests.pokemons_index_test import RATTATA, golbat, inventory_items
+
+
+def released(candy_awarded=1, result=1):
+    return {"responses": {"RELEASE_POKEMON": {"result": result, "candy_awarded": candy_awarded}}}
+
+
+class BulkReleaserTest(unittest.TestCase):
+    def setUp(self):
+        self.pokemons = Pokemons()
+        self.pokemons.refresh(inventory_items(golbat(10, 600, 15), golbat(11, 700, 0), golbat(12, 800, 5), RATTATA))
+        self.candies = Candies()
+
+        patcher = patch('pokemongo_bot.inventory._inventory')
+        inventory = patcher.start()
+        inventory.pokemons = self.pokemons
+        inventory.candy = self.candies
+        self.addCleanup(patcher.stop)
+
+        patcher = patch('pokemongo_bot.bulk_release.action_delay')
+        self.action_delay = patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.bot = MagicMock()
+        self.bot.database = sqlite3.connect(':memory:')
+        self.bot.database.execute("CREATE TABLE transfer_log (pokemon text, iv real, cp real)")
+
+    def logged(self):
+        return [row[0] for row in self.bot.database.execute("SELECT pokemon FROM transfer_log")]
+
+    def test_one_request_per_family_and_batch(self):
+        self.bot.api.release_pokemon.side_effect = [released(2), released(1), released(1)]
+        pokemons = self.pokemons.all()
+
+        result = BulkReleaser(self.bot, batch_size=2).release(pokemons)
+
+        self.assertEqual([p.unique_id for p in result], [10, 11, 12, 2])
+        self.assertEqual([c[1] for c in self.bot.api.release_pokemon.call_args_list],
+                         [{"pokemon_ids": [10, 11]}, {"pokemon_id": 12}, {"pokemon_id": 2}])
+        self.assertEqual(self.candies.get(41).quantity, 3)
+        self.assertEqual(self.candies.get(19).quantity, 1)
+        self.assertEqual(self.pokemons.all(), [])
+        self.assertEqual(self.logged(), ["Golbat", "Golbat", "Golbat", "Rattata"])
+        # one wait between two requests, not one per pokemon
+        self.assertEqual(self.action_delay.call_count, 2)
+        self.bot.metrics.released_pokemon.assert_called_once_with(4)
+
+    def test_failed_batch_is_sent_one_by_one(self):
+        self.bot.api.release_pokemon.side_effect = [released(result=2), released(), released(result=2), released()]
+        golbats = self.pokemons.of_family(41)
+
+        result = BulkReleaser(self.bot, batch_size=2).release(golbats)
+
+        self.assertEqual([p.unique_id for p in result], [10, 12])
+        self.assertEqual([c[1] for c in self.bot.api.release_pokemon.call_args_list],
+                         [{"pokemon_ids": [10, 11]}, {"pokemon_id": 10}, {"pokemon_id": 11}, {"pokemon_id": 12}])
+        self.assertEqual(sorted(p.unique_id for p in self.pokemons.all()), [2, 11])
+        self.assertEqual(self.candies.get(41).quantity, 2)
+
+    def test_batch_the_api_can_not_build_is_sent_one_by_one(self):
+        self.bot.api.release_pokemon.side_effect = [ValueError('Protocol message has no "pokemon_ids" field'),
+                                                    released(), released(), released()]
+        golbats = self.pokemons.of_family(41)
+
+        result = BulkReleaser(self.bot, batch_size=2).release(golbats)
+
+        self.assertEqual([p.unique_id for p in result], [10, 11, 12])
+        self.assertEqual([c[1] for c in self.bot.api.release_pokemon.call_args_list],
+                         [{"pokemon_ids": [10, 11]}, {"pokemon_id": 10}, {"pokemon_id": 11}, {"pokemon_id": 12}])
+        self.assertEqual(sorted(p.unique_id for p in self.pokemons.all()), [2])
+        self.assertEqual(self.candies.get(41).quantity, 3)
+
+    def test_simulate(self):
+        result = BulkReleaser(self.bot, simulate=True).release(self.pokemons.of_family(41))
+
+        self.assertEqual(len(result), 3)
+        self.assertFalse(self.bot.api.release_pokemon.called)
+        self.assertFalse(self.action_delay.called)
+        self.assertEqual(self.candies.get(41).quantity, 3)
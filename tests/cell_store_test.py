@@ -0,0 +1,47 @@
+import unittest
+
+from pokemongo_bot.cell_store import CellStore
+
+
+class TestCellStore(unittest.TestCase):
+    def setUp(self):
+        self.store = CellStore()
+        self.store.update([{
+            's2_cell_id': 1,
+            'current_timestamp_ms': 1000,
+            'forts': [{'id': 'a', 'latitude': 1, 'longitude': 1}, {'id': 'b', 'latitude': 2, 'longitude': 2}],
+            'wild_pokemons': [{'encounter_id': 1}]
+        }], {1: 0})
+
+    def test_unknown_cells_are_fully_requested(self):
+        self.assertEqual(self.store.timestamps([1, 2]), [1000, 0])
+
+    def test_delta_is_merged(self):
+        self.store.update([{
+            's2_cell_id': 1,
+            'current_timestamp_ms': 2000,
+            'forts': [{'id': 'b', 'latitude': 2, 'longitude': 2, 'lure_info': {}}, {'id': 'c', 'latitude': 3, 'longitude': 3}],
+            'deleted_objects': ['a']
+        }], {1: 1000})
+
+        cell = self.store.cells([1])[0]
+        self.assertEqual([f['id'] for f in cell['forts']], ['b', 'c'])
+        self.assertIn('lure_info', cell['forts'][0])
+        self.assertNotIn('wild_pokemons', cell)
+        self.assertEqual(self.store.timestamps([1]), [2000])
+
+    def test_full_response_replaces_cell(self):
+        self.store.update([{
+            's2_cell_id': 1,
+            'current_timestamp_ms': 3000,
+            'forts': [{'id': 'c', 'latitude': 3, 'longitude': 3}]
+        }], {1: 0})
+
+        cell = self.store.cells([1])[0]
+        self.assertEqual([f['id'] for f in cell['forts']], ['c'])
+
+    def test_missing_cell_loses_its_pokemons(self):
+        self.store.update([], {1: 1000})
+        cell = self.store.cells([1])[0]
+        self.assertNotIn('wild_pokemons', cell)
+        self.assertEqual(len(cell['forts']), 2)
@@ -0,0 +1,49 @@
+import time
+import unittest
+from datetime import datetime
+
+from pokemongo_bot import clock
+from pokemongo_bot.human_behaviour import action_delay, sleep
+from pokemongo_bot.rate_limiter import RateLimiter
+from pokemongo_bot.response_cache import ResponseCache
+
+
+class VirtualClockTest(unittest.TestCase):
+    def setUp(self):
+        self.clock = clock.VirtualClock(start=1470000000)
+        self.previous = clock.set_clock(self.clock)
+
+    def tearDown(self):
+        clock.set_clock(self.previous)
+
+    def test_sleeping_moves_the_clock(self):
+        start = time.time()
+        sleep(3600)
+        action_delay(5, 5)
+        clock.sleep(-1)
+
+        self.assertLess(time.time() - start, 1)
+        self.assertAlmostEqual(self.clock.slept, 3600 * 1.3, delta=3600 * 0.6 + 5)
+        self.assertEqual(clock.time(), 1470000000 + self.clock.slept)
+        self.assertEqual(clock.now(), datetime.fromtimestamp(clock.time()))
+
+    def test_rate_limiter_waits_on_the_clock(self):
+        limiter = RateLimiter(rate=2, burst=1)
+        for _ in range(11):
+            limiter.acquire(['GET_INVENTORY'])
+
+        # the first request goes out at once, then one every half second
+        self.assertAlmostEqual(self.clock.slept, 5.0)
+
+    def test_cached_responses_expire_on_the_clock(self):
+        cache = ResponseCache({'GET_PLAYER': 10})
+        cache.set('GET_PLAYER', {}, 'player')
+
+        clock.sleep(9)
+        self.assertEqual(cache.get('GET_PLAYER', {}), 'player')
+        clock.sleep(2)
+        self.assertIsNone(cache.get('GET_PLAYER', {}))
+
+    def test_set_clock(self):
+        self.assertIs(clock.get_clock(), self.clock)
+        self.assertIsInstance(self.previous, clock.RealClock)
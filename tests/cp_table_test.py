@@ -0,0 +1,52 @@
+import itertools
+import unittest
+
+import numpy as np
+
+from pokemongo_bot.inventory import CpTable, LevelToCPm, Pokemon, Pokemons, _calc_cp
+
+
+class CpTableTest(unittest.TestCase):
+    def test_cp_matches_the_formula(self):
+        for pokemon_id, ivs, level in itertools.product((1, 42, 133, 151), ((0, 0, 0), (9, 4, 8), (15, 15, 15)),
+                                                        (1, 12.5, 40)):
+            info = Pokemons.data_for(pokemon_id)
+            cpm = LevelToCPm.cp_multiplier_for(level)
+            expected = _calc_cp(info.base_attack, info.base_defense, info.base_stamina,
+                                ivs[0], ivs[1], ivs[2], cpm)
+            self.assertAlmostEqual(CpTable.cp_for(pokemon_id, ivs[0], ivs[1], ivs[2], cpm), expected)
+            self.assertAlmostEqual(CpTable.cp_at_level(pokemon_id, ivs[0], ivs[1], ivs[2], level), expected)
+
+        self.assertAlmostEqual(CpTable.PERFECT_CP[42], Pokemons.data_for(42).max_cp)
+
+    def test_batch_matches_one_by_one(self):
+        rand = np.random.RandomState(0)
+        pokemon_id = rand.randint(1, 152, 500)
+        ivs = rand.randint(0, 16, (3, 500))
+
+        batch = CpTable.cp_perfection(pokemon_id, *ivs)
+        for i in range(500):
+            self.assertAlmostEqual(batch[i], CpTable.cp_perfection_for(pokemon_id[i], *ivs[:, i]))
+
+        # eevee is scored on its best evolution, perfect IVs are perfect for all
+        self.assertEqual(len(Pokemons.data_for(133).last_evolution_ids), 3)
+        self.assertEqual(CpTable.cp_perfection_for(133, 15, 15, 15), 1)
+        self.assertEqual(CpTable.cp_perfection_for(133, 0, 0, 0), 0)
+
+    def test_score(self):
+        golbat = Pokemon({
+            "move_1": 210, "move_2": 69, "pokemon_id": 42, "stamina_max": 76,
+            "individual_attack": 9, "individual_defense": 4, "individual_stamina": 8,
+            "cp_multiplier": 0.4627983868122101, "additional_cp_multiplier": 0.018886566162109375,
+            "cp": 653, "id": 1})
+        rattata = Pokemon({
+            "move_1": 221, "move_2": 129, "pokemon_id": 19, "cp": 106,
+            "individual_attack": 6, "stamina_max": 22, "individual_defense": 14,
+            "cp_multiplier": 0.37523558735847473, "id": 2})
+
+        score = CpTable.score([golbat, rattata])
+        for i, pokemon in enumerate([golbat, rattata]):
+            for name in ('cp_exact', 'iv', 'ivcp', 'ncp'):
+                self.assertAlmostEqual(score[name][i], getattr(pokemon, name))
+
+        self.assertEqual(len(CpTable.score([])['ivcp']), 0)
@@ -0,0 +1,34 @@
+import math
+import unittest
+
+from pokemongo_bot.disk_cover import best_disk, covering_radius
+
+
+class TestDiskCover(unittest.TestCase):
+    def test_no_points(self):
+        self.assertIsNone(best_disk([], [], 50))
+
+    def test_single_point(self):
+        cx, cy, covered = best_disk([10], [20], 50)
+        self.assertEqual((cx, cy, list(covered)), (10, 20, [0]))
+
+    def test_covers_the_most_points(self):
+        x = [0, 60, 30, 500, 520]
+        y = [0, 0, 40, 500, 500]
+        cx, cy, covered = best_disk(x, y, 40)
+        self.assertEqual(list(covered), [0, 1, 2])
+        self.assertLessEqual(covering_radius([0, 60, 30], [0, 0, 40], cx, cy), 40 + 1e-6)
+
+    def test_pairwise_close_points_may_not_fit(self):
+        # an equilateral triangle of side 2r needs a circle of radius 2r/sqrt(3)
+        side = 100.0
+        x = [0, side, side / 2]
+        y = [0, 0, side * math.sqrt(3) / 2]
+        self.assertEqual(len(best_disk(x, y, 50)[2]), 2)
+        self.assertEqual(len(best_disk(x, y, 58)[2]), 3)
+
+    def test_ties_are_broken_on_weights(self):
+        x = [0, 10, 1000, 1010]
+        y = [0, 0, 0, 0]
+        self.assertEqual(list(best_disk(x, y, 20, weights=[1, 1, 5, 5])[2]), [2, 3])
+        self.assertEqual(list(best_disk(x, y, 20, weights=[5, 5, 1, 1])[2]), [0, 1])
@@ -0,0 +1,118 @@
+import unittest
+
+from pokemongo_bot.evolution_planner import EvolutionPlanner
+
+UPGRADE_COSTS = [(1, 100)] * 80
+
+
+class FakePokemon(object):
+    def __init__(self, name, level=10, iv=0.5, evolution_cost=12, favorite=False):
+        self.name = name
+        self.level = level
+        self.iv = iv
+        self.cp = 100
+        self.evolution_cost = evolution_cost
+        self.in_fort = False
+        self.is_favorite = favorite
+
+    def has_next_evolution(self):
+        return self.evolution_cost > 0
+
+    def __repr__(self):
+        return self.name
+
+
+class EvolutionPlannerTest(unittest.TestCase):
+    def planner(self, stardust=0, **kwargs):
+        return EvolutionPlanner(UPGRADE_COSTS, 25, stardust, **kwargs)
+
+    def test_stardust_goes_where_it_upgrades_the_most(self):
+        # 6 upgrade steps for the first one, 3 for the others
+        dragonite = FakePokemon('dragonite', level=10, evolution_cost=0)
+        snorlaxes = [FakePokemon('snorlax%d' % i, level=11.5, evolution_cost=0) for i in range(2)]
+
+        for families in ([(147, [dragonite]), (143, snorlaxes)], [(143, snorlaxes), (147, [dragonite])]):
+            planner = self.planner(stardust=600, evolve_for_xp=False)
+            for family_id, pokemons in families:
+                planner.add_family(family_id, 100, pokemons, [], pokemons, pokemons, 0)
+            plan = planner.plan()
+
+            self.assertItemsEqual(plan.upgrade, snorlaxes)
+            self.assertEqual(plan.stardust_cost, 600)
+            self.assertEqual(plan.transfer, [])
+
+    def test_upgrades_use_the_candies_left_by_evolutions_for_xp(self):
+        kept = FakePokemon('kept', level=11.5)
+        crap = [FakePokemon('crap%d' % i, iv=i / 10.0) for i in range(5)]
+
+        planner = self.planner(stardust=1000)
+        planner.add_family(16, 25, [kept] + crap, [], [kept], [kept], 12)
+        plan = planner.plan()
+
+        # 30 candies with the transfers, 3 for the upgrade: 27 - 1 >= 2 * 12
+        self.assertEqual(plan.upgrade, [kept])
+        self.assertEqual(plan.xp, crap[::-1][:2])
+        self.assertItemsEqual(plan.transfer, crap[:3])
+
+    def test_evolutions_for_xp_come_before_upgrades(self):
+        kept = FakePokemon('kept', level=11.5)
+        crap = [FakePokemon('crap%d' % i, iv=i / 10.0) for i in range(5)]
+
+        planner = self.planner(stardust=1000)
+        planner.add_family(16, 20, [kept] + crap, [], [kept], [kept], 12)
+        plan = planner.plan()
+
+        # 25 candies make 2 evolutions, only 1 after the 3 of the upgrade
+        self.assertEqual(plan.upgrade, [])
+        self.assertEqual(len(plan.xp), 2)
+
+        # with room in the bag for a single one, the upgrade is paid
+        planner = self.planner(stardust=1000, bag_size=100, bag_limit=96)
+        planner.add_family(16, 20, [kept] + crap, [], [kept], [kept], 12)
+        plan = planner.plan()
+        self.assertEqual(plan.upgrade, [kept])
+        self.assertEqual(len(plan.xp), 1)
+
+    def test_bag_room_goes_to_the_cheapest_evolutions(self):
+        pidgeys = [FakePokemon('pidgey%d' % i) for i in range(3)]
+        eevees = [FakePokemon('eevee%d' % i, evolution_cost=25) for i in range(3)]
+
+        for families in ([(16, pidgeys, 12), (133, eevees, 25)], [(133, eevees, 25), (16, pidgeys, 12)]):
+            planner = self.planner(bag_size=100, bag_limit=96)
+            for family_id, pokemons, cost in families:
+                planner.add_family(family_id, 200, pokemons, [], [], [], cost)
+            plan = planner.plan()
+
+            self.assertItemsEqual(plan.xp, pidgeys[:2])
+            self.assertEqual(len(plan.transfer), 4)
+
+    def test_best_evolutions_come_first(self):
+        best = [FakePokemon('best%d' % i, evolution_cost=cost) for i, cost in enumerate((50, 12, 12))]
+
+        planner = self.planner()
+        planner.add_family(16, 23, best, best, [], best, 12)
+        plan = planner.plan()
+
+        # no candies for the 50 but enough for both 12 after it
+        self.assertEqual(plan.evolve, best[1:])
+        self.assertEqual(plan.xp, [])
+
+    def test_evolutions_for_xp_are_limited(self):
+        crap = [FakePokemon('crap%d' % i) for i in range(10)]
+
+        planner = self.planner(bag_size=100, bag_limit=93)
+        planner.add_family(16, 200, crap, [], [], [], 12)
+        self.assertEqual(len(planner.plan().xp), 3)
+
+        planner = self.planner(min_xp_evolutions=11)
+        planner.add_family(16, 200, crap, [], [], [], 12)
+        plan = planner.plan()
+        self.assertEqual(plan.xp, [])
+        self.assertEqual(len(plan.transfer), 10)
+
+    def test_evolution_batches(self):
+        crap = [FakePokemon('crap%d' % i) for i in range(5)]
+
+        planner = self.planner()
+        planner.add_family(16, 200, crap, [], [], [], 12)
+        self.assertEqual([len(batch) for batch in planner.plan().evolution_batches(2)], [2, 2, 1])
@@ -0,0 +1,78 @@
+import random
+import unittest
+
+from pokemongo_bot.fort_cluster_index import FortClusterIndex
+
+ORIGIN = (40.7, -74.0)
+RADIUS = 38
+
+
+def make_forts(count, seed, lured_ratio=0.2):
+    rand = random.Random(seed)
+    forts = []
+    for i in range(count):
+        fort = {'id': '{}-{}'.format(seed, i),
+                'latitude': ORIGIN[0] + rand.uniform(0, 0.003),
+                'longitude': ORIGIN[1] + rand.uniform(0, 0.003)}
+        if rand.random() < lured_ratio:
+            fort['active_fort_modifier'] = 'lure'
+        forts.append(fort)
+    return forts
+
+
+class TestFortClusterIndex(unittest.TestCase):
+    def rankings(self, index):
+        return sorted((c.lured, len(c.covered), sorted(c.covered)) for c in index._circles.values())
+
+    def test_best_cluster(self):
+        forts = [
+            {'id': 'a', 'latitude': 40.7, 'longitude': -74.0},
+            {'id': 'b', 'latitude': 40.7003, 'longitude': -74.0},
+            {'id': 'c', 'latitude': 40.7, 'longitude': -74.0003},
+            {'id': 'd', 'latitude': 40.71, 'longitude': -74.0, 'active_fort_modifier': 'lure'},
+            {'id': 'e', 'latitude': 40.7103, 'longitude': -74.0}
+        ]
+        index = FortClusterIndex(ORIGIN, RADIUS)
+        index.sync(forts)
+
+        self.assertEqual(index.best(ORIGIN)[2:4], (1, 2))
+        self.assertEqual(index.best(ORIGIN, min_lured=0, min_count=3)[2:4], (0, 3))
+        self.assertIsNone(index.best(ORIGIN, min_lured=2))
+
+    def test_incremental_updates_match_a_new_index(self):
+        forts = make_forts(80, seed=1)
+        index = FortClusterIndex(ORIGIN, RADIUS)
+        index.sync(forts)
+
+        rand = random.Random(2)
+        for step in range(5):
+            rand.shuffle(forts)
+            forts = forts[10:] + make_forts(10, seed=step + 10)
+            for i in range(5):
+                fort = forts[i].copy()
+                if 'active_fort_modifier' in fort:
+                    del fort['active_fort_modifier']
+                else:
+                    fort['active_fort_modifier'] = 'lure'
+                forts[i] = fort
+            self.assertTrue(index.sync(forts))
+
+            fresh = FortClusterIndex(ORIGIN, RADIUS)
+            fresh.sync(forts)
+            self.assertEqual(self.rankings(index), self.rankings(fresh))
+            self.assertEqual(index.best(ORIGIN), fresh.best(ORIGIN))
+
+    def test_lure_changes(self):
+        forts = make_forts(40, seed=3, lured_ratio=0)
+        index = FortClusterIndex(ORIGIN, RADIUS)
+        index.sync(forts)
+        self.assertFalse(index.sync(forts))
+
+        lured = [dict(fort, active_fort_modifier='lure') for fort in forts]
+        self.assertTrue(index.sync(lured))
+        best = index.best(ORIGIN)
+        self.assertEqual(best[2], best[3])
+
+        self.assertTrue(index.sync([]))
+        self.assertIsNone(index.best(ORIGIN))
+        self.assertEqual(index._keys, [])
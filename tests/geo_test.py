@@ -0,0 +1,42 @@
+import unittest
+
+from pokemongo_bot import geo
+
+
+class TestGeo(unittest.TestCase):
+    def setUp(self):
+        self.lats = [40.7, 40.71, 40.69, -33.86]
+        self.lngs = [-74.0, -74.01, -73.98, 151.21]
+
+    def test_distance(self):
+        self.assertAlmostEqual(geo.distance(0, 0, 0, 1), 111194.93, places=2)
+        self.assertEqual(geo.distance(40.7, -74.0, 40.7, -74.0), 0)
+
+    def test_arrays_match_numbers(self):
+        distances = geo.distance(40.7, -74.0, self.lats, self.lngs)
+        bearings = geo.bearing(40.7, -74.0, self.lats, self.lngs)
+        lats, lngs = geo.destination(self.lats, self.lngs, 45, 100)
+        for i in range(len(self.lats)):
+            self.assertAlmostEqual(distances[i], geo.distance(40.7, -74.0, self.lats[i], self.lngs[i]), places=6)
+            self.assertAlmostEqual(bearings[i], geo.bearing(40.7, -74.0, self.lats[i], self.lngs[i]), places=9)
+            self.assertEqual((lats[i], lngs[i]), geo.destination(self.lats[i], self.lngs[i], 45, 100))
+
+    def test_bearing(self):
+        self.assertEqual(geo.bearing(0, 0, 1, 0), 0)
+        self.assertEqual(geo.bearing(0, 0, 0, 1), 90)
+        self.assertEqual(geo.bearing(0, 0, 0, -1), 270)
+
+    def test_destination(self):
+        lat, lng = geo.destination(0, 0, 45, 1)
+        self.assertAlmostEqual(lat, 6.3948578954430175e-06, places=12)
+        self.assertAlmostEqual(lng, 6.35204828670955e-06, places=12)
+
+        lat, lng = geo.destination(40.7, -74.0, 123, 250)
+        self.assertAlmostEqual(geo.distance(40.7, -74.0, lat, lng), 250, delta=1)
+        self.assertAlmostEqual(geo.bearing(40.7, -74.0, lat, lng), 123, delta=0.5)
+
+    def test_distances_from(self):
+        forts = [{'latitude': lat, 'longitude': lng} for lat, lng in zip(self.lats, self.lngs)]
+        self.assertEqual(list(geo.distances_from(40.7, -74.0, forts)),
+                         list(geo.distance(40.7, -74.0, self.lats, self.lngs)))
+        self.assertEqual(len(geo.distances_from(40.7, -74.0, [])), 0)
@@ -0,0 +1,86 @@
+import copy
+import unittest
+
+from mock import MagicMock, patch
+
+from pokemongo_bot.inventory import Inventory
+from tests.inventory_export_test import GOLBAT, inventory_response
+
+
+def delta_response(original, new, items=(), deleted=()):
+    inventory_items = [{'modified_timestamp_ms': new, 'inventory_item_data': item} for item in items]
+    inventory_items += [{'modified_timestamp_ms': new, 'deleted_item': {'pokemon_id': pokemon_id}}
+                        for pokemon_id in deleted]
+    return {'responses': {'GET_INVENTORY': {'inventory_delta': {
+        'original_timestamp_ms': original, 'new_timestamp_ms': new,
+        'inventory_items': inventory_items}}}}
+
+
+class InventoryDeltaTest(unittest.TestCase):
+    def setUp(self):
+        self.bot = MagicMock()
+        self.bot.config.username = 'user'
+        full = inventory_response()
+        full['responses']['GET_INVENTORY']['inventory_delta']['new_timestamp_ms'] = 1000
+        self.bot.api.batch.enqueue.return_value.result.return_value = full
+        patcher = patch('pokemongo_bot.inventory.write_atomically')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.inventory = Inventory(self.bot)
+
+    def test_asks_for_changes_since_the_last_refresh(self):
+        self.assertEqual(self.inventory.last_timestamp_ms, 1000)
+        self.bot.api.batch.enqueue.return_value.result.return_value = delta_response(1000, 2000)
+        self.inventory.refresh()
+        self.bot.api.batch.enqueue.assert_called_with('get_inventory', last_timestamp_ms=1000)
+        self.assertEqual(self.inventory.last_timestamp_ms, 2000)
+
+    def test_only_changed_items_are_replaced(self):
+        golbat = self.inventory.pokemons.get(GOLBAT['id'])
+        other = dict(copy.deepcopy(GOLBAT), id=7, nickname='Other')
+        version = self.inventory.version()
+
+        self.inventory.refresh(delta_response(1000, 2000, items=[
+            {'item': {'item_id': 1, 'count': 15}},
+            {'pokemon_data': other}
+        ], deleted=[99]))
+
+        self.assertNotEqual(self.inventory.version(), version)
+        self.assertIs(self.inventory.pokemons.get(GOLBAT['id']), golbat)
+        self.assertEqual(self.inventory.pokemons.get(7).nickname, 'Other')
+        self.assertIsNone(self.inventory.pokemons.get(99))
+        self.assertEqual(self.inventory.items.get(1).count, 15)
+        self.assertEqual(self.inventory.items.get(3).count, 5)
+        self.assertEqual(self.inventory.player.player_stats['km_walked'], 3.5)
+        self.assertEqual(len(self.inventory.egg_incubators), 1)
+
+    def test_older_responses_are_ignored(self):
+        self.inventory.refresh(delta_response(1000, 3000, items=[{'item': {'item_id': 1, 'count': 10}}]))
+        self.inventory.refresh(delta_response(1000, 2000, items=[{'item': {'item_id': 1, 'count': 15}}]))
+        self.assertEqual(self.inventory.items.get(1).count, 10)
+        self.assertEqual(self.inventory.last_timestamp_ms, 3000)
+
+    def test_full_refresh_keeps_unchanged_pokemons(self):
+        golbat = self.inventory.pokemons.get(GOLBAT['id'])
+        full = inventory_response(ultra_balls=2)
+        full['responses']['GET_INVENTORY']['inventory_delta']['inventory_items'].pop(-2)  # the egg
+        self.inventory.refresh(full)
+        self.assertIs(self.inventory.pokemons.get(GOLBAT['id']), golbat)
+        self.assertEqual(len(self.inventory.pokemons.all_with_eggs()), 1)
+
+    def test_full_inventory_is_asked_periodically(self):
+        self.inventory.items.get(1).remove(1)
+        self.assertTrue(self.inventory.items.dirty)
+
+        with patch('pokemongo_bot.inventory.clock.time', return_value=self.inventory.full_at + Inventory.FULL_REFRESH_INTERVAL):
+            self.inventory.refresh(self.inventory.enqueue().result())
+
+        self.bot.api.batch.enqueue.assert_called_with('get_inventory', last_timestamp_ms=0)
+        self.assertFalse(self.inventory.items.dirty)
+        # the local estimate is replaced by what the server has
+        self.assertEqual(self.inventory.items.get(1).count, 20)
+
+    def test_deleted_items_leave_every_component(self):
+        self.inventory.refresh(delta_response(1000, 2000, items=[{'item': {'item_id': 701, 'count': 1}}]))
+        self.inventory.refresh(delta_response(2000, 3000, deleted=[701]))
+        self.assertNotIn(701, [item.id for item in self.inventory.items.all()])
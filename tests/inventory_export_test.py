@@ -0,0 +1,111 @@
+import copy
+import unittest
+
+from mock import MagicMock, patch
+
+from pokemongo_bot.inventory import CpTable, Inventory, LevelToCPm
+
+GOLBAT = {
+    "num_upgrades": 2, "move_1": 210, "move_2": 69, "pokeball": 2,
+    "favorite": 1, "pokemon_id": 42, "battles_attacked": 4,
+    "stamina": 76, "stamina_max": 76, "individual_attack": 9,
+    "individual_defense": 4, "individual_stamina": 8,
+    "cp_multiplier": 0.4627983868122101,
+    "additional_cp_multiplier": 0.018886566162109375,
+    "cp": 653, "nickname": "Golb", "id": 13632861873471324}
+
+
+def with_cp(data, cp):
+    """
+    pokemon_data at the level whose CP is the closest to cp, with the exact
+    CP of its IVs at that level as Pokemon checks it.
+    """
+    ivs = data.get('individual_attack', 0), data.get('individual_defense', 0), data.get('individual_stamina', 0)
+
+    def cp_at(cp_multiplier):
+        return max(int(CpTable.cp_for(data['pokemon_id'], ivs[0], ivs[1], ivs[2], cp_multiplier)), 10)
+
+    cp_multiplier = min((LevelToCPm.cp_multiplier_for(level / 2.0) for level in range(2, 81)),
+                        key=lambda m: abs(cp_at(m) - cp))
+    return dict(data, cp=cp_at(cp_multiplier), cp_multiplier=cp_multiplier, additional_cp_multiplier=.0)
+
+
+def inventory_response(ultra_balls=5):
+    items = [
+        {'player_stats': {'level': 12, 'experience': 5000, 'next_level_xp': 10000, 'km_walked': 3.5}},
+        {'pokedex_entry': {'pokemon_id': 42, 'times_captured': 1}},
+        {'candy': {'family_id': 41, 'candy': 12}},
+        {'item': {'item_id': 1, 'count': 20}},
+        {'item': {'item_id': 3, 'count': ultra_balls}},
+        {'pokemon_data': copy.deepcopy(GOLBAT)},
+        {'pokemon_data': {'id': 99, 'is_egg': True, 'egg_km_walked_target': 5.0}},
+        {'egg_incubators': {'egg_incubator': [{'id': 'EggIncubatorProto1', 'item_id': 901}]}}
+    ]
+    return {'responses': {'GET_INVENTORY': {'inventory_delta': {
+        'inventory_items': [{'inventory_item_data': item} for item in items]}}}}
+
+
+class InventoryExportTest(unittest.TestCase):
+    def setUp(self):
+        self.bot = MagicMock()
+        self.bot.config.username = 'user'
+        self.bot.api.batch.enqueue.return_value.result.side_effect = lambda: inventory_response()
+        patcher = patch('pokemongo_bot.inventory.write_atomically')
+        self.write = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.inventory = Inventory(self.bot)
+
+    def test_unchanged_refresh_does_not_export(self):
+        self.assertEqual(self.write.call_count, 1)
+        pokemon = self.inventory.pokemons.get(GOLBAT['id'])
+
+        self.inventory.refresh(inventory_response())
+        self.assertEqual(self.write.call_count, 1)
+        # nothing was rebuilt either
+        self.assertIs(self.inventory.pokemons.get(GOLBAT['id']), pokemon)
+
+        self.inventory.refresh(inventory_response(ultra_balls=4))
+        self.assertEqual(self.write.call_count, 2)
+        self.assertEqual(self.inventory.items.get(3).count, 4)
+
+    def test_local_changes_are_exported(self):
+        version = self.inventory.version()
+        self.inventory.items.get(1).remove(1)
+        self.assertNotEqual(self.inventory.version(), version)
+
+        self.inventory.update_web_inventory()
+        self.assertEqual(self.write.call_count, 2)
+        self.assertIn({'inventory_item_data': {'item': {'item_id': 1, 'count': 19}}},
+                      self.inventory.jsonify_inventory())
+
+        self.inventory.pokemons.get(GOLBAT['id']).update_nickname('Bat')
+        self.inventory.update_web_inventory()
+        self.assertEqual(self.write.call_count, 3)
+
+        # the server has the same inventory as before the local changes
+        self.inventory.refresh(inventory_response())
+        self.assertEqual(self.inventory.items.get(1).count, 20)
+        self.assertEqual(self.inventory.pokemons.get(GOLBAT['id']).nickname, 'Golb')
+
+    def test_jsonify_inventory_is_reused(self):
+        json_inventory = self.inventory.jsonify_inventory()
+        cached = self.inventory._json_inventory
+        self.assertEqual(len(json_inventory), 8)
+
+        # callers get their own list
+        json_inventory.append({})
+        self.assertEqual(len(self.inventory.jsonify_inventory()), 8)
+        self.assertIs(self.inventory._json_inventory, cached)
+
+        self.inventory.candy.get(42).consume(2)
+        self.inventory.jsonify_inventory()
+        self.assertIsNot(self.inventory._json_inventory, cached)
+
+    def test_missing_items_are_not_changes(self):
+        version = self.inventory.version()
+        self.assertEqual(self.inventory.items.get(701).count, 0)
+        self.assertEqual(self.inventory.candy.get(1).quantity, 0)
+        self.assertEqual(self.inventory.version(), version)
+
+        self.inventory.update_web_inventory()
+        self.assertEqual(self.write.call_count, 1)
@@ -0,0 +1,32 @@
+import random
+import unittest
+
+from pokemongo_bot import geo
+from pokemongo_bot.kd_tree import KDTree
+
+
+class KDTreeTest(unittest.TestCase):
+    def setUp(self):
+        rng = random.Random(0)
+        self.lats = [47.17 + rng.uniform(-0.01, 0.01) for _ in range(300)]
+        self.lngs = [8.51 + rng.uniform(-0.01, 0.01) for _ in range(300)]
+        self.tree = KDTree(self.lats, self.lngs)
+
+    def brute_force(self, lat, lng, k):
+        distances = geo.distance(lat, lng, self.lats, self.lngs)
+        return sorted(range(len(self.lats)), key=lambda i: distances[i])[:k]
+
+    def test_same_as_brute_force(self):
+        rng = random.Random(1)
+        for _ in range(200):
+            lat, lng = 47.17 + rng.uniform(-0.012, 0.012), 8.51 + rng.uniform(-0.012, 0.012)
+            nearest = self.tree.nearest(lat, lng, k=3)
+
+            self.assertEqual([i for i, _ in nearest], self.brute_force(lat, lng, 3))
+            self.assertAlmostEqual(nearest[0][1], geo.distance(lat, lng, self.lats[nearest[0][0]], self.lngs[nearest[0][0]]), delta=0.5)
+
+    def test_duplicates_and_small_trees(self):
+        tree = KDTree(self.lats + self.lats[:1], self.lngs + self.lngs[:1])
+        self.assertEqual(sorted(i for i, d in tree.nearest(self.lats[0], self.lngs[0], k=2)), [0, 300])
+        self.assertEqual(KDTree([], []).nearest(47.17, 8.51), [])
+        self.assertEqual(KDTree([47.17], [8.51]).nearest(47.18, 8.51, k=2)[0][0], 0)
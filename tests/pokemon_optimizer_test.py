@@ -0,0 +1,97 @@
+import copy
+import itertools
+import unittest
+
+from mock import MagicMock, patch
+
+from pokemongo_bot.cell_workers.pokemon_optimizer import KeepRule, PokemonOptimizer
+from pokemongo_bot.inventory import Pokemon, Pokemons
+from tests.inventory_export_test import GOLBAT, with_cp
+
+
+def golbat(unique_id, cp, ivs):
+    return Pokemon(with_cp(dict(copy.deepcopy(GOLBAT), id=unique_id, individual_attack=ivs[0],
+                                individual_defense=ivs[1], individual_stamina=ivs[2]), cp))
+
+
+def zubat(unique_id, ivs):
+    return Pokemon(with_cp({"move_1": 210, "move_2": 69, "pokemon_id": 41, "stamina_max": 30,
+                            "individual_attack": ivs[0], "individual_defense": ivs[1], "individual_stamina": ivs[2],
+                            "id": unique_id}, 100))
+
+
+class KeepRuleTest(unittest.TestCase):
+    def setUp(self):
+        ivs = [(15, 15, 15), (0, 4, 8), (9, 4, 8), (9, 8, 4), (4, 8, 9), (0, 0, 0)]
+        self.bag = [golbat(i + 1, cp, iv) for i, (cp, iv) in enumerate(itertools.product((500, 700), ivs))]
+        self.bag += [zubat(100 + i, iv) for i, iv in enumerate(ivs)]
+
+    def old_score(self, pokemon, sort, evolve, upgrade):
+        # the scoring done one pokemon at a time before KeepRule
+        score = tuple(getattr(pokemon, a if not isinstance(a, dict) else a.keys()[0]) for a in sort)
+        eligible = all(getattr(pokemon, a.keys()[0]) >= a.values()[0] for a in sort if isinstance(a, dict))
+        return score, eligible and pokemon.has_next_evolution() and evolve, eligible and upgrade
+
+    def test_rank_matches_one_by_one_scoring(self):
+        for sort in (["cp"], [{"iv": 0.4}, "cp"], ["ivcp", {"cp": 600}], []):
+            rule = KeepRule({"sort": sort, "evolve": True, "upgrade": True})
+            ranking = rule.rank(self.bag)
+            expected = sorted(self.bag, key=lambda p: self.old_score(p, sort, True, True)[0], reverse=True)
+
+            self.assertEqual(ranking.pokemon_list, expected)
+            for i, pokemon in enumerate(ranking.pokemon_list):
+                score, may_try_evolve, may_try_upgrade = self.old_score(pokemon, sort, True, True)
+                self.assertEqual(tuple(ranking.scores[i]), score)
+                self.assertEqual(ranking.may_try_evolve[i], may_try_evolve)
+                self.assertEqual(ranking.may_try_upgrade[i], may_try_upgrade)
+
+    def test_select(self):
+        rule = KeepRule({"sort": [{"iv": 0.4}, "cp"], "evolve": True, "upgrade": True})
+        ranking = rule.rank(self.bag)
+        worst = ranking.scores[5]
+
+        try_evolve, try_upgrade, keep = ranking.select(worst)
+        self.assertEqual(keep, ranking.pokemon_list[:6])
+        # golbats are fully evolved, zubats with iv >= 0.4 can be evolved
+        self.assertEqual(try_evolve, [p for p in keep if p.pokemon_id == 41 and p.iv >= 0.4])
+        self.assertEqual(try_upgrade, [p for p in keep if p not in try_evolve and p.iv >= 0.4])
+        self.assertEqual(ranking.select(worst, limit=2)[2], ranking.pokemon_list[:2])
+
+    def test_rank_groups(self):
+        rule = KeepRule({"sort": ["iv", "cp"]})
+        groups = [self.bag[:6], [], self.bag[6:]]
+        rankings = rule.rank_groups(groups)
+
+        self.assertEqual([r.pokemon_list for r in rankings], [rule.rank(group).pokemon_list for group in groups])
+        self.assertEqual(rankings[2].scores.tolist(), rule.rank(groups[2]).scores.tolist())
+
+
+class PokemonOptimizerTest(unittest.TestCase):
+    def setUp(self):
+        self.pokemons = Pokemons()
+        patcher = patch('pokemongo_bot.inventory._inventory')
+        patcher.start().pokemons = self.pokemons
+        self.addCleanup(patcher.stop)
+        self.optimizer = PokemonOptimizer(MagicMock(), {})
+
+    def test_top_fraction_keeps_the_pokemons_close_to_the_best(self):
+        rule = KeepRule({"top": 0.5, "sort": ["cp"]})
+        bag = [golbat(1, 700, (15, 15, 15)), golbat(2, 400, (9, 4, 8)), golbat(3, 300, (0, 0, 0))]
+        self.assertEqual(self.optimizer.get_best_pokemon_for_rule(bag, rule)[2], bag[:2])
+
+    def test_groups_are_scored_again_only_when_they_change(self):
+        rule = KeepRule({"top": 1, "sort": ["iv"]})
+        zubats = [zubat(1, (15, 15, 15)), zubat(2, (0, 0, 0))]
+        golbats = [golbat(3, 653, (9, 4, 8))]
+
+        with patch.object(rule, 'rank_groups', wraps=rule.rank_groups) as rank_groups:
+            best = self.optimizer.get_best_for_groups(0, rule, [(41, zubats), (42, golbats)])
+            self.assertEqual([keep for _, _, keep in best], [zubats[:1], golbats])
+            self.assertEqual(self.optimizer.get_best_for_groups(0, rule, [(41, list(reversed(zubats)))]), best[:1])
+            self.assertEqual(rank_groups.call_count, 1)
+
+            # an evolved or upgraded pokemon is a new object
+            zubats[1] = zubat(2, (15, 15, 15))
+            best = self.optimizer.get_best_for_groups(0, rule, [(41, zubats), (42, golbats)])
+            self.assertEqual(best[0][2], zubats)
+            self.assertEqual(rank_groups.call_args_list[-1][0][0], [zubats])
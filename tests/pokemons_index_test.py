@@ -0,0 +1,64 @@
+import copy
+import unittest
+
+from pokemongo_bot.inventory import Pokemon, Pokemons
+from tests.inventory_export_test import GOLBAT, with_cp
+
+RATTATA = {
+    "move_1": 221, "move_2": 129, "pokemon_id": 19, "cp": 106,
+    "individual_attack": 6, "stamina_max": 22, "individual_defense": 14,
+    "cp_multiplier": 0.37523558735847473, "id": 2}
+
+
+def golbat(unique_id, cp, iv_attack):
+    return with_cp(dict(copy.deepcopy(GOLBAT), id=unique_id, individual_attack=iv_attack), cp)
+
+
+def inventory_items(*pokemons):
+    return [{'inventory_item_data': {'pokemon_data': pokemon}} for pokemon in pokemons]
+
+
+class PokemonsIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.pokemons = Pokemons()
+        self.pokemons.refresh(inventory_items(
+            golbat(10, 600, 15), golbat(11, 700, 0), RATTATA,
+            {'id': 99, 'is_egg': True, 'egg_km_walked_target': 5.0}))
+
+    def ids(self, pokemons):
+        return [p.unique_id for p in pokemons]
+
+    def test_groups(self):
+        self.assertEqual(sorted(self.ids(self.pokemons.of_pokemon_id(42))), [10, 11])
+        self.assertEqual(sorted(self.ids(self.pokemons.of_family(41))), [10, 11])
+        self.assertEqual(self.pokemons.of_pokemon_id(41), [])
+        self.assertEqual([key for key, _ in self.pokemons.group_by_pokemon_id()], [19, 42])
+        self.assertEqual([key for key, _ in self.pokemons.group_by_family()], [19, 41])
+
+        # callers get copies they can change
+        self.pokemons.of_family(41).pop()
+        self.pokemons.group_by_family()[1][1].pop()
+        self.assertEqual(len(self.pokemons.of_family(41)), 2)
+
+    def test_ranked(self):
+        self.assertEqual(self.ids(self.pokemons.ranked('cp')), [11, 10, 2])
+        self.assertEqual(self.ids(self.pokemons.ranked('iv')), [10, 2, 11])
+        self.assertEqual(self.ids(self.pokemons.ranked('pokemon_id', 'iv')), [10, 11, 2])
+        self.assertIsNot(self.pokemons.ranked('cp'), self.pokemons.ranked('cp'))
+
+    def test_indexes_follow_changes(self):
+        self.assertEqual(self.ids(self.pokemons.ranked('cp')), [11, 10, 2])
+
+        self.pokemons.add(Pokemon(golbat(12, 800, 5)))
+        self.assertEqual(self.ids(self.pokemons.ranked('cp')), [12, 11, 10, 2])
+        self.pokemons.remove(11)
+        self.assertEqual(sorted(self.ids(self.pokemons.of_family(41))), [10, 12])
+        self.pokemons.remove(2)
+        self.assertEqual([key for key, _ in self.pokemons.group_by_pokemon_id()], [42])
+
+        self.pokemons.refresh(inventory_items(RATTATA))
+        self.assertEqual(self.ids(self.pokemons.all()), [2])
+        self.assertEqual(self.pokemons.of_family(41), [])
+
+        self.pokemons.delete([2])
+        self.assertEqual(self.pokemons.ranked('cp'), [])
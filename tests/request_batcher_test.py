@@ -0,0 +1,87 @@
+import unittest
+from mock import MagicMock
+
+from tests import FakeApi
+
+
+class TestRequestBatcher(unittest.TestCase):
+    def setUp(self):
+        self.api = FakeApi()
+        self.response = {
+            'responses': {'GET_PLAYER': {'success': True}, 'GET_INVENTORY': {'success': True}},
+            'status_code': 1
+        }
+        self.request = self.api.create_request(self.response)
+        self.request.is_response_valid = MagicMock(return_value=True)
+        self.api.create_request = MagicMock(return_value=self.request)
+
+    def test_nothing_is_sent_until_a_result_is_needed(self):
+        self.api.batch.enqueue('get_player')
+        self.api.batch.enqueue('get_inventory')
+        self.assertEqual(self.api.batch.pending(), ['GET_PLAYER', 'GET_INVENTORY'])
+        self.assertFalse(self.api.create_request.called)
+
+    def test_pending_requests_are_sent_in_one_call(self):
+        player = self.api.batch.enqueue('get_player')
+        inventory = self.api.batch.enqueue('get_inventory')
+
+        self.assertEqual(player.result()['responses'], {'GET_PLAYER': {'success': True}})
+        self.assertTrue(inventory.done())
+        self.assertEqual(inventory.result()['responses'], {'GET_INVENTORY': {'success': True}})
+        self.assertEqual(inventory.result()['status_code'], 1)
+
+        self.assertEqual(self.api.create_request.call_count, 1)
+        self.assertEqual(self.request._call.call_count, 1)
+        self.assertEqual(self.api.batch.pending(), [])
+
+    def test_same_request_is_shared(self):
+        first = self.api.batch.enqueue('get_player')
+        second = self.api.batch.enqueue('get_player')
+        self.assertIs(first, second)
+
+    def test_same_request_with_other_arguments_flushes(self):
+        self.api.batch.enqueue('get_player')
+        self.api.batch.enqueue('get_player', player_locale={'country': 'US'})
+        self.assertEqual(self.api.create_request.call_count, 1)
+        self.assertEqual(self.api.batch.pending(), ['GET_PLAYER'])
+
+    def test_actions_can_not_be_batched(self):
+        with self.assertRaises(ValueError):
+            self.api.batch.enqueue('release_pokemon', pokemon_id=1)
+
+    def test_cached_response_is_not_sent_again(self):
+        self.api.batch.enqueue('get_player').result()
+        player = self.api.batch.enqueue('get_player')
+        self.assertTrue(player.done())
+        self.assertEqual(player.result()['responses'], {'GET_PLAYER': {'success': True}})
+        self.assertEqual(self.api.create_request.call_count, 1)
+
+    def test_cached_responses_can_be_edited(self):
+        player = self.api.batch.enqueue('get_player').result()
+        player['responses']['GET_PLAYER']['success'] = False
+
+        cached = self.api.batch.enqueue('get_player').result()
+        self.assertEqual(cached['responses'], {'GET_PLAYER': {'success': True}})
+        cached['responses']['GET_PLAYER']['success'] = False
+        self.assertEqual(self.api.batch.enqueue('get_player').result()['responses'],
+                         {'GET_PLAYER': {'success': True}})
+        self.assertEqual(self.api.create_request.call_count, 1)
+
+    def test_actions_invalidate_cached_responses(self):
+        self.api.batch.enqueue('get_inventory').result()
+        self.api.response_cache.invalidate(['ENCOUNTER'])
+        self.assertIsNotNone(self.api.response_cache.get('get_inventory', {}))
+
+        self.api.response_cache.invalidate(['RELEASE_POKEMON'])
+        self.assertIsNone(self.api.response_cache.get('get_inventory', {}))
+        self.assertFalse(self.api.batch.enqueue('get_inventory').done())
+
+    def test_failed_batch_resolves_every_request_with_the_error(self):
+        self.request._call = MagicMock(side_effect=ValueError('boom'))
+        player = self.api.batch.enqueue('get_player')
+        inventory = self.api.batch.enqueue('get_inventory')
+
+        with self.assertRaises(ValueError):
+            player.result()
+        self.assertTrue(inventory.failed())
+        self.assertFalse(self.api.batch.enqueue('get_inventory').failed())
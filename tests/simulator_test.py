@@ -0,0 +1,118 @@
+import unittest
+
+from pokemongo_bot import clock
+from pokemongo_bot.simulator import LocalServer, cell_id
+
+CENTER = (40.7680, -73.9820, 8.0)
+
+
+class TestLocalServer(unittest.TestCase):
+    def setUp(self):
+        self.clock = clock.VirtualClock(start=1470000000)
+        self.previous = clock.set_clock(self.clock)
+        self.server = LocalServer(seed=7)
+        self.call('GET_PLAYER')
+
+    def tearDown(self):
+        clock.set_clock(self.previous)
+
+    def call(self, name, position=CENTER, **kwargs):
+        return self.server.call([(name, kwargs)], position)['responses'][name]
+
+    def inventory(self, key):
+        items = self.call('GET_INVENTORY')['inventory_delta']['inventory_items']
+        return [item['inventory_item_data'][key] for item in items if key in item['inventory_item_data']]
+
+    def items(self):
+        return dict((item['item_id'], item['count']) for item in self.inventory('item'))
+
+    def map_objects(self, position):
+        cells = self.call('GET_MAP_OBJECTS', position, cell_id=[cell_id(*position[:2])])['map_cells']
+        return cells[0]
+
+    def active_spawn(self):
+        # waits for the first spawn point to show its pokemon
+        spawn_point = self.server.world.spawn_points[0]
+        position = (spawn_point['latitude'], spawn_point['longitude'], 8.0)
+        while not self.map_objects(position).get('catchable_pokemons'):
+            clock.sleep(60)
+        return position, self.map_objects(position)['catchable_pokemons'][0]
+
+    def encounter_and_catch(self, pokeball):
+        position, pokemon = self.active_spawn()
+        encounter = self.call('ENCOUNTER', position, encounter_id=pokemon['encounter_id'],
+                              spawn_point_id=pokemon['spawn_point_id'])
+        self.assertEqual(encounter['status'], 1)
+        catch = self.call('CATCH_POKEMON', position, encounter_id=pokemon['encounter_id'], pokeball=pokeball,
+                          hit_pokemon=1, normalized_reticle_size=1.95, spin_modifier=1.0)
+        return encounter, catch
+
+    def test_same_seed_same_world(self):
+        other = LocalServer(seed=7)
+        other.call([('GET_PLAYER', {})], CENTER)
+
+        self.assertEqual(other.world.forts, self.server.world.forts)
+        self.assertEqual([other.world.spawn(s, 1470000000) for s in other.world.spawn_points],
+                         [self.server.world.spawn(s, 1470000000) for s in self.server.world.spawn_points])
+
+    def test_only_requested_cells_are_answered(self):
+        fort = self.server.world.forts[0]
+        cells = self.call('GET_MAP_OBJECTS', cell_id=[fort['cell_id'], 1])['map_cells']
+
+        self.assertEqual([c['s2_cell_id'] for c in cells], [fort['cell_id'], 1])
+        self.assertIn(fort['id'], [f['id'] for f in cells[0]['forts']])
+        self.assertNotIn('forts', cells[1])
+
+    def test_catch_goes_to_inventory(self):
+        self.server.items[4] = 1
+        encounter, catch = self.encounter_and_catch(pokeball=4)
+
+        self.assertEqual(catch['status'], 1)
+        caught = [p for p in self.inventory('pokemon_data') if p['id'] == catch['captured_pokemon_id']]
+        self.assertEqual(len(caught), 1)
+        self.assertEqual(caught[0]['cp'], encounter['wild_pokemon']['pokemon_data']['cp'])
+        self.assertEqual(self.items()[4], 0)
+        self.assertEqual(sum(c['candy'] for c in self.inventory('candy')), 3)
+        self.assertEqual(self.inventory('player_stats')[0]['pokemons_captured'], 1)
+
+        # caught pokemons leave the map and cannot be encountered again
+        position, pokemon = self.active_spawn()
+        self.assertEqual(self.call('ENCOUNTER', position, encounter_id=encounter['wild_pokemon']['encounter_id'],
+                                   spawn_point_id=pokemon['spawn_point_id'])['status'], 2)
+
+    def test_fort_search_and_cooldown(self):
+        fort = self.server.world.forts[0]
+        position = (fort['latitude'], fort['longitude'], 8.0)
+        far = (fort['latitude'] + 0.01, fort['longitude'], 8.0)
+        before = sum(self.items().values())
+
+        self.assertEqual(self.call('FORT_SEARCH', far, fort_id=fort['id'])['result'], 2)
+        search = self.call('FORT_SEARCH', position, fort_id=fort['id'])
+        self.assertEqual(search['result'], 1)
+        self.assertEqual(sum(self.items().values()), before + sum(i['item_count'] for i in search['items_awarded']))
+        self.assertEqual(self.call('FORT_SEARCH', position, fort_id=fort['id'])['result'], 3)
+
+        clock.sleep(301)
+        self.assertEqual(self.call('FORT_SEARCH', position, fort_id=fort['id'])['result'], 1)
+
+    def test_release_and_evolve(self):
+        self.server.items[4] = 1
+        _, catch = self.encounter_and_catch(pokeball=4)
+        pokemon_id = catch['captured_pokemon_id']
+        species = self.server.pokemons[pokemon_id]['pokemon_id']
+
+        self.server.candies[species] = 400
+        evolve = self.call('EVOLVE_POKEMON', pokemon_id=pokemon_id)
+        if evolve['result'] == 1:
+            self.assertNotEqual(evolve['evolved_pokemon_data']['pokemon_id'], species)
+            self.assertEqual(evolve['evolved_pokemon_data']['id'], pokemon_id)
+        else:
+            # species without evolution
+            self.assertEqual(evolve['result'], 4)
+
+        self.assertEqual(self.call('RELEASE_POKEMON', pokemon_id=pokemon_id)['result'], 1)
+        self.assertEqual(self.inventory('pokemon_data'), [])
+        self.assertEqual(self.call('RELEASE_POKEMON', pokemon_id=pokemon_id)['result'], 3)
+
+    def test_unknown_requests_get_empty_responses(self):
+        self.assertEqual(self.call('DOWNLOAD_SETTINGS', hash='x'), {})
@@ -0,0 +1,52 @@
+import random
+import unittest
+
+from pokemongo_bot.cell_workers.utils import distance
+from pokemongo_bot.spatial_index import SpatialIndex
+
+
+class TestSpatialIndex(unittest.TestCase):
+    def setUp(self):
+        rand = random.Random(42)
+        self.forts = [
+            {'id': 'fort{}'.format(i), 'type': 1,
+             'latitude': 40.7 + rand.uniform(-0.01, 0.01),
+             'longitude': -74.0 + rand.uniform(-0.01, 0.01)}
+            for i in range(300)
+        ]
+        # a gym, not a pokestop
+        self.forts.append({'id': 'gym', 'latitude': 40.7, 'longitude': -74.0})
+        self.index = SpatialIndex(self.forts, accept=lambda fort: 'type' in fort)
+        self.position = (40.7012, -74.0034)
+
+    def brute_force(self, position, radius=None, exclude=()):
+        forts = [f for f in self.forts if 'type' in f and f['id'] not in exclude]
+        forts.sort(key=lambda f: distance(position[0], position[1], f['latitude'], f['longitude']))
+        if radius is not None:
+            forts = [f for f in forts if distance(position[0], position[1], f['latitude'], f['longitude']) <= radius]
+        return forts
+
+    def test_nearest(self):
+        self.assertEqual(self.index.nearest(*self.position), self.brute_force(self.position))
+        self.assertEqual(self.index.nearest(self.position[0], self.position[1], k=5), self.brute_force(self.position)[:5])
+
+    def test_within(self):
+        for radius in (38, 150, 1000):
+            self.assertEqual(self.index.within(self.position[0], self.position[1], radius),
+                             self.brute_force(self.position, radius))
+
+    def test_nearest_not_in(self):
+        exclude = set(f['id'] for f in self.brute_force(self.position)[:10])
+        self.assertEqual(self.index.nearest_not_in(self.position[0], self.position[1], exclude),
+                         self.brute_force(self.position, exclude=exclude)[0])
+
+    def test_far_away_position(self):
+        position = (41.5, -73.0)
+        self.assertEqual(self.index.nearest(position[0], position[1], k=3), self.brute_force(position)[:3])
+        self.assertEqual(self.index.within(position[0], position[1], 1000), [])
+
+    def test_update_only_rebuilds_new_lists(self):
+        self.assertFalse(self.index.update(self.forts))
+        self.assertTrue(self.index.update([]))
+        self.assertEqual(self.index.nearest(*self.position), [])
+        self.assertIsNone(self.index.nearest_not_in(self.position[0], self.position[1], ()))
@@ -0,0 +1,16 @@
+import os
+import unittest
+
+from pokemongo_bot import static_data
+from pokemongo_bot.base_dir import _base_dir
+from pokemongo_bot.inventory import Pokemons
+
+
+class StaticDataTest(unittest.TestCase):
+    def test_files_are_parsed_once(self):
+        path = os.path.join(_base_dir, 'data', 'pokemon.json')
+        pokemon_list = static_data.load_json(path)
+
+        self.assertIs(static_data.load_json(path), pokemon_list)
+        # the inventory was built from the same objects
+        self.assertIs(Pokemons.data_for(42)._data, pokemon_list[41])
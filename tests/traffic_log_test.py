@@ -0,0 +1,111 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from pokemongo_bot import clock
+from pokemongo_bot.simulator import LocalServer, cell_id
+from pokemongo_bot.traffic_log import ReplayServer, TrafficRecorder, read_records
+
+CENTER = (40.7680, -73.9820, 8.0)
+
+
+class TestTrafficLog(unittest.TestCase):
+    envelopes = [
+        [('GET_PLAYER', {}), ('GET_INVENTORY', {'last_timestamp_ms': 0})],
+        [('GET_MAP_OBJECTS', {'cell_id': [cell_id(*CENTER[:2])]})],
+        [('GET_INVENTORY', {'last_timestamp_ms': 0})]
+    ]
+
+    def setUp(self):
+        self.clock = clock.VirtualClock(start=1470000000)
+        self.previous = clock.set_clock(self.clock)
+        self.dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        clock.set_clock(self.previous)
+        shutil.rmtree(self.dir)
+
+    def record_session(self, path):
+        # what ApiRequest.call does with a recorder, against the simulator
+        server = LocalServer(seed=1)
+        recorder = TrafficRecorder(path)
+        responses = []
+        for subrequests in self.envelopes:
+            response = server.call(subrequests, CENTER)
+            recorder.record([name for name, _ in subrequests], subrequests, CENTER, response)
+            responses.append(response)
+            clock.sleep(10)
+        recorder.close()
+        return responses
+
+    def test_records_are_appended(self):
+        path = os.path.join(self.dir, 'traffic.jsonl')
+        self.record_session(path)
+        self.record_session(path)
+
+        records = read_records(path)
+        self.assertEqual(len(records), 6)
+        self.assertEqual(records[0]['callers'], ['GET_PLAYER', 'GET_INVENTORY'])
+        self.assertEqual(records[1]['time'], 1470000010)
+        self.assertEqual([r['seq'] for r in records], [1, 2, 3, 1, 2, 3])
+
+    def test_cut_line_ends_the_log(self):
+        path = os.path.join(self.dir, 'traffic.jsonl')
+        self.record_session(path)
+        with open(path, 'ab') as outfile:
+            outfile.write('{"seq":4,"ti')
+
+        self.assertEqual(len(read_records(path)), 3)
+
+    def test_bytes_come_back_as_str(self):
+        path = os.path.join(self.dir, 'traffic.jsonl')
+        recorder = TrafficRecorder(path)
+        response = {'status_code': 1, 'responses': {'GET_MAP_OBJECTS': {'signature': '\xff\x00\x9c', 'name': 'caf\xc3\xa9'}}}
+        recorder.record(['GET_MAP_OBJECTS'], [('GET_MAP_OBJECTS', {})], CENTER, response)
+        recorder.close()
+
+        replayed = read_records(path)[0]['response']['responses']['GET_MAP_OBJECTS']
+        self.assertEqual(replayed['signature'], '\xff\x00\x9c')
+        self.assertIsInstance(replayed['signature'], str)
+        self.assertEqual(replayed['name'], u'caf\xe9')
+
+    def test_replay_in_recorded_order(self):
+        path = os.path.join(self.dir, 'traffic.jsonl')
+        recorded = self.record_session(path) + self.record_session(path)
+
+        clock.set_clock(clock.VirtualClock(start=1470000000))
+        replay = ReplayServer.from_file(path)
+        for response, subrequests in zip(recorded, self.envelopes * 2):
+            self.assertEqual(replay.call(subrequests, CENTER)['responses'], response['responses'])
+
+        self.assertEqual(replay.fallbacks, 0)
+        self.assertEqual(replay.repeated, 0)
+        self.assertTrue(replay.finished)
+
+    def test_replay_by_request_type(self):
+        path = os.path.join(self.dir, 'traffic.jsonl.gz')
+        recorded = self.record_session(path)
+        self.assertEqual(ReplayServer.start_time_of(path), 1470000000)
+
+        clock.set_clock(clock.VirtualClock(start=1470000000))
+        replay = ReplayServer.from_file(path)
+        # batched differently than when recorded
+        first = replay.call([('GET_INVENTORY', {})], CENTER)['responses']['GET_INVENTORY']
+        player = replay.call([('GET_PLAYER', {})], CENTER)['responses']['GET_PLAYER']
+        cells = replay.call([('GET_MAP_OBJECTS', {})], CENTER)['responses']['GET_MAP_OBJECTS']
+        second = replay.call([('GET_INVENTORY', {})], CENTER)['responses']['GET_INVENTORY']
+
+        self.assertEqual(first['inventory_delta'], recorded[0]['responses']['GET_INVENTORY']['inventory_delta'])
+        self.assertEqual(player['player_data']['max_pokemon_storage'], 250)
+        self.assertEqual(len(cells['map_cells']), 1)
+        self.assertEqual(second['inventory_delta']['new_timestamp_ms'], 1470000020000)
+        self.assertEqual(clock.time(), 1470000020)
+        self.assertTrue(replay.finished)
+        # the first recorded envelope was split, the later ones were sent as recorded
+        self.assertEqual(replay.fallbacks, 2)
+
+        # used up, the last response is repeated
+        self.assertEqual(replay.call([('GET_INVENTORY', {})], CENTER)['responses']['GET_INVENTORY'], second)
+        self.assertEqual(replay.repeated, 1)
+        self.assertEqual(replay.call([('RELEASE_POKEMON', {})], CENTER)['responses'], {'RELEASE_POKEMON': {}})
@@ -0,0 +1,88 @@
+import json
+import os
+import shutil
+import stat
+import tempfile
+import unittest
+
+from mock import patch
+
+from pokemongo_bot import clock
+from pokemongo_bot.web_location_writer import WebLocationWriter, write_atomically
+
+CELLS = [{'s2_cell_id': 1, 'forts': [{'id': 'a', 'latitude': 40.7, 'longitude': -74.0}]}]
+
+
+class TestWebLocationWriter(unittest.TestCase):
+    def setUp(self):
+        self.base_dir = tempfile.mkdtemp()
+        os.mkdir(os.path.join(self.base_dir, 'data'))
+        os.mkdir(os.path.join(self.base_dir, 'web'))
+        self.writer = WebLocationWriter(self.base_dir, 'user', interval=2)
+
+    def tearDown(self):
+        shutil.rmtree(self.base_dir)
+
+    def read(self, path):
+        with open(path) as infile:
+            return json.load(infile)
+
+    def test_writes_the_files(self):
+        self.assertEqual(self.writer.write(40.7, -74.0, 10, CELLS, [40.6, -74.1, 0]), 3)
+        self.assertEqual(self.read(self.writer.cells_path), CELLS)
+        self.assertEqual(self.read(self.writer.location_path),
+                         {'lat': 40.7, 'lng': -74.0, 'alt': 10, 'cells': CELLS})
+        self.assertEqual(self.read(self.writer.last_location_path),
+                         {'lat': 40.7, 'lng': -74.0, 'alt': 10, 'start_position': [40.6, -74.1, 0]})
+        self.assertEqual(sorted(os.listdir(os.path.join(self.base_dir, 'data'))),
+                         ['cells-user.json', 'last-location-user.json'])
+
+    def test_only_changed_files_are_written(self):
+        self.writer.write(40.7, -74.0, 10, CELLS, None)
+        self.assertEqual(self.writer.write(40.7, -74.0, 10, CELLS, None), 0)
+        # moving keeps the same cells
+        self.assertEqual(self.writer.write(40.8, -74.0, 10, CELLS, None), 2)
+
+        with patch('pokemongo_bot.web_location_writer.json.dumps', wraps=json.dumps) as dumps:
+            self.writer.write(40.8, -74.0, 10, CELLS, None, cells_key=1)
+            dumps.reset_mock()
+            self.assertEqual(self.writer.write(40.8, -74.0, 10, CELLS, None, cells_key=1), 0)
+            self.assertFalse(dumps.called)
+
+    def test_wait_caps_the_write_rate(self):
+        virtual = clock.VirtualClock(start=100)
+        previous = clock.set_clock(virtual)
+        try:
+            self.writer.write(40.7, -74.0, 10, CELLS, None)
+            clock.sleep(0.5)
+            self.writer.wait()
+            self.assertEqual(virtual.slept, 2)
+
+            clock.sleep(3)
+            self.writer.wait()
+            self.assertEqual(virtual.slept, 5)
+        finally:
+            clock.set_clock(previous)
+
+    @unittest.skipIf(os.name == 'nt', 'no unix permissions')
+    def test_written_files_are_readable_by_others(self):
+        path = os.path.join(self.base_dir, 'web', 'file.json')
+        umask = os.umask(0o022)
+        try:
+            write_atomically(path, '{}')
+        finally:
+            os.umask(umask)
+        self.assertEqual(stat.S_IMODE(os.stat(path).st_mode), 0o644)
+
+        # a rewrite keeps the mode of the previous file
+        os.chmod(path, 0o640)
+        write_atomically(path, '{"a": 1}')
+        self.assertEqual(stat.S_IMODE(os.stat(path).st_mode), 0o640)
+
+    def test_failed_write_keeps_the_previous_file(self):
+        path = os.path.join(self.base_dir, 'data', 'file.json')
+        write_atomically(path, '{}')
+        with patch('pokemongo_bot.web_location_writer.os.rename', side_effect=OSError('full')):
+            self.assertRaises(OSError, write_atomically, path, '{"a": 1}')
+        self.assertEqual(self.read(path), {})
+        self.assertEqual(os.listdir(os.path.join(self.base_dir, 'data')), ['file.json'])